@@ -61,6 +61,10 @@ let Collection = Backbone.Collection.extend({
             opts.data.sort_by = JSON.stringify(data.sort_by);
         }
 
+        if (this.columns) {
+            opts.data.columns = JSON.stringify(this.columns);
+        }
+
         return Backbone.Collection.prototype.fetch.call(this, opts);
     },
 
@@ -79,6 +83,11 @@ let Collection = Backbone.Collection.extend({
             opts.data.filters = JSON.stringify(this.filters)
         }
 
+        // planner estimation in place of the exact count for large results
+        if (options.approximate) {
+            opts.data.approximate = true;
+        }
+
         $.ajax({
             type: "GET",
             url: (_.isFunction(this.url) ? this.url() : this.url) + 'count/',
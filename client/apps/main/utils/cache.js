@@ -148,6 +148,15 @@ Cache.prototype = {
         }
     },
 
+    /**
+     * Invalidate any entries of any categories.
+     */
+    invalidateAll: function() {
+        for (let cacheType in this.data) {
+            this.invalidate(cacheType, '*');
+        }
+    },
+
     /**
      * Register a specific cache fetcher.
      * @param fetcher Valid cache fetcher instance.
@@ -20,6 +20,10 @@ let Messenger = function() {
     this.MAX_ATTEMPTS = 10;
 
     this.COMMAND_CACHE_INVALIDATION = 1;
+    this.COMMAND_CACHE_INVALIDATION_BATCH = 3;
+
+    // version of the last received batch of cache invalidations
+    this.cacheVersion = null;
 };
 
 /**
@@ -82,6 +86,8 @@ Messenger.prototype.connect = function(force) {
 
                 if (data.command === self.COMMAND_CACHE_INVALIDATION) {
                     window.application.main.cache.invalidate(data.data.category, data.data.name);
+                } else if (data.command === self.COMMAND_CACHE_INVALIDATION_BATCH) {
+                    self.invalidate(data.version, data.data);
                 }
             };
 
@@ -115,6 +121,26 @@ Messenger.prototype.connect = function(force) {
     });
 };
 
+/**
+ * Process a batch of cache invalidations. An empty batch gives the current version at connection.
+ * If some versions are missing (disconnected or messenger restarted) any caches are invalidated.
+ * @param version Version of the batch.
+ * @param invalidations Array of category, name and values.
+ */
+Messenger.prototype.invalidate = function(version, invalidations) {
+    let expected = this.cacheVersion !== null ? this.cacheVersion + (invalidations.length ? 1 : 0) : version;
+
+    if (version !== expected) {
+        window.application.main.cache.invalidateAll();
+    } else {
+        for (let i = 0; i < invalidations.length; ++i) {
+            window.application.main.cache.invalidate(invalidations[i].category, invalidations[i].name);
+        }
+    }
+
+    this.cacheVersion = version;
+};
+
 Messenger.prototype.disconnect = function() {
     if (this.socket) {
         delete this.socket;
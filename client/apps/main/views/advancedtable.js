@@ -171,6 +171,9 @@ let View = Marionette.CompositeView.extend({
             }
         }
 
+        // let the server project the results on the displayed columns (same array, kept in sync)
+        this.collection.columns = this.displayedColumns;
+
         this.initialResizeDone = false;
     },
 
@@ -1618,6 +1621,8 @@ let View = Marionette.CompositeView.extend({
         });
 
         // then add others
+        let projected = false;
+
         labels = contextMenu.children('ul.columns-list').children('li.column').children('label');
         $.each(labels, function (i, element) {
             let el = $(element);
@@ -1625,11 +1630,25 @@ let View = Marionette.CompositeView.extend({
 
             if (!el.prop('displayed') && el.children('input').prop('checked')) {
                 self.addColumn(columnName, false);
+
+                if (columnName.startsWith('#') || columnName.startsWith('&')) {
+                    projected = true;
+                }
             }
         });
 
         this.updateColumnsWidth(true);
 
+        // the fetched rows only contains the previously displayed descriptors and synonyms
+        if (projected && this.collection) {
+            this.collection.fetch({
+                reset: true, data: {
+                    sort_by: this.collection.sort_by,
+                    more: Math.max(this.collection.length, 30)
+                }
+            });
+        }
+
         if (this.getUserSettingName()) {
             window.application.updateUserSetting(
                 this.getUserSettingName(),
@@ -19,6 +19,7 @@ from channels import Group
 from django.contrib.auth import get_user_model
 from django.core.signing import TimestampSigner, SignatureExpired
 
+from messenger.invalidation import invalidation_publisher
 from messenger.localsettings import SECRET_KEY
 from messenger.session import session_manager
 
@@ -132,6 +133,9 @@ def ws_connect(message):
 
     message.reply_channel.send({'accept': True})
 
+    # current version of the invalidations, to detect missed ones after a reconnection
+    invalidation_publisher.hello(message.reply_channel)
+
 
 def ws_disconnect(message):
     Group("default").discard(message.reply_channel)
@@ -0,0 +1,130 @@
+# -*- coding: utf-8; -*-
+#
+# @file invalidation.py
+# @brief Coalescing of the cache invalidations
+# @author Frédéric SCHERMA (INRA UMR1095)
+# @date 2018-10-18
+# @copyright Copyright (c) 2018 INRA/CIRAD
+# @license MIT (see LICENSE file)
+# @details The InvalidationBatcher must be kept identical with the server one.
+
+import json
+import threading
+import time
+
+from collections import OrderedDict
+
+from channels import Group
+
+from messenger.commands import COMMAND_CACHE_INVALIDATION_BATCH
+
+
+class InvalidationBatcher(object):
+    """
+    Collect the cache invalidations during a debounce window, merged per category, and send them as a single
+    batch at the end of the window. When a category receives more than threshold names, they are replaced
+    by a single wildcard.
+    """
+
+    def __init__(self, send, window=0.05, threshold=32):
+        """
+        :param send: Callable receiving the list of invalidations dict (category, name, values) of a window.
+        :param window: Debounce window in seconds.
+        :param threshold: Max number of names per category before wildcarding.
+        """
+        self.send = send
+        self.window = window
+        self.threshold = threshold
+
+        self._pending = OrderedDict()
+        self._lock = threading.Lock()
+        self._timer = None
+
+    @staticmethod
+    def _merge_values(current, values):
+        # None means any values
+        if current is None or values is None:
+            return None
+
+        return current + [value for value in values if value not in current]
+
+    def add(self, category, name, values=None):
+        with self._lock:
+            names = self._pending.setdefault(category, OrderedDict())
+
+            if '*' not in names:
+                if name == '*' or (name not in names and len(names) >= self.threshold):
+                    names.clear()
+                    names['*'] = None
+                elif name in names:
+                    names[name] = self._merge_values(names[name], values)
+                else:
+                    names[name] = list(values) if values is not None else None
+
+            if self._timer is None:
+                self._timer = threading.Timer(self.window, self.flush)
+                self._timer.daemon = True
+                self._timer.start()
+
+    def flush(self):
+        with self._lock:
+            pending = self._pending
+            self._pending = OrderedDict()
+
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+
+        invalidations = []
+
+        for category, names in pending.items():
+            for name, values in names.items():
+                invalidations.append({'category': category, 'name': name, 'values': values})
+
+        if invalidations:
+            self.send(invalidations)
+
+
+class VersionedInvalidationPublisher(object):
+    """
+    Publish the batches of invalidations to the web-clients, with a monotonically increasing version number.
+    The version starts from the current time in milliseconds, in way to always increase after a restart of
+    the service, so a web-client can detect missed invalidations after a reconnection.
+    """
+
+    def __init__(self, window=0.05, threshold=32):
+        self.version = int(time.time() * 1000)
+        self._lock = threading.Lock()
+        self.batcher = InvalidationBatcher(self.publish, window, threshold)
+
+    def add(self, category, name, values=None):
+        self.batcher.add(category, name, values)
+
+    def publish(self, invalidations):
+        with self._lock:
+            self.version += 1
+            content = json.dumps({
+                'command': COMMAND_CACHE_INVALIDATION_BATCH,
+                'version': self.version,
+                'data': invalidations
+            })
+
+            # to the group, in order of version
+            Group("default").send({'text': content})
+
+    def hello(self, reply_channel):
+        """
+        Send the current version to a newly connected web-client.
+        """
+        with self._lock:
+            content = json.dumps({
+                'command': COMMAND_CACHE_INVALIDATION_BATCH,
+                'version': self.version,
+                'data': []
+            })
+
+        reply_channel.send({'text': content})
+
+
+# Singleton of the invalidations publisher to the web-clients
+invalidation_publisher = VersionedInvalidationPublisher()
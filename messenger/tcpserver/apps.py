@@ -72,8 +72,9 @@ class CollGateMessengerTCPServer(ApplicationMain):
 
         handled_signals = GracefulInterruptHandler()
 
-        # Create the server
-        server = socketserver.TCPServer((TCP_SERVER_LISTEN, TCP_SERVER_LISTEN_PORT), tcpserver.TCPHandler)
+        # Create the server, one thread per front-end connection
+        server = socketserver.ThreadingTCPServer((TCP_SERVER_LISTEN, TCP_SERVER_LISTEN_PORT), tcpserver.TCPHandler)
+        server.daemon_threads = True
         tcpserver.tcp_server = server
 
         tcpserver.tcp_server_thread = threading.Thread(target=server.serve_forever)
@@ -8,71 +8,31 @@
 # @license MIT (see LICENSE file)
 # @details
 
-import io
-import json
 import logging
-import select
+import selectors
+import socket
 import socketserver
 
 from threading import Lock
-from channels import Group
 
 from messenger.session import session_manager
-from messenger.commands import COMMAND_CACHE_INVALIDATION, COMMAND_AUTH_SESSION, COMMAND_ONLINE, COMMAND_OFFLINE
+from messenger.commands import COMMAND_CACHE_INVALIDATION, COMMAND_SERVER_CACHE_INVALIDATION, \
+    COMMAND_CACHE_INVALIDATION_BATCH, COMMAND_AUTH_SESSION, COMMAND_ONLINE, COMMAND_OFFLINE
+from messenger.framing import FrameBuffer, FrameError, SendBuffer, encode_frame
+from messenger.invalidation import invalidation_publisher
 
 logger = logging.getLogger('collgate-messenger')
 
-
-class RWBuffer:
-
-    def __init__(self):
-        self.read_pos = 0
-        self.write_pos = 0
-        self.buffer = io.BytesIO()
-
-    def write(self, data):
-        self.buffer.write(data)
-        self.write_pos += len(data)
-
-        return self.write_pos - self.read_pos
-
-    def read(self, size):
-        if self.read_pos < self.write_pos:
-            right_pos = min(size + self.read_pos, self.write_pos)
-            data = self.buffer.getbuffer()[self.read_pos:right_pos]
-
-            self.read_pos += len(data)
-            self.buffer.flush()
-
-            return bytes(data)
-        else:
-            return bytes([])
-
-    def peek(self, size):
-        if self.read_pos < self.write_pos:
-            right_pos = min(size + self.read_pos, self.write_pos)
-            data = self.buffer.getbuffer()[self.read_pos:right_pos]
-
-            return bytes(data)
-        else:
-            return bytes([])
-
-    def seek(self, method, size):
-        if method == io.SEEK_CUR:
-            dist = min(size, self.write_pos - self.read_pos)
-            self.read_pos += dist
-
-            return dist
-        else:
-            return 0
-
-    def size(self):
-        return max(0, self.write_pos - self.read_pos)
+# connected front-ends handlers
+handlers = set()
+handlers_lock = Lock()
 
 
 class TCPHandler(socketserver.BaseRequestHandler):
     """
     Connection coming from front-ends (server).
+    The handler waits on a selector for incoming data, for the socket to be writable when there is pending
+    outgoing data, and for a wake-up when a message is queued by another thread.
     """
 
     def setup(self):
@@ -81,108 +41,119 @@ class TCPHandler(socketserver.BaseRequestHandler):
         self.recv_list = []
         self.send_list = []
 
-        self._closed = False
-
-        self.in_rw = RWBuffer()
+        self.in_buffer = FrameBuffer()
+        self.out_buffer = SendBuffer()
 
-        # self.request.setblocking(False)
-        self.request.settimeout(0.1)
-
-        super().setup()
-
-    def read_messages(self):
-        while True:
-            head = self.in_rw.peek(4)
+        # used by the others threads to wake up the selector
+        self._wake_r, self._wake_w = socket.socketpair()
+        self._wake_r.setblocking(False)
+        self._wake_w.setblocking(False)
 
-            if len(head) < 4:
-                return
+        self.request.setblocking(False)
+        self.request.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
 
-            command_type = head[1]
-            message_size = head[2] | (head[3] << 8)
+        with handlers_lock:
+            handlers.add(self)
 
-            # message and is complete
-            if head[0] == 0 and self.in_rw.size() >= message_size:
-                self.in_rw.seek(io.SEEK_CUR, 4)
-                buffer = self.in_rw.read(message_size)
-
-                in_message = json.loads(buffer.decode('utf-8'))
+        super().setup()
 
-                self.lock.acquire()
-                self.recv_list.append((command_type, in_message))
-                self.lock.release()
+    def finish(self):
+        with handlers_lock:
+            handlers.discard(self)
 
-                logger.info("Received: {}".format(in_message))
-            else:
-                break
+        self._wake_r.close()
+        self._wake_w.close()
 
-    def process_incoming(self):
-        while True:
-            try:
-                recv_data = self.request.recv(1024)
-            except OSError as e:
-                break
+        super().finish()
 
-            if len(recv_data) > 0:
-                self.in_rw.write(recv_data)
-            else:
-                self._closed = True
-                break
+    def _wake_up(self):
+        try:
+            self._wake_w.send(b'\0')
+        except OSError:
+            # already pending wake-up or closed
+            pass
 
     def process_outgoing(self):
+        # coalesce any queued messages, in order
         self.lock.acquire()
-        if len(self.send_list):
-            command_type, out_message = self.send_list.pop()
-            self.lock.release()
-
-            # 0 for message start
-            # 1 bytes command type
-            # 2 bytes message size
-            # ... message content
-            buffer = bytes([
-                0,
-                command_type,
-                len(out_message) & 0xff,
-                (len(out_message) >> 8) & 0xff]) + out_message.encode('utf-8')
-
-            self.request.sendall(buffer)
-
-            logger.info("Sent:     {}".format(out_message))
-        else:
-            self.lock.release()
+        outgoing = self.send_list
+        self.send_list = []
+        self.lock.release()
+
+        for frame in outgoing:
+            self.out_buffer.append(frame)
+
+        return self.out_buffer.send_to(self.request)
 
     def handle(self):
-        inout = [self.request]
         self.peername = "%s:%i" % self.request.getpeername()
 
         logger.info("%s client initiated a connection !" % self.peername)
 
-        self.request.settimeout(0.1)
-
-        while True:
-            # peer closed connection
-            if self._closed:
-                logger.info("%s client closed connection !" % self.peername)
-                break
-
-            infds, outfds, errfds = select.select(inout, inout, [], self.request.gettimeout())
+        selector = selectors.DefaultSelector()
+        selector.register(self._wake_r, selectors.EVENT_READ)
+        selector.register(self.request, selectors.EVENT_READ)
+
+        writing = False
+        closed = False
+
+        try:
+            while not closed:
+                done = self.process_outgoing()
+
+                if not done and not writing:
+                    selector.modify(self.request, selectors.EVENT_READ | selectors.EVENT_WRITE)
+                    writing = True
+                elif done and writing:
+                    selector.modify(self.request, selectors.EVENT_READ)
+                    writing = False
+
+                for key, events in selector.select():
+                    if key.fileobj is self._wake_r:
+                        try:
+                            while self._wake_r.recv(4096):
+                                pass
+                        except BlockingIOError:
+                            pass
+
+                    elif events & selectors.EVENT_READ:
+                        try:
+                            count = self.in_buffer.recv_from(self.request)
+                        except BlockingIOError:
+                            continue
+
+                        # peer closed connection
+                        if count == 0:
+                            logger.info("%s client closed connection !" % self.peername)
+                            closed = True
+
+                        # remaining messages
+                        self.read_messages()
+                        self.dispatch()
+        except (OSError, FrameError) as e:
+            logger.error("%s client connection error: %s" % (self.peername, repr(e)))
+        finally:
+            selector.close()
 
-            if len(infds):
-                self.process_incoming()
-
-            self.process_outgoing()
+    def read_messages(self):
+        messages = self.in_buffer.read_messages()
 
-            self.read_messages()
-            self.dispatch()
+        for command_type, in_message in messages:
+            logger.info("Received: {}".format(in_message))
 
-        # remaining messages
-        self.read_messages()
-        self.dispatch()
+        self.lock.acquire()
+        self.recv_list.extend(messages)
+        self.lock.release()
 
     def message(self, command_type, message):
+        frame = encode_frame(command_type, message)
+
         self.lock.acquire()
-        self.send_list.append((command_type, json.dumps(message)))
+        self.send_list.append(frame)
         self.lock.release()
 
+        self._wake_up()
+
     def dispatch(self):
         self.lock.acquire()
         messages = self.recv_list.copy()
@@ -194,19 +165,28 @@ class TCPHandler(socketserver.BaseRequestHandler):
 
         # dispatch to default group cache invalidation commands
         for command_type, message in messages:
-            # dispatch to any connected web-clients
+            # dispatch to any connected web-clients, merged during the debounce window of the publisher
             if command_type == COMMAND_CACHE_INVALIDATION:
-                # multiples commands
-                if "%s__%s" % (message['category'], message['name']) in lookup:
+                invalidation_publisher.add(message['category'], message['name'], message.get('values'))
+
+            if command_type == COMMAND_CACHE_INVALIDATION_BATCH:
+                for invalidation in message['invalidations']:
+                    invalidation_publisher.add(
+                        invalidation['category'], invalidation['name'], invalidation.get('values'))
+
+            # forward to any others connected front-ends, for their local cache
+            if command_type == COMMAND_SERVER_CACHE_INVALIDATION:
+                key = "server:%s__%s" % (message['category'], message['name'])
+                if key in lookup:
                     continue
 
-                lookup.add("%s__%s" % (message['category'], message['name']))
+                lookup.add(key)
 
-                # Add them to the chat group
-                content = json.dumps({'command': command_type, 'data': message})
+                with handlers_lock:
+                    others = [handler for handler in handlers if handler is not self]
 
-                # to the group
-                Group("default").send({'text': content})
+                for handler in others:
+                    handler.message(command_type, message)
 
             # only for messenger service
             if command_type == COMMAND_AUTH_SESSION:
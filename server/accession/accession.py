@@ -24,7 +24,8 @@ from descriptor.describable import DescriptorsBuilder
 from descriptor.models import Layout, Descriptor
 from igdectk.rest.handler import *
 from igdectk.rest.response import HttpResponseRest
-from main.models import Language, EntitySynonymType
+from main.models import Language
+from main.search import search_backend
 from permission.utils import get_permissions_for
 from classification.models import ClassificationEntry
 
@@ -226,7 +227,7 @@ def get_accession_list_count(request):
 
     cq.set_synonym_model(AccessionSynonym)
 
-    count = cq.count()
+    count = cq.count(approximate=request.GET.get('approximate') == 'true', cached=True)
 
     results = {
         'count': count
@@ -235,6 +236,34 @@ def get_accession_list_count(request):
     return HttpResponseRest(request, results)
 
 
+def make_accession_list_items(cq):
+    """
+    Make the items of a list of accessions from the rows of a cursor query, projected on the displayed columns.
+
+    :param cq: CursorQuery on Accession, with the primary classification entry name and rank selected.
+    :return: List of dict
+    """
+    accession_items = []
+
+    for row in cq.rows():
+        accession_items.append({
+            'id': row['id'],
+            'name': row['name'],
+            'code': row['code'],
+            'primary_classification_entry': row['primary_classification_entry_id'],
+            'layout': row['layout_id'],
+            'descriptors': row['descriptors'],
+            'synonyms': row.get('synonyms', {}),
+            'primary_classification_entry_details': {
+                'id': row['primary_classification_entry_id'],
+                'name': row['primary_classification_entry_name'],
+                'rank': row['primary_classification_entry_rank_id'],
+            }
+        })
+
+    return accession_items
+
+
 @RestAccessionAccession.def_auth_request(Method.GET, Format.JSON, perms={
     'accession.list_accession': _("You are not allowed to list the accessions")
 })
@@ -278,46 +307,14 @@ def get_accession_list(request):
 
     cq.set_synonym_model(AccessionSynonym)
 
-    cq.prefetch_related(Prefetch(
-        "synonyms",
-        queryset=AccessionSynonym.objects.all().order_by('synonym_type', 'language')
-    ))
+    cq.project(json.loads(request.GET.get('columns', 'null')))
 
     cq.select_related('primary_classification_entry->name', 'primary_classification_entry->rank')
 
     cq.cursor(cursor, order_by)
     cq.order_by(order_by).limit(limit)
 
-    accession_items = []
-
-    synonym_types = dict(EntitySynonymType.objects.filter(target_model=ContentType.objects.get_for_model(Accession)).values_list('id', 'name'))
-
-    for accession in cq:
-        a = {
-            'id': accession.pk,
-            'name': accession.name,
-            'code': accession.code,
-            'primary_classification_entry': accession.primary_classification_entry_id,
-            'layout': accession.layout_id,
-            'descriptors': accession.descriptors,
-            'synonyms': {},
-            'primary_classification_entry_details': {
-                'id': accession.primary_classification_entry.id,
-                'name': accession.primary_classification_entry.name,
-                'rank': accession.primary_classification_entry.rank_id,
-            }
-        }
-
-        for synonym in accession.synonyms.all():
-            synonym_type_name = synonym_types.get(synonym.synonym_type_id)
-            a['synonyms'][synonym_type_name] = {
-                'id': synonym.id,
-                'name': synonym.name,
-                'synonym_type': synonym.synonym_type_id,
-                'language': synonym.language
-            }
-
-        accession_items.append(a)
+    accession_items = make_accession_list_items(cq)
 
     results = {
         'perms': [],
@@ -409,21 +406,21 @@ def search_accession(request):
         layout = int_arg(filters['layout'])
 
         if name_method == 'ieq':
-            qs = qs.filter(Q(synonyms__name__iexact=filters['name']))
+            qs = qs.filter(search_backend.q('synonyms__name', 'ieq', filters['name']))
         elif name_method == 'icontains':
-            qs = qs.filter(Q(synonyms__name__icontains=filters['name']))
+            qs = qs.filter(search_backend.q('synonyms__name', 'icontains', filters['name']))
 
         qs = qs.filter(Q(layout_id=layout))
     elif 'name' in filters['fields']:
         if name_method == 'ieq':
-            qs = qs.filter(synonyms__name__iexact=filters['name'])
+            qs = qs.filter(search_backend.q('synonyms__name', 'ieq', filters['name']))
         elif name_method == 'icontains':
-            qs = qs.filter(synonyms__name__icontains=filters['name'])
+            qs = qs.filter(search_backend.q('synonyms__name', 'icontains', filters['name']))
     elif 'code' in filters['fields']:
         if name_method == 'ieq':
-            qs = qs.filter(code__iexact=filters['code'])
+            qs = qs.filter(search_backend.q('code', 'ieq', filters['code']))
         elif name_method == 'icontains':
-            qs = qs.filter(code__icontains=filters['code'])
+            qs = qs.filter(search_backend.q('code', 'icontains', filters['code']))
 
     qs = qs.prefetch_related(
         Prefetch(
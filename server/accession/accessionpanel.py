@@ -12,17 +12,17 @@ from descriptor.describable import DescriptorsBuilder
 from django.contrib.contenttypes.models import ContentType
 from descriptor.models import Layout, Descriptor
 from igdectk.rest.handler import *
-from django.db.models import Q, Prefetch
+from django.db.models import Q
 from igdectk.rest.response import HttpResponseRest
 from django.core.exceptions import SuspiciousOperation
 from django.db import transaction, IntegrityError
 from django.shortcuts import get_object_or_404
 from django.utils.translation import ugettext_lazy as _
+from main.search import search_backend
 
-from main.models import EntitySynonymType
 from .models import AccessionPanel, Accession, AccessionSynonym, PanelType
 from .base import RestAccession
-from .accession import RestAccessionId
+from .accession import RestAccessionId, make_accession_list_items
 
 
 class RestAccessionPanel(RestAccession):
@@ -135,7 +135,7 @@ def count_accession_panels(request, acc_id):
         cq.filter(filters)
 
     results = {
-        'count': cq.count()
+        'count': cq.count(approximate=request.GET.get('approximate') == 'true', cached=True)
     }
 
     return HttpResponseRest(request, results)
@@ -256,16 +256,15 @@ def create_panel(request):
 
             if isinstance(selection, bool):
                 if selection is True:
-                    acc_panel.accessions.add(*cq)
-                    acc_panel.count = cq.count()
+                    acc_panel.count = cq.m2m_add(AccessionPanel.accessions, acc_panel.pk)
 
             elif selection['op'] == 'in':
-                acc_panel.accessions.add(*cq.filter(id__in=selection['value']))
-                acc_panel.count = cq.filter(id__in=selection['value']).count()
+                acc_panel.count = cq.filter(id__in=selection['value']).m2m_add(
+                    AccessionPanel.accessions, acc_panel.pk)
 
             elif selection['op'] == 'notin':
-                acc_panel.accessions.add(*cq.filter(id__notin=selection['value']))
-                acc_panel.count = cq.filter(id__notin=selection['value']).count()
+                acc_panel.count = cq.filter(id__notin=selection['value']).m2m_add(
+                    AccessionPanel.accessions, acc_panel.pk)
 
     except IntegrityError as e:
         Descriptor.integrity_except(AccessionPanel, e)
@@ -310,7 +309,7 @@ def get_panel_list_count(request):
         filters = json.loads(request.GET['filters'])
         cq.filter(filters)
 
-    count = cq.count()
+    count = cq.count(approximate=request.GET.get('approximate') == 'true', cached=True)
 
     results = {
         'count': count
@@ -518,7 +517,7 @@ def get_panel_id_accession_list_count(request, panel_id):
     cq.inner_join(AccessionPanel, accessionpanel=int(panel_id))
 
     results = {
-        'count': cq.count()
+        'count': cq.count(approximate=request.GET.get('approximate') == 'true', cached=True)
     }
 
     return HttpResponseRest(request, results)
@@ -576,9 +575,7 @@ def get_panel_id_accession_list(request, panel_id):
 
     cq.set_synonym_model(AccessionSynonym)
 
-    cq.prefetch_related(Prefetch(
-        "synonyms",
-        queryset=AccessionSynonym.objects.all().order_by('synonym_type', 'language')))
+    cq.project(json.loads(request.GET.get('columns', 'null')))
 
     cq.select_related('primary_classification_entry->name', 'primary_classification_entry->rank')
 
@@ -586,37 +583,7 @@ def get_panel_id_accession_list(request, panel_id):
     cq.inner_join(AccessionPanel, accessionpanel=int(panel_id))
     cq.order_by(order_by).limit(limit)
 
-    accession_items = []
-
-    synonym_types = dict(
-        EntitySynonymType.objects.filter(target_model=ContentType.objects.get_for_model(Accession)).values_list('id', 'name'))
-
-    for accession in cq:
-        a = {
-            'id': accession.pk,
-            'name': accession.name,
-            'code': accession.code,
-            'primary_classification_entry': accession.primary_classification_entry_id,
-            'layout': accession.layout_id,
-            'descriptors': accession.descriptors,
-            'synonyms': {},
-            'primary_classification_entry_details': {
-                'id': accession.primary_classification_entry_id,
-                'name': accession.primary_classification_entry_name,
-                'rank': accession.primary_classification_entry_rank_id,
-            }
-        }
-
-        for synonym in accession.synonyms.all():
-            synonym_type_name = synonym_types.get(synonym.synonym_type_id)
-            a['synonyms'][synonym_type_name] = {
-                'id': synonym.id,
-                'name': synonym.name,
-                'synonym_type': synonym.synonym_type_id,
-                'language': synonym.language
-            }
-
-        accession_items.append(a)
+    accession_items = make_accession_list_items(cq)
 
     results = {
         'perms': [],
@@ -715,13 +682,13 @@ def modify_panel_accessions(request, panel_id):
             with transaction.atomic():
                 if isinstance(selection, bool):
                     if selection is True:
-                        acc_panel.accessions.remove(*cq)
+                        cq.m2m_remove(AccessionPanel.accessions, acc_panel.pk)
 
                 elif selection['op'] == 'in':
-                    acc_panel.accessions.remove(*cq.filter(id__in=selection['value']))
+                    cq.filter(id__in=selection['value']).m2m_remove(AccessionPanel.accessions, acc_panel.pk)
 
                 elif selection['op'] == 'notin':
-                    acc_panel.accessions.remove(*cq.filter(id__notin=selection['value']))
+                    cq.filter(id__notin=selection['value']).m2m_remove(AccessionPanel.accessions, acc_panel.pk)
 
                 acc_panel.save()
 
@@ -733,13 +700,13 @@ def modify_panel_accessions(request, panel_id):
             with transaction.atomic():
                 if isinstance(selection, bool):
                     if selection is True:
-                        acc_panel.accessions.add(*cq)
+                        cq.m2m_add(AccessionPanel.accessions, acc_panel.pk)
 
                 elif selection['op'] == 'in':
-                    acc_panel.accessions.add(*cq.filter(id__in=selection['value']))
+                    cq.filter(id__in=selection['value']).m2m_add(AccessionPanel.accessions, acc_panel.pk)
 
                 elif selection['op'] == 'notin':
-                    acc_panel.accessions.add(*cq.filter(id__notin=selection['value']))
+                    cq.filter(id__notin=selection['value']).m2m_add(AccessionPanel.accessions, acc_panel.pk)
 
                 acc_panel.save()
 
@@ -776,16 +743,16 @@ def search_accession_panel(request):
         layout = int_arg(filters['layout'])
 
         if name_method == 'ieq':
-            qs = qs.filter(Q(name__iexact=filters['name']))
+            qs = qs.filter(search_backend.q('name', 'ieq', filters['name']))
         elif name_method == 'icontains':
-            qs = qs.filter(Q(name__icontains=filters['name']))
+            qs = qs.filter(search_backend.q('name', 'icontains', filters['name']))
 
         qs = qs.filter(Q(layout_id=layout))
     elif 'name' in filters['fields']:
         if name_method == 'ieq':
-            qs = qs.filter(name__iexact=filters['name'])
+            qs = qs.filter(search_backend.q('name', 'ieq', filters['name']))
         elif name_method == 'icontains':
-            qs = qs.filter(name__icontains=filters['name'])
+            qs = qs.filter(search_backend.q('name', 'icontains', filters['name']))
 
     qs = qs.order_by('name').distinct()[:limit]
 
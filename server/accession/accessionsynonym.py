@@ -17,6 +17,7 @@ from accession.models import AccessionSynonym, Accession
 from igdectk.rest.handler import *
 from igdectk.rest.response import HttpResponseRest
 from main.models import EntitySynonymType
+from main.search import search_backend
 from .accession import RestAccessionAccession, RestAccessionId
 
 
@@ -69,9 +70,9 @@ def search_accession_synonyms(request):
         name_method = filters.get('method', 'ieq')
 
         if name_method == 'ieq':
-            qs = qs.filter(name__iexact=filters['name'])
+            qs = qs.filter(search_backend.q('name', 'ieq', filters['name']))
         elif name_method == 'icontains':
-            qs = qs.filter(name__icontains=filters['name'])
+            qs = qs.filter(search_backend.q('name', 'icontains', filters['name']))
 
     if 'synonym_type' in filters['fields']:
         st_method = filters.get('synonym_type_method', 'eq')
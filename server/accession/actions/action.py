@@ -535,7 +535,10 @@ def download_action_id_content(request, act_id):
 
     response = StreamingHttpResponse(data, content_type=exporter.mime_type)
     response['Content-Disposition'] = 'attachment; filename="' + file_name + '"'
-    response['Content-Length'] = exporter.size
+
+    # unknown for a streamed content
+    if exporter.size is not None:
+        response['Content-Length'] = exporter.size
 
     return response
 
@@ -651,14 +654,24 @@ def get_action_list_for_entity_id_count(request, ent_id, content_type_name):
 def get_action_id_data_for_step(request, act_id, step_idx, type_num):
     action = get_object_or_404(Action, pk=int(act_id))
 
-    # any elements of the array are returnedZ
-    action_data = get_object_or_404(ActionData, action=action, step_index=step_idx, type=ActionDataType(type_num).value)
+    results_per_page = int_arg(request.GET.get('more', ActionData.CHUNK_SIZE))
+    cursor = json.loads(request.GET.get('cursor', 'null'))
+    limit = min(results_per_page, ActionData.CHUNK_SIZE)
+
+    action_data = get_object_or_404(
+        ActionData, action=action, step_index=int(step_idx), data_type=ActionDataType(int(type_num)).value)
+
+    # a page of elements of the array, the cursor is the position of the last element
+    page = action_data.page(cursor, limit)
 
     results = {
         'action': action.id,
         'step': action_data.step_index,
-        'data': action_data.data,
-        'type': action_data.data_type
+        'data': [entity_id for position, entity_id in page],
+        'type': action_data.data_type,
+        'size': action_data.size,
+        'cursor': cursor,
+        'next': page[-1][0] if len(page) == limit else None
     }
 
     return HttpResponseRest(request, results)
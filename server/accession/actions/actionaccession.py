@@ -10,16 +10,14 @@
 
 import json
 
-from django.contrib.contenttypes.models import ContentType
 from django.core.exceptions import SuspiciousOperation, PermissionDenied
-from django.db.models import Prefetch
 from django.shortcuts import get_object_or_404
 from django.utils.translation import ugettext_lazy as _
 
+from accession.accession import make_accession_list_items
 from accession.actions.actioncontroller import ActionController
 from accession.models import Accession, AccessionSynonym, Action, ActionData, ActionDataType, AccessionPanel
 from igdectk.rest.response import HttpResponseRest
-from main.models import EntitySynonymType
 
 from .action import RestActionIdTodo, RestActionIdDone
 
@@ -98,7 +96,7 @@ def get_action_id_todo_accession_list_count(request, act_id):
     cq.inner_join(AccessionPanel, accessionpanel=int(panel_id))
 
     results = {
-        'count': cq.count()
+        'count': cq.count(approximate=request.GET.get('approximate') == 'true', cached=True)
     }
 
     return HttpResponseRest(request, results)
@@ -162,8 +160,7 @@ def get_action_id_accession_list(request, act_id):
 
     cq.set_synonym_model(AccessionSynonym)
 
-    cq.prefetch_related(Prefetch("synonyms", queryset=AccessionSynonym.objects.all().order_by(
-        'synonym_type', 'language')))
+    cq.project(json.loads(request.GET.get('columns', 'null')))
 
     cq.select_related('primary_classification_entry->name', 'primary_classification_entry->rank')
 
@@ -171,38 +168,7 @@ def get_action_id_accession_list(request, act_id):
     cq.inner_join(AccessionPanel, accessionpanel=int(panel_id))
     cq.order_by(order_by).limit(limit)
 
-    accession_items = []
-
-    synonym_types = dict(
-        EntitySynonymType.objects.filter(
-            target_model=ContentType.objects.get_for_model(Accession)).values_list('id', 'name'))
-
-    for accession in cq:
-        a = {
-            'id': accession.pk,
-            'name': accession.name,
-            'code': accession.code,
-            'primary_classification_entry': accession.primary_classification_entry_id,
-            'layout': accession.layout_id,
-            'descriptors': accession.descriptors,
-            'synonyms': {},
-            'primary_classification_entry_details': {
-                'id': accession.primary_classification_entry_id,
-                'name': accession.primary_classification_entry_name,
-                'rank': accession.primary_classification_entry_rank_id,
-            }
-        }
-
-        for synonym in accession.synonyms.all():
-            synonym_type_name = synonym_types.get(synonym.synonym_type_id)
-            a['synonyms'][synonym_type_name] = {
-                'id': synonym.id,
-                'name': synonym.name,
-                'synonym_type': synonym.synonym_type_id,
-                'language': synonym.language
-            }
-
-        accession_items.append(a)
+    accession_items = make_accession_list_items(cq)
 
     results = {
         'perms': [],
@@ -265,7 +231,7 @@ def get_action_id_done_accession_list_count(request, act_id):
     cq.inner_join(AccessionPanel, accessionpanel=int(panel_id))
 
     results = {
-        'count': cq.count()
+        'count': cq.count(approximate=request.GET.get('approximate') == 'true', cached=True)
     }
 
     return HttpResponseRest(request, results)
@@ -329,8 +295,7 @@ def get_action_id_accession_list(request, act_id):
 
     cq.set_synonym_model(AccessionSynonym)
 
-    cq.prefetch_related(Prefetch("synonyms", queryset=AccessionSynonym.objects.all().order_by(
-        'synonym_type', 'language')))
+    cq.project(json.loads(request.GET.get('columns', 'null')))
 
     cq.select_related('primary_classification_entry->name', 'primary_classification_entry->rank')
 
@@ -338,38 +303,7 @@ def get_action_id_accession_list(request, act_id):
     cq.inner_join(AccessionPanel, accessionpanel=int(panel_id))
     cq.order_by(order_by).limit(limit)
 
-    accession_items = []
-
-    synonym_types = dict(
-        EntitySynonymType.objects.filter(
-            target_model=ContentType.objects.get_for_model(Accession)).values_list('id', 'name'))
-
-    for accession in cq:
-        a = {
-            'id': accession.pk,
-            'name': accession.name,
-            'code': accession.code,
-            'primary_classification_entry': accession.primary_classification_entry_id,
-            'layout': accession.layout_id,
-            'descriptors': accession.descriptors,
-            'synonyms': {},
-            'primary_classification_entry_details': {
-                'id': accession.primary_classification_entry_id,
-                'name': accession.primary_classification_entry_name,
-                'rank': accession.primary_classification_entry_rank_id,
-            }
-        }
-
-        for synonym in accession.synonyms.all():
-            synonym_type_name = synonym_types.get(synonym.synonym_type_id)
-            a['synonyms'][synonym_type_name] = {
-                'id': synonym.id,
-                'name': synonym.name,
-                'synonym_type': synonym.synonym_type_id,
-                'language': synonym.language
-            }
-
-        accession_items.append(a)
+    accession_items = make_accession_list_items(cq)
 
     results = {
         'perms': [],
@@ -81,7 +81,7 @@ def get_action_id_todo_batch_list_count(request, act_id):
     )
 
     results = {
-        'count': cq.count()
+        'count': cq.count(approximate=request.GET.get('approximate') == 'true', cached=True)
     }
 
     return HttpResponseRest(request, results)
@@ -201,7 +201,7 @@ def get_action_id_done_batch_list_count(request, act_id):
     )
 
     results = {
-        'count': cq.count()
+        'count': cq.count(approximate=request.GET.get('approximate') == 'true', cached=True)
     }
 
     return HttpResponseRest(request, results)
@@ -211,13 +211,13 @@ class ActionController(object):
         action_data.action = self.action
         action_data.data_type = ActionDataType.INPUT.value
         action_data.step_index = step_index
-        action_data.data = validated_data or []   # never null
 
         try:
             # finally save
             with transaction.atomic():
                 self.action.save()
                 action_data.save()
+                action_data.append(validated_data or [])
 
         except IntegrityError as e:
             raise ActionError(e)
@@ -253,29 +253,28 @@ class ActionController(object):
 
         # current step data set
         try:
-            input_data_array = ActionData.objects.get(
+            input_action_data = ActionData.objects.get(
                 action=self.action,
                 step_index=step_index,
-                data_type=ActionDataType.INPUT).data
+                data_type=ActionDataType.INPUT)
         except ActionData.DoesNotExist:
-            input_data_array = None
+            input_action_data = None
 
         if step_index > 0:
-            # output of the previous state if not initial step
+            # output of the previous state if not initial step (read by chunks if necessary)
             try:
-                prev_output_array = ActionData.objects.get(
+                prev_output_data = ActionData.objects.get(
                                         action=self.action,
                                         step_index=step_index-1,
-                                        data_type=ActionDataType.OUTPUT).data
+                                        data_type=ActionDataType.OUTPUT)
             except ActionData.DoesNotExist:
-                prev_output_array = None
+                prev_output_data = None
         else:
-            prev_output_array = None
+            prev_output_data = None
 
         # check if element(s) to process are included into the input data array
-        for elt in data:
-            if elt not in input_data_array:
-                raise ActionError("Element(s) not allowed into the step")
+        if input_action_data is None or not input_action_data.contains_all(data):
+            raise ActionError("Element(s) not allowed into the step")
 
         # @todo could need to be adapted
         to_process_data_array = data
@@ -288,7 +287,7 @@ class ActionController(object):
                     self.action,
                     step_format,
                     action_step,
-                    prev_output_array,
+                    prev_output_data,
                     to_process_data_array)
 
                 # first time create the action data
@@ -302,15 +301,15 @@ class ActionController(object):
                     action_data.action = self.action
                     action_data.data_type = ActionDataType.OUTPUT.value
                     action_data.step_index = step_index
+                    action_data.save()
 
                 # aggregate the results
-                action_data.data += output_data
+                self.append_output(action_data, output_data)
 
                 # and one more element
                 action_step['progression'][0] += len(action_step_format.accept_format)
 
                 self.action.save()
-                action_data.save()
 
                 # and add the related refs
                 self.update_related_entities(step_index, output_data)
@@ -341,23 +340,23 @@ class ActionController(object):
         if action_step_state != ActionController.STEP_SETUP:
             raise ActionError("Current action step state must be setup")
 
-        # current step data set
+        # current step data set (read by chunks if necessary)
         try:
-            data_array = ActionData.objects.get(
+            input_data = ActionData.objects.get(
                 action=self.action,
                 step_index=step_index,
-                data_type=ActionDataType.INPUT).data
+                data_type=ActionDataType.INPUT)
         except ActionData.DoesNotExist:
-            data_array = None
+            input_data = None
 
         if step_index > 0:
             # output of the previous state if not initial step
-            prev_output_array = ActionData.objects.get(
+            prev_output_data = ActionData.objects.get(
                 action=self.action,
                 step_index=step_index-1,
-                data_type=ActionDataType.OUTPUT).data
+                data_type=ActionDataType.OUTPUT)
         else:
-            prev_output_array = None
+            prev_output_data = None
 
         # for iterative or user type step set the flag to process and returns
         if (action_step_format.type == ActionStepFormat.TYPE_ITERATIVE or
@@ -369,14 +368,13 @@ class ActionController(object):
                         self,
                         step_format,
                         action_step,
-                        prev_output_array,
-                        data_array)
+                        prev_output_data,
+                        input_data)
 
                     action_data = ActionData()
                     action_data.action = self.action
                     action_data.data_type = ActionDataType.OUTPUT.value
-                    action_data.step_index = step_index
-                    action_data.data = []  # empty array initially
+                    action_data.step_index = step_index  # empty array initially
 
                     # wait for iterative processing and a finalization
                     action_step['state'] = ActionController.STEP_PROCESS
@@ -396,14 +394,13 @@ class ActionController(object):
                         self,
                         step_format,
                         action_step,
-                        prev_output_array,
-                        data_array)
+                        prev_output_data,
+                        input_data)
 
                     action_data = ActionData()
                     action_data.action = self.action
                     action_data.data_type = ActionDataType.OUTPUT.value
                     action_data.step_index = step_index
-                    action_data.data = output_data
 
                     # auto finalize
                     action_step['state'] = ActionController.STEP_DONE
@@ -416,6 +413,7 @@ class ActionController(object):
 
                     self.action.save()
                     action_data.save()
+                    self.append_output(action_data, output_data)
 
                     # and add the related refs
                     self.update_related_entities(step_index, output_data)
@@ -500,16 +498,35 @@ class ActionController(object):
         try:
             with transaction.atomic():
                 self.action.save()
+                action_data.clear()
                 action_data.delete()
         except IntegrityError as e:
             raise ActionError(e)
 
+    def append_output(self, action_data, output_data):
+        """
+        Append the output of a step format to the output action data.
+
+        :param action_data: Output ActionData of the step.
+        :param output_data: List of elements or ActionData (copied using SQL).
+        """
+        if isinstance(output_data, ActionData):
+            action_data.append_data(output_data)
+        else:
+            action_data.append(output_data)
+
     def update_related_entities(self, step_index, data_array):
         """
         After processing a step, the related table of entities must be updated to easily lookup for which entities
         an action is related to.
+
+        :param data_array: List of elements or ActionData (read by chunks).
         """
-        if not data_array:
+        if isinstance(data_array, ActionData):
+            chunks = data_array.iterate()
+        elif data_array:
+            chunks = (data_array,)
+        else:
             return
 
         action_steps = self.action.data.get('steps')
@@ -534,12 +551,13 @@ class ActionController(object):
         step_format = action_type_steps[step_index]
         action_step_format = ActionStepFormatManager.get(step_format['type'])
 
-        missing = []
+        for chunk in chunks:
+            missing = []
 
-        self.get_missing_entities(data_array, action_step_format.data_format, missing)
+            self.get_missing_entities(chunk, action_step_format.data_format, missing)
 
-        # now for missing entities bulk create them
-        ActionToEntity.objects.bulk_create(missing)
+            # now for missing entities bulk create them
+            ActionToEntity.objects.bulk_create(missing)
 
     def get_missing_entities(self, array, array_format, results):
         # initiates the types
@@ -598,9 +616,9 @@ class ActionController(object):
                     step_index=step_index,
                     data_type=ActionDataType.OUTPUT.value).exists()
 
-    def get_step_data(self, step_index):
+    def get_step_action_data(self, step_index):
         """
-        Get the data for a particular step index.
+        Get the output action data model for a particular step index, to read its data by chunks.
         """
         action_steps = self.action.data.get('steps')
         if not action_steps:
@@ -624,7 +642,7 @@ class ActionController(object):
         except ActionData.DoesNotExist:
             raise ActionError("Action data does not exists")
 
-        return action_data.data
+        return action_data
 
     def get_step_data_format(self, step_index):
         """
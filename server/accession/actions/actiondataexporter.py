@@ -9,18 +9,31 @@
 # @details
 
 import io
+import tempfile
 
 from django.utils.translation import ugettext_lazy as _
-from openpyxl import Workbook, load_workbook
-from openpyxl.writer.excel import save_virtual_workbook
+from openpyxl import Workbook
 
 from accession.actions.actionstepformat import ActionStepFormat
-from accession.models import Accession, Batch, ActionData, ActionDataType
+from accession.models import Accession, Batch, ActionData
 from descriptor.models import Descriptor
 
 
 class ActionDataExporter(object):
 
+    # size of the chunks read from the XLSX file
+    FILE_CHUNK_SIZE = 64 * 1024
+
+    # maximal size of the XLSX file kept in memory before to be rolled over to disk
+    SPOOL_MAX_SIZE = 4 * 1024 * 1024
+
+    # model of the entities per action IO type
+    MODELS = {
+        ActionStepFormat.IO_ACCESSION_ID: Accession,
+        ActionStepFormat.IO_BATCH_ID: Batch,
+        ActionStepFormat.IO_DESCRIPTOR: Descriptor
+    }
+
     def __init__(self, action_controller, step_index):
         self._action_controller = action_controller
         self._step_index = step_index
@@ -43,118 +56,72 @@ class ActionDataExporter(object):
             else:
                 pass
 
-    def export_data_as_csv(self):
-        data = self._action_controller.get_step_data(self._step_index)
+    def _rows(self):
+        """
+        Generator of the rows of the data of the step. The data array is read by chunks, and the entities of each
+        chunk are fetched at once.
+        """
+        action_data = self._action_controller.get_step_action_data(self._step_index)
         data_format = self._action_controller.get_step_data_format(self._step_index)
 
-        output = io.BytesIO()
-        header = ','.join(self._columns) + '\n'
-        output.write(header.encode('utf-8'))
+        # a row is a group of consecutive elements, one per column of the format
+        width = len(data_format)
 
-        cols = [[] for x in range(0, len(data_format))]
+        for chunk in action_data.iterate(ActionData.CHUNK_SIZE * width):
+            entities = {}
 
-        if len(data_format) == 1:
-            # single column is direct
-            if data_format[0] == ActionStepFormat.IO_ACCESSION_ID:
-                cols[0] = Accession.objects.filter(id__in=data).iterator()
-            elif data_format[0] == ActionStepFormat.IO_BATCH_ID:
-                cols[0] = Batch.objects.filter(id__in=data).iterator()
-            elif data_format[0] == ActionStepFormat.IO_DESCRIPTOR:
-                cols[0] = Descriptor.objects.filter(id__in=data).iterator()
-            else:
-                cols[0] = None
-        else:
-            # multiple columns, sub-array
-            for f in data_format:
-                if f == ActionStepFormat.IO_ACCESSION_ID:
-                    cols[f] = Accession.objects.filter(id__in=data[f]).iterator()
-                elif f == ActionStepFormat.IO_BATCH_ID:
-                    cols[f] = Batch.objects.filter(id__in=data[f]).iterator()
-                elif f == ActionStepFormat.IO_DESCRIPTOR:
-                    cols[f] = Descriptor.objects.filter(id__in=data[f]).iterator()
-                else:
-                    cols[f] = None
-
-        num_rows = len(data)
-        for x in range(0, num_rows):
-            row_content = []
-
-            for f in data_format:
-                if f == ActionStepFormat.IO_ACCESSION_ID:
-                    entity = next(cols[f])
-                    row_content += [entity.name, str(entity.id)]
-                elif f == ActionStepFormat.IO_BATCH_ID:
-                    entity = next(cols[f])
-                    row_content += [entity.name, str(entity.id)]
-                elif f == ActionStepFormat.IO_DESCRIPTOR:
-                    entity = next(cols[f])
-                    row_content += [entity.name, str(entity.id)]
-                else:
-                    row_content += [""]
-
-                output.write((','.join(row_content) + '\n').encode('utf-8'))
+            for col, f in enumerate(data_format):
+                model = self.MODELS.get(f)
+                if model is not None:
+                    entities.setdefault(f, {}).update(model.objects.in_bulk(chunk[col::width]))
 
-        self._size = output.tell()
-        output.seek(0, io.SEEK_SET)
+            for x in range(0, len(chunk) - width + 1, width):
+                row_content = []
+
+                for col, f in enumerate(data_format):
+                    entity = entities.get(f, {}).get(chunk[x + col])
+
+                    if entity is not None:
+                        row_content += [entity.name, str(entity.id)]
+                    else:
+                        row_content += [""]
+
+                yield row_content
+
+    def _csv_content(self):
+        yield (','.join(self._columns) + '\n').encode('utf-8')
+
+        for row_content in self._rows():
+            yield (','.join(row_content) + '\n').encode('utf-8')
+
+    def export_data_as_csv(self):
+        """
+        Streamed CSV content, the size is unknown.
+        """
+        self._size = None
 
         self._mime_type = 'text/csv'
         self._file_ext = ".csv"
 
-        return output
+        return self._csv_content()
 
     def export_data_as_xslx(self):
-        data = self._action_controller.get_step_data(self._step_index)
-        data_format = self._action_controller.get_step_data_format(self._step_index)
-
-        output = io.BytesIO()
+        """
+        XLSX content. The workbook is written in write-only mode, and saved into a spooled temporary file,
+        rolled over to disk when it grows.
+        :return: Generator of chunks of the XLSX file.
+        """
+        output = tempfile.SpooledTemporaryFile(max_size=self.SPOOL_MAX_SIZE)
 
         wb = Workbook(write_only=True)
         ws = wb.create_sheet()
 
         ws.append(self._columns)
 
-        cols = [[] for x in range(0, len(data_format))]
+        for row_content in self._rows():
+            ws.append(row_content)
 
-        if len(data_format) == 1:
-            if data_format[0] == ActionStepFormat.IO_ACCESSION_ID:
-                cols[0] = Accession.objects.filter(id__in=data).iterator()
-            elif data_format[0] == ActionStepFormat.IO_BATCH_ID:
-                cols[0] = Batch.objects.filter(id__in=data).iterator()
-            elif data_format[0] == ActionStepFormat.IO_DESCRIPTOR:
-                cols[0] = Descriptor.objects.filter(id__in=data).iterator()
-            else:
-                cols[0] = None
-        else:
-            for f in data_format:
-                if f == ActionStepFormat.IO_ACCESSION_ID:
-                    cols[f] = Accession.objects.filter(id__in=data[f]).iterator()
-                elif f == ActionStepFormat.IO_BATCH_ID:
-                    cols[f] = Batch.objects.filter(id__in=data[f]).iterator()
-                elif f == ActionStepFormat.IO_DESCRIPTOR:
-                    cols[f] = Descriptor.objects.filter(id__in=data[f]).iterator()
-                else:
-                    cols[f] = None
-
-        num_rows = len(data)
-        for x in range(0, num_rows):
-            row_content = []
-
-            for f in data_format:
-                if f == ActionStepFormat.IO_ACCESSION_ID:
-                    entity = next(cols[f])
-                    row_content += [entity.name, str(entity.id)]
-                elif f == ActionStepFormat.IO_BATCH_ID:
-                    entity = next(cols[f])
-                    row_content += [entity.name, str(entity.id)]
-                elif f == ActionStepFormat.IO_DESCRIPTOR:
-                    entity = next(cols[f])
-                    row_content += [entity.name, str(entity.id)]
-                else:
-                    row_content += [""]
-
-                ws.append(row_content)
-
-        output.write(save_virtual_workbook(wb))
+        wb.save(output)
 
         self._size = output.tell()
         output.seek(0, io.SEEK_SET)
@@ -162,7 +129,18 @@ class ActionDataExporter(object):
         self._mime_type = 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
         self._file_ext = ".xlsx"
 
-        return output
+        return self._file_chunks(output)
+
+    def _file_chunks(self, output):
+        try:
+            while True:
+                chunk = output.read(self.FILE_CHUNK_SIZE)
+                if not chunk:
+                    break
+
+                yield chunk
+        finally:
+            output.close()
 
     @property
     def size(self):
@@ -13,6 +13,8 @@ from django.utils.translation import ugettext_lazy as _, pgettext_lazy
 
 from accession.models import Accession, Batch, AccessionPanel, PanelType
 from accession.namebuilder import NameBuilderManager
+from audit.models import entities_bulk_created
+from main.cursor import cursor_query_count_cache
 
 
 class ActionError(BaseException):
@@ -112,6 +114,22 @@ class ActionStepFormat(object):
 
         return constants
 
+    def producers_naming_constants(self, name_builder, producers):
+        """
+        List of the naming constants of each producer, computed once per step.
+        """
+        return [self.naming_constants(name_builder.num_constants, producer['naming_options'])
+                for producer in producers]
+
+    def batch_layout(self, action_controller, accession, batch_layouts):
+        """
+        Batch layout of an accession, memoized per accession layout into batch_layouts.
+        """
+        if accession.layout_id not in batch_layouts:
+            batch_layouts[accession.layout_id] = action_controller.batch_layout(accession)
+
+        return batch_layouts[accession.layout_id]
+
     def data(self, action, default=None):
         """
         Returns the data array of the previous step to uses as input of the current.
@@ -136,12 +154,13 @@ class ActionStepFormat(object):
     def process(self, action_controller, step_format, step_data, prev_output_data, input_data):
         """
         Process the specialized action step to the given action, using input array,
-        and complete the step data structure.
+        and complete the step data structure. Returns the list of output elements, or an ActionData
+        whose elements are copied as output.
         :param action_controller: Action controller.
         :param step_format: Current step format.
         :param step_data: Initialized step data structure to be filled during process.
-        :param prev_output_data: Data generated at the previous step or None
-        :param input_data Input data of the current step or None
+        :param prev_output_data: ActionData generated at the previous step or None (read by chunks)
+        :param input_data ActionData input of the current step or None (read by chunks)
         :return:
         """
         return []
@@ -152,8 +171,8 @@ class ActionStepFormat(object):
         :param action_controller: Action controller.
         :param step_format: Current step format.
         :param step_data: Initialized step data structure to be filled during process.
-        :param prev_output_data: Data generated at the previous step or None
-        :param input_data Input data of the current step or None
+        :param prev_output_data: ActionData generated at the previous step or None (read by chunks)
+        :param input_data ActionData input of the current step or None (read by chunks)
         :return:
         """
         return
@@ -175,8 +194,8 @@ class ActionStepFormat(object):
         :param action_controller: Action controller.
         :param step_format: Current step format.
         :param step_data: Initialized step data structure to be filled during process.
-        :param prev_output_data: Data generated at the previous step or None
-        :param input_data Input data of the current step or None
+        :param prev_output_data: ActionData generated at the previous step or None (read by chunks)
+        :param input_data ActionData input of the current step or None (read by chunks)
         :param element Unique element to process at once
         :return:
         """
@@ -331,38 +350,54 @@ class ActionStepAccessionConsumerBatchProducer(ActionStepFormat):
     def process(self, action_controller, step_format, step_data, prev_output_data, input_data):
         name_builder = NameBuilderManager.get(NameBuilderManager.GLOBAL_BATCH)
 
-        accessions = Accession.objects.filter(id__in=prev_output_data)
         producers = step_format['producers']
 
         # find related descriptors
         descriptors = {}
 
-        batches = []
+        naming_constants = self.producers_naming_constants(name_builder, producers)
+        batch_layouts = {}
+
+        output = []
 
-        for accession in accessions:
-            batch_layout = action_controller.batch_layout(accession)
+        # the accessions of the previous step by chunks
+        for accession_ids in prev_output_data.iterate():
+            accessions = list(Accession.objects.filter(id__in=accession_ids).select_related('layout'))
 
-            for producer in producers:
-                naming_constants = self.naming_constants(
-                    name_builder.num_constants,
-                    producer['naming_options'])
+            batches = []
+            naming_variables = []
 
-                batch = Batch()
-                batch.content_type = batch._get_content_type()  # because save method is not used in bulk
-                batch.name = name_builder.pick(self.naming_variables(accession), naming_constants)
-                batch.layout = batch_layout
-                batch.accession = accession
+            for accession in accessions:
+                batch_layout = self.batch_layout(action_controller, accession, batch_layouts)
+                accession_naming_variables = self.naming_variables(accession)
 
-                # defined descriptors
-                # @todo creation date... how to ?
+                for producer in producers:
+                    batch = Batch()
+                    batch.content_type = batch._get_content_type()  # because save method is not used in bulk
+                    batch.layout = batch_layout
+                    batch.accession = accession
 
-                batches.append(batch)
+                    # defined descriptors
+                    # @todo creation date... how to ?
 
-        # bulk create
-        results = Batch.objects.bulk_create(batches)
+                    batches.append(batch)
+                    naming_variables.append(accession_naming_variables)
+
+            # reserve the names of the chunk at once
+            names = name_builder.pick_many(len(batches), naming_variables, naming_constants * len(accessions))
+            for batch, name in zip(batches, names):
+                batch.name = name
+
+            # bulk create
+            results = Batch.objects.bulk_create(batches)
+
+            # bulk create does not send signals
+            entities_bulk_created(Batch, results)
+            cursor_query_count_cache.invalidate(Batch._meta.db_table)
+
+            # take id from insert
+            output.extend(x.pk for x in results)
 
-        # take id from insert
-        output = [x.pk for x in results]
         return output
 
 
@@ -420,7 +455,7 @@ class ActionStepAccessionList(ActionStepFormat):
             raise ActionError("Accession list is missing from step data")
 
         # check for the existences of any accessions
-        if Accession.objects.filter(id__in=input_data).count() != len(input_data):
+        if Accession.objects.filter(id__in=input_data.entity_ids()).count() != input_data.size:
             raise ActionError("Some accessions ids does not exists")
 
         # input as output
@@ -485,12 +520,14 @@ class ActionStepAccessionRefinement(ActionStepFormat):
             raise ActionError("Accession list from previous step is missing")
 
         # check for foreign accession id
-        for acc_id in input_data:
-            if acc_id not in prev_output_data:
-                raise ActionError(_("The accession %i might not be in the list") % acc_id)
+        acc_id = input_data.items().exclude(entity_id__in=prev_output_data.entity_ids()).values_list(
+            'entity_id', flat=True).first()
+
+        if acc_id is not None:
+            raise ActionError(_("The accession %i might not be in the list") % acc_id)
 
         # check for the existences of any accessions
-        if Accession.objects.filter(id__in=input_data).count() != len(input_data):
+        if Accession.objects.filter(id__in=input_data.entity_ids()).count() != input_data.size:
             raise ActionError("Some accessions ids does not exists")
 
         # output as input
@@ -525,37 +562,53 @@ class ActionStepBatchConsumerBatchProducer(ActionStepFormat):
     def process(self, action_controller, step_format, step_data, prev_output_data, input_data):
         name_builder = NameBuilderManager.get(NameBuilderManager.GLOBAL_BATCH)
 
-        batches = Batch.objects.filter(id__in=prev_output_data).prefetch_related('accession')
         producers = step_format['producers']
 
         # find related descriptors
         descriptors = {}
 
-        output_batches = []
+        naming_constants = self.producers_naming_constants(name_builder, producers)
+        batch_layouts = {}
 
-        for batch in batches:
-            batch_layout = action_controller.batch_layout(batch.accession)
+        output = []
 
-            for producer in producers:
-                naming_constants = self.naming_constants(
-                    name_builder.num_constants,
-                    producer['naming_options'])
+        # the batches of the previous step by chunks
+        for batch_ids in prev_output_data.iterate():
+            batches = list(Batch.objects.filter(id__in=batch_ids).select_related('accession__layout'))
 
-                out_batch = Batch()
-                out_batch.content_type = out_batch._get_content_type()  # because save method is not used in bulk
-                out_batch.name = name_builder.pick(self.naming_variables(batch.accession), naming_constants)
-                out_batch.layout = batch_layout
+            output_batches = []
+            naming_variables = []
 
-                # defined descriptors
-                # @todo creation date... how to ?
+            for batch in batches:
+                batch_layout = self.batch_layout(action_controller, batch.accession, batch_layouts)
+                accession_naming_variables = self.naming_variables(batch.accession)
 
-                output_batches.append(out_batch)
+                for producer in producers:
+                    out_batch = Batch()
+                    out_batch.content_type = out_batch._get_content_type()  # because save method is not used in bulk
+                    out_batch.layout = batch_layout
 
-        # bulk create
-        results = Batch.objects.bulk_create(output_batches)
+                    # defined descriptors
+                    # @todo creation date... how to ?
+
+                    output_batches.append(out_batch)
+                    naming_variables.append(accession_naming_variables)
+
+            # reserve the names of the chunk at once
+            names = name_builder.pick_many(len(output_batches), naming_variables, naming_constants * len(batches))
+            for out_batch, name in zip(output_batches, names):
+                out_batch.name = name
+
+            # bulk create
+            results = Batch.objects.bulk_create(output_batches)
+
+            # bulk create does not send signals
+            entities_bulk_created(Batch, results)
+            cursor_query_count_cache.invalidate(Batch._meta.db_table)
+
+            # take id from insert
+            output.extend(x.pk for x in results)
 
-        # take id from insert
-        output = [x.pk for x in results]
         return output
 
     def process_iteration(self, action_controller, step_format, step_data, prev_output_data, input_data, element):
@@ -587,37 +640,53 @@ class ActionStepBatchConsumerBatchModifier(ActionStepFormat):
     def process(self, action_controller, step_format, step_data, prev_output_data, input_data):
         name_builder = NameBuilderManager.get(NameBuilderManager.GLOBAL_BATCH)
 
-        batches = Batch.objects.filter(id__in=prev_output_data).prefetch_related('accession')
         producers = step_format['producers']
 
         # find related descriptors
         descriptors = {}
 
-        output_batches = []
+        naming_constants = self.producers_naming_constants(name_builder, producers)
+        batch_layouts = {}
 
-        for batch in batches:
-            batch_layout = action_controller.batch_layout(batch.accession)
+        output = []
 
-            for producer in producers:
-                naming_constants = self.naming_constants(
-                    name_builder.num_constants,
-                    producer['naming_options'])
+        # the batches of the previous step by chunks
+        for batch_ids in prev_output_data.iterate():
+            batches = list(Batch.objects.filter(id__in=batch_ids).select_related('accession__layout'))
 
-                out_batch = Batch()
-                out_batch.content_type = out_batch._get_content_type()  # because save method is not used in bulk
-                out_batch.name = name_builder.pick(self.naming_variables(batch.accession), naming_constants)
-                out_batch.layout = batch_layout
+            output_batches = []
+            naming_variables = []
 
-                # defined descriptors
-                # @todo creation date... how to ?
+            for batch in batches:
+                batch_layout = self.batch_layout(action_controller, batch.accession, batch_layouts)
+                accession_naming_variables = self.naming_variables(batch.accession)
 
-                output_batches.append(out_batch)
+                for producer in producers:
+                    out_batch = Batch()
+                    out_batch.content_type = out_batch._get_content_type()  # because save method is not used in bulk
+                    out_batch.layout = batch_layout
 
-        # bulk create
-        results = Batch.objects.bulk_create(output_batches)
+                    # defined descriptors
+                    # @todo creation date... how to ?
+
+                    output_batches.append(out_batch)
+                    naming_variables.append(accession_naming_variables)
+
+            # reserve the names of the chunk at once
+            names = name_builder.pick_many(len(output_batches), naming_variables, naming_constants * len(batches))
+            for out_batch, name in zip(output_batches, names):
+                out_batch.name = name
+
+            # bulk create
+            results = Batch.objects.bulk_create(output_batches)
+
+            # bulk create does not send signals
+            entities_bulk_created(Batch, results)
+            cursor_query_count_cache.invalidate(Batch._meta.db_table)
+
+            # take id from insert
+            output.extend(x.pk for x in results)
 
-        # take id from insert
-        output = [x.pk for x in results]
         return output
 
 
@@ -639,7 +708,7 @@ class ActionStepAccessionConsumerBatchProducerIt(ActionStepAccessionConsumerBatc
         # for now descriptor are defined into options but are not editable by users
 
     def prepare_iterative_process(self, action_controller, step_format, step_data, prev_output_data, input_data):
-        limit = len(prev_output_data) // len(self.accept_format)
+        limit = prev_output_data.size // len(self.accept_format)
         step_data['progression'] = [0, limit]
 
         # and store the process list of items into a working to be done panel
@@ -648,8 +717,9 @@ class ActionStepAccessionConsumerBatchProducerIt(ActionStepAccessionConsumerBatc
         todo_accession_panel.panel_type = PanelType.WORKING.value
         todo_accession_panel.save()
 
-        # previous input data is an array of accession ids
-        todo_accession_panel.accessions.add(prev_output_data)
+        # previous input data is an array of accession ids, read by chunks
+        for accession_ids in prev_output_data.iterate():
+            todo_accession_panel.accessions.add(*accession_ids)
 
         # and store the process list of items into a working of done panel
         done_accession_panel = AccessionPanel()
@@ -677,14 +747,15 @@ class ActionStepAccessionConsumerBatchProducerIt(ActionStepAccessionConsumerBatc
 
         batch_layout = action_controller.batch_layout(accession)
 
-        for producer in producers:
-            naming_constants = self.naming_constants(
-                name_builder.num_constants,
-                producer['naming_options'])
+        names = name_builder.pick_many(
+            len(producers),
+            self.naming_variables(accession),
+            self.producers_naming_constants(name_builder, producers))
 
+        for producer, name in zip(producers, names):
             batch = Batch()
             batch.content_type = batch._get_content_type()  # because save method is not used in bulk
-            batch.name = name_builder.pick(self.naming_variables(accession), naming_constants)
+            batch.name = name
             batch.layout = batch_layout
             batch.accession = accession
 
@@ -697,6 +768,10 @@ class ActionStepAccessionConsumerBatchProducerIt(ActionStepAccessionConsumerBatc
         # bulk create
         results = Batch.objects.bulk_create(batches)
 
+        # bulk create does not send signals
+        entities_bulk_created(Batch, results)
+        cursor_query_count_cache.invalidate(Batch._meta.db_table)
+
         # take id from insert
         output = [x.pk for x in results]
         return output
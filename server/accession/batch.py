@@ -14,6 +14,7 @@ from django.db import IntegrityError
 from django.db import transaction
 from django.db.models import Q
 from django.shortcuts import get_object_or_404
+from django.utils import translation
 
 from accession.namebuilder import NameBuilderManager
 from descriptor.comment import CommentController
@@ -21,8 +22,10 @@ from descriptor.describable import DescriptorsBuilder
 from descriptor.models import Layout
 from igdectk.rest.handler import *
 from igdectk.rest.response import HttpResponseRest
+from main.search import search_backend
 from permission.utils import get_permissions_for
 
+from .batchlineage import BatchLineage
 from .models import Accession, Batch, BatchPanel
 from .base import RestAccession
 
@@ -69,6 +72,26 @@ class RestBatchIdParentCount(RestBatchIdParent):
     suffix = 'count'
 
 
+class RestBatchIdAncestor(RestBatchId):
+    regex = r'^ancestor/$'
+    suffix = 'ancestor'
+
+
+class RestBatchIdAncestorCount(RestBatchIdAncestor):
+    regex = r'^count/$'
+    suffix = 'count'
+
+
+class RestBatchIdDescendant(RestBatchId):
+    regex = r'^descendant/$'
+    suffix = 'descendant'
+
+
+class RestBatchIdDescendantCount(RestBatchIdDescendant):
+    regex = r'^count/$'
+    suffix = 'count'
+
+
 class RestBatchIdComment(RestBatchId):
     regex = r'^comment/$'
     suffix = 'comment'
@@ -510,16 +533,16 @@ def search_batch(request):
         layout = int_arg(filters['layout'])
 
         if name_method == 'ieq':
-            qs = qs.filter(Q(name__iexact=filters['name']))
+            qs = qs.filter(search_backend.q('name', 'ieq', filters['name']))
         elif name_method == 'icontains':
-            qs = qs.filter(Q(name__icontains=filters['name']))
+            qs = qs.filter(search_backend.q('name', 'icontains', filters['name']))
 
         qs = qs.filter(Q(layout_id=layout))
     elif 'name' in filters['fields']:
         if name_method == 'ieq':
-            qs = qs.filter(name__iexact=filters['name'])
+            qs = qs.filter(search_backend.q('name', 'ieq', filters['name']))
         elif name_method == 'icontains':
-            qs = qs.filter(name__icontains=filters['name'])
+            qs = qs.filter(search_backend.q('name', 'icontains', filters['name']))
 
     qs = qs.order_by('name')[:limit]
 
@@ -595,19 +618,24 @@ def get_batch_list(request):
         alias='panels'
     )
 
+    cq.project(json.loads(request.GET.get('columns', 'null')))
+
+    cq.select_related('location->label')
+
     cq.cursor(cursor, order_by)
     cq.order_by(order_by).limit(limit)
 
+    lang = translation.get_language()
     batch_list = []
 
-    for batch in cq:
+    for row in cq.rows():
         a = {
-            'id': batch.pk,
-            'name': batch.name,
-            'accession': batch.accession_id,
-            'layout': batch.layout_id,
-            'descriptors': batch.descriptors,
-            'location': batch.location.get_label() if batch.location else None
+            'id': row['id'],
+            'name': row['name'],
+            'accession': row['accession_id'],
+            'layout': row['layout_id'],
+            'descriptors': row['descriptors'],
+            'location': row['location_label'].get(lang, "") if row['location_label'] is not None else None
         }
 
         batch_list.append(a)
@@ -646,7 +674,7 @@ def get_batch_list_count(request):
         alias='panels'
     )
 
-    count = cq.count()
+    count = cq.count(approximate=request.GET.get('approximate') == 'true', cached=True)
 
     results = {
         'count': count
@@ -655,6 +683,107 @@ def get_batch_list_count(request):
     return HttpResponseRest(request, results)
 
 
+def check_batch_accession_perms(request, batch):
+    """
+    Check the permission to get the accession of a batch.
+    """
+    perms = get_permissions_for(
+        request.user,
+        batch.accession.content_type.app_label,
+        batch.accession.content_type.model,
+        batch.accession.pk)
+
+    if 'accession.get_accession' not in perms:
+        raise PermissionDenied(_('Invalid permission to access to this accession'))
+
+
+def get_batch_lineage_list(request, bat_id, direction):
+    results_per_page = int_arg(request.GET.get('more', 30))
+    cursor = json.loads(request.GET.get('cursor', 'null'))
+    depth = int_arg(request.GET.get('depth', 0))
+    limit = results_per_page
+
+    batch = get_object_or_404(Batch, id=int(bat_id))
+    check_batch_accession_perms(request, batch)
+
+    items_list = BatchLineage.list_batches(batch.id, direction, depth, cursor, limit)
+
+    if len(items_list) > 0:
+        # prev cursor (asc order)
+        obj = items_list[0]
+        prev_cursor = (obj['depth'], obj['name'], obj['id'])
+
+        # next cursor (asc order)
+        obj = items_list[-1]
+        next_cursor = (obj['depth'], obj['name'], obj['id'])
+    else:
+        prev_cursor = None
+        next_cursor = None
+
+    results = {
+        'perms': [],
+        'items': items_list,
+        'prev': prev_cursor,
+        'cursor': cursor,
+        'next': next_cursor,
+    }
+
+    return HttpResponseRest(request, results)
+
+
+def get_batch_lineage_list_count(request, bat_id, direction):
+    depth = int_arg(request.GET.get('depth', 0))
+
+    batch = get_object_or_404(Batch, id=int(bat_id))
+    check_batch_accession_perms(request, batch)
+
+    results = {
+        'count': BatchLineage.count(batch.id, direction, depth)
+    }
+
+    return HttpResponseRest(request, results)
+
+
+@RestBatchIdAncestor.def_auth_request(Method.GET, Format.JSON, perms={
+    'accession.get_accession': _("You are not allowed to get an accession"),
+    'accession.list_batch': _("You are not allowed to list parent batches for a batch")
+})
+def get_batch_ancestors_batches_list(request, bat_id):
+    """
+    List the ancestors of a batch (parents, parents of parents...) until a depth (optional depth parameter),
+    each one with its depth and its direct parents.
+    """
+    return get_batch_lineage_list(request, bat_id, BatchLineage.ANCESTORS)
+
+
+@RestBatchIdAncestorCount.def_auth_request(Method.GET, Format.JSON, perms={
+    'accession.get_accession': _("You are not allowed to get an accession"),
+    'accession.list_batch': _("You are not allowed to list parent batches for a batch")
+})
+def get_batch_ancestors_batches_list_count(request, bat_id):
+    return get_batch_lineage_list_count(request, bat_id, BatchLineage.ANCESTORS)
+
+
+@RestBatchIdDescendant.def_auth_request(Method.GET, Format.JSON, perms={
+    'accession.get_accession': _("You are not allowed to get an accession"),
+    'accession.list_batch': _("You are not allowed to list children batches for a batch")
+})
+def get_batch_descendants_batches_list(request, bat_id):
+    """
+    List the descendants of a batch (children, children of children...) until a depth (optional depth
+    parameter), each one with its depth and its direct parents.
+    """
+    return get_batch_lineage_list(request, bat_id, BatchLineage.DESCENDANTS)
+
+
+@RestBatchIdDescendantCount.def_auth_request(Method.GET, Format.JSON, perms={
+    'accession.get_accession': _("You are not allowed to get an accession"),
+    'accession.list_batch': _("You are not allowed to list children batches for a batch")
+})
+def get_batch_descendants_batches_list_count(request, bat_id):
+    return get_batch_lineage_list_count(request, bat_id, BatchLineage.DESCENDANTS)
+
+
 @RestBatchIdComment.def_auth_request(Method.GET, Format.JSON, perms={
     'accession.get_accession': _("You are not allowed to get a batch")
 })
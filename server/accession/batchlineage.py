@@ -0,0 +1,137 @@
+# -*- coding: utf-8; -*-
+#
+# @file batchlineage.py
+# @brief coll-gate batch lineage (ancestors and descendants over the parent batches relation)
+# @author Frédéric SCHERMA (INRA UMR1095)
+# @date 2018-10-18
+# @copyright Copyright (c) 2018 INRA/CIRAD
+# @license MIT (see LICENSE file)
+# @details
+
+from django.conf import settings
+from django.db import connection
+
+from .models import Batch
+
+
+class BatchLineage(object):
+    """
+    Traversal of the graph of the batches, from a batch to its ancestors (parents of parents...) or to its
+    descendants, using a single recursive query. The graph can contains cycles, a batch is never visited twice.
+    Each reached batch is returned once, at its minimal depth, with the list of its direct parents, letting the
+    client rebuild the graph.
+    """
+
+    ANCESTORS = 'ancestors'
+    DESCENDANTS = 'descendants'
+
+    @classmethod
+    def max_depth(cls):
+        return getattr(settings, 'BATCH_LINEAGE_MAX_DEPTH', 32)
+
+    @classmethod
+    def _lineage_sql(cls, direction):
+        """
+        SQL of the recursive CTE "lineage" ("id", "depth") for a direction, containing each reached batch once.
+        Its parameters are the origin batch id and the max depth.
+        """
+        field = Batch._meta.get_field('batches')
+        through_table = field.remote_field.through._meta.db_table
+
+        # the batches relation goes from a batch to its parents
+        if direction == cls.ANCESTORS:
+            from_column, to_column = field.m2m_column_name(), field.m2m_reverse_name()
+        else:
+            from_column, to_column = field.m2m_reverse_name(), field.m2m_column_name()
+
+        # breadth first traversal, one row per depth with the frontier and the already reached batches, so
+        # each batch is reached once, at its minimal depth
+        return """WITH RECURSIVE frontier("ids", "reached", "depth") AS (
+                SELECT o."ids", o."ids", 0 FROM (SELECT ARRAY[%%s]::integer[] AS "ids") AS o
+            UNION ALL
+                SELECT n."ids", f."reached" || n."ids", f."depth" + 1 FROM frontier AS f
+                CROSS JOIN LATERAL (SELECT ARRAY(
+                    SELECT l."%(to)s" FROM "%(through)s" AS l WHERE l."%(from)s" = ANY(f."ids")
+                    EXCEPT SELECT unnest(f."reached")) AS "ids") AS n
+                WHERE f."depth" < %%s AND cardinality(f."ids") > 0
+            ), lineage("id", "depth") AS (
+                SELECT unnest(f."ids"), f."depth" FROM frontier AS f WHERE f."depth" > 0
+            )""" % {'through': through_table, 'from': from_column, 'to': to_column}
+
+    @classmethod
+    def list_batches(cls, batch_id, direction, depth=None, cursor=None, limit=30):
+        """
+        List the batches of the lineage of a batch, ordered by depth, name and id.
+
+        :param batch_id: Id of the origin batch (not returned).
+        :param direction: BatchLineage.ANCESTORS or BatchLineage.DESCENDANTS.
+        :param depth: Max depth, 1 means the direct parents or children. None or greater than the max setting
+            means the max setting.
+        :param cursor: Tuple (depth, name, id) of the last previous result, or None.
+        :param limit: Max number of results.
+        :return: List of dict with id, name, accession, layout, descriptors, location, depth and parents.
+        """
+        max_depth = cls.max_depth()
+        depth = min(depth, max_depth) if depth else max_depth
+
+        field = Batch._meta.get_field('batches')
+        through_table = field.remote_field.through._meta.db_table
+
+        params = [batch_id, depth]
+
+        if cursor:
+            where = 'WHERE (n."depth", b."name", b."id") > (%s, %s, %s)'
+            params += list(cursor)
+        else:
+            where = ""
+
+        params.append(limit)
+
+        sql = """%(lineage)s
+            SELECT b."id", b."name", b."accession_id", b."layout_id", b."descriptors", b."location_id", n."depth",
+                ARRAY(SELECT p."%(to)s" FROM "%(through)s" AS p WHERE p."%(from)s" = b."id") AS "parents"
+            FROM lineage AS n
+            INNER JOIN "%(table)s" AS b ON b."id" = n."id"
+            %(where)s
+            ORDER BY n."depth", b."name", b."id"
+            LIMIT %%s""" % {
+            'lineage': cls._lineage_sql(direction),
+            'through': through_table,
+            'from': field.m2m_column_name(),
+            'to': field.m2m_reverse_name(),
+            'table': Batch._meta.db_table,
+            'where': where
+        }
+
+        with connection.cursor() as cursor:
+            cursor.execute(sql, params)
+            rows = cursor.fetchall()
+
+        return [{
+            'id': row[0],
+            'name': row[1],
+            'accession': row[2],
+            'layout': row[3],
+            'descriptors': row[4],
+            'location': row[5],
+            'depth': row[6],
+            'parents': row[7]
+        } for row in rows]
+
+    @classmethod
+    def count(cls, batch_id, direction, depth=None):
+        """
+        Count the batches of the lineage of a batch.
+
+        :param batch_id: Id of the origin batch (not counted).
+        :param direction: BatchLineage.ANCESTORS or BatchLineage.DESCENDANTS.
+        :param depth: Max depth, None means the max setting.
+        :return: Integer
+        """
+        max_depth = cls.max_depth()
+        depth = min(depth, max_depth) if depth else max_depth
+
+        with connection.cursor() as cursor:
+            cursor.execute(cls._lineage_sql(direction) + ' SELECT COUNT(*) FROM lineage',
+                           [batch_id, depth])
+            return cursor.fetchone()[0]
@@ -18,6 +18,7 @@ from django.core.exceptions import SuspiciousOperation
 from django.db import transaction, IntegrityError
 from django.shortcuts import get_object_or_404
 from django.utils.translation import ugettext_lazy as _
+from main.search import search_backend
 
 from .models import BatchPanel, Batch, PanelType
 from .base import RestAccession
@@ -213,16 +214,15 @@ def create_batch_panel(request):
 
             if isinstance(selection, bool):
                 if selection is True:
-                    batch_panel.batches.add(*cq)
-                    batch_panel.count = cq.count()
+                    batch_panel.count = cq.m2m_add(BatchPanel.batches, batch_panel.pk)
 
             elif selection['op'] == 'in':
-                batch_panel.batches.add(*cq.filter(id__in=selection['value']))
-                batch_panel.count = cq.filter(id__in=selection['value']).count()
+                batch_panel.count = cq.filter(id__in=selection['value']).m2m_add(
+                    BatchPanel.batches, batch_panel.pk)
 
             elif selection['op'] == 'notin':
-                batch_panel.batches.add(*cq.filter(id__notin=selection['value']))
-                batch_panel.count = cq.filter(id__notin=selection['value']).count()
+                batch_panel.count = cq.filter(id__notin=selection['value']).m2m_add(
+                    BatchPanel.batches, batch_panel.pk)
 
     except IntegrityError as e:
         Descriptor.integrity_except(BatchPanel, e)
@@ -369,7 +369,7 @@ def get_panel_list_count(request):
         filters = json.loads(request.GET['filters'])
         cq.filter(filters)
 
-    count = cq.count()
+    count = cq.count(approximate=request.GET.get('approximate') == 'true', cached=True)
 
     results = {
         'count': count
@@ -403,16 +403,16 @@ def search_batch_panel(request):
         layout = int_arg(filters['layout'])
 
         if name_method == 'ieq':
-            qs = qs.filter(Q(name__iexact=filters['name']))
+            qs = qs.filter(search_backend.q('name', 'ieq', filters['name']))
         elif name_method == 'icontains':
-            qs = qs.filter(Q(name__icontains=filters['name']))
+            qs = qs.filter(search_backend.q('name', 'icontains', filters['name']))
 
         qs = qs.filter(Q(layout_id=layout))
     elif 'name' in filters['fields']:
         if name_method == 'ieq':
-            qs = qs.filter(name__iexact=filters['name'])
+            qs = qs.filter(search_backend.q('name', 'ieq', filters['name']))
         elif name_method == 'icontains':
-            qs = qs.filter(name__icontains=filters['name'])
+            qs = qs.filter(search_backend.q('name', 'icontains', filters['name']))
 
     qs = qs.order_by('name').distinct()[:limit]
 
@@ -574,13 +574,13 @@ def modify_panel_batches(request, panel_id):
             with transaction.atomic():
                 if isinstance(selection, bool):
                     if selection is True:
-                        panel.batches.remove(*cq)
+                        cq.m2m_remove(BatchPanel.batches, panel.pk)
 
                 elif selection['op'] == 'in':
-                    panel.batches.remove(*cq.filter(id__in=selection['value']))
+                    cq.filter(id__in=selection['value']).m2m_remove(BatchPanel.batches, panel.pk)
 
                 elif selection['op'] == 'notin':
-                    panel.batches.remove(*cq.filter(id__notin=selection['value']))
+                    cq.filter(id__notin=selection['value']).m2m_remove(BatchPanel.batches, panel.pk)
 
                 panel.save()
 
@@ -592,13 +592,13 @@ def modify_panel_batches(request, panel_id):
             with transaction.atomic():
                 if isinstance(selection, bool):
                     if selection is True:
-                        panel.batches.add(*cq)
+                        cq.m2m_add(BatchPanel.batches, panel.pk)
 
                 elif selection['op'] == 'in':
-                    panel.batches.add(*cq.filter(id__in=selection['value']))
+                    cq.filter(id__in=selection['value']).m2m_add(BatchPanel.batches, panel.pk)
 
                 elif selection['op'] == 'notin':
-                    panel.batches.add(*cq.filter(id__notin=selection['value']))
+                    cq.filter(id__notin=selection['value']).m2m_add(BatchPanel.batches, panel.pk)
 
                 panel.save()
 
@@ -628,7 +628,7 @@ def get_panel_id_batch_list_count(request, panel_id):
     cq.inner_join(BatchPanel, batchpanel=int(panel_id))
 
     results = {
-        'count': cq.count()
+        'count': cq.count(approximate=request.GET.get('approximate') == 'true', cached=True)
     }
 
     return HttpResponseRest(request, results)
@@ -704,7 +704,7 @@ def count_batch_id_panels(request, bat_id):
         cq.filter(filters)
 
     results = {
-        'count': cq.count()
+        'count': cq.count(approximate=request.GET.get('approximate') == 'true', cached=True)
     }
 
     return HttpResponseRest(request, results)
@@ -0,0 +1,58 @@
+# Generated by Django 2.0.4 on 2018-10-18 10:00
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accession', '0014_auto_20180704_1228'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ActionDataItem',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('step_index', models.IntegerField(default=0)),
+                ('data_type', models.IntegerField(choices=[(0, 'Input'), (1, 'Output')], default=0)),
+                ('position', models.IntegerField()),
+                ('entity_id', models.IntegerField()),
+                ('action', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='accession.Action')),
+            ],
+        ),
+        migrations.AlterUniqueTogether(
+            name='actiondataitem',
+            unique_together={('action', 'step_index', 'data_type', 'position')},
+        ),
+        migrations.AlterIndexTogether(
+            name='actiondataitem',
+            index_together={('action', 'step_index', 'data_type', 'entity_id')},
+        ),
+        migrations.AddField(
+            model_name='actiondata',
+            name='size',
+            field=models.IntegerField(default=0),
+        ),
+        # move the JSON arrays to the rows of elements, and back
+        migrations.RunSQL(
+            sql="""
+                INSERT INTO "accession_actiondataitem" ("action_id", "step_index", "data_type", "position", "entity_id")
+                SELECT d."action_id", d."step_index", d."data_type", e.ordinality - 1, e.value::INTEGER
+                FROM "accession_actiondata" AS d, jsonb_array_elements_text(d."data") WITH ORDINALITY AS e(value, ordinality);
+
+                UPDATE "accession_actiondata" SET "size" = jsonb_array_length("data");
+            """,
+            reverse_sql="""
+                UPDATE "accession_actiondata" AS d SET "data" = COALESCE((
+                    SELECT jsonb_agg(i."entity_id" ORDER BY i."position") FROM "accession_actiondataitem" AS i
+                    WHERE i."action_id" = d."action_id" AND i."step_index" = d."step_index"
+                    AND i."data_type" = d."data_type"), '[]'::JSONB);
+            """
+        ),
+        migrations.RemoveField(
+            model_name='actiondata',
+            name='data',
+        ),
+    ]
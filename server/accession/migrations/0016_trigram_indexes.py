@@ -0,0 +1,28 @@
+# Generated by Django 2.0.4 on 2018-10-18 10:00
+
+from django.db import migrations
+
+
+def trigram_index(table, column):
+    name = "%s_%s_trgm" % (table, column)
+    return migrations.RunSQL(
+        sql='CREATE INDEX "%s" ON "%s" USING gin ("%s" gin_trgm_ops)' % (name, table, column),
+        reverse_sql='DROP INDEX IF EXISTS "%s"' % name
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('main', '0002_pg_trgm'),
+        ('accession', '0015_actiondataitem'),
+    ]
+
+    operations = [
+        trigram_index("accession_accession", "name"),
+        trigram_index("accession_accession", "code"),
+        trigram_index("accession_accessionsynonym", "name"),
+        trigram_index("accession_batch", "name"),
+        trigram_index("accession_accessionpanel", "name"),
+        trigram_index("accession_batchpanel", "name"),
+    ]
@@ -0,0 +1,38 @@
+# Generated by Django 2.0.4 on 2018-10-18 10:00
+
+import django.contrib.postgres.fields
+import django.contrib.postgres.indexes
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accession', '0016_trigram_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='storagelocation',
+            name='parent_list',
+            field=django.contrib.postgres.fields.ArrayField(base_field=models.IntegerField(), default=list, size=None),
+        ),
+        migrations.AddIndex(
+            model_name='storagelocation',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['parent_list'], name='storagelocation_parent_list_gin'),
+        ),
+        # initial lists of parents
+        migrations.RunSQL(
+            sql="""
+                WITH RECURSIVE tree("id", "parent_list") AS (
+                    SELECT "id", ARRAY[]::INTEGER[] FROM "accession_storagelocation" WHERE "parent_id" IS NULL
+                UNION ALL
+                    SELECT c."id", c."parent_id" || t."parent_list" FROM "accession_storagelocation" AS c
+                    INNER JOIN tree AS t ON c."parent_id" = t."id"
+                )
+                UPDATE "accession_storagelocation" AS l SET "parent_list" = tree."parent_list" FROM tree
+                WHERE l."id" = tree."id";
+            """,
+            reverse_sql=migrations.RunSQL.noop
+        ),
+    ]
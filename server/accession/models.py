@@ -11,8 +11,9 @@
 import re
 
 from django.contrib.auth.models import User
-from django.contrib.postgres.fields import JSONField
-from django.db import models
+from django.contrib.postgres.fields import JSONField, ArrayField
+from django.contrib.postgres.indexes import GinIndex
+from django.db import models, connection, transaction
 from django.db.models import Q, Prefetch
 from django.utils import translation
 from django.utils.translation import ugettext_lazy as _
@@ -23,6 +24,7 @@ from classification.models import ClassificationEntry
 from descriptor.models import DescribableEntity
 from descriptor.models import Layout
 from main.models import Entity, EntitySynonym, ContentType, EntitySynonymType
+from main.search import search_backend
 
 
 class AccessionClassificationEntry(models.Model):
@@ -194,7 +196,7 @@ class Accession(DescribableEntity):
 
     @classmethod
     def make_search_by_name(cls, term):
-        return Q(name__istartswith=term)
+        return search_backend.q('name', 'istartswith', term)
 
     def audit_create(self, user):
         return {
@@ -252,8 +254,11 @@ class Accession(DescribableEntity):
 
     @classmethod
     def export_list(cls, columns, cursor, search, filters, order_by, limit, user):
-        res_columns = []
-        items = []
+        """
+        Export a list of accessions, rows being generated from a server-side cursor.
+
+        :return: A tuple with the list of columns and a generator of rows (list of string).
+        """
 
         if not order_by:
             order_by = ['id']
@@ -267,7 +272,8 @@ class Accession(DescribableEntity):
         if filters:
             cq.filter(filters)
 
-        # @todo filter given user permission per accession (v2)
+        # only the accessions the user can get, if not at the model level then per accession
+        cq.filter_object_permission(user, 'accession.get_accession')
 
         # accession panels ids
         cq.m2m_to_array_field(
@@ -302,50 +308,50 @@ class Accession(DescribableEntity):
 
         synonym_types = dict(EntitySynonymType.objects.filter(target_model=ContentType.objects.get_for_model(Accession)).values_list('id', 'name'))
 
-        for accession in cq:
-            item = []
-
-            for col in columns:
-                if col == 'id':
-                    item.append(str(accession.pk))
-                elif col == 'name':
-                    item.append(accession.name)
-                elif col == 'code':
-                    item.append(accession.code)
-                elif col == 'primary_classification_entry':
-                    item.append(str(accession.primary_classification_entry.name))
-                elif col == 'layout':
-                    item.append(str(accession.layout.name))
-                elif col.startswith('#'):
-                    # descriptors (@todo how to format at this level...)
-                    descr = accession.descriptors[col[1:]]
-                    if isinstance(descr, list):
-                        v = '-'.join([str(x) for x in descr])
+        def rows():
+            for accession in cq.iterator():
+                item = []
+
+                for col in columns:
+                    if col == 'id':
+                        item.append(str(accession.pk))
+                    elif col == 'name':
+                        item.append(accession.name)
+                    elif col == 'code':
+                        item.append(accession.code)
+                    elif col == 'primary_classification_entry':
+                        item.append(str(accession.primary_classification_entry.name))
+                    elif col == 'layout':
+                        item.append(str(accession.layout.name))
+                    elif col.startswith('#'):
+                        # descriptors (@todo how to format at this level...)
+                        descr = accession.descriptors[col[1:]]
+                        if isinstance(descr, list):
+                            v = '-'.join([str(x) for x in descr])
+                        else:
+                            v = str(descr)
+
+                        item.append(v)
+                    elif col.startswith('&'):
+                        # synonyms
+                        vals = []
+
+                        for synonym in accession.synonyms.all():
+                            synonym_type_name = synonym_types.get(synonym.synonym_type_id)
+                            if col[1:] == synonym_type_name:
+                                vals.append(synonym.language + ':' + synonym.name)
+
+                        item.append("/".join(vals))
+                    elif col.startswith('$'):
+                        item.append("")  # format
+                    elif col.startswith('@'):
+                        item.append("")  # label
                     else:
-                        v = str(descr)
-
-                    item.append(v)
-                elif col.startswith('&'):
-                    # synonyms
-                    vals = []
-
-                    for synonym in accession.synonyms.all():
-                        synonym_type_name = synonym_types.get(synonym.synonym_type_id)
-                        if col[1:] == synonym_type_name:
-                            vals.append(synonym.language + ':' + synonym.name)
-
-                    item.append("/".join(vals))
-                elif col.startswith('$'):
-                    item.append("")  # format
-                elif col.startswith('@'):
-                    item.append("")  # label
-                else:
-                    item.append("")
+                        item.append("")
 
-            items.append(item)
+                yield item
 
-        res_columns = columns
-        return res_columns, items
+        return columns, rows()
 
 
 class AccessionSynonym(EntitySynonym):
@@ -471,7 +477,7 @@ class Batch(DescribableEntity):
 
     @classmethod
     def make_search_by_name(cls, term):
-        return Q(name__istartswith=term)
+        return search_backend.q('name', 'istartswith', term)
 
     def audit_create(self, user):
         return {
@@ -706,23 +712,184 @@ class ActionData(models.Model):
     """
     Purely the data (input or output) for each step of each action.
     Input can be not defined.
+    The elements of the data array are stored by rows into ActionDataItem, in way to be appended, checked and read
+    by parts, without loading or rewriting the whole array.
     """
 
+    # default number of elements per read
+    CHUNK_SIZE = 1000
+
     # related action
     action = models.ForeignKey(Action, on_delete=models.CASCADE)
 
     # step 0 based index
     step_index = models.IntegerField(default=0)
 
-    # data array, empty by default
-    data = JSONField(default=[])
-
     # type of data (False : input,
     data_type = models.IntegerField(choices=ActionDataType.choices(), default=ActionDataType.INPUT.value)
 
+    # number of elements of the data array
+    size = models.IntegerField(default=0)
+
     class Meta:
         unique_together = (('action', 'step_index', 'data_type'),)
 
+    def items(self):
+        return ActionDataItem.objects.filter(
+            action_id=self.action_id, step_index=self.step_index, data_type=self.data_type)
+
+    def _lock(self):
+        """
+        Lock the row of the action data until the end of the transaction, and refresh its size, in way to serialize
+        the concurrent modifications of the data array.
+
+        :return: Current size of the data array.
+        """
+        self.size = ActionData.objects.select_for_update().values_list('size', flat=True).get(pk=self.pk)
+        return self.size
+
+    def _set_size(self, size):
+        self.size = size
+        ActionData.objects.filter(pk=self.pk).update(size=size)
+
+    def append(self, values):
+        """
+        Append elements at the end of the data array, using a bulk insert. The action data must be saved.
+
+        :param values: List of entity id.
+        """
+        if not values:
+            return
+
+        with transaction.atomic():
+            position = self._lock()
+
+            ActionDataItem.objects.bulk_create([ActionDataItem(
+                action_id=self.action_id,
+                step_index=self.step_index,
+                data_type=self.data_type,
+                position=position + i,
+                entity_id=value) for i, value in enumerate(values)], batch_size=self.CHUNK_SIZE)
+
+            self._set_size(position + len(values))
+
+    def append_data(self, action_data):
+        """
+        Append the elements of another data array at the end of the data array, using a single INSERT ... SELECT.
+        The action data must be saved.
+
+        :param action_data: Source ActionData.
+        """
+        table = ActionDataItem._meta.db_table
+
+        with transaction.atomic():
+            position = self._lock()
+
+            with connection.cursor() as cursor:
+                cursor.execute("""INSERT INTO "%(table)s"
+                    ("action_id", "step_index", "data_type", "position", "entity_id")
+                    SELECT %%s, %%s, %%s, %%s + ROW_NUMBER() OVER (ORDER BY "position") - 1, "entity_id"
+                    FROM "%(table)s" WHERE "action_id" = %%s AND "step_index" = %%s AND "data_type" = %%s""" % {
+                        'table': table}, [
+                    self.action_id, self.step_index, self.data_type, position,
+                    action_data.action_id, action_data.step_index, action_data.data_type])
+
+                count = cursor.rowcount
+
+            if count:
+                self._set_size(position + count)
+
+    def clear(self):
+        """
+        Remove any elements of the data array.
+        """
+        with transaction.atomic():
+            self._lock()
+            self.items().delete()
+
+            if self.size:
+                self._set_size(0)
+
+    def entity_ids(self):
+        """
+        Sub-query of the elements of the data array, to filter entities without loading the array.
+        """
+        return self.items().values('entity_id')
+
+    def contains_all(self, values):
+        """
+        Check if all the given elements are present into the data array, using the index on entity id.
+
+        :param values: List of entity id.
+        :return: True if all the elements are present.
+        """
+        values = set(values)
+
+        if not values:
+            return True
+
+        return self.items().filter(entity_id__in=values).values('entity_id').distinct().count() == len(values)
+
+    def page(self, cursor=None, limit=CHUNK_SIZE):
+        """
+        Get a page of elements of the data array, keyset paginated on the position.
+
+        :param cursor: Last position of the previous page or None for the first page.
+        :param limit: Max number of elements.
+        :return: List of pair (position, entity id).
+        """
+        qs = self.items()
+
+        if cursor is not None:
+            qs = qs.filter(position__gt=cursor)
+
+        return list(qs.order_by('position').values_list('position', 'entity_id')[:limit])
+
+    def iterate(self, chunk_size=CHUNK_SIZE):
+        """
+        Generator over the chunks of the data array, read by keyset pagination.
+
+        :param chunk_size: Max number of elements per chunk.
+        :return: Generator of lists of entity id.
+        """
+        cursor = None
+
+        while True:
+            page = self.page(cursor, chunk_size)
+            if not page:
+                break
+
+            cursor = page[-1][0]
+            yield [entity_id for position, entity_id in page]
+
+            if len(page) < chunk_size:
+                break
+
+
+class ActionDataItem(models.Model):
+    """
+    An element of the data array of a step of an action.
+    """
+
+    # related action
+    action = models.ForeignKey(Action, on_delete=models.CASCADE)
+
+    # step 0 based index
+    step_index = models.IntegerField(default=0)
+
+    # type of data (input, output)
+    data_type = models.IntegerField(choices=ActionDataType.choices(), default=ActionDataType.INPUT.value)
+
+    # 0 based position into the data array
+    position = models.IntegerField()
+
+    # element of the array (entity id)
+    entity_id = models.IntegerField()
+
+    class Meta:
+        unique_together = (('action', 'step_index', 'data_type', 'position'),)
+        index_together = (('action', 'step_index', 'data_type', 'entity_id'),)
+
 
 class ActionToEntity(models.Model):
     """
@@ -787,7 +954,7 @@ class Panel(Entity):
 
     @classmethod
     def make_search_by_name(cls, term):
-        return Q(name__istartswith=term)
+        return search_backend.q('name', 'istartswith', term)
 
 
 class BatchPanel(Panel):
@@ -914,6 +1081,9 @@ class StorageLocation(models.Model):
     # Parent location
     parent = models.ForeignKey('self', blank=True, null=True, related_name='children', on_delete=models.PROTECT)
 
+    # List of the ancestors ids, from the direct parent to the root (@see StorageLocationTree)
+    parent_list = ArrayField(models.IntegerField(), default=list)
+
     class Meta:
         verbose_name = _("storage location")
 
@@ -922,6 +1092,11 @@ class StorageLocation(models.Model):
             ("list_storagelocation", "Can list storage locations"),
         )
 
+        # sub-tree lookup (parent_list @> ARRAY[id])
+        indexes = [
+            GinIndex(fields=['parent_list'], name='storagelocation_parent_list_gin'),
+        ]
+
     def get_label(self):
         """
         Get the label for this storage location in the current regional.
@@ -42,6 +42,31 @@ class NamingType(object):
     def value(self, variables, constants):
         return ""
 
+    def values(self, count, variables_list, constants_list):
+        """
+        Values for many names at once. By default computed one by one, overridden by the naming types that
+        can compute them in one time (sequences, constant per call values).
+
+        :param count: Number of names.
+        :param variables_list: List of variables dict, one per name.
+        :param constants_list: List of constants list, one per name.
+        :return: List of count strings.
+        """
+        return [self.value(variables, constants) for variables, constants in zip(variables_list, constants_list)]
+
+
+def next_sequence_values(sequence_name, count):
+    """
+    Reserve a block of values of a sequence in a single statement.
+
+    :param sequence_name: Name of the PostgreSQL sequence.
+    :param count: Number of values.
+    :return: Ordered list of count values.
+    """
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT nextval(%s) FROM generate_series(1, %s)", [sequence_name, count])
+        return sorted(row[0] for row in cursor.fetchall())
+
 
 class NamingTypeSequence(NamingType):
     """
@@ -62,6 +87,9 @@ class NamingTypeSequence(NamingType):
 
         return self.format % v
 
+    def values(self, count, variables_list, constants_list):
+        return [self.format % v for v in next_sequence_values(self.sequence_name, count)]
+
 
 class NamingTypeHash(NamingType):
     """
@@ -166,6 +194,10 @@ class NamingTypeHash(NamingType):
         # return a 3 chars max string from the crc15
         return NamingTypeHash.to_base32(crc15)
 
+    def values(self, count, variables_list, constants_list):
+        return [NamingTypeHash.to_base32(NamingTypeHash.crc15(v))
+                for v in next_sequence_values(self.sequence_name, count)]
+
 
 class NamingTypeStatic(NamingType):
     """
@@ -179,6 +211,9 @@ class NamingTypeStatic(NamingType):
     def value(self, variables, constants):
         return self.text
 
+    def values(self, count, variables_list, constants_list):
+        return [self.text] * count
+
 
 class NamingTypeConstant(NamingType):
     """
@@ -229,6 +264,9 @@ class NamingTypeMonthDay(NamingType):
         day = datetime.today().day
         return "%.2i" % day
 
+    def values(self, count, variables_list, constants_list):
+        return [self.value(None, None)] * count
+
 
 class NamingTypeMonth(NamingType):
     """
@@ -242,6 +280,9 @@ class NamingTypeMonth(NamingType):
         month = datetime.today().month
         return "%.2i" % month
 
+    def values(self, count, variables_list, constants_list):
+        return [self.value(None, None)] * count
+
 
 class NamingTypeYear(NamingType):
     """
@@ -255,6 +296,9 @@ class NamingTypeYear(NamingType):
         year = datetime.today().year
         return "%.4i" % year
 
+    def values(self, count, variables_list, constants_list):
+        return [self.value(None, None)] * count
+
 
 class NamingTypeGRCCode(NamingType):
     """
@@ -267,6 +311,9 @@ class NamingTypeGRCCode(NamingType):
     def value(self, variables, constants):
         return GRC.objects.get_unique_grc().identifier
 
+    def values(self, count, variables_list, constants_list):
+        return [self.value(None, None)] * count
+
 
 class NameBuilder(object):
 
@@ -375,6 +422,38 @@ class NameBuilder(object):
 
         return name
 
+    def pick_many(self, count, variables=None, constants=None):
+        """
+        Pick the next count names. The sequence values are reserved by a single query, and the per call values
+        (date, GRC code) are computed once.
+        :param count: Number of names.
+        :param variables: Named standardized variable dict, or list of count dicts (one per name).
+        :param constants: List of ordered constants string, or list of count lists (one per name).
+        :return: List of count newly generated names, in order.
+        """
+        if count <= 0:
+            return []
+
+        if variables is None:
+            variables = {}
+
+        if constants is None:
+            constants = []
+
+        variables_list = variables if isinstance(variables, (list, tuple)) else [variables] * count
+        constants_list = constants if constants and isinstance(constants[0], (list, tuple)) else [constants] * count
+
+        if len(variables_list) != count or len(constants_list) != count:
+            raise ValueError("Number of variables or constants differs from the number of names")
+
+        names = [""] * count
+
+        for p in self._recipe:
+            for i, value in enumerate(p.values(count, variables_list, constants_list)):
+                names[i] += value
+
+        return names
+
 
 class NameBuilderManager(object):
 
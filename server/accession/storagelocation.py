@@ -8,7 +8,9 @@
 # @license MIT (see LICENSE file)
 # @details
 
-from django.db.models import Q, Prefetch
+from django.db import transaction
+from django.db.models import Q
+from django.shortcuts import get_object_or_404
 from django.utils import translation
 
 from accession.base import RestAccession
@@ -16,7 +18,7 @@ from igdectk.rest.handler import *
 from igdectk.rest.response import HttpResponseRest
 
 from accession.models import StorageLocation
-from permission.utils import get_permissions_for
+from accession.storagelocationtree import StorageLocationTree
 from django.utils.translation import ugettext_lazy as _
 
 
@@ -35,37 +37,57 @@ class RestStorageLocationSearch(RestStorageLocation):
     suffix = 'search'
 
 
-@RestStorageLocationId.def_auth_request(Method.GET, Format.JSON)
+class RestStorageLocationTree(RestStorageLocation):
+    regex = r'^tree/$'
+    suffix = 'tree'
+
+
+class RestStorageLocationIdTree(RestStorageLocationId):
+    regex = r'^tree/$'
+    suffix = 'tree'
+
+
+class RestStorageLocationIdBatch(RestStorageLocationId):
+    regex = r'^batch/$'
+    suffix = 'batch'
+
+
+class RestStorageLocationIdOccupancy(RestStorageLocationId):
+    regex = r'^occupancy/$'
+    suffix = 'occupancy'
+
+
+@RestStorageLocationId.def_auth_request(Method.GET, Format.JSON, perms={
+    'accession.get_storagelocation': _("You are not allowed to get a storage location")
+})
 def get_location_details_json(request, location_id):
     """
-    Get the details of a storage location.
+    Get the details of a storage location, with its ancestors (from the direct parent to the root) and its
+    direct children.
     """
-
-    location = StorageLocation.objects.get(id=int(location_id))
-
-    # check permission on this object
-    perms = get_permissions_for(request.user, location.content_type.app_label, location.content_type.model, location.pk)
-    if 'accession.get_location' not in perms:
-        raise PermissionDenied(_('Invalid permission to access to this storage location'))
+    location = get_object_or_404(StorageLocation, id=int(location_id))
 
     children = []
 
-    for child in location.children.all():
+    for child in location.children.all().order_by('name'):
         children.append({
             'id': child.id,
             'name': child.name,
             'label': child.get_label()
         })
 
+    ancestors = [{
+        'id': ancestor.id,
+        'name': ancestor.name,
+        'label': ancestor.get_label()
+    } for ancestor in StorageLocationTree.ancestors(location)]
+
     result = {
         'id': location.id,
         'name': location.name,
         'label': location.get_label(),
-        'parent': {
-            'id': location.parent.id,
-            'name': location.parent.name,
-            'label': location.parent.get_label(),
-        },
+        'parent': ancestors[0] if ancestors else None,
+        'ancestors': ancestors,
         'children': children
     }
 
@@ -97,11 +119,11 @@ def create_storage_location(request):
 
     lang = translation.get_language()
 
-    storage_location = StorageLocation.objects.create(
-        name=name,
-        parent=parent_storage_location,
-        label={lang: label},
-    )
+    storage_location = StorageLocation(name=name, label={lang: label})
+    StorageLocationTree.update_parents(storage_location, parent_storage_location)
+    storage_location.save()
+
+    StorageLocationTree.invalidate_occupancy()
 
     result = {
         'id': storage_location.id,
@@ -126,13 +148,7 @@ def create_storage_location(request, location_id):
     """
     Modify a storage location.
     """
-    storage_location = StorageLocation.objects.get(id=int(location_id))
-
-    # check permission on this object
-    perms = get_permissions_for(request.user, storage_location.content_type.app_label,
-                                storage_location.content_type.model, storage_location.pk)
-    if 'accession.get_location' not in perms:
-        raise PermissionDenied(_('Invalid permission to access to this storage location'))
+    storage_location = get_object_or_404(StorageLocation, id=int(location_id))
 
     name = request.data['name']
     label = request.data['label']
@@ -144,9 +160,14 @@ def create_storage_location(request, location_id):
 
     lang = translation.get_language()
 
-    storage_location.name = name
-    storage_location.set_label(lang, label)
-    storage_location.parent = parent_storage_location
+    with transaction.atomic():
+        storage_location.name = name
+        storage_location.set_label(lang, label)
+
+        if storage_location.parent_id != (parent_storage_location.id if parent_storage_location else None):
+            StorageLocationTree.move(storage_location, parent_storage_location)
+
+        storage_location.save()
 
     result = {
         'id': storage_location.id,
@@ -187,22 +208,20 @@ def get_location_list(request):
         filters = json.loads(request.GET['filters'])
         cq.filter(filters)
 
-    cq.prefetch_related(Prefetch(
-        "children",
-        queryset=StorageLocation.objects.all()
-    ))
-
     cq.cursor(cursor, order_by)
     cq.order_by(order_by).limit(limit)
 
+    storage_locations = list(cq)
+    children_counts = StorageLocationTree.children_counts([location.id for location in storage_locations])
+
     location_list = []
 
-    for storage_location in cq:
+    for storage_location in storage_locations:
         sl = {
             'id': storage_location.id,
             'name': storage_location.name,
             'label': storage_location.get_label(),
-            'children_count': storage_location.children.count()
+            'children_count': children_counts.get(storage_location.id, 0)
         }
 
         location_list.append(sl)
@@ -293,3 +312,120 @@ def search_accession(request):
     }
 
     return HttpResponseRest(request, results)
+
+
+def make_location_tree_items(location, request):
+    depth = request.GET.get('depth')
+    lang = translation.get_language()
+
+    items = StorageLocationTree.subtree(location, int_arg(depth) if depth is not None else None)
+
+    for item in items:
+        item['label'] = item['label'].get(lang, "")
+
+    return items
+
+
+@RestStorageLocationTree.def_auth_request(Method.GET, Format.JSON, perms={
+    'accession.list_storagelocation': _("You are not allowed to list the locations")
+})
+def get_location_tree(request):
+    """
+    List the whole tree of storage locations (until an optional depth parameter), with for each location its
+    number of children, of batches, and of batches of its sub-tree.
+    """
+    results = {
+        'items': make_location_tree_items(None, request)
+    }
+
+    return HttpResponseRest(request, results)
+
+
+@RestStorageLocationIdTree.def_auth_request(Method.GET, Format.JSON, perms={
+    'accession.list_storagelocation': _("You are not allowed to list the locations")
+})
+def get_location_id_tree(request, location_id):
+    """
+    List the sub-tree of a storage location (itself included, until an optional depth parameter), with for each
+    location its number of children, of batches, and of batches of its sub-tree.
+    """
+    location = get_object_or_404(StorageLocation, id=int(location_id))
+
+    results = {
+        'items': make_location_tree_items(location, request)
+    }
+
+    return HttpResponseRest(request, results)
+
+
+@RestStorageLocationIdBatch.def_auth_request(Method.GET, Format.JSON, perms={
+    'accession.list_batch': _("You are not allowed to list the batches")
+})
+def get_location_batch_list(request, location_id):
+    """
+    List the batches stored anywhere under a storage location (itself included).
+    """
+    results_per_page = int_arg(request.GET.get('more', 30))
+    cursor = json.loads(request.GET.get('cursor', 'null'))
+    limit = results_per_page
+
+    location = get_object_or_404(StorageLocation, id=int(location_id))
+
+    qs = StorageLocationTree.batches(location)
+
+    if cursor:
+        cursor_name, cursor_id = cursor
+        qs = qs.filter(Q(name__gt=cursor_name) | (Q(name=cursor_name) & Q(id__gt=cursor_id)))
+
+    qs = qs.select_related('location').order_by('name', 'id')[:limit]
+
+    items_list = []
+
+    for batch in qs:
+        items_list.append({
+            'id': batch.id,
+            'name': batch.name,
+            'accession': batch.accession_id,
+            'layout': batch.layout_id,
+            'descriptors': batch.descriptors,
+            'location': batch.location_id,
+            'location_details': {
+                'id': batch.location.id,
+                'name': batch.location.name,
+                'label': batch.location.get_label()
+            }
+        })
+
+    if len(items_list) > 0:
+        # prev cursor (asc order)
+        obj = items_list[0]
+        prev_cursor = (obj['name'], obj['id'])
+
+        # next cursor (asc order)
+        obj = items_list[-1]
+        next_cursor = (obj['name'], obj['id'])
+    else:
+        prev_cursor = None
+        next_cursor = None
+
+    results = {
+        'perms': [],
+        'items': items_list,
+        'prev': prev_cursor,
+        'cursor': cursor,
+        'next': next_cursor,
+    }
+
+    return HttpResponseRest(request, results)
+
+
+@RestStorageLocationIdOccupancy.def_auth_request(Method.GET, Format.JSON, perms={
+    'accession.list_storagelocation': _("You are not allowed to list the locations")
+})
+def get_location_occupancy(request, location_id):
+    """
+    Occupancy summary of a storage location and its sub-tree (cached).
+    """
+    location = get_object_or_404(StorageLocation, id=int(location_id))
+
+    return HttpResponseRest(request, StorageLocationTree.occupancy(location))
@@ -0,0 +1,231 @@
+# -*- coding: utf-8; -*-
+#
+# @file storagelocationtree.py
+# @brief coll-gate storage location tree (sub-tree listing, batch counts and occupancy)
+# @author Frédéric SCHERMA (INRA UMR1095)
+# @date 2018-10-18
+# @copyright Copyright (c) 2018 INRA/CIRAD
+# @license MIT (see LICENSE file)
+# @details
+
+from django.conf import settings
+from django.core.exceptions import SuspiciousOperation
+from django.db import connection
+from django.db.models import Q
+
+from audit.models import entities_bulk_changed
+from main.cache import cache_manager
+from main.cursor import cursor_query_count_cache
+
+from .models import Batch, StorageLocation
+
+from django.utils.translation import ugettext_lazy as _
+
+
+class StorageLocationTree(object):
+    """
+    Tree of the storage locations. Each location keeps the list of its ancestors ids (parent_list), from its
+    direct parent to the root, maintained at creation and at move, in way to get any sub-tree with a single
+    indexed query.
+    """
+
+    OCCUPANCY_CACHE_NAME = "storage_location_occupancy"
+
+    @classmethod
+    def update_parents(cls, location, parent=None):
+        """
+        Defines the list of parents of a location for a given parent (does not save the location).
+        :param location: Valid storage location instance.
+        :param parent: None or valid storage location instance.
+        """
+        location.parent = parent
+        location.parent_list = [parent.id] + parent.parent_list if parent is not None else []
+
+    @classmethod
+    def move(cls, location, parent=None):
+        """
+        Change the parent of a location, and update the list of parents of the whole sub-tree using a single
+        update (does not save the location itself, but must be performed into the same transaction).
+        :param location: Valid and saved storage location instance.
+        :param parent: None or valid storage location instance.
+        """
+        if parent is not None:
+            if parent.id == location.id or location.id in parent.parent_list:
+                raise SuspiciousOperation(
+                    _("The parent cannot be the storage location itself or one of its children"))
+
+        cls.update_parents(location, parent)
+
+        # the descendants keep their parents until the moved location, and take its new parents
+        with connection.cursor() as cursor:
+            cursor.execute("""UPDATE "%(table)s"
+                SET "parent_list" = "parent_list"[1:array_position("parent_list", %%s)] || %%s::INTEGER[]
+                WHERE "parent_list" @> ARRAY[%%s] RETURNING "id" """ % {'table': StorageLocation._meta.db_table},
+                [location.id, location.parent_list, location.id])
+
+            updated_ids = [row[0] for row in cursor.fetchall()]
+
+        # raw SQL does not send any signal
+        entities_bulk_changed(StorageLocation, updated_ids, fields={'updated_fields': ['parent_list']})
+        cursor_query_count_cache.invalidate(StorageLocation._meta.db_table)
+
+        cls.invalidate_occupancy()
+
+    @classmethod
+    def ancestors(cls, location):
+        """
+        Ancestors of a location, from its direct parent to the root, using a single query.
+        :param location: Valid storage location instance.
+        :return: List of storage location instances.
+        """
+        if not location.parent_list:
+            return []
+
+        ancestors = StorageLocation.objects.in_bulk(location.parent_list)
+        return [ancestors[ancestor_id] for ancestor_id in location.parent_list if ancestor_id in ancestors]
+
+    @classmethod
+    def children_counts(cls, location_ids):
+        """
+        Number of direct children of some locations, using a single query.
+        :param location_ids: List of storage location ids.
+        :return: Dict of the count by location id (missing means 0).
+        """
+        with connection.cursor() as cursor:
+            cursor.execute("""SELECT "parent_id", COUNT(*) FROM "%s" WHERE "parent_id" = ANY(%%s)
+                GROUP BY "parent_id" """ % StorageLocation._meta.db_table, [list(location_ids)])
+
+            return dict(cursor.fetchall())
+
+    @classmethod
+    def subtree(cls, location=None, depth=None):
+        """
+        List a sub-tree using a single query. Each location comes with its number of direct children, its number
+        of batches, and the number of batches of its whole sub-tree.
+
+        :param location: Root storage location instance of the sub-tree (included), or None for the whole tree.
+        :param depth: Max depth under the root, None for unlimited (the root is at depth 0).
+        :return: List of dict ordered by depth and name.
+        """
+        params = []
+
+        if location is not None:
+            where = 'WHERE (l."id" = %s OR l."parent_list" @> ARRAY[%s])'
+            params += [location.id, location.id]
+            base_depth = len(location.parent_list)
+        else:
+            where = 'WHERE TRUE'
+            base_depth = 0
+
+        if depth is not None:
+            where += ' AND cardinality(l."parent_list") <= %s'
+            params.append(base_depth + depth)
+
+            # the deeper locations are not listed, their batches are counted per listed location
+            subtree_batches_count = """(SELECT COUNT(*) FROM "%(batch_table)s" AS b
+                INNER JOIN "%(table)s" AS s ON s."id" = b."location_id"
+                WHERE s."id" = l."id" OR s."parent_list" @> ARRAY[l."id"])"""
+        else:
+            # summed from the listed locations
+            subtree_batches_count = "NULL"
+
+        with connection.cursor() as cursor:
+            cursor.execute(("""SELECT l."id", l."name", l."label", l."parent_id", l."parent_list",
+                    (SELECT COUNT(*) FROM "%(table)s" AS c WHERE c."parent_id" = l."id") AS "children_count",
+                    (SELECT COUNT(*) FROM "%(batch_table)s" AS b WHERE b."location_id" = l."id") AS "batches_count",
+                    """ + subtree_batches_count + """ AS "subtree_batches_count"
+                FROM "%(table)s" AS l %(where)s
+                ORDER BY cardinality(l."parent_list"), l."name" """) % {
+                    'table': StorageLocation._meta.db_table,
+                    'batch_table': Batch._meta.db_table,
+                    'where': where
+                }, params)
+
+            rows = cursor.fetchall()
+
+        items = []
+        items_by_id = {}
+
+        for row in rows:
+            item = {
+                'id': row[0],
+                'name': row[1],
+                'label': row[2],
+                'parent': row[3],
+                'parent_list': row[4],
+                'depth': len(row[4]) - base_depth,
+                'children_count': row[5],
+                'batches_count': row[6],
+                'subtree_batches_count': row[7] if row[7] is not None else row[6]
+            }
+
+            items.append(item)
+            items_by_id[item['id']] = item
+
+        # add the batches of each location to its listed ancestors
+        if depth is None:
+            for item in items:
+                if not item['batches_count']:
+                    continue
+
+                for ancestor_id in item['parent_list']:
+                    ancestor = items_by_id.get(ancestor_id)
+                    if ancestor is None:
+                        break
+
+                    ancestor['subtree_batches_count'] += item['batches_count']
+
+        return items
+
+    @classmethod
+    def batches(cls, location):
+        """
+        Query set of the batches stored anywhere under a location (included).
+        :param location: Valid storage location instance.
+        :return: Query set of batches.
+        """
+        return Batch.objects.filter(Q(location_id=location.id) | Q(location__parent_list__contains=[location.id]))
+
+    @classmethod
+    def occupancy_timeout(cls):
+        return getattr(settings, 'STORAGE_LOCATION_OCCUPANCY_CACHE_TIMEOUT', 60)
+
+    @classmethod
+    def occupancy(cls, location):
+        """
+        Summary of the occupancy of a location (included) and its sub-tree : number of locations, of empty
+        locations and of batches. It is cached, invalidated at each change of the tree. The moves of batches are
+        taken in account at the end of the validity (STORAGE_LOCATION_OCCUPANCY_CACHE_TIMEOUT setting).
+        :param location: Valid storage location instance.
+        :return: Dict
+        """
+        cache_name = cache_manager.make_cache_name(cls.OCCUPANCY_CACHE_NAME, str(location.id))
+        results = cache_manager.get('accession', cache_name)
+
+        if results is not None:
+            return results
+
+        with connection.cursor() as cursor:
+            cursor.execute("""SELECT COUNT(*), COUNT(*) FILTER (WHERE "batches_count" = 0), SUM("batches_count")
+                FROM (SELECT (SELECT COUNT(*) FROM "%(batch_table)s" AS b WHERE b."location_id" = l."id")
+                    AS "batches_count" FROM "%(table)s" AS l WHERE l."id" = %%s OR l."parent_list" @> ARRAY[%%s]
+                ) AS o""" % {
+                    'table': StorageLocation._meta.db_table,
+                    'batch_table': Batch._meta.db_table
+                }, [location.id, location.id])
+
+            row = cursor.fetchone()
+
+        results = {
+            'locations_count': row[0],
+            'empty_locations_count': row[1],
+            'batches_count': row[2] or 0
+        }
+
+        cache_manager.set('accession', cache_name, results, cls.occupancy_timeout())
+
+        return results
+
+    @classmethod
+    def invalidate_occupancy(cls):
+        cache_manager.delete('accession', cache_manager.make_cache_name(cls.OCCUPANCY_CACHE_NAME, '*'))
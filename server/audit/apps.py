@@ -50,6 +50,16 @@ class CollGateAudit(ApplicationMain):
         if var and var != '':
             localsettings.migration_username = var
 
+        # project setting can overrides the audit writer settings
+        writer_settings = dict(appsettings.AUDIT_WRITER)
+        writer_settings.update(getattr(settings, 'AUDIT_WRITER', {}))
+
+        from .writer import audit_writer
+        audit_writer.setup(
+            background=writer_settings['BACKGROUND'] and not localsettings.migration_mode,
+            batch_size=writer_settings['BATCH_SIZE'],
+            interval=writer_settings['INTERVAL'])
+
         if localsettings.migration_audit:
             UserModel = get_user_model()
 
@@ -25,3 +25,9 @@ AUDIT_MIGRATION = {
     'AUDIT': True,          # correspond to environment variable COLLGATE_MIGRATION_AUDIT
     'USERNAME': "root"      # correspond to environment variable COLLGATE_MIGRATION_AUDIT_USERNAME
 }
+
+AUDIT_WRITER = {
+    'BACKGROUND': False,    # if true audits are written by a thread of the process, out of the request
+    'BATCH_SIZE': 1000,     # max number of audits per insert
+    'INTERVAL': 1.0         # interval in seconds between two writes in background mode
+}
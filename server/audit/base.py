@@ -12,7 +12,7 @@ import operator
 
 from django.contrib.auth.models import Permission, User, Group
 from django.contrib.contenttypes.models import ContentType
-from django.core.exceptions import SuspiciousOperation, ObjectDoesNotExist
+from django.core.exceptions import SuspiciousOperation
 from django.db.models import Q
 from django.shortcuts import get_object_or_404
 
@@ -48,8 +48,8 @@ def search_audit_for_username(request):
     Search audits entry for a specific username and ordered by timestamp.
     Infinite pagination with cursor returned by next and desc order on timestamp.
 
-    @note This request potentially can do a lot of query in worsts cases such as querying the name directly from
-    the entity itself, and more if the natural_get accessor need to perform some extra queries.
+    @note The names of the entities are resolved with a query per content type, and more if the natural_name
+    accessor need to perform some extra queries.
     """
     results_per_page = min(int_arg(request.GET.get('more', 30)), 100)
     cursor = request.GET.get('cursor')
@@ -65,18 +65,33 @@ def search_audit_for_username(request):
     else:
         qs = Audit.objects.filter(user=user)
 
-    audits = qs.order_by('-timestamp').order_by('-id')[:limit]
+    audits = list(qs.order_by('-timestamp').order_by('-id')[:limit])
+
+    # resolve the names of the entities with a single query per content type
+    objects_ids = {}
+
+    for audit in audits:
+        objects_ids.setdefault(audit.content_type_id, set()).add(audit.object_id)
+
+    entities_names = {}
+
+    for content_type_id, ids in objects_ids.items():
+        model_class = ContentType.objects.get_for_id(content_type_id).model_class()
+        if model_class is None:
+            continue
+
+        for entity in model_class._default_manager.filter(id__in=ids):
+            entities_names[(content_type_id, entity.id)] = entity.natural_name()
 
     audit_list = []
 
     for audit in audits:
-        entity_name = ""
+        content_type = ContentType.objects.get_for_id(audit.content_type_id)
+        entity_name = entities_names.get((audit.content_type_id, audit.object_id))
 
-        try:
-            entity = audit.content_type.get_object_for_this_type(id=audit.object_id)
-            entity_name = entity.natural_name()
-        except ObjectDoesNotExist:
+        if entity_name is None:
             fields = audit.fields
+            entity_name = ""
 
             # get name in fields if the entity no longer exists, those are the common fields for name
             if 'name' in fields:
@@ -94,7 +109,7 @@ def search_audit_for_username(request):
             'username': user.username,
             'timestamp': audit.timestamp,
             'type': audit.type,
-            'content_type': '.'.join(audit.content_type.natural_key()),
+            'content_type': '.'.join(content_type.natural_key()),
             'object_id': audit.object_id,
             'object_name': entity_name,
             'fields': audit.fields
@@ -148,10 +163,13 @@ def search_audit_for_entity(request):
     else:
         qs = Audit.objects.filter(content_type=content_type, object_id=object_id)
 
-    audits = qs.order_by('-timestamp').order_by('-id')[:limit]
+    audits = qs.select_related('user').order_by('-timestamp').order_by('-id')[:limit]
 
     audit_list = []
 
+    content_type_name = '.'.join(content_type.natural_key())
+    entity_name = entity.natural_name()
+
     for audit in audits:
         audit_list.append({
             'id': audit.id,
@@ -159,9 +177,9 @@ def search_audit_for_entity(request):
             'username': audit.user.username,
             'timestamp': audit.timestamp,
             'type': audit.type,
-            'content_type': '.'.join(audit.content_type.natural_key()),
+            'content_type': content_type_name,
             'object_id': entity.id,
-            'object_name': entity.natural_name(),
+            'object_name': entity_name,
             'fields': audit.fields
         })
 
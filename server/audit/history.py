@@ -84,73 +84,34 @@ def search_audit_value_history_for_entity(request):
     else:
         qs = Audit.objects.filter(content_type=content_type, object_id=object_id)
 
-    # interested in change of value so update and create only
-    qs = qs.filter(type__in=[AuditType.UPDATE, AuditType.CREATE])
+    # interested in change of value so update and create only, and filter the fields in SQL
+    created = Q(type=AuditType.CREATE.value)
+    descriptors_updated = Q(type=AuditType.UPDATE.value) & Q(fields__updated_fields__contains=["descriptors"])
+    comments_updated = Q(type=AuditType.UPDATE.value) & Q(fields__updated_fields__contains=["comments"]) & ~Q(
+        fields__updated_fields__contains=["descriptors"])
+
+    if is_descriptor:
+        qs = qs.filter(((created | descriptors_updated) & Q(fields__descriptors__has_key=value_name)) |
+                       (comments_updated & Q(fields__has_key=value_name)))
+    elif is_comment:
+        qs = qs.filter(((created | comments_updated) & Q(fields__comments__has_key=value_name)) |
+                       (descriptors_updated & Q(fields__has_key=value_name)))
+    else:
+        qs = qs.filter((created | descriptors_updated | comments_updated) & Q(fields__has_key=value_name))
 
-    audits = qs.order_by('-timestamp').order_by('-id')[:limit]
+    audits = qs.select_related('user').order_by('-timestamp').order_by('-id')[:limit]
 
     audit_list = []
 
     for audit in audits:
-        if audit.type == AuditType.CREATE.value:
-            if is_descriptor:
-                descriptors = audit.fields.get("descriptors")
-                if descriptors is None:
-                    continue
-
-                if value_name not in descriptors:
-                    continue
-
-                value = descriptors.get(value_name)
-            elif is_comment:
-                comments = audit.fields.get("comments")
-                if comments is None:
-                    continue
-
-                if value_name not in comments:
-                    continue
-
-                value = comments.get(value_name)
-            else:
-                if value_name not in audit.fields:
-                    continue
-
-                value = audit.fields.get(value_name)
-
-        elif "descriptors" in audit.fields.get("updated_fields", []):
-            if is_descriptor:
-                descriptors = audit.fields.get("descriptors")
-                if descriptors is None:
-                    continue
-
-                if value_name not in descriptors:
-                    continue
-
-                value = descriptors.get(value_name)
-            else:
-                if value_name not in audit.fields:
-                    continue
-
-                value = audit.fields.get(value_name)
-
-        elif "comments" in audit.fields.get("updated_fields", []):
-            if is_comment:
-                comments = audit.fields.get("comments")
-                if comments is None:
-                    continue
-
-                if value_name not in comments:
-                    continue
-
-                value = comments.get(value_name)
-            else:
-                if value_name not in audit.fields:
-                    continue
-
-                value = audit.fields.get(value_name)
+        updated_fields = audit.fields.get("updated_fields", [])
 
+        if is_descriptor and (audit.type == AuditType.CREATE.value or "descriptors" in updated_fields):
+            value = audit.fields["descriptors"].get(value_name)
+        elif is_comment and (audit.type == AuditType.CREATE.value or "descriptors" not in updated_fields):
+            value = audit.fields["comments"].get(value_name)
         else:
-            continue
+            value = audit.fields.get(value_name)
 
         audit_list.append({
             'id': audit.id,
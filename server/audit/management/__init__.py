@@ -0,0 +1,10 @@
+# -*- coding: utf-8; -*-
+#
+# @file __init__.py
+# @brief 
+# @author Frédéric SCHERMA (INRA UMR1095)
+# @date 2016-09-01
+# @copyright Copyright (c) 2016 INRA/CIRAD
+# @license MIT (see LICENSE file)
+# @details 
+
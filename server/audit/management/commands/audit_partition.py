@@ -0,0 +1,71 @@
+# -*- coding: utf-8; -*-
+#
+# @file audit_partition.py
+# @brief Manage the monthly partitions of the audit table.
+# @author Frédéric SCHERMA (INRA UMR1095)
+# @date 2018-10-18
+# @copyright Copyright (c) 2018 INRA/CIRAD
+# @license MIT (see LICENSE file)
+# @details
+
+import sys
+
+from django.core.management.base import BaseCommand, CommandError
+
+from audit.partition import is_partitioned, convert_to_partitioned, create_partitions, get_partitions
+
+
+class Command(BaseCommand):
+    help = """Convert the audit table to a monthly partitioned table (--convert), and create the partitions
+    of the next months. Should be run at least once a month when the table is partitioned."""
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--convert',
+            action='store_true',
+            dest='convert',
+            default=False,
+            help='Convert the audit table to a partitioned table (PostgreSQL 11+)',
+        )
+        parser.add_argument(
+            '--months-ahead',
+            type=int,
+            dest='months_ahead',
+            default=2,
+            help='Number of partitions to create after the current month',
+        )
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            dest='dry_run',
+            default=False,
+            help='With --convert, perform the conversion and roll it back',
+        )
+
+    def handle(self, *args, **options):
+        if options['convert']:
+            if is_partitioned():
+                raise CommandError("The audit table is already partitioned")
+
+            try:
+                created = convert_to_partitioned(options['months_ahead'], options['dry_run'])
+            except ValueError as e:
+                raise CommandError(str(e))
+
+            if options['dry_run']:
+                for name in created:
+                    sys.stdout.write('Would create partition {}\n'.format(name))
+
+                sys.stdout.write('Conversion succeed and rolled back\n')
+                return
+        else:
+            if not is_partitioned():
+                raise CommandError("The audit table is not partitioned, use --convert")
+
+            created = create_partitions(options['months_ahead'])
+
+        for name in created:
+            sys.stdout.write('Created partition {}\n'.format(name))
+
+        for name, upper in get_partitions():
+            sys.stdout.write('Partition {} until {}\n'.format(name, upper.isoformat() if upper else '-'))
@@ -23,6 +23,7 @@ from igdectk.rest.restmiddleware import RestMiddleware
 
 from main.models import Entity
 from . import localsettings
+from .writer import audit_writer
 
 
 class AuditManager(models.Manager):
@@ -118,18 +119,63 @@ class AuditManager(models.Manager):
             type=audit_type,
             fields=fields)
 
-        audit.save()
+        # written with the others audits of the transaction once committed
+        audit_writer.add(audit)
+
+    @staticmethod
+    def create_audits(user, content_type, entries, audit_type):
+        """
+        Create many audit entries for a user and many objects of the same type, written in bulk.
+
+        :param user: User model
+        :param content_type: ContentType model or string like "appname.modelname"
+        :param entries: List of pair (object identifier, fields)
+        :param audit_type: One of the models.AuditType integer value
+        :return:
+        """
+        if isinstance(content_type, str) and content_type.find('.') > 0:
+            app_name, model = content_type.split('.')
+            content_type = ContentType.objects.get_by_natural_key(app_name, model)
+
+        if not content_type or not isinstance(content_type, ContentType):
+            raise SuspiciousOperation(_("Invalid content type or application name"))
+
+        if not user or not isinstance(user, User):
+            raise SuspiciousOperation(_("Invalid user"))
+
+        audits = []
+
+        for object_id, fields in entries:
+            if not object_id:
+                raise SuspiciousOperation(_("Invalid object identifier"))
+
+            audits.append(Audit(
+                user=user,
+                content_type=content_type,
+                object_id=object_id,
+                type=audit_type,
+                fields=fields))
+
+        audit_writer.add_audits(audits)
 
     @staticmethod
     def purge_audit(datetime):
         """
-        Purge any audit entry that have a date-time greater or equal to datetime.
+        Purge any audit entry that have a date-time lesser or equal to datetime.
+        If the audit table is partitioned, the partitions fully before datetime are dropped first.
 
         :param datetime: Valid datetime object instance
         :return: Number of deleted entries
         """
+        from .partition import is_partitioned, drop_partitions_before
+
+        count = 0
+
+        if is_partitioned():
+            count += drop_partitions_before(datetime)
+
         qs = Audit.objects.filter(timestamp__lte=datetime)
-        return qs.delete()
+        return count + qs.delete()[0]
 
 
 class AuditType(ChoiceEnum):
@@ -308,6 +354,68 @@ def entity_m2m_changed(sender, instance, action, reverse, model, **kwargs):
     Audit.objects.create_audit(user, content_type, instance.pk, AuditType.M2M_CHANGE, fields)
 
 
+def entities_bulk_created(sender, instances):
+    """
+    Audit hook for entities created with bulk_create, that does not send post_save signal.
+
+    :param sender: Model class of the entities
+    :param instances: List of created instances (with theirs primary keys)
+    """
+    # if audit globally disabled
+    if not localsettings.migration_audit:
+        return
+
+    user, remote_addr = get_current_request_params()
+    entries = []
+
+    for instance in instances:
+        if hasattr(sender, 'audit_create'):
+            fields = instance.audit_create(user)
+        else:
+            fields = {}
+
+        # None means ignore audit
+        if fields is None:
+            continue
+
+        # add the uuid of the instance
+        if hasattr(instance, 'uuid'):
+            fields['uuid'] = str(instance.uuid)
+
+        # always add the status of the entity
+        if hasattr(instance, 'entity_status'):
+            fields['entity_status'] = instance.entity_status
+
+        entries.append((instance.pk, fields))
+
+    if entries:
+        content_type = ContentType.objects.get_for_model(sender)
+        Audit.objects.create_audits(user, content_type, entries, AuditType.CREATE)
+
+
+def entities_bulk_changed(sender, instances, audit_type=AuditType.UPDATE, fields=None):
+    """
+    Audit hook for entities updated or deleted in bulk (queryset update, delete or raw SQL).
+
+    :param sender: Model class of the entities
+    :param instances: List of instances or of primary keys
+    :param audit_type: AuditType (UPDATE, REMOVE, DELETE, M2M_CHANGE...)
+    :param fields: Same audit fields for each entity, default to empty dict
+    """
+    # if audit globally disabled
+    if not localsettings.migration_audit:
+        return
+
+    user, remote_addr = get_current_request_params()
+
+    entries = [(instance.pk if isinstance(instance, models.Model) else instance, dict(fields or {}))
+               for instance in instances]
+
+    if entries:
+        content_type = ContentType.objects.get_for_model(sender)
+        Audit.objects.create_audits(user, content_type, entries, audit_type)
+
+
 def audit_register_models(app_name):
     if 'django_content_type' not in connection.introspection.table_names():
         return
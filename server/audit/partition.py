@@ -0,0 +1,220 @@
+# -*- coding: utf-8; -*-
+#
+# @file partition.py
+# @brief coll-gate audit table monthly partitioning.
+# @author Frédéric SCHERMA (INRA UMR1095)
+# @date 2018-10-18
+# @copyright Copyright (c) 2018 INRA/CIRAD
+# @license MIT (see LICENSE file)
+# @details Optional range partitioning of the audit table on timestamp, one partition per month (PostgreSQL 11+).
+# A default partition receives the audits out of the monthly partitions, they are moved to their monthly partition
+# when it is created.
+
+import datetime
+import re
+
+from django.db import connection, transaction
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+
+def audit_table():
+    from .models import Audit
+    return Audit._meta.db_table
+
+
+def default_partition():
+    return "%s_default" % audit_table()
+
+
+def month_start(date):
+    """
+    First instant of the month of the given date, in UTC.
+    """
+    return datetime.datetime(date.year, date.month, 1, tzinfo=datetime.timezone.utc)
+
+
+def next_month_start(date):
+    if date.month == 12:
+        return datetime.datetime(date.year + 1, 1, 1, tzinfo=datetime.timezone.utc)
+    else:
+        return datetime.datetime(date.year, date.month + 1, 1, tzinfo=datetime.timezone.utc)
+
+
+def is_partitioned():
+    """
+    Returns True if the audit table is partitioned.
+    """
+    with connection.cursor() as cursor:
+        cursor.execute("""SELECT 1 FROM pg_partitioned_table WHERE partrelid = to_regclass(%s)""", [audit_table()])
+        return cursor.fetchone() is not None
+
+
+def get_partitions():
+    """
+    Returns the list of partitions of the audit table, ordered by upper bound, the default partition being last.
+
+    :return: List of pair (partition name, upper bound datetime or None for the default partition)
+    """
+    partitions = []
+
+    with connection.cursor() as cursor:
+        cursor.execute("""SELECT c.relname, pg_get_expr(c.relpartbound, c.oid)
+            FROM pg_inherits i JOIN pg_class c ON c.oid = i.inhrelid
+            WHERE i.inhparent = to_regclass(%s)""", [audit_table()])
+
+        for name, bound in cursor.fetchall():
+            upper = re.search(r"TO \('([^']+)'\)", bound)
+            partitions.append((name, parse_datetime(upper.group(1)) if upper else None))
+
+    partitions.sort(key=lambda x: x[1] or datetime.datetime.max.replace(tzinfo=datetime.timezone.utc))
+
+    return partitions
+
+
+def create_partitions(months_ahead=2):
+    """
+    Create the missing monthly partitions until the given number of months after the current one, and the default
+    partition if missing. The months before the current one that are not yet partitioned (maintenance not
+    performed in time) are created too, and their audits are moved from the default partition.
+
+    :param months_ahead: Number of months to create after the current one.
+    :return: List of created partitions names.
+    """
+    table = audit_table()
+    default = default_partition()
+    created = []
+
+    partitions = get_partitions()
+    has_default = any(upper is None for name, upper in partitions)
+
+    # upper bound of the already partitioned range (the legacy partition can cover the current month)
+    covered = max((upper for name, upper in partitions if upper is not None), default=None)
+
+    start = month_start(timezone.now())
+    if covered is not None and covered < start:
+        start = covered
+
+    last = month_start(timezone.now())
+    for i in range(0, months_ahead):
+        last = next_month_start(last)
+
+    with transaction.atomic(), connection.cursor() as cursor:
+        while start <= last:
+            end = next_month_start(start)
+
+            if covered is None or start >= covered:
+                name = "%s_y%04im%02i" % (table, start.year, start.month)
+
+                moved = False
+
+                if has_default:
+                    cursor.execute("""SELECT EXISTS(SELECT 1 FROM "%s" WHERE "timestamp" >= %%s AND "timestamp" < %%s)
+                        """ % default, [start, end])
+                    moved = cursor.fetchone()[0]
+
+                # the rows of the default partition must not be in the range of a new partition
+                if moved:
+                    cursor.execute("""ALTER TABLE "%s" DETACH PARTITION "%s" """ % (table, default))
+
+                cursor.execute("""CREATE TABLE "%s" PARTITION OF "%s" FOR VALUES FROM ('%s') TO ('%s')""" % (
+                    name, table, start.isoformat(), end.isoformat()))
+
+                if moved:
+                    cursor.execute("""WITH moved AS (DELETE FROM "%s" WHERE "timestamp" >= %%s AND "timestamp" < %%s
+                        RETURNING *) INSERT INTO "%s" SELECT * FROM moved""" % (default, table), [start, end])
+                    cursor.execute("""ALTER TABLE "%s" ATTACH PARTITION "%s" DEFAULT""" % (table, default))
+
+                created.append(name)
+
+            start = end
+
+        if not has_default:
+            cursor.execute("""CREATE TABLE "%s" PARTITION OF "%s" DEFAULT""" % (default, table))
+            created.append(default)
+
+    return created
+
+
+def convert_to_partitioned(months_ahead=2, dry_run=False):
+    """
+    Convert the audit table to a table partitioned by month on timestamp. The previous table is kept as
+    the partition of any audits before the next month, and the new partitions are created from the next month,
+    with the default partition.
+    The primary key of a partitioned table must include the partition key, so it becomes (id, timestamp), for the
+    partitioned table and for the previous table before to attach it.
+
+    :param months_ahead: Number of months to create after the current one.
+    :param dry_run: If True the whole conversion is performed and then rolled back.
+    :return: List of created partitions names.
+    """
+    table = audit_table()
+    legacy = "%s_legacy" % table
+    bound = next_month_start(timezone.now())
+
+    with transaction.atomic(), connection.cursor() as cursor:
+        cursor.execute("""LOCK TABLE "%s" IN ACCESS EXCLUSIVE MODE""" % table)
+
+        # the previous table must fit into its partition
+        cursor.execute("""SELECT COUNT(*) FROM "%s" WHERE "timestamp" >= %%s""" % table, [bound])
+        outside = cursor.fetchone()[0]
+        if outside:
+            raise ValueError("%i audits are after the bound of the legacy partition %s" % (
+                outside, bound.isoformat()))
+
+        cursor.execute("""ALTER TABLE "%s" RENAME TO "%s" """ % (table, legacy))
+        cursor.execute("""CREATE TABLE "%s" (LIKE "%s" INCLUDING DEFAULTS) PARTITION BY RANGE ("timestamp")""" % (
+            table, legacy))
+
+        cursor.execute("""ALTER SEQUENCE "%s_id_seq" OWNED BY "%s"."id" """ % (table, table))
+        cursor.execute("""ALTER TABLE "%s" ADD PRIMARY KEY ("id", "timestamp")""" % table)
+
+        # a partition cannot have another primary key than the one of the partitioned table
+        cursor.execute("""SELECT conname FROM pg_constraint WHERE conrelid = to_regclass(%s) AND contype = 'p'""",
+                       [legacy])
+        for row in cursor.fetchall():
+            cursor.execute("""ALTER TABLE "%s" DROP CONSTRAINT "%s" """ % (legacy, row[0]))
+
+        cursor.execute("""ALTER TABLE "%s" ADD PRIMARY KEY ("id", "timestamp")""" % legacy)
+
+        cursor.execute("""ALTER TABLE "%s" ADD FOREIGN KEY ("content_type_id") REFERENCES "django_content_type" ("id")
+            DEFERRABLE INITIALLY DEFERRED""" % table)
+        cursor.execute("""ALTER TABLE "%s" ADD FOREIGN KEY ("user_id") REFERENCES "auth_user" ("id")
+            DEFERRABLE INITIALLY DEFERRED""" % table)
+
+        # same indexes as the model (index_together)
+        cursor.execute("""CREATE INDEX ON "%s" ("timestamp", "id", "content_type_id", "object_id")""" % table)
+        cursor.execute("""CREATE INDEX ON "%s" ("timestamp", "id", "user_id")""" % table)
+        cursor.execute("""CREATE INDEX ON "%s" ("timestamp", "id", "user_id", "content_type_id", "object_id")""" % (
+            table,))
+
+        cursor.execute("""ALTER TABLE "%s" ATTACH PARTITION "%s" FOR VALUES FROM (MINVALUE) TO ('%s')""" % (
+            table, legacy, bound.isoformat()))
+
+        created = create_partitions(months_ahead)
+
+        if dry_run:
+            transaction.set_rollback(True)
+
+    return created
+
+
+def drop_partitions_before(date):
+    """
+    Drop any partitions whose upper bound is lesser or equal to the given date.
+
+    :param date: Datetime
+    :return: Number of audits of the dropped partitions
+    """
+    count = 0
+
+    with transaction.atomic(), connection.cursor() as cursor:
+        for name, upper in get_partitions():
+            if upper is not None and upper <= date:
+                cursor.execute("""LOCK TABLE "%s" IN ACCESS EXCLUSIVE MODE""" % name)
+                cursor.execute("""SELECT COUNT(*) FROM "%s" """ % name)
+                count += cursor.fetchone()[0]
+
+                cursor.execute("""DROP TABLE "%s" """ % name)
+
+    return count
@@ -0,0 +1,115 @@
+# -*- coding: utf-8; -*-
+#
+# @file test_partition.py
+# @brief 
+# @author Frédéric SCHERMA (INRA UMR1095)
+# @date 2018-10-18
+# @copyright Copyright (c) 2018 INRA/CIRAD
+# @license MIT (see LICENSE file)
+# @details 
+
+import datetime
+
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.contrib.contenttypes.models import ContentType
+from django.db import connection
+from django.test import TestCase
+from django.utils import timezone
+
+from audit.models import Audit, AuditType
+from audit.partition import convert_to_partitioned, create_partitions, default_partition, get_partitions, \
+    is_partitioned, next_month_start
+
+
+# the schema changes are rolled back with the transaction of the test
+class TestAuditPartition(TestCase):
+    def setUp(self):
+        if connection.pg_version < 110000:
+            self.skipTest("Partitioned tables with primary keys requires PostgreSQL 11+")
+
+        self.user = User.objects.create_user('audit', password='audit')
+        self.content_type = ContentType.objects.get_for_model(User)
+
+        self.create_audit()
+
+    def create_audit(self):
+        return Audit.objects.create(
+            user=self.user,
+            content_type=self.content_type,
+            object_id=self.user.pk,
+            type=AuditType.CREATE.value,
+            fields={})
+
+    def test_dry_run(self):
+        created = convert_to_partitioned(months_ahead=2, dry_run=True)
+
+        self.assertEqual(len(created), 3)
+        self.assertEqual(created[-1], default_partition())
+        self.assertFalse(is_partitioned())
+
+    def test_convert(self):
+        created = convert_to_partitioned(months_ahead=2)
+
+        self.assertTrue(is_partitioned())
+
+        partitions = get_partitions()
+        self.assertEqual(partitions[0][0], "%s_legacy" % Audit._meta.db_table)
+        self.assertEqual([name for name, upper in partitions[1:]], created)
+
+        # an audit of the next month goes into its partition
+        audit = self.create_audit()
+        Audit.objects.filter(pk=audit.pk).update(timestamp=next_month_start(timezone.now()))
+
+        with connection.cursor() as cursor:
+            cursor.execute('SELECT tableoid::regclass::text FROM "%s" WHERE "id" = %%s' % Audit._meta.db_table,
+                           [audit.pk])
+            self.assertEqual(cursor.fetchone()[0], created[0])
+
+        self.assertEqual(Audit.objects.count(), 2)
+
+    def partition_of(self, audit):
+        with connection.cursor() as cursor:
+            cursor.execute('SELECT tableoid::regclass::text FROM "%s" WHERE "id" = %%s' % Audit._meta.db_table,
+                           [audit.pk])
+            return cursor.fetchone()[0]
+
+    def test_default_partition(self):
+        convert_to_partitioned(months_ahead=1)
+
+        # after the last monthly partition, the maintenance has not been performed
+        later = next_month_start(next_month_start(next_month_start(timezone.now())))
+
+        audit = self.create_audit()
+        Audit.objects.filter(pk=audit.pk).update(timestamp=later)
+        self.assertEqual(self.partition_of(audit), default_partition())
+
+        with mock.patch('audit.partition.timezone.now', return_value=later):
+            created = create_partitions(months_ahead=0)
+
+        # the missing months are created, and the audit is moved from the default partition
+        self.assertEqual(len(created), 2)
+        self.assertEqual(self.partition_of(audit), created[-1])
+        self.assertEqual(get_partitions()[-1][0], default_partition())
+
+    def test_purge(self):
+        convert_to_partitioned(months_ahead=1)
+
+        bound = next_month_start(timezone.now())
+
+        audit = self.create_audit()
+        Audit.objects.filter(pk=audit.pk).update(timestamp=bound)
+
+        # the legacy partition is dropped, and the audit of the next month deleted
+        self.assertEqual(Audit.purge_audit(bound + datetime.timedelta(days=1)), 2)
+        self.assertEqual(Audit.objects.count(), 0)
+
+    def test_audits_after_bound(self):
+        audit = self.create_audit()
+        Audit.objects.filter(pk=audit.pk).update(timestamp=next_month_start(timezone.now()))
+
+        with self.assertRaises(ValueError):
+            convert_to_partitioned()
+
+        self.assertFalse(is_partitioned())
@@ -0,0 +1,119 @@
+# -*- coding: utf-8; -*-
+#
+# @file test_writer.py
+# @brief 
+# @author Frédéric SCHERMA (INRA UMR1095)
+# @date 2018-10-18
+# @copyright Copyright (c) 2018 INRA/CIRAD
+# @license MIT (see LICENSE file)
+# @details 
+
+from django.db import transaction
+from django.test import TransactionTestCase
+
+from audit.writer import AuditWriter
+
+
+class FakeAuditWriter(AuditWriter):
+    """
+    Keep the written audits in place of inserting them.
+    """
+    def __init__(self):
+        super().__init__()
+        self.written = []
+
+    def _write(self, audits):
+        self.written.extend(audits)
+
+
+class RollbackError(Exception):
+    pass
+
+
+# on_commit hooks are only run with real transactions
+class TestAuditWriter(TransactionTestCase):
+    def setUp(self):
+        self.writer = FakeAuditWriter()
+
+    def test_autocommit(self):
+        self.writer.add('a')
+        self.assertEqual(self.writer.written, ['a'])
+
+    def test_commit(self):
+        with transaction.atomic():
+            self.writer.add('a')
+            self.writer.add_audits(['b', 'c'])
+            self.assertEqual(self.writer.written, [])
+
+        self.assertEqual(self.writer.written, ['a', 'b', 'c'])
+
+    def test_rollback(self):
+        try:
+            with transaction.atomic():
+                self.writer.add('a')
+                raise RollbackError()
+        except RollbackError:
+            pass
+
+        self.assertEqual(self.writer.written, [])
+
+    def test_rolled_back_transaction(self):
+        try:
+            with transaction.atomic():
+                self.writer.add('a')
+                raise RollbackError()
+        except RollbackError:
+            pass
+
+        # the flush hook of the rolled back transaction has not run
+        with transaction.atomic():
+            self.writer.add('b')
+            self.writer.add('c')
+
+        self.assertEqual(self.writer.written, ['b', 'c'])
+
+        with transaction.atomic():
+            self.writer.add('d')
+            self.writer.add('e')
+
+        self.assertEqual(self.writer.written, ['b', 'c', 'd', 'e'])
+
+    def test_rolled_back_savepoint(self):
+        with transaction.atomic():
+            self.writer.add('a')
+
+            try:
+                with transaction.atomic():
+                    self.writer.add('b')
+                    raise RollbackError()
+            except RollbackError:
+                pass
+
+        # the last added audits are discarded, the previous ones are written at the commit
+        self.assertEqual(self.writer.written, ['a'])
+
+    def test_rolled_back_first_savepoint(self):
+        with transaction.atomic():
+            try:
+                with transaction.atomic():
+                    self.writer.add('a')
+                    raise RollbackError()
+            except RollbackError:
+                pass
+
+            with transaction.atomic():
+                self.writer.add('b')
+
+            # another hook after the audits
+            transaction.on_commit(lambda: None)
+
+        self.assertEqual(self.writer.written, ['b'])
+
+    def test_batch_size(self):
+        self.writer.batch_size = 2
+
+        with transaction.atomic():
+            self.writer.add_audits(['a', 'b'])
+            self.writer.add('c')
+
+        self.assertEqual(self.writer.written, ['a', 'b', 'c'])
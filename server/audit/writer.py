@@ -0,0 +1,189 @@
+# -*- coding: utf-8; -*-
+#
+# @file writer.py
+# @brief coll-gate audit buffered writer.
+# @author Frédéric SCHERMA (INRA UMR1095)
+# @date 2018-10-18
+# @copyright Copyright (c) 2018 INRA/CIRAD
+# @license MIT (see LICENSE file)
+# @details
+
+import atexit
+import logging
+import threading
+
+from functools import partial
+
+from django.db import transaction, connection
+
+logger = logging.getLogger('collgate')
+
+
+class AuditWriter(object):
+    """
+    Buffered writer of audit entries.
+
+    The audits are collected for the duration of the transaction, and inserted with a single bulk_create once
+    the transaction is committed. Each added audit is associated to an on_commit hook, in way to be discarded
+    with a rolled back transaction or savepoint. A single flush hook is registered with the first audits of the
+    transaction, and the hooks of the next audits wait for it. If it has been discarded with a rolled back
+    savepoint, or if it has already run, the hooks of the next audits write them. Outside of a transaction the
+    audits are written immediately.
+
+    In background mode, the committed audits are queued and inserted by a thread of the process, out of the
+    request, at each interval or when the queue reach the batch size.
+    """
+
+    def __init__(self):
+        self._local = threading.local()
+
+        self.background = False
+        self.batch_size = 1000
+        self.interval = 1.0
+
+        self._queue = []
+        self._lock = threading.Lock()
+        self._event = threading.Event()
+        self._thread = None
+
+    def setup(self, background=False, batch_size=1000, interval=1.0):
+        """
+        Configure the writer.
+
+        :param background: If True the committed audits are written by a thread of the process.
+        :param batch_size: Max number of audits per insert, and size of the queue that wakes up the thread.
+        :param interval: Interval in seconds between two writes of the queue in background mode.
+        """
+        self.background = background
+        self.batch_size = batch_size
+        self.interval = interval
+
+        if self.background and self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="audit-writer")
+            self._thread.daemon = True
+            self._thread.start()
+
+            atexit.register(self.flush_queue)
+
+    def _committed(self):
+        committed = getattr(self._local, 'committed', None)
+
+        if committed is None:
+            committed = self._local.committed = []
+
+        return committed
+
+    def add(self, audit):
+        """
+        Add an audit to be written when the current transaction is committed.
+
+        :param audit: Audit model instance (not saved).
+        """
+        self.add_audits((audit,))
+
+    def add_audits(self, audits):
+        """
+        Add many audits to be written when the current transaction is committed.
+
+        :param audits: List of Audit model instances (not saved).
+        """
+        if not audits:
+            return
+
+        audits = list(audits)
+
+        if transaction.get_autocommit():
+            # autocommit, the audits are already committed
+            self._committed().extend(audits)
+            self.flush()
+            return
+
+        token = getattr(self._local, 'token', None)
+
+        if token is None:
+            # first audits of the transaction, followed by the flush hook, in the same savepoint scope
+            token = self._local.token = object()
+            transaction.on_commit(partial(self._on_commit, audits, token, True))
+            transaction.on_commit(partial(self._on_commit_flush, token))
+        else:
+            transaction.on_commit(partial(self._on_commit, audits, token, False))
+
+    def _on_commit(self, audits, token, first):
+        committed = self._committed()
+        committed.extend(audits)
+
+        if first:
+            # the flush hook is not discarded, it is the next hook
+            self._local.pending = token
+        elif getattr(self._local, 'pending', None) is not token:
+            # the flush hook has already run, or has been discarded with the first audits of the transaction
+            # (rolled back savepoint, or flag of a rolled back transaction)
+            if getattr(self._local, 'token', None) is token:
+                self._local.token = None
+
+            self.flush()
+            return
+
+        # to limit the memory usage, the flush hook writes the remaining audits
+        if len(committed) >= self.batch_size:
+            self.flush()
+
+    def _on_commit_flush(self, token):
+        if getattr(self._local, 'token', None) is token:
+            self._local.token = None
+
+        self._local.pending = None
+        self.flush()
+
+    def flush(self):
+        """
+        Write the committed audits of the current thread, or queue them in background mode.
+        """
+        audits = self._committed()
+
+        if not audits:
+            return
+
+        self._local.committed = []
+
+        if self.background:
+            with self._lock:
+                self._queue.extend(audits)
+                size = len(self._queue)
+
+            if size >= self.batch_size:
+                self._event.set()
+        else:
+            self._write(audits)
+
+    def flush_queue(self):
+        """
+        Write the queued audits (background mode).
+        """
+        with self._lock:
+            audits = self._queue
+            self._queue = []
+
+        if audits:
+            self._write(audits)
+
+    def _write(self, audits):
+        from .models import Audit
+        Audit.objects.bulk_create(audits, batch_size=self.batch_size)
+
+    def _run(self):
+        while True:
+            self._event.wait(self.interval)
+            self._event.clear()
+
+            try:
+                self.flush_queue()
+            except Exception as e:
+                logger.error("Unable to write audits: %s" % repr(e))
+
+                # the connection could be in a broken state
+                connection.close()
+
+
+# Singleton of audit writer
+audit_writer = AuditWriter()
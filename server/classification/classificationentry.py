@@ -26,6 +26,7 @@ from igdectk.rest.handler import *
 from igdectk.rest.response import HttpResponseRest
 from main.cursor import CursorQuery
 from main.models import Language, EntitySynonymType
+from main.search import search_backend
 from .base import RestClassification
 from .controller import ClassificationEntryManager
 from .models import ClassificationEntry
@@ -191,9 +192,7 @@ def get_classification_entry_list(request):
         filters = json.loads(request.GET['filters'])
         cq.filter(filters)
 
-    cq.prefetch_related(Prefetch(
-            "synonyms",
-            queryset=ClassificationEntrySynonym.objects.all().order_by('synonym_type', 'language')))
+    cq.project(json.loads(request.GET.get('columns', 'null')))
 
     cq.select_related('parent->name', 'parent->rank')
 
@@ -202,35 +201,18 @@ def get_classification_entry_list(request):
 
     classification_entry_items = []
 
-    for classification_entry in cq:
+    for row in cq.rows():
         c = {
-            'id': classification_entry.id,
-            'name': classification_entry.name,
-            'parent': classification_entry.parent_id,
-            'rank': classification_entry.rank_id,
-            'layout': classification_entry.layout_id,
-            'descriptors': classification_entry.descriptors,
-            'parent_list': classification_entry.parent_list,
-            # 'parent_details': None,
-            'synonyms': {}
+            'id': row['id'],
+            'name': row['name'],
+            'parent': row['parent_id'],
+            'rank': row['rank_id'],
+            'layout': row['layout_id'],
+            'descriptors': row['descriptors'],
+            'parent_list': row['parent_list'],
+            'synonyms': row.get('synonyms', {})
         }
 
-        # if classification_entry.parent:
-        #     c['parent_details'] = {
-        #         'id': classification_entry.parent.id,
-        #         'name': classification_entry.parent.name,
-        #         'rank': classification_entry.parent.rank_id
-        #     }
-
-        for synonym in classification_entry.synonyms.all():
-            synonym_type = EntitySynonymType.objects.get(id=synonym.synonym_type_id)
-            c['synonyms'][synonym_type.name] = {
-                'id': synonym.id,
-                'name': synonym.name,
-                'synonym_type': synonym.synonym_type_id,
-                'language': synonym.language
-            }
-
         classification_entry_items.append(c)
 
     results = {
@@ -260,7 +242,7 @@ def get_classification_list_count(request):
         filters = json.loads(request.GET['filters'])
         cq.filter(filters)
 
-    count = cq.count()
+    count = cq.count(approximate=request.GET.get('approximate') == 'true', cached=True)
 
     results = {
         'count': count
@@ -334,9 +316,9 @@ def search_classification_entry(request):
         name_method = filters.get('method', 'ieq')
 
         if name_method == 'ieq':
-            qs = qs.filter(synonyms__name__iexact=filters['name'])
+            qs = qs.filter(search_backend.q('synonyms__name', 'ieq', filters['name']))
         elif name_method == 'icontains':
-            qs = qs.filter(synonyms__name__icontains=filters['name'])
+            qs = qs.filter(search_backend.q('synonyms__name', 'icontains', filters['name']))
 
     if 'classification' in filters['fields']:
         classification_method = filters.get('classification_method', 'eq')
@@ -429,8 +411,7 @@ def patch_classification_entry(request, cls_id):
 
     if 'parent' in request.data:
         if request.data['parent'] is None:
-            classification_entry.parent = None
-            classification_entry.parent_list = []
+            parent = None
 
             result['parent'] = None
             result['parent_list'] = []
@@ -440,35 +421,34 @@ def patch_classification_entry(request, cls_id):
 
             parent = get_object_or_404(ClassificationEntry, id=pcls_id)
 
-            classification_entry.parent = parent
-
             # @todo rank level
             if parent.rank_id >= classification_entry.rank_id:
                 raise SuspiciousOperation(_("The rank of the parent must be lowest than the classification entry itself"))
 
-            # make parent list
-            ClassificationEntryManager.update_parents(classification_entry, parent)
-
-            # query for parents
-            parents = []
-            parents_cls = ClassificationEntry.objects.filter(id__in=classification_entry.parent_list)
-
-            for parent in parents_cls:
-                parents.insert(0, {
-                    'id': parent.id,
-                    'name': parent.name,
-                    'rank': parent.rank_id,
-                    'parent': parent.parent_id
-                })
-
-            result['parent'] = parent.id
-            result['parent_list'] = parents
-            result['parent_details'] = parents
-
         classification_entry.update_field(['parent', 'parent_list'])
 
     try:
         with transaction.atomic():
+            # change of parent, for the entry and its whole sub-tree
+            if 'parent' in request.data:
+                ClassificationEntryManager.move_classification_entry(classification_entry, parent)
+
+                if parent is not None:
+                    # query for parents
+                    parents = []
+
+                    for ancestor in ClassificationEntryManager.list_ancestors(classification_entry):
+                        parents.insert(0, {
+                            'id': ancestor.id,
+                            'name': ancestor.name,
+                            'rank': ancestor.rank_id,
+                            'parent': ancestor.parent_id
+                        })
+
+                    result['parent'] = parent.id
+                    result['parent_list'] = parents
+                    result['parent_details'] = parents
+
             # update layout of descriptors and descriptors
             if 'layout' in request.data:
                 layout_id = request.data["layout"]
@@ -666,7 +646,7 @@ def get_classification_entry_children_list_count(request, cls_id):
     if request.GET.get('filters'):
         cq.filter(json.loads(request.GET['filters']))
 
-    count = cq.count()
+    count = cq.count(approximate=request.GET.get('approximate') == 'true', cached=True)
 
     results = {
         'count': count
@@ -868,7 +848,7 @@ def get_classification_id_list_count(request, cls_id):
 
     cq.select_related('rank->classification')
 
-    count = cq.count()
+    count = cq.count(approximate=request.GET.get('approximate') == 'true', cached=True)
 
     results = {
         'count': count
@@ -9,10 +9,13 @@
 # @details 
 
 from django.core.exceptions import SuspiciousOperation, PermissionDenied
-from django.db import transaction
+from django.db import transaction, connection
 
+from audit.models import entities_bulk_changed
 from classification import localsettings
 from descriptor.describable import DescriptorsBuilder
+from main.cursor import cursor_query_count_cache
+from main.search import search_backend
 from .models import ClassificationEntry, ClassificationRank
 from .models import ClassificationEntrySynonym
 
@@ -21,6 +24,27 @@ from django.utils.translation import ugettext_lazy as _
 
 class ClassificationEntryManager(object):
 
+    @classmethod
+    def get_ancestors_ids(cls, parent):
+        """
+        Ids of a classification entry and of its ancestors, from it to the root, using a single recursive query.
+        :param parent: Valid Classification entry instance or id.
+        :return: List of ids.
+        """
+        parent_id = parent.id if isinstance(parent, ClassificationEntry) else parent
+        db_table = ClassificationEntry._meta.db_table
+
+        with connection.cursor() as cursor:
+            cursor.execute("""WITH RECURSIVE ancestors("id", "parent_id", "depth") AS (
+                    SELECT "id", "parent_id", 0 FROM "%(table)s" WHERE "id" = %%s
+                UNION ALL
+                    SELECT c."id", c."parent_id", a."depth" + 1 FROM "%(table)s" AS c
+                    INNER JOIN ancestors AS a ON c."id" = a."parent_id"
+                )
+                SELECT "id" FROM ancestors ORDER BY "depth" """ % {'table': db_table}, [parent_id])
+
+            return [row[0] for row in cursor.fetchall()]
+
     @classmethod
     def update_parents(cls, classification_entry, parent=None):
         """
@@ -34,14 +58,75 @@ class ClassificationEntryManager(object):
         if not parent:
             return
 
-        curr_parent = parent
-        while curr_parent is not None:
-            classification_entry.parent_list.append(curr_parent.id)
+        classification_entry.parent_list = cls.get_ancestors_ids(parent)
+
+    @classmethod
+    def move_classification_entry(cls, classification_entry, parent=None):
+        """
+        Change the parent of a classification entry, and update the list of parents of the whole sub-tree using
+        a single update (does not save the entry itself, but must be performed into the same transaction).
+        :param classification_entry: Valid Classification entry instance.
+        :param parent: None or valid Classification entry instance.
+        """
+        if parent is not None:
+            if parent.id == classification_entry.id or classification_entry.id in parent.parent_list:
+                raise SuspiciousOperation(_("The parent cannot be the classification entry itself or one of its children"))
+
+        classification_entry.parent = parent
+        cls.update_parents(classification_entry, parent)
+
+        # the descendants keep their parents until the moved entry, and take its new parents
+        db_table = ClassificationEntry._meta.db_table
 
-            if curr_parent.parent:
-                curr_parent = curr_parent.parent
-            else:
-                break
+        with connection.cursor() as cursor:
+            cursor.execute("""UPDATE "%(table)s"
+                SET "parent_list" = "parent_list"[1:array_position("parent_list", %%s)] || %%s::INTEGER[]
+                WHERE "parent_list" @> ARRAY[%%s]::INTEGER[] RETURNING "id" """ % {'table': db_table}, [
+                    classification_entry.id, classification_entry.parent_list, classification_entry.id])
+
+            updated_ids = [row[0] for row in cursor.fetchall()]
+
+        # raw SQL does not send any signal
+        entities_bulk_changed(ClassificationEntry, updated_ids, fields={'updated_fields': ['parent_list']})
+        cursor_query_count_cache.invalidate(ClassificationEntry._meta.db_table)
+
+    @classmethod
+    def rebuild_parents(cls):
+        """
+        Rebuild the list of parents of any classification entries from the parent relation, using a single
+        recursive update. Useful to fix inconsistent lists.
+        :return: Number of updated classification entries.
+        """
+        db_table = ClassificationEntry._meta.db_table
+
+        with connection.cursor() as cursor:
+            cursor.execute("""WITH RECURSIVE tree("id", "parent_list") AS (
+                    SELECT "id", ARRAY[]::INTEGER[] FROM "%(table)s" WHERE "parent_id" IS NULL
+                UNION ALL
+                    SELECT c."id", c."parent_id" || t."parent_list" FROM "%(table)s" AS c
+                    INNER JOIN tree AS t ON c."parent_id" = t."id"
+                )
+                UPDATE "%(table)s" AS e SET "parent_list" = tree."parent_list" FROM tree
+                WHERE e."id" = tree."id" AND e."parent_list" IS DISTINCT FROM tree."parent_list"
+                RETURNING e."id" """ % {'table': db_table})
+
+            updated_ids = [row[0] for row in cursor.fetchall()]
+
+        # raw SQL does not send any signal
+        entities_bulk_changed(ClassificationEntry, updated_ids, fields={'updated_fields': ['parent_list']})
+        cursor_query_count_cache.invalidate(ClassificationEntry._meta.db_table)
+
+        return len(updated_ids)
+
+    @classmethod
+    def list_ancestors(cls, classification_entry):
+        """
+        List the ancestors of a classification entry, from its direct parent to the root.
+        :param classification_entry: Valid Classification entry instance.
+        :return: List of Classification entry
+        """
+        ancestors = ClassificationEntry.objects.in_bulk(classification_entry.parent_list)
+        return [ancestors[pk] for pk in classification_entry.parent_list if pk in ancestors]
 
     @classmethod
     @transaction.atomic
@@ -133,7 +218,8 @@ class ClassificationEntryManager(object):
         :param name: Partial or complete classification entry name.
         :return: QuerySet of Classification entry
         """
-        return ClassificationEntry.objects.filter(name__icontains=name_part)
+        return search_backend.rank(
+            ClassificationEntry.objects.filter(search_backend.q('name', 'icontains', name_part)), 'name', name_part)
 
     @classmethod
     def list_classification_entry_by_parent(cls, parent):
@@ -152,9 +238,10 @@ class ClassificationEntryManager(object):
         :return: Array of Classification entry
         """
         if isinstance(parent, ClassificationEntry):
-            return ClassificationEntry.objects.filter(parent_list__in=[parent])
+            return ClassificationEntry.objects.filter(parent_list__contains=[parent.id])
         elif isinstance(parent, list):
-            return ClassificationEntry.objects.filter(parent_list__in=parent)
+            return ClassificationEntry.objects.filter(parent_list__overlap=[
+                p.id if isinstance(p, ClassificationEntry) else p for p in parent])
 
     @classmethod
     def add_synonym(cls, classification_entry, synonym):
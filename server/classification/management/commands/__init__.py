@@ -0,0 +1,9 @@
+# -*- coding: utf-8; -*-
+#
+# @file __init__.py
+# @brief
+# @author Frédéric SCHERMA (INRA UMR1095)
+# @date 2018-10-18
+# @copyright Copyright (c) 2018 INRA/CIRAD
+# @license MIT (see LICENSE file)
+# @details
@@ -0,0 +1,27 @@
+# -*- coding: utf-8; -*-
+#
+# @file classification_rebuild_parents.py
+# @brief Rebuild the list of parents of the classification entries.
+# @author Frédéric SCHERMA (INRA UMR1095)
+# @date 2018-10-18
+# @copyright Copyright (c) 2018 INRA/CIRAD
+# @license MIT (see LICENSE file)
+# @details
+
+import sys
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from classification.controller import ClassificationEntryManager
+
+
+class Command(BaseCommand):
+    help = """Rebuild the list of parents (parent_list) of any classification entries from the parent relation.
+    To run after an import or a manual change of the parents, to fix the inconsistent lists."""
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            count = ClassificationEntryManager.rebuild_parents()
+
+        sys.stdout.write('{} classification entries updated\n'.format(count))
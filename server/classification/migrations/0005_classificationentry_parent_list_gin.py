@@ -0,0 +1,32 @@
+# Generated by Django 2.0.4 on 2018-10-18 10:00
+
+import django.contrib.postgres.indexes
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('classification', '0004_auto_20180704_1228'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='classificationentry',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['parent_list'], name='classification_parent_list_gin'),
+        ),
+        # fix the lists of parents of the descendants of previously moved entries
+        migrations.RunSQL(
+            sql="""
+                WITH RECURSIVE tree("id", "parent_list") AS (
+                    SELECT "id", ARRAY[]::INTEGER[] FROM "classification_classificationentry" WHERE "parent_id" IS NULL
+                UNION ALL
+                    SELECT c."id", c."parent_id" || t."parent_list" FROM "classification_classificationentry" AS c
+                    INNER JOIN tree AS t ON c."parent_id" = t."id"
+                )
+                UPDATE "classification_classificationentry" AS e SET "parent_list" = tree."parent_list" FROM tree
+                WHERE e."id" = tree."id" AND e."parent_list" IS DISTINCT FROM tree."parent_list";
+            """,
+            reverse_sql=migrations.RunSQL.noop
+        ),
+    ]
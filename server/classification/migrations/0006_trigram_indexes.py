@@ -0,0 +1,24 @@
+# Generated by Django 2.0.4 on 2018-10-18 10:00
+
+from django.db import migrations
+
+
+def trigram_index(table, column):
+    name = "%s_%s_trgm" % (table, column)
+    return migrations.RunSQL(
+        sql='CREATE INDEX "%s" ON "%s" USING gin ("%s" gin_trgm_ops)' % (name, table, column),
+        reverse_sql='DROP INDEX IF EXISTS "%s"' % name
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('main', '0002_pg_trgm'),
+        ('classification', '0005_classificationentry_parent_list_gin'),
+    ]
+
+    operations = [
+        trigram_index("classification_classificationentry", "name"),
+        trigram_index("classification_classificationentrysynonym", "name"),
+    ]
@@ -11,8 +11,9 @@
 import re
 
 from django.contrib.postgres.fields import JSONField, ArrayField
+from django.contrib.postgres.indexes import GinIndex
 from django.db import models
-from django.db.models import Q, Prefetch
+from django.db.models import Prefetch
 from django.utils import translation
 
 from django.utils.translation import ugettext_lazy as _
@@ -22,6 +23,7 @@ from descriptor.models import Layout
 from igdectk.common.models import ChoiceEnum, IntegerChoice
 
 from main.models import Entity, EntitySynonym, EntitySynonymType, ContentType
+from main.search import search_backend
 
 
 class BotanicalRank(ChoiceEnum):
@@ -362,6 +364,11 @@ class ClassificationEntry(Entity):
             ("list_classificationentry", "Can list classification entry"),
         )
 
+        # sub-tree lookup (parent_list @> ARRAY[id])
+        indexes = [
+            GinIndex(fields=['parent_list'], name='classification_parent_list_gin'),
+        ]
+
     def natural_name(self):
         return self.name
 
@@ -374,7 +381,7 @@ class ClassificationEntry(Entity):
 
     @classmethod
     def make_search_by_name(cls, term):
-        return Q(name__istartswith=term)
+        return search_backend.q('name', 'istartswith', term)
 
     def audit_create(self, user):
         return {
@@ -445,8 +452,11 @@ class ClassificationEntry(Entity):
 
     @classmethod
     def export_list(cls, columns, cursor, search, filters, order_by, limit, user):
-        res_columns = []
-        items = []
+        """
+        Export a list of classification entries, rows being generated from a server-side cursor.
+
+        :return: A tuple with the list of columns and a generator of rows (list of string).
+        """
 
         if not order_by:
             order_by = ['id']
@@ -469,70 +479,70 @@ class ClassificationEntry(Entity):
         cq.cursor(cursor, order_by)
         cq.order_by(order_by).limit(limit)
 
-        for classification_entry in cq:
-            item = []
-
-            for col in columns:
-                if col == 'id':
-                    item.append(str(classification_entry.pk))
-                elif col == 'name':
-                    item.append(classification_entry.name)
-                elif col == 'parent':
-                    item.append(classification_entry.parent.name)
-                elif col == 'rank':
-                    item.append(classification_entry.rank.name)
-                elif col == 'layout':
-                    item.append(str(classification_entry.layout.name))
-                # elif col == 'parent_list':
-                #     item.append(classification_entry.parent_list)
-                # elif col == 'synonyms':
-                #     item.append(str(classification_entry.parent_id))
-                elif col.startswith('#'):
-                    # descriptors (@todo how to format at this level...)
-                    descr = classification_entry.descriptors[col[1:]]
-                    if isinstance(descr, list):
-                        v = '-'.join([str(x) for x in descr])
+        def rows():
+            for classification_entry in cq.iterator():
+                item = []
+
+                for col in columns:
+                    if col == 'id':
+                        item.append(str(classification_entry.pk))
+                    elif col == 'name':
+                        item.append(classification_entry.name)
+                    elif col == 'parent':
+                        item.append(classification_entry.parent.name)
+                    elif col == 'rank':
+                        item.append(classification_entry.rank.name)
+                    elif col == 'layout':
+                        item.append(str(classification_entry.layout.name))
+                    # elif col == 'parent_list':
+                    #     item.append(classification_entry.parent_list)
+                    # elif col == 'synonyms':
+                    #     item.append(str(classification_entry.parent_id))
+                    elif col.startswith('#'):
+                        # descriptors (@todo how to format at this level...)
+                        descr = classification_entry.descriptors[col[1:]]
+                        if isinstance(descr, list):
+                            v = '-'.join([str(x) for x in descr])
+                        else:
+                            v = str(descr)
+
+                        item.append(v)
+                    elif col.startswith('&'):
+                        item.append("")  # synonyms
+                        # for synonym in accession.synonyms.all():
+                        #     synonym_type_name = synonym_types.get(synonym.synonym_type_id)
+                        #     a['synonyms'][synonym_type_name] = {
+                        #         'id': synonym.id,
+                        #         'name': synonym.name,
+                        #         'synonym_type': synonym.synonym_type_id,
+                        #         'language': synonym.language
+                        #     }
+                    elif col.startswith('$'):
+                        item.append("")  # format
+                    elif col.startswith('@'):
+                        item.append("")  # label
                     else:
-                        v = str(descr)
-
-                    item.append(v)
-                elif col.startswith('&'):
-                    item.append("")  # synonyms
-                    # for synonym in accession.synonyms.all():
-                    #     synonym_type_name = synonym_types.get(synonym.synonym_type_id)
-                    #     a['synonyms'][synonym_type_name] = {
-                    #         'id': synonym.id,
-                    #         'name': synonym.name,
-                    #         'synonym_type': synonym.synonym_type_id,
-                    #         'language': synonym.language
-                    #     }
-                elif col.startswith('$'):
-                    item.append("")  # format
-                elif col.startswith('@'):
-                    item.append("")  # label
-                else:
-                    item.append("")
-
-            # if classification_entry.parent:
-            #     c['parent_details'] = {
-            #         'id': classification_entry.parent.id,
-            #         'name': classification_entry.parent.name,
-            #         'rank': classification_entry.parent.rank_id
-            #     }
-
-            # for synonym in classification_entry.synonyms.all():
-            #     synonym_type = EntitySynonymType.objects.get(id=synonym.synonym_type_id)
-            #     c['synonyms'][synonym_type.name] = {
-            #         'id': synonym.id,
-            #         'name': synonym.name,
-            #         'synonym_type': synonym.synonym_type_id,
-            #         'language': synonym.language
-            #     }
-
-            items.append(item)
-
-        res_columns = columns
-        return res_columns, items
+                        item.append("")
+
+                # if classification_entry.parent:
+                #     c['parent_details'] = {
+                #         'id': classification_entry.parent.id,
+                #         'name': classification_entry.parent.name,
+                #         'rank': classification_entry.parent.rank_id
+                #     }
+
+                # for synonym in classification_entry.synonyms.all():
+                #     synonym_type = EntitySynonymType.objects.get(id=synonym.synonym_type_id)
+                #     c['synonyms'][synonym_type.name] = {
+                #         'id': synonym.id,
+                #         'name': synonym.name,
+                #         'synonym_type': synonym.synonym_type_id,
+                #         'language': synonym.language
+                #     }
+
+                yield item
+
+        return columns, rows()
 
 
 class ClassificationEntrySynonym(EntitySynonym):
@@ -19,7 +19,8 @@ from descriptor.descriptorformattype import DescriptorFormatTypeManager
 from igdectk.rest import Format, Method
 from igdectk.rest.response import HttpResponseRest
 
-from descriptor.models import Layout, Descriptor
+from descriptor.layoutresolver import resolve_layout
+from descriptor.models import Layout
 from .descriptor import RestDescriptor
 
 
@@ -77,18 +78,15 @@ class DescriptorsBuilder(object):
 
         :param layout:
         """
-        panels = layout.layout_content.get('panels')
+        for resolved in resolve_layout(layout):
+            descriptor = resolved['descriptor']
 
-        for panel in panels:
-            for layout_descriptor in panel.get('descriptors'):
-                descriptor = get_object_or_404(Descriptor, name=layout_descriptor.get('name'))
+            # values are loaded on demand (displaying the panel or opening the dropdown)
 
-                # values are loaded on demand (displaying the panel or opening the dropdown)
+            acc_value = self.entity.descriptors.get(descriptor.name)
 
-                acc_value = self.entity.descriptors.get(descriptor.name)
-
-                if DescriptorFormatTypeManager.has_external(descriptor.format):
-                    self.own_list.append((descriptor.format, acc_value, None))
+            if resolved['handler'].external:
+                self.own_list.append((descriptor.format, acc_value, None))
 
         # no more values
         self._descriptors = {}
@@ -108,106 +106,104 @@ class DescriptorsBuilder(object):
         :param descriptors: New descriptors values
         """
 
-        panels = layout.layout_content.get('panels')
-
-        for panel in panels:
-            for layout_descriptor in panel.get('descriptors'):
-
-                descriptor = get_object_or_404(Descriptor, name=layout_descriptor.get('name'))
-
-                # values are loaded on demand (displaying the panel or opening the dropdown)
-                dt_format = descriptor.format
-
-                conditions = layout_descriptor.get('conditions')
-
-                src_defined = descriptor.name in descriptors
-
-                acc_value = self.entity.descriptors.get(descriptor.name)
-                src_value = descriptors.get(descriptor.name)
-
-                merged_value = src_value if src_defined else acc_value
-
-                # valid the new value
-                if src_defined and src_value is not None:
-                    DescriptorFormatTypeManager.validate(dt_format, src_value, descriptor)
-
-                # mandatory descriptor
-                if layout_descriptor.get('mandatory') is True:
-                    if src_value is None and acc_value is None:
-                        raise ValueError(_("Missing mandatory descriptor %s") % (descriptor.get_label(),))
-
-                # set once descriptor
-                if layout_descriptor.get('set_once') is True:
-                    if src_value is not None and acc_value is not None:
-                        raise ValueError(_("Already defined set once descriptor %s") % (descriptor.get_label(),))
-
-                if conditions:
-                    # check condition
-                    dmtc = conditions
-                    target_name = dmtc.get('target_name')
-
-                    # according to the condition if the current value is defined (src) or was defined (acc)
-                    # the condition must be respected otherwise it raises an exception if a new value is defined (src)
-                    src_target_defined = target_name in descriptors
-
-                    acc_target_value = self.entity.descriptors.get(target_name)
-                    src_target_value = descriptors.get(target_name)
-                    merged_target_value = src_target_value if src_target_defined else acc_target_value
-
-                    if dmtc.get('condition') == 0:
-                        # the src_value can be defined if the target_value is not defined
-                        if merged_target_value is not None and merged_value is not None:
-                            raise ValueError(_("A conditional descriptor is defined but the condition is not true") +
-                                             " (%s)" % descriptor.get_label())
-
-                    elif dmtc.get('condition') == 1:
-                        # the src_value can be defined if the target_value is defined
-                        if merged_target_value is None and merged_value is not None:
-                            raise ValueError(_("A conditional descriptor is defined but the condition is not true") +
-                                             " (%s)" % descriptor.get_label())
-
-                    elif dmtc.get('condition') == 2:
-                        # the src_value can defined if the target_value is defined and is equal to the value defined by
-                        # the condition
-
-                        # first the target_value must be defined
-                        if merged_target_value is None and merged_value is not None:
-                            raise ValueError(_("A conditional descriptor is defined but the condition is not true") +
-                                             " (%s)" % descriptor.get_label())
-
-                        # and be equal to
-                        if merged_value is not None and merged_target_value is not None and merged_target_value != dmtc.get(
-                                'values'):
-                            raise ValueError(_("A conditional descriptor is defined but the condition is not true") +
-                                             " (%s)" % descriptor.get_label())
-
-                    elif dmtc.get('condition') == 3:
-                        # the src_value can defined if the target_value is defined and is different from the value
-                        # defined by the condition
-
-                        # first the target_value must be defined
-                        if merged_target_value is None and merged_value is not None:
-                            raise ValueError(
-                                _("A conditional descriptor is defined but the condition is not true") +
-                                " (%s)" % descriptor.get_label())
-
-                        # and be different from
-                        if merged_value is not None and merged_target_value is not None and merged_target_value == dmtc.get(
-                                'values'):
-                            raise ValueError(
-                                _("A conditional descriptor is defined but the condition is not true") +
-                                " (%s)" % descriptor.get_label())
-
-                # use new value if defined, else reuse current
-                self._descriptors[descriptor.code] = src_value if src_defined else acc_value
-
-                # keep trace of changed descriptors
-                if src_defined and src_value != acc_value:
-                    self._changed_descriptors[descriptor.code] = src_value
-
-                # make the list of descriptors that need to perform a call to own
-                if DescriptorFormatTypeManager.has_external(dt_format):
-                    self.own_list.append((dt_format, acc_value, merged_value))
+        for resolved in resolve_layout(layout):
+            descriptor = resolved['descriptor']
+
+            # values are loaded on demand (displaying the panel or opening the dropdown)
+            dt_format = descriptor.format
+
+            conditions = resolved['conditions']
+
+            src_defined = descriptor.name in descriptors
+
+            acc_value = self.entity.descriptors.get(descriptor.name)
+            src_value = descriptors.get(descriptor.name)
+
+            merged_value = src_value if src_defined else acc_value
+
+            # valid the new value
+            if src_defined and src_value is not None:
+                res = resolved['handler'].validate(dt_format, src_value, descriptor)
+                if res is not None:
+                    raise ValueError(res + " (%s)" % descriptor.get_label())
+
+            # mandatory descriptor
+            if resolved['mandatory']:
+                if src_value is None and acc_value is None:
+                    raise ValueError(_("Missing mandatory descriptor %s") % (descriptor.get_label(),))
+
+            # set once descriptor
+            if resolved['set_once']:
+                if src_value is not None and acc_value is not None:
+                    raise ValueError(_("Already defined set once descriptor %s") % (descriptor.get_label(),))
+
+            if conditions:
+                # check condition
+                dmtc = conditions
+                target_name = dmtc.get('target_name')
+
+                # according to the condition if the current value is defined (src) or was defined (acc)
+                # the condition must be respected otherwise it raises an exception if a new value is defined (src)
+                src_target_defined = target_name in descriptors
+
+                acc_target_value = self.entity.descriptors.get(target_name)
+                src_target_value = descriptors.get(target_name)
+                merged_target_value = src_target_value if src_target_defined else acc_target_value
+
+                if dmtc.get('condition') == 0:
+                    # the src_value can be defined if the target_value is not defined
+                    if merged_target_value is not None and merged_value is not None:
+                        raise ValueError(_("A conditional descriptor is defined but the condition is not true") +
+                                         " (%s)" % descriptor.get_label())
+
+                elif dmtc.get('condition') == 1:
+                    # the src_value can be defined if the target_value is defined
+                    if merged_target_value is None and merged_value is not None:
+                        raise ValueError(_("A conditional descriptor is defined but the condition is not true") +
+                                         " (%s)" % descriptor.get_label())
+
+                elif dmtc.get('condition') == 2:
+                    # the src_value can defined if the target_value is defined and is equal to the value defined by
+                    # the condition
+
+                    # first the target_value must be defined
+                    if merged_target_value is None and merged_value is not None:
+                        raise ValueError(_("A conditional descriptor is defined but the condition is not true") +
+                                         " (%s)" % descriptor.get_label())
+
+                    # and be equal to
+                    if merged_value is not None and merged_target_value is not None and merged_target_value != dmtc.get(
+                            'values'):
+                        raise ValueError(_("A conditional descriptor is defined but the condition is not true") +
+                                         " (%s)" % descriptor.get_label())
+
+                elif dmtc.get('condition') == 3:
+                    # the src_value can defined if the target_value is defined and is different from the value
+                    # defined by the condition
+
+                    # first the target_value must be defined
+                    if merged_target_value is None and merged_value is not None:
+                        raise ValueError(
+                            _("A conditional descriptor is defined but the condition is not true") +
+                            " (%s)" % descriptor.get_label())
+
+                    # and be different from
+                    if merged_value is not None and merged_target_value is not None and merged_target_value == dmtc.get(
+                            'values'):
+                        raise ValueError(
+                            _("A conditional descriptor is defined but the condition is not true") +
+                            " (%s)" % descriptor.get_label())
+
+            # use new value if defined, else reuse current
+            self._descriptors[descriptor.code] = src_value if src_defined else acc_value
+
+            # keep trace of changed descriptors
+            if src_defined and src_value != acc_value:
+                self._changed_descriptors[descriptor.code] = src_value
+
+            # make the list of descriptors that need to perform a call to own
+            if resolved['handler'].external:
+                self.own_list.append((dt_format, acc_value, merged_value))
 
     def update_associations(self):
         """
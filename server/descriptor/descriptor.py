@@ -305,9 +305,12 @@ def create_index(request):
         type=index_type.value
     )
 
-    with transaction.atomic():
-        index.save()
+    # built concurrently, out of the transaction
+    try:
         index.create_or_drop_index()
+    except Exception:
+        index.delete()
+        raise
 
     response = {
         'id': index.id,
@@ -324,10 +327,9 @@ def delete_index(request, index_id):
     index = get_object_or_404(DescriptorIndex, id=int(index_id))
 
     # if index.count_index_usage() == 0:
-    with transaction.atomic():
-        index.type = JSONBFieldIndexType.NONE
-        index.create_or_drop_index()
-        index.delete()
+    index.type = JSONBFieldIndexType.NONE.value
+    index.create_or_drop_index()
+    index.delete()
     # else:
     #     from django.core import exceptions
     #     raise exceptions.SuspiciousOperation(_("This index refer to a descriptor used in a layout"))
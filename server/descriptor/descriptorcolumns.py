@@ -8,17 +8,19 @@
 # @license MIT (see LICENSE file)
 # @details coll-gate descriptor module, descriptor columns
 
+from types import MappingProxyType
+
 from django.contrib.contenttypes.models import ContentType
 from django.core.exceptions import SuspiciousOperation
 from django.shortcuts import get_object_or_404
 from django.utils.translation import ugettext_lazy as _
-from descriptor.descriptorformattype import DescriptorFormatTypeManager
 from igdectk.rest import Format, Method
 from igdectk.rest.response import HttpResponseRest
 from main.cache import cache_manager
 from .descriptor import RestDescriptor
+from .layoutresolver import resolve_layouts
 
-from .models import Layout, Descriptor
+from .models import Layout
 
 
 class RestDescriptorColumnsForContentType(RestDescriptor):
@@ -82,28 +84,29 @@ def get_columns_name_for_describable_content_type(request, content_type_name):
     # add descriptor model type information for each descriptors attached to any layout related to the
     # entity model
 
-    for layout in layouts:
-        if layout.layout_content.get('panels'):
-            for panel in layout.layout_content.get('panels'):
-                for descriptor in panel.get('descriptors'):
-                    descriptor = Descriptor.objects.get(name=descriptor.get('name'))
-                    dft = DescriptorFormatTypeManager.get(descriptor.format)
-
-                    query = True if dft.related_model(descriptor.format) else False
-
-                    # display_fields comes by default from dft is defined
-                    if dft.display_fields is not None and 'display_fields' not in descriptor.format:
-                        descriptor.format['display_fields'] = dft.display_fields
-
-                    if (dft.column_display is True and not mode) or (dft.search_display is True and mode == 'search'):
-                        columns['#' + descriptor.code] = {
-                            'id': descriptor.id,
-                            'group_name': descriptor.group_name,
-                            'label': descriptor.get_label(),
-                            'query': query,
-                            'format': descriptor.format,
-                            'available_operators': dft.available_operators
-                        }
+    for resolved_layout in resolve_layouts(layouts).values():
+        for resolved in resolved_layout:
+            descriptor = resolved['descriptor']
+            dft = resolved['handler']
+
+            query = True if dft.related_model(descriptor.format) else False
+
+            # resolved descriptors are shared, so work on a copy of the format
+            descriptor_format = dict(descriptor.format)
+
+            # display_fields comes by default from dft is defined
+            if dft.display_fields is not None and 'display_fields' not in descriptor_format:
+                descriptor_format['display_fields'] = dft.display_fields
+
+            if (dft.column_display is True and not mode) or (dft.search_display is True and mode == 'search'):
+                columns['#' + descriptor.code] = {
+                    'id': descriptor.id,
+                    'group_name': descriptor.group_name,
+                    'label': descriptor.get_label(),
+                    'query': query,
+                    'format': descriptor_format,
+                    'available_operators': dft.available_operators
+                }
 
     # for dmt in dmts:
     #     descriptor_format = dmt.descriptor_type.format
@@ -132,11 +135,6 @@ def get_columns_name_for_describable_content_type(request, content_type_name):
             descriptor_format = column.get('format')
             descriptor_group_name = column.get('group_name', None)
 
-            # get group id and type id from descriptor type code
-            code = column.get('code')
-            if code:
-                descriptor = Descriptor.objects.get(code=code)
-
             # if column.get('column_display', True):
             if (column.get('column_display', True) and not mode) or (
                     column.get('search_display', True) and mode == 'search'):
@@ -164,10 +162,11 @@ def get_columns_name_for_describable_content_type(request, content_type_name):
 def get_description(model):
     """
     Returns information about columns for a specified model. All columns of any related layouts.
+    The result is kept into the local cache, not pickled, so it is a read-only dict of read-only dict.
     """
 
     cache_name = cache_manager.make_cache_name('description', '%s.%s' % (model._meta.app_label, model._meta.model_name))
-    results = cache_manager.get('descriptor', cache_name)
+    results = cache_manager.get_local('descriptor', cache_name)
 
     if results is not None:
         return results
@@ -182,20 +181,17 @@ def get_description(model):
 
     results = {}
 
-    for layout in layouts:
-        if layout.layout_content.get('panels'):
-            for panel in layout.layout_content.get('panels'):
-                for descriptor in panel.get('descriptors'):
-                    descriptor = Descriptor.objects.get(name=descriptor.get('name'))
-                    dft = DescriptorFormatTypeManager.get(descriptor.format)
-                    results[descriptor.code] = {
-                        'code': descriptor.code,
-                        'name': descriptor.name,
-                        'label': descriptor.get_label(),
-                        # 'index': descriptor.index,
-                        'handler': dft,
-                        'format': descriptor.format
-                    }
+    for resolved_layout in resolve_layouts(layouts).values():
+        for resolved in resolved_layout:
+            descriptor = resolved['descriptor']
+            results[descriptor.code] = MappingProxyType({
+                'code': descriptor.code,
+                'name': descriptor.name,
+                'label': descriptor.get_label(),
+                # 'index': descriptor.index,
+                'handler': resolved['handler'],
+                'format': descriptor.format
+            })
 
     # for dmt in dmts:
     #     descriptor_format = dmt.descriptor_type.format
@@ -209,7 +205,9 @@ def get_description(model):
     #         'format': descriptor_format
     #     }
 
-    # cache for 1 day
-    cache_manager.set('descriptor', cache_name, results, 60 * 60 * 24)
+    results = MappingProxyType(results)
+
+    # cache for 1 day, bounded by the timeout of the local cache
+    cache_manager.set_local('descriptor', cache_name, results, 60 * 60 * 24)
 
     return results
@@ -160,12 +160,14 @@ class DescriptorFormatType(object):
         else:
             return '("%s"."descriptors"->>\'%s\') = "%s"."id"' % (db_table, descriptor_name, table_alias)
 
-    def make_sql_value(self, value):
+    def make_sql_value(self, value, params=None):
         """
         Convert the given value for a SQL query according to the format of the descriptor and about the
         meaning of the NULL value.
 
         :param value: Value to convert.
+        :param params: If a list is given the value is appended to it as a bind parameter and a placeholder
+            is returned in place of the literal.
         :return: Converted value a string.
         """
         if value is None:
@@ -182,13 +184,17 @@ class DescriptorFormatType(object):
 
         if self.data == 'INTEGER':
             try:
-                int(value)
+                value = int(value)
             except ValueError:
                 if self.null:
                     return "0"
                 else:
                     return "NULL"
 
+            if params is not None:
+                params.append(value)
+                return "%s"
+
             return str(value)
 
         # values = json.loads(value)
@@ -196,7 +202,52 @@ class DescriptorFormatType(object):
         #     return '("' + '","'.join(values) + '")'
 
         else:
-            return "'" + value.replace("'", "''") + "'"
+            if params is not None:
+                params.append(value)
+                return "%s"
+
+            # need to escape % because of django raw
+            return "'" + value.replace("'", "''").replace("%", "%%") + "'"
+
+    def make_sql_list_value(self, values, params=None):
+        """
+        Convert the given list of values for a SQL IN clause.
+
+        :param values: List of values to convert.
+        :param params: If a list is given the values are appended to it as bind parameters.
+        :return: Converted values a string, '()' for an empty or invalid list.
+        """
+        if not isinstance(values, list):
+            return '()'
+
+        return '(' + ','.join(self.make_sql_value(v, params) for v in values) + ')'
+
+    def make_sql_array_value(self, values, params):
+        """
+        Convert the given list of values to a single array bind parameter, for a SQL = ANY or <> ALL clause, so
+        the SQL does not depend on the number of values. Values are converted like with make_sql_value.
+
+        :param values: List of values to convert, an invalid list is considered as empty.
+        :param params: List receiving the array as bind parameter.
+        :return: Placeholder of the array, casted to the type of the data.
+        """
+        array = []
+
+        if isinstance(values, list):
+            for value in values:
+                if self.data == 'INTEGER':
+                    try:
+                        value = int(value) if value is not None else None
+                    except (TypeError, ValueError):
+                        value = None
+
+                if value is None and self.null:
+                    value = 0 if self.data == 'INTEGER' else ''
+
+                array.append(value)
+
+        params.append(array)
+        return "%%s::%s[]" % self.data
 
     def reset_values(self, descriptor):
         """
@@ -207,7 +258,7 @@ class DescriptorFormatType(object):
         descriptor.values = None
         descriptor.values_set.all().delete()
 
-    def operator(self, operator, db_table, descriptor_name, value):
+    def operator(self, operator, db_table, descriptor_name, value, params=None):
         """
         According to operator switch to the operator method.
 
@@ -215,6 +266,8 @@ class DescriptorFormatType(object):
         :param db_table: Name of the table.
         :param descriptor_name: Name of the descriptor.
         :param value: Value previously validated or None.
+        :param params: List receiving the bind parameters, in order of their placeholders, or None to
+            inline the values as literals.
         :return: String of the clause-s or raise a ValueError exception.
         """
         if operator == 'exists':
@@ -226,40 +279,75 @@ class DescriptorFormatType(object):
         elif operator == 'notnull':
             return self.operator_notnull(db_table, descriptor_name)
         elif operator == '=' or operator == 'eq':
-            return self.operator_eq(db_table, descriptor_name, value)
+            return self.operator_eq(db_table, descriptor_name, value, params)
         elif operator == '!=' or operator == 'neq':
-            return self.operator_neq(db_table, descriptor_name, value)
+            return self.operator_neq(db_table, descriptor_name, value, params)
         elif operator == '<=' or operator == 'lte':
-            return self.operator_lte(db_table, descriptor_name, value)
+            return self.operator_lte(db_table, descriptor_name, value, params)
         elif operator == '<' or operator == 'lt':
-            return self.operator_lt(db_table, descriptor_name, value)
+            return self.operator_lt(db_table, descriptor_name, value, params)
         elif operator == '>=' or operator == 'gte':
-            return self.operator_gte(db_table, descriptor_name, value)
+            return self.operator_gte(db_table, descriptor_name, value, params)
         elif operator == '>' or operator == 'gt':
-            return self.operator_gt(db_table, descriptor_name, value)
+            return self.operator_gt(db_table, descriptor_name, value, params)
         elif operator == 'iexact':
-            return self.operator_iexact(db_table, descriptor_name, value)
+            return self.operator_iexact(db_table, descriptor_name, value, params)
         elif operator == 'exact':
-            return self.operator_exact(db_table, descriptor_name, value)
+            return self.operator_exact(db_table, descriptor_name, value, params)
         elif operator == 'icontains':
-            return self.operator_icontains(db_table, descriptor_name, value)
+            return self.operator_icontains(db_table, descriptor_name, value, params)
         elif operator == 'contains':
-            return self.operator_contains(db_table, descriptor_name, value)
+            return self.operator_contains(db_table, descriptor_name, value, params)
         elif operator == 'istartswith':
-            return self.operator_istartswith(db_table, descriptor_name, value)
+            return self.operator_istartswith(db_table, descriptor_name, value, params)
         elif operator == 'startswith':
-            return self.operator_startswith(db_table, descriptor_name, value)
+            return self.operator_startswith(db_table, descriptor_name, value, params)
         elif operator == 'iendswith':
-            return self.operator_iendswith(db_table, descriptor_name, value)
+            return self.operator_iendswith(db_table, descriptor_name, value, params)
         elif operator == 'endswith':
-            return self.operator_endswith(db_table, descriptor_name, value)
+            return self.operator_endswith(db_table, descriptor_name, value, params)
         elif operator == 'in':
-            return self.operator_in(db_table, descriptor_name, value)
+            return self.operator_in(db_table, descriptor_name, value, params)
         elif operator == 'notin':
-            return self.operator_notin(db_table, descriptor_name, value)
+            return self.operator_notin(db_table, descriptor_name, value, params)
         else:
             raise ValueError('Unrecognized operator')
 
+    def index_expressions(self, descriptor_name):
+        """
+        Canonical index expressions of a descriptor, per family of operators : 'eq' (eq, neq, in, notin),
+        'range' (lte, lt, gte, gt) and 'like' (the LIKE and ILIKE based operators). They must be exactly the
+        expressions generated by the operators (without the table name), else the planner cannot use the index.
+
+        :param descriptor_name: Name of the descriptor.
+        :return: Dict of the list of indexes by family, each index is a tuple of column expressions.
+        """
+        operators = set(self.available_operators)
+        text_value = '("descriptors"->>\'%s\')' % descriptor_name
+
+        if self.data == "INTEGER":
+            value = '%s::INTEGER' % text_value
+        else:
+            value = text_value
+
+        expressions = {}
+
+        if operators & {'eq', 'neq', 'in', 'notin'}:
+            expressions['eq'] = [(value,)]
+
+        if operators & {'lte', 'lt', 'gte', 'gt'} and isinstance(self.data, str):
+            if self.null:
+                expressions['range'] = [('COALESCE(%s::%s, %s)' % (
+                    text_value, self.data, "0" if self.data == "INTEGER" else "''"),)]
+            else:
+                expressions['range'] = [(value,)]
+
+        if self.data == "TEXT" and operators & {
+                'exact', 'iexact', 'contains', 'icontains', 'startswith', 'istartswith', 'endswith', 'iendswith'}:
+            expressions['like'] = [(text_value,)]
+
+        return expressions
+
     def operator_exists(self, db_table, descriptor_name):
         return '("%s"."descriptors"?\'%s\') IS TRUE' % (db_table, descriptor_name)
 
@@ -272,62 +360,47 @@ class DescriptorFormatType(object):
     def operator_notnull(self, db_table, descriptor_name):
         return '("%s"."descriptors"->>\'%s\') IS NOT NULL' % (db_table, descriptor_name)
 
-    def operator_iexact(self, db_table, descriptor_name, value):
-        return self.operator_ilike(db_table, descriptor_name, value)
+    def operator_iexact(self, db_table, descriptor_name, value, params=None):
+        return self.operator_ilike(db_table, descriptor_name, value, params)
 
-    def operator_exact(self, db_table, descriptor_name, value):
-        return self.operator_like(db_table, descriptor_name, value)
+    def operator_exact(self, db_table, descriptor_name, value, params=None):
+        return self.operator_like(db_table, descriptor_name, value, params)
 
-    def operator_istartswith(self, db_table, descriptor_name, value):
-        return self.operator_ilike(db_table, descriptor_name, value + "%%")
+    def operator_startswith(self, db_table, descriptor_name, value, params=None):
+        return self.operator_like(db_table, descriptor_name, value + "%", params)
 
-    def operator_startswith(self, db_table, descriptor_name, value):
-        return self.operator_like(db_table, descriptor_name, value + "%%")
+    def operator_istartswith(self, db_table, descriptor_name, value, params=None):
+        return self.operator_ilike(db_table, descriptor_name, value + "%", params)
 
-    def operator_istartswith(self, db_table, descriptor_name, value):
-        return self.operator_ilike(db_table, descriptor_name, value + "%%")
+    def operator_endswith(self, db_table, descriptor_name, value, params=None):
+        return self.operator_like(db_table, descriptor_name, "%" + value, params)
 
-    def operator_endswith(self, db_table, descriptor_name, value):
-        return self.operator_like(db_table, descriptor_name, "%%" + value)
+    def operator_iendswith(self, db_table, descriptor_name, value, params=None):
+        return self.operator_ilike(db_table, descriptor_name, "%" + value, params)
 
-    def operator_iendswith(self, db_table, descriptor_name, value):
-        return self.operator_ilike(db_table, descriptor_name, "%%" + value)
+    def operator_contains(self, db_table, descriptor_name, value, params=None):
+        return self.operator_like(db_table, descriptor_name, "%" + value + "%", params)
 
-    def operator_contains(self, db_table, descriptor_name, value):
-        return self.operator_like(db_table, descriptor_name, "%%" + value + "%%")
+    def operator_icontains(self, db_table, descriptor_name, value, params=None):
+        return self.operator_ilike(db_table, descriptor_name, "%" + value + "%", params)
 
-    def operator_icontains(self, db_table, descriptor_name, value):
-        return self.operator_ilike(db_table, descriptor_name, "%%" + value + "%%")
+    def operator_in(self, db_table, descriptor_name, value, params=None):
+        if params is None:
+            return '("%s"."descriptors"->>\'%s\')::%s IN %s' % (
+                db_table, descriptor_name, self.data, self.make_sql_list_value(value))
 
-    def operator_in(self, db_table, descriptor_name, value):
-        if self.data == "INTEGER":
-            if isinstance(value, list):
-                value = '(' + ','.join(str(v) for v in value) + ')'
-            else:
-                value = '()'
-        else:
-            if isinstance(value, list):
-                value = '(\'' + '\',\''.join(value) + '\')'
-            else:
-                value = '()'
-        return '("%s"."descriptors"->>\'%s\')::%s IN %s' % (
-            db_table, descriptor_name, self.data, value)
+        return '("%s"."descriptors"->>\'%s\')::%s = ANY(%s)' % (
+            db_table, descriptor_name, self.data, self.make_sql_array_value(value, params))
 
-    def operator_notin(self, db_table, descriptor_name, value):
-        if self.data == "INTEGER":
-            if isinstance(value, list):
-                value = '(' + ','.join(str(v) for v in value) + ')'
-            else:
-                value = '()'
-        else:
-            if isinstance(value, list):
-                value = '(\'' + '\',\''.join(value) + '\')'
-            else:
-                value = '()'
-        return '("%s"."descriptors"->>\'%s\')::%s NOT IN %s' % (
-            db_table, descriptor_name, self.data, value)
+    def operator_notin(self, db_table, descriptor_name, value, params=None):
+        if params is None:
+            return '("%s"."descriptors"->>\'%s\')::%s NOT IN %s' % (
+                db_table, descriptor_name, self.data, self.make_sql_list_value(value))
+
+        return '("%s"."descriptors"->>\'%s\')::%s <> ALL(%s)' % (
+            db_table, descriptor_name, self.data, self.make_sql_array_value(value, params))
 
-    def operator_like(self, db_table, descriptor_name, value):
+    def operator_like(self, db_table, descriptor_name, value, params=None):
         """
         Case sensitive text comparison based on LIKE operator.
         """
@@ -335,9 +408,9 @@ class DescriptorFormatType(object):
             return None
         else:
             return '("%s"."descriptors"->>\'%s\') LIKE %s' % (
-                db_table, descriptor_name, self.make_sql_value(value))
+                db_table, descriptor_name, self.make_sql_value(value, params))
 
-    def operator_ilike(self, db_table, descriptor_name, value):
+    def operator_ilike(self, db_table, descriptor_name, value, params=None):
         """
         Case insensitive text comparison based on ILIKE operator.
         """
@@ -345,105 +418,105 @@ class DescriptorFormatType(object):
             return None
         else:
             return '("%s"."descriptors"->>\'%s\') ILIKE %s' % (
-                db_table, descriptor_name, self.make_sql_value(value))
+                db_table, descriptor_name, self.make_sql_value(value, params))
 
-    def operator_eq(self, db_table, descriptor_name, value):
+    def operator_eq(self, db_table, descriptor_name, value, params=None):
         """
         Strict equality operator.
         """
         if self.data == "INTEGER":
             return '("%s"."descriptors"->>\'%s\')::%s = %s' % (
-                db_table, descriptor_name, self.data, self.make_sql_value(value))
+                db_table, descriptor_name, self.data, self.make_sql_value(value, params))
         else:
             return '("%s"."descriptors"->>\'%s\') = %s' % (
-                db_table, descriptor_name, self.make_sql_value(value))
+                db_table, descriptor_name, self.make_sql_value(value, params))
 
-    def operator_neq(self, db_table, descriptor_name, value):
+    def operator_neq(self, db_table, descriptor_name, value, params=None):
         """
         Strict inequality operator.
         """
         if self.data == "INTEGER":
             return '("%s"."descriptors"->>\'%s\')::%s != %s' % (
-                db_table, descriptor_name, self.data, self.make_sql_value(value))
+                db_table, descriptor_name, self.data, self.make_sql_value(value, params))
         else:
             return '("%s"."descriptors"->>\'%s\') != %s' % (
-                db_table, descriptor_name, self.make_sql_value(value))
+                db_table, descriptor_name, self.make_sql_value(value, params))
 
-    def operator_lte(self, db_table, descriptor_name, value):
+    def operator_lte(self, db_table, descriptor_name, value, params=None):
         """
         Lesser than or equal operator.
         """
         if self.data == "INTEGER":
             if self.null:
                 return 'COALESCE(("%s"."descriptors"->>\'%s\')::%s, 0) <= %s' % (
-                    db_table, descriptor_name, self.data, self.make_sql_value(value))
+                    db_table, descriptor_name, self.data, self.make_sql_value(value, params))
             else:
                 return '("%s"."descriptors"->>\'%s\')::%s <= %s' % (
-                    db_table, descriptor_name, self.data, self.make_sql_value(value))
+                    db_table, descriptor_name, self.data, self.make_sql_value(value, params))
         else:
             if self.null:
                 return 'COALESCE(("%s"."descriptors"->>\'%s\')::%s, \'\') <= %s' % (
-                    db_table, descriptor_name, self.data, self.make_sql_value(value))
+                    db_table, descriptor_name, self.data, self.make_sql_value(value, params))
             else:
                 return '("%s"."descriptors"->>\'%s\') <= %s' % (
-                    db_table, descriptor_name, self.make_sql_value(value))
+                    db_table, descriptor_name, self.make_sql_value(value, params))
 
-    def operator_lt(self, db_table, descriptor_name, value):
+    def operator_lt(self, db_table, descriptor_name, value, params=None):
         """
         Strict lesser than operator.
         """
         if self.data == "INTEGER":
             if self.null:
                 return 'COALESCE(("%s"."descriptors"->>\'%s\')::%s, 0) < %s' % (
-                    db_table, descriptor_name, self.data, self.make_sql_value(value))
+                    db_table, descriptor_name, self.data, self.make_sql_value(value, params))
             else:
                 return '("%s"."descriptors"->>\'%s\')::%s < %s' % (
-                    db_table, descriptor_name, self.data, self.make_sql_value(value))
+                    db_table, descriptor_name, self.data, self.make_sql_value(value, params))
         else:
             if self.null:
                 return 'COALESCE(("%s"."descriptors"->>\'%s\')::%s, \'\') < %s' % (
-                    db_table, descriptor_name, self.data, self.make_sql_value(value))
+                    db_table, descriptor_name, self.data, self.make_sql_value(value, params))
             else:
                 return '("%s"."descriptors"->>\'%s\') < %s' % (
-                    db_table, descriptor_name, self.make_sql_value(value))
+                    db_table, descriptor_name, self.make_sql_value(value, params))
 
-    def operator_gte(self, db_table, descriptor_name, value):
+    def operator_gte(self, db_table, descriptor_name, value, params=None):
         """
         Greater than or equal operator.
         """
         if self.data == "INTEGER":
             if self.null:
                 return 'COALESCE(("%s"."descriptors"->>\'%s\')::%s, 0) >= %s' % (
-                    db_table, descriptor_name, self.data, self.make_sql_value(value))
+                    db_table, descriptor_name, self.data, self.make_sql_value(value, params))
             else:
                 return '("%s"."descriptors"->>\'%s\')::%s >= %s' % (
-                    db_table, descriptor_name, self.data, self.make_sql_value(value))
+                    db_table, descriptor_name, self.data, self.make_sql_value(value, params))
         else:
             if self.null:
                 return 'COALESCE(("%s"."descriptors"->>\'%s\')::%s, \'\') >= %s' % (
-                    db_table, descriptor_name, self.data, self.make_sql_value(value))
+                    db_table, descriptor_name, self.data, self.make_sql_value(value, params))
             else:
                 return '("%s"."descriptors"->>\'%s\') >= %s' % (
-                    db_table, descriptor_name, self.make_sql_value(value))
+                    db_table, descriptor_name, self.make_sql_value(value, params))
 
-    def operator_gt(self, db_table, descriptor_name, value):
+    def operator_gt(self, db_table, descriptor_name, value, params=None):
         """
         Strict greater than operator.
         """
         if self.data == "INTEGER":
             if self.null:
                 return 'COALESCE(("%s"."descriptors"->>\'%s\')::%s, 0) > %s' % (
-                    db_table, descriptor_name, self.data, self.make_sql_value(value))
+                    db_table, descriptor_name, self.data, self.make_sql_value(value, params))
             else:
                 return '("%s"."descriptors"->>\'%s\')::%s > %s' % (
-                    db_table, descriptor_name, self.data, self.make_sql_value(value))
+                    db_table, descriptor_name, self.data, self.make_sql_value(value, params))
         else:
             if self.null:
                 return 'COALESCE(("%s"."descriptors"->>\'%s\')::%s, \'\') > %s' % (
-                    db_table, descriptor_name, self.data, self.make_sql_value(value))
+                    db_table, descriptor_name, self.data, self.make_sql_value(value, params))
             else:
                 return '("%s"."descriptors"->>\'%s\') > %s' % (
-                    db_table, descriptor_name, self.make_sql_value(value))
+                    db_table, descriptor_name, self.make_sql_value(value, params))
 
 
 class DescriptorFormatTypeManager(object):
@@ -591,6 +664,21 @@ class DescriptorFormatTypeManager(object):
 
         dft.reset_values(descriptor)
 
+    @classmethod
+    def index_expressions(cls, descriptor):
+        """
+        Call the index_expressions method of the correct descriptor format type.
+        :param descriptor: Descriptor instance
+        :return: Dict of the list of indexes by family of operators
+        """
+        descriptor_format = descriptor.format
+
+        dft = cls.descriptor_format_types.get(descriptor_format['type'])
+        if dft is None:
+            raise ValueError("Unsupported descriptor format type %s" % descriptor_format['type'])
+
+        return dft.index_expressions(descriptor.name)
+
 
 class DescriptorFormatTypeGroupSingle(DescriptorFormatTypeGroup):
     """
@@ -1311,7 +1399,7 @@ class DescriptorFormatTypeImpreciseDate(DescriptorFormatType):
     def check(self, descriptor_type_format):
         return None
 
-    def make_sql_value(self, value):
+    def make_sql_value(self, value, params=None):
         """
         Convert the given value for a SQL query according to the format of the descriptor and about the
         meaning of the NULL value.
@@ -1341,7 +1429,28 @@ class DescriptorFormatTypeImpreciseDate(DescriptorFormatType):
 
         return result
 
-    def operator_eq(self, db_table, descriptor_name, value):
+    def _bind(self, value, params):
+        """
+        Return the placeholder of a date part and append it to the bind parameters,
+        or the literal part if there is no bind parameters list.
+        """
+        if params is None:
+            return value
+
+        params.append(int(value))
+        return "%s"
+
+    def index_expressions(self, descriptor_name):
+        # the year, month and day are compared separately, the year always first
+        parts = tuple('(("descriptors"->\'%s\')->>%i)::INTEGER' % (descriptor_name, i) for i in range(0, 3))
+
+        return {
+            'eq': [parts],
+            # the range operators are ORed with IS NULL, indexed apart
+            'range': [parts, ('("descriptors"->>\'%s\')' % descriptor_name,)]
+        }
+
+    def operator_eq(self, db_table, descriptor_name, value, params=None):
         """
         Strict equality operator.
         """
@@ -1353,33 +1462,33 @@ class DescriptorFormatTypeImpreciseDate(DescriptorFormatType):
                 if final_value[2] != '0':
                     # year is always present
                     clauses.append('(("%s"."descriptors"->\'%s\')->>0)::INTEGER = %s' % (
-                        db_table, descriptor_name, final_value[0]))
+                        db_table, descriptor_name, self._bind(final_value[0], params)))
 
                     # month
                     clauses.append('((("%s"."descriptors"->\'%s\')->>1)::INTEGER = 0' % (
                         db_table, descriptor_name) + " OR "
                                                      '(("%s"."descriptors"->\'%s\')->>1)::INTEGER = %s)' % (
-                                       db_table, descriptor_name, final_value[1]))
+                                       db_table, descriptor_name, self._bind(final_value[1], params)))
 
                     # day of month
                     clauses.append('((("%s"."descriptors"->\'%s\')->>2)::INTEGER = 0' % (
                         db_table, descriptor_name) + " OR "
                                                      '(("%s"."descriptors"->\'%s\')->>2)::INTEGER = %s)' % (
-                                       db_table, descriptor_name, final_value[2]))
+                                       db_table, descriptor_name, self._bind(final_value[2], params)))
                 else:
                     # year
                     clauses.append('(("%s"."descriptors"->\'%s\')->>0)::INTEGER = %s' % (
-                        db_table, descriptor_name, final_value[0]))
+                        db_table, descriptor_name, self._bind(final_value[0], params)))
 
                     # month
                     clauses.append('((("%s"."descriptors"->\'%s\')->>1)::INTEGER = 0' % (
                         db_table, descriptor_name) + " OR "
                                                      '(("%s"."descriptors"->\'%s\')->>1)::INTEGER = %s)' % (
-                                       db_table, descriptor_name, final_value[1]))
+                                       db_table, descriptor_name, self._bind(final_value[1], params)))
             else:
                 # year
                 clauses.append('(("%s"."descriptors"->\'%s\')->>0)::INTEGER = %s' % (
-                    db_table, descriptor_name, final_value[0]))
+                    db_table, descriptor_name, self._bind(final_value[0], params)))
 
                 # clauses = [
                 # '(("%s"."descriptors"->\'%s\')->>0)::INTEGER = %s' % (db_table, descriptor_name, final_value[0]),
@@ -1397,7 +1506,7 @@ class DescriptorFormatTypeImpreciseDate(DescriptorFormatType):
 
         return "(%s)" % " AND ".join(clauses)
 
-    def operator_neq(self, db_table, descriptor_name, value):
+    def operator_neq(self, db_table, descriptor_name, value, params=None):
         """
         Strict inequality operator.
         """
@@ -1409,37 +1518,37 @@ class DescriptorFormatTypeImpreciseDate(DescriptorFormatType):
                 if final_value[2] != '0':
                     # year is always present
                     clauses.append('(("%s"."descriptors"->\'%s\')->>0)::INTEGER != %s' % (
-                        db_table, descriptor_name, final_value[0]))
+                        db_table, descriptor_name, self._bind(final_value[0], params)))
 
                     # month
                     clauses.append('((("%s"."descriptors"->\'%s\')->>1)::INTEGER != 0' % (
                         db_table, descriptor_name) + " AND "
                                                      '(("%s"."descriptors"->\'%s\')->>1)::INTEGER != %s)' % (
-                                       db_table, descriptor_name, final_value[1]))
+                                       db_table, descriptor_name, self._bind(final_value[1], params)))
 
                     # day of month
                     clauses.append('((("%s"."descriptors"->\'%s\')->>2)::INTEGER != 0' % (
                         db_table, descriptor_name) + " AND "
                                                      '(("%s"."descriptors"->\'%s\')->>2)::INTEGER != %s)' % (
-                                       db_table, descriptor_name, final_value[2]))
+                                       db_table, descriptor_name, self._bind(final_value[2], params)))
                 else:
                     # year
                     clauses.append('(("%s"."descriptors"->\'%s\')->>0)::INTEGER != %s' % (
-                        db_table, descriptor_name, final_value[0]))
+                        db_table, descriptor_name, self._bind(final_value[0], params)))
 
                     # month
                     clauses.append('((("%s"."descriptors"->\'%s\')->>1)::INTEGER != 0' % (
                         db_table, descriptor_name) + " AND "
                                                      '(("%s"."descriptors"->\'%s\')->>1)::INTEGER != %s)' % (
-                                       db_table, descriptor_name, final_value[1]))
+                                       db_table, descriptor_name, self._bind(final_value[1], params)))
             else:
                 # year
                 clauses.append('(("%s"."descriptors"->\'%s\')->>0)::INTEGER != %s' % (
-                    db_table, descriptor_name, final_value[0]))
+                    db_table, descriptor_name, self._bind(final_value[0], params)))
 
         return "(%s)" % " OR ".join(clauses)
 
-    def operator_lte(self, db_table, descriptor_name, value):
+    def operator_lte(self, db_table, descriptor_name, value, params=None):
         """
         Lesser than or equal operator.
         """
@@ -1455,33 +1564,33 @@ class DescriptorFormatTypeImpreciseDate(DescriptorFormatType):
                 if final_value[2] != '0':
                     # year is always present
                     sub_clauses.append('(("%s"."descriptors"->\'%s\')->>0)::INTEGER <= %s' % (
-                        db_table, descriptor_name, final_value[0]))
+                        db_table, descriptor_name, self._bind(final_value[0], params)))
 
                     # month
                     sub_clauses.append('((("%s"."descriptors"->\'%s\')->>1)::INTEGER = 0' % (
                         db_table, descriptor_name) + " OR "
                                                      '(("%s"."descriptors"->\'%s\')->>1)::INTEGER <= %s)' % (
-                                           db_table, descriptor_name, final_value[1]))
+                                           db_table, descriptor_name, self._bind(final_value[1], params)))
 
                     # day of month
                     sub_clauses.append('((("%s"."descriptors"->\'%s\')->>2)::INTEGER = 0' % (
                         db_table, descriptor_name) + " OR "
                                                      '(("%s"."descriptors"->\'%s\')->>2)::INTEGER <= %s)' % (
-                                           db_table, descriptor_name, final_value[2]))
+                                           db_table, descriptor_name, self._bind(final_value[2], params)))
                 else:
                     # year
                     sub_clauses.append('(("%s"."descriptors"->\'%s\')->>0)::INTEGER <= %s' % (
-                        db_table, descriptor_name, final_value[0]))
+                        db_table, descriptor_name, self._bind(final_value[0], params)))
 
                     # month
                     sub_clauses.append('((("%s"."descriptors"->\'%s\')->>1)::INTEGER = 0' % (
                         db_table, descriptor_name) + " OR "
                                                      '(("%s"."descriptors"->\'%s\')->>1)::INTEGER <= %s)' % (
-                                           db_table, descriptor_name, final_value[1]))
+                                           db_table, descriptor_name, self._bind(final_value[1], params)))
             else:
                 # year
                 sub_clauses.append('(("%s"."descriptors"->\'%s\')->>0)::INTEGER <= %s' % (
-                    db_table, descriptor_name, final_value[0]))
+                    db_table, descriptor_name, self._bind(final_value[0], params)))
 
             clauses.append("%s OR (%s)" % (is_null, " AND ".join(sub_clauses)))
         else:
@@ -1505,7 +1614,7 @@ class DescriptorFormatTypeImpreciseDate(DescriptorFormatType):
 
         return "(%s)" % " AND ".join(clauses)
 
-    def operator_lt(self, db_table, descriptor_name, value):
+    def operator_lt(self, db_table, descriptor_name, value, params=None):
         """
         Strict lesser than operator.
         """
@@ -1521,33 +1630,33 @@ class DescriptorFormatTypeImpreciseDate(DescriptorFormatType):
                 if final_value[2] != '0':
                     # year is always present
                     sub_clauses.append('(("%s"."descriptors"->\'%s\')->>0)::INTEGER <= %s' % (
-                        db_table, descriptor_name, final_value[0]))
+                        db_table, descriptor_name, self._bind(final_value[0], params)))
 
                     # month
                     sub_clauses.append('((("%s"."descriptors"->\'%s\')->>1)::INTEGER = 0' % (
                         db_table, descriptor_name) + " OR "
                                                      '(("%s"."descriptors"->\'%s\')->>1)::INTEGER < %s)' % (
-                                           db_table, descriptor_name, final_value[1]))
+                                           db_table, descriptor_name, self._bind(final_value[1], params)))
 
                     # day of month
                     sub_clauses.append('((("%s"."descriptors"->\'%s\')->>2)::INTEGER = 0' % (
                         db_table, descriptor_name) + " OR "
                                                      '(("%s"."descriptors"->\'%s\')->>2)::INTEGER < %s)' % (
-                                           db_table, descriptor_name, final_value[2]))
+                                           db_table, descriptor_name, self._bind(final_value[2], params)))
                 else:
                     # year
                     sub_clauses.append('(("%s"."descriptors"->\'%s\')->>0)::INTEGER < %s' % (
-                        db_table, descriptor_name, final_value[0]))
+                        db_table, descriptor_name, self._bind(final_value[0], params)))
 
                     # month
                     sub_clauses.append('((("%s"."descriptors"->\'%s\')->>1)::INTEGER = 0' % (
                         db_table, descriptor_name) + " OR "
                                                      '(("%s"."descriptors"->\'%s\')->>1)::INTEGER < %s)' % (
-                                           db_table, descriptor_name, final_value[1]))
+                                           db_table, descriptor_name, self._bind(final_value[1], params)))
             else:
                 # year
                 sub_clauses.append('(("%s"."descriptors"->\'%s\')->>0)::INTEGER < %s' % (
-                    db_table, descriptor_name, final_value[0]))
+                    db_table, descriptor_name, self._bind(final_value[0], params)))
 
             clauses.append("%s OR (%s)" % (is_null, " AND ".join(sub_clauses)))
         else:
@@ -1556,7 +1665,7 @@ class DescriptorFormatTypeImpreciseDate(DescriptorFormatType):
 
         return "(%s)" % " AND ".join(clauses)
 
-    def operator_gte(self, db_table, descriptor_name, value):
+    def operator_gte(self, db_table, descriptor_name, value, params=None):
         """
         Greater than or equal operator.
         """
@@ -1574,33 +1683,33 @@ class DescriptorFormatTypeImpreciseDate(DescriptorFormatType):
                 if final_value[2] != '0':
                     # year is always present
                     sub_clauses.append('(("%s"."descriptors"->\'%s\')->>0)::INTEGER >= %s' % (
-                        db_table, descriptor_name, final_value[0]))
+                        db_table, descriptor_name, self._bind(final_value[0], params)))
 
                     # month
                     sub_clauses.append('((("%s"."descriptors"->\'%s\')->>1)::INTEGER = 0' % (
                         db_table, descriptor_name) + " OR "
                                                      '(("%s"."descriptors"->\'%s\')->>1)::INTEGER >= %s)' % (
-                                           db_table, descriptor_name, final_value[1]))
+                                           db_table, descriptor_name, self._bind(final_value[1], params)))
 
                     # day of month
                     sub_clauses.append('((("%s"."descriptors"->\'%s\')->>2)::INTEGER = 0' % (
                         db_table, descriptor_name) + " OR "
                                                      '(("%s"."descriptors"->\'%s\')->>2)::INTEGER >= %s)' % (
-                                           db_table, descriptor_name, final_value[2]))
+                                           db_table, descriptor_name, self._bind(final_value[2], params)))
                 else:
                     # year
                     sub_clauses.append('(("%s"."descriptors"->\'%s\')->>0)::INTEGER >= %s' % (
-                        db_table, descriptor_name, final_value[0]))
+                        db_table, descriptor_name, self._bind(final_value[0], params)))
 
                     # month
                     sub_clauses.append('((("%s"."descriptors"->\'%s\')->>1)::INTEGER = 0' % (
                         db_table, descriptor_name) + " OR "
                                                      '(("%s"."descriptors"->\'%s\')->>1)::INTEGER >= %s)' % (
-                                           db_table, descriptor_name, final_value[1]))
+                                           db_table, descriptor_name, self._bind(final_value[1], params)))
             else:
                 # year
                 sub_clauses.append('(("%s"."descriptors"->\'%s\')->>0)::INTEGER >= %s' % (
-                    db_table, descriptor_name, final_value[0]))
+                    db_table, descriptor_name, self._bind(final_value[0], params)))
 
             # clauses.append("%s OR (%s)" % (is_null, " AND ".join(sub_clauses)))
             clauses = sub_clauses
@@ -1625,7 +1734,7 @@ class DescriptorFormatTypeImpreciseDate(DescriptorFormatType):
 
         return "(%s)" % " AND ".join(clauses)
 
-    def operator_gt(self, db_table, descriptor_name, value):
+    def operator_gt(self, db_table, descriptor_name, value, params=None):
         """
         Strict greater than operator.
         """
@@ -1638,33 +1747,33 @@ class DescriptorFormatTypeImpreciseDate(DescriptorFormatType):
                 if final_value[2] != '0':
                     # year is always present
                     clauses.append('(("%s"."descriptors"->\'%s\')->>0)::INTEGER > %s' % (
-                        db_table, descriptor_name, final_value[0]))
+                        db_table, descriptor_name, self._bind(final_value[0], params)))
 
                     # month
                     clauses.append('((("%s"."descriptors"->\'%s\')->>1)::INTEGER != 0' % (
                         db_table, descriptor_name) + " OR "
                                                      '(("%s"."descriptors"->\'%s\')->>1)::INTEGER > %s)' % (
-                                       db_table, descriptor_name, final_value[1]))
+                                       db_table, descriptor_name, self._bind(final_value[1], params)))
 
                     # day of month
                     clauses.append('((("%s"."descriptors"->\'%s\')->>2)::INTEGER != 0' % (
                         db_table, descriptor_name) + " OR "
                                                      '(("%s"."descriptors"->\'%s\')->>2)::INTEGER > %s)' % (
-                                       db_table, descriptor_name, final_value[2]))
+                                       db_table, descriptor_name, self._bind(final_value[2], params)))
                 else:
                     # year
                     clauses.append('(("%s"."descriptors"->\'%s\')->>0)::INTEGER > %s' % (
-                        db_table, descriptor_name, final_value[0]))
+                        db_table, descriptor_name, self._bind(final_value[0], params)))
 
                     # month
                     clauses.append('((("%s"."descriptors"->\'%s\')->>1)::INTEGER != 0' % (
                         db_table, descriptor_name) + " OR "
                                                      '(("%s"."descriptors"->\'%s\')->>1)::INTEGER > %s)' % (
-                                       db_table, descriptor_name, final_value[1]))
+                                       db_table, descriptor_name, self._bind(final_value[1], params)))
             else:
                 # year
                 clauses.append('(("%s"."descriptors"->\'%s\')->>0)::INTEGER > %s' % (
-                    db_table, descriptor_name, final_value[0]))
+                    db_table, descriptor_name, self._bind(final_value[0], params)))
         else:
             is_null = self.operator_notnull(db_table, descriptor_name)
 
@@ -138,7 +138,8 @@ class FixtureManager:
                 type=index_type.value
             )
 
-            index.create_or_drop_index()
+            index.create_or_drop_index(progress=lambda index_name, number, count: sys.stdout.write(
+                "     - Build index %s (%i/%i)\n" % (index_name, number, count)))
 
             self.set_descriptor_index(index.id)
 
@@ -24,6 +24,7 @@ from igdectk.rest import Format, Method
 from igdectk.rest.response import HttpResponseRest
 
 from main.models import InterfaceLanguages
+from main.search import search_backend
 from .descriptor import RestDescriptor
 from .models import Layout, Descriptor, DescriptorCondition
 
@@ -391,18 +392,18 @@ def search_layouts(request):
 
     if 'name' in filters['fields']:
         if filters['method'] == 'ieq':
-            layouts = Layout.objects.filter(name__iexact=filters['name'])
+            layouts = Layout.objects.filter(search_backend.q('name', 'ieq', filters['name']))
         elif filters['method'] == 'icontains':
-            layouts = Layout.objects.filter(name__icontains=filters['name'])
+            layouts = Layout.objects.filter(search_backend.q('name', 'icontains', filters['name']))
     elif 'name_or_label' in filters['fields']:
         lang = translation.get_language()
 
         if filters['method'] == 'ieq':
             q_params = {"label__%s__iexact" % lang: filters['name']}
-            layouts = Layout.objects.filter(Q(name__iexact=filters['name']) | Q(**q_params))
+            layouts = Layout.objects.filter(search_backend.q('name', 'ieq', filters['name']) | Q(**q_params))
         elif filters['method'] == 'icontains':
             q_params = {"label__%s__icontains" % lang: filters['name']}
-            layouts = Layout.objects.filter(Q(name__icontains=filters['name']) | Q(**q_params))
+            layouts = Layout.objects.filter(search_backend.q('name', 'icontains', filters['name']) | Q(**q_params))
 
     if 'model' in filters['fields'] and 'model' in filters:
         app_name, model = filters['model'].split('.')
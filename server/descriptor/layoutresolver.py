@@ -0,0 +1,106 @@
+# -*- coding: utf-8; -*-
+#
+# @file layoutresolver.py
+# @brief coll-gate descriptor module, layout resolution
+# @author Frédéric SCHERMA (INRA UMR1095)
+# @date 2018-10-18
+# @copyright Copyright (c) 2018 INRA/CIRAD
+# @license MIT (see LICENSE file)
+# @details
+
+from types import MappingProxyType
+
+from django.http import Http404
+from django.utils.translation import ugettext_lazy as _
+
+from descriptor.descriptorformattype import DescriptorFormatTypeManager
+from main.cache import cache_manager
+
+from .models import Descriptor
+
+
+def make_layout_cache_name(layout):
+    """
+    Cache name of a resolved layout, according to its id and version (last modification date).
+    """
+    version = int(layout.modified_date.timestamp() * 1000000) if layout.modified_date else 0
+    return cache_manager.make_cache_name('layout', str(layout.id), str(version))
+
+
+def resolve_layouts(layouts):
+    """
+    Resolve the descriptors of many layouts. Descriptors of the non cached layouts are loaded in a single query.
+
+    Each resolved layout is a list of dict, in order of panels and descriptors of the layout, containing :
+      - descriptor: Descriptor model instance
+      - handler: Descriptor format type implementation
+      - conditions: Condition of the descriptor, or None
+      - mandatory: True if mandatory
+      - set_once: True if set once
+
+    The results are kept into the local cache of the descriptor category, that is invalidated at any change of a
+    layout or a descriptor, and the version of the layout is part of the cache name. They are not pickled, so
+    they are immutable (tuple of read-only dict), and the descriptors instances must be considered as read-only.
+
+    :param layouts: Iterable of Layout instances.
+    :return: A dict of tuple of resolved descriptors, with layout id as key.
+    """
+    results = {}
+    missing = []
+
+    for layout in layouts:
+        resolved = cache_manager.get_local('descriptor', make_layout_cache_name(layout))
+
+        if resolved is not None:
+            results[layout.id] = resolved
+        else:
+            missing.append(layout)
+
+    if not missing:
+        return results
+
+    names = set()
+
+    for layout in missing:
+        for panel in layout.layout_content.get('panels', []):
+            for layout_descriptor in panel.get('descriptors'):
+                names.add(layout_descriptor.get('name'))
+
+    descriptors = {descriptor.name: descriptor for descriptor in Descriptor.objects.filter(name__in=names)}
+
+    for layout in missing:
+        resolved = []
+
+        for panel in layout.layout_content.get('panels', []):
+            for layout_descriptor in panel.get('descriptors'):
+                descriptor = descriptors.get(layout_descriptor.get('name'))
+
+                if descriptor is None:
+                    raise Http404(_("Descriptor %s does not exists") % layout_descriptor.get('name'))
+
+                resolved.append(MappingProxyType({
+                    'descriptor': descriptor,
+                    'handler': DescriptorFormatTypeManager.get(descriptor.format),
+                    'conditions': layout_descriptor.get('conditions'),
+                    'mandatory': layout_descriptor.get('mandatory') is True,
+                    'set_once': layout_descriptor.get('set_once') is True
+                }))
+
+        resolved = tuple(resolved)
+
+        # cache for 1 day, bounded by the timeout of the local cache
+        cache_manager.set_local('descriptor', make_layout_cache_name(layout), resolved, 60 * 60 * 24)
+
+        results[layout.id] = resolved
+
+    return results
+
+
+def resolve_layout(layout):
+    """
+    Resolve the descriptors of a layout.
+
+    :param layout: Layout instance.
+    :return: A tuple of resolved descriptors (see resolve_layouts).
+    """
+    return resolve_layouts((layout,))[layout.id]
@@ -0,0 +1,141 @@
+# -*- coding: utf-8; -*-
+#
+# @file descriptor_index_verify.py
+# @brief Verify the descriptor indexes are used by the planner for the CursorQuery filters.
+# @author Frédéric SCHERMA (INRA UMR1095)
+# @date 2018-10-18
+# @copyright Copyright (c) 2018 INRA/CIRAD
+# @license MIT (see LICENSE file)
+# @details
+
+import json
+import sys
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+
+from descriptor.descriptorformattype import DescriptorFormatTypeManager
+from descriptor.models import DescriptorIndex, JSONBFieldIndexType
+from main.cursor import CursorQuery, CursorQueryError
+
+
+class Command(BaseCommand):
+    help = """EXPLAIN a representative CursorQuery filter for each family of operators of each descriptor index,
+    and report if one of the indexes of the descriptor is used by the plan."""
+
+    # representative operator by family of operators
+    OPERATORS = {
+        'eq': 'eq',
+        'range': 'gte',
+        'like': 'icontains'
+    }
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '-d', '--descriptor',
+            dest='descriptor',
+            default=None,
+            help='Verify only the indexes of this descriptor name',
+        )
+        parser.add_argument(
+            '--allow-seqscan',
+            action='store_true',
+            dest='allow_seqscan',
+            default=False,
+            help='Let the planner choose a sequential scan (small tables are never index scanned)',
+        )
+
+    def handle(self, *args, **options):
+        indexes = DescriptorIndex.objects.exclude(type=JSONBFieldIndexType.NONE.value).select_related(
+            'descriptor', 'target')
+
+        if options['descriptor']:
+            indexes = indexes.filter(descriptor__name=options['descriptor'])
+
+        failures = 0
+
+        for index in indexes:
+            model = index.target.model_class()
+            descriptor_name = index.descriptor.name
+
+            index_names = set(index.index_names())
+            prefix = "%s.%s (%s)" % (model._meta.db_table, descriptor_name, JSONBFieldIndexType(index.type).name)
+
+            if not index_names:
+                sys.stdout.write("%s: missing index\n" % prefix)
+                failures += 1
+                continue
+
+            value = self.sample_value(model, descriptor_name)
+            if value is None:
+                sys.stdout.write("%s: no value to filter, skipped\n" % prefix)
+                continue
+
+            expressions = DescriptorFormatTypeManager.index_expressions(index.descriptor)
+
+            for family in sorted(index.index_methods(expressions)):
+                operator = self.OPERATORS[family]
+
+                # a trigram index needs at least 3 characters
+                term = value[0:3] if family == 'like' else value
+
+                cq = CursorQuery(model)
+                cq.filter({'type': 'term', 'field': '#' + descriptor_name, 'op': operator, 'value': term})
+
+                try:
+                    used = self.used_indexes(cq, options['allow_seqscan']) & index_names
+                except CursorQueryError as e:
+                    # the descriptor is not used by a layout of the model
+                    sys.stdout.write("%s %s: cannot be filtered (%s)\n" % (prefix, operator, str(e)))
+                    continue
+
+                if used:
+                    sys.stdout.write("%s %s: uses %s\n" % (prefix, operator, ", ".join(sorted(used))))
+                else:
+                    sys.stdout.write("%s %s: not used\n" % (prefix, operator))
+                    failures += 1
+
+        if failures:
+            raise CommandError("%i descriptor index-es not used" % failures)
+
+    def sample_value(self, model, descriptor_name):
+        """
+        A value of the descriptor, from any entity having it.
+        """
+        with connection.cursor() as cursor:
+            cursor.execute("""SELECT "descriptors"->%%s FROM "%s" WHERE "descriptors" ? %%s LIMIT 1""" % (
+                model._meta.db_table,), [descriptor_name, descriptor_name])
+
+            row = cursor.fetchone()
+
+        return row[0] if row else None
+
+    def used_indexes(self, cq, allow_seqscan):
+        """
+        Names of the indexes used by the plan of the query of the ids of a cursor query.
+        """
+        sql, params = cq.ids_sql()
+
+        with transaction.atomic():
+            with connection.cursor() as cursor:
+                if not allow_seqscan:
+                    cursor.execute("SET LOCAL enable_seqscan = off")
+
+                cursor.execute("EXPLAIN (FORMAT JSON) " + sql, params)
+                plan = cursor.fetchone()[0]
+
+        if isinstance(plan, str):
+            plan = json.loads(plan)
+
+        index_names = set()
+        nodes = [plan[0]['Plan']]
+
+        while nodes:
+            node = nodes.pop()
+
+            if 'Index Name' in node:
+                index_names.add(node['Index Name'])
+
+            nodes.extend(node.get('Plans', []))
+
+        return index_names
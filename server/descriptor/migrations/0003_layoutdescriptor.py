@@ -0,0 +1,52 @@
+# Generated by Django 2.0.2 on 2018-10-18 12:00
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def build_layout_descriptors(apps, schema_editor):
+    Layout = apps.get_model('descriptor', 'Layout')
+    Descriptor = apps.get_model('descriptor', 'Descriptor')
+    LayoutDescriptor = apps.get_model('descriptor', 'LayoutDescriptor')
+
+    descriptors_ids = dict(Descriptor.objects.values_list('name', 'id'))
+    layout_descriptors = []
+
+    for layout in Layout.objects.all():
+        ids = set()
+
+        for panel in layout.layout_content.get('panels', []):
+            for descriptor in panel.get('descriptors'):
+                descriptor_id = descriptors_ids.get(descriptor.get('name'))
+                if descriptor_id is not None:
+                    ids.add(descriptor_id)
+
+        layout_descriptors += [LayoutDescriptor(layout_id=layout.id, descriptor_id=descriptor_id) for descriptor_id in ids]
+
+    LayoutDescriptor.objects.bulk_create(layout_descriptors)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('descriptor', '0002_auto_20180328_1749'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='LayoutDescriptor',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('descriptor', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='layout_descriptors', to='descriptor.Descriptor')),
+                ('layout', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='layout_descriptors', to='descriptor.Layout')),
+            ],
+            options={
+                'verbose_name': 'layout descriptor',
+            },
+        ),
+        migrations.AlterUniqueTogether(
+            name='layoutdescriptor',
+            unique_together={('layout', 'descriptor')},
+        ),
+        migrations.RunPython(build_layout_descriptors, migrations.RunPython.noop),
+    ]
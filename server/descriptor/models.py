@@ -11,6 +11,7 @@
 import codecs
 import json
 import hashlib
+import logging
 
 from django.contrib.contenttypes.models import ContentType
 from django.contrib.postgres.fields import JSONField
@@ -24,9 +25,12 @@ from main.models import Entity
 
 from django.db import connections, models, connection
 from django.db.models.sql.compiler import SQLCompiler
+from django.dispatch import receiver
 
 from igdectk.common.models import ChoiceEnum, IntegerChoice
 
+logger = logging.getLogger('collgate')
+
 
 class NullsLastSQLCompiler(SQLCompiler):
     def get_order_by(self):
@@ -276,23 +280,18 @@ class Descriptor(Entity):
         :return: True if there is some values
         """
 
-        def handle(content_type):
-            for describable in content_type.get_all_objects_for_this_type():
-                # if the descriptor code is present in a JSONb field of describable entity,
-                # this mean that some records exist.
-                if self.code in describable.descriptors:
-                    return True
-
+        # if the descriptor code is present as key of the JSONB field of a describable entity,
+        # this mean that some records exist. It is an EXISTS query with the ? operator, that stop at the first
+        # found row and that can be served by a GIN index on the descriptors field.
         if not layout:
             from django.apps import apps
             for entity in apps.get_app_config('descriptor').describable_entities:
-                content_type = get_object_or_404(ContentType, app_label=entity._meta.app_label,
-                                                 model=entity._meta.model_name)
-                if handle(content_type):
+                if entity.objects.filter(descriptors__has_key=self.code).exists():
                     return True
 
         else:
-            if handle(layout.target):
+            model_class = layout.target.model_class()
+            if model_class.objects.filter(layout=layout, descriptors__has_key=self.code).exists():
                 return True
 
         return False
@@ -301,16 +300,7 @@ class Descriptor(Entity):
         """
         Check if the type of descriptor is used by some layouts of descriptors
         """
-        # @todo how to optimize it?
-
-        layouts = Layout.objects.all()
-
-        for layout in layouts:
-            for panel in layout.layout_content.get('panels'):
-                for descriptor in panel.get('descriptors'):
-                    if descriptor.get('name') == self.name:
-                        return True
-        return False
+        return LayoutDescriptor.objects.filter(descriptor=self).exists()
 
     def get_label(self):
         """
@@ -355,290 +345,22 @@ class Descriptor(Entity):
         if sort_by == "code":
             sort_by = "id"
 
-        # internally stored values
+        # internally stored values, using a sorted index
         if self.values is not None:
-            if trans:
-                pre_values = self.values
-                if lang in pre_values:
-                    values = pre_values[lang]
-                else:
-                    values = {}
-            else:
-                values = self.values
-
-            if sort_by == 'id':
-                # sort by id (code)
-                # name are unique so its a trivial case
-                if reverse:
-                    cursor_code = cursor[1] if cursor else "~"
-
-                    for k, v in values.items():
-                        if k < cursor_code:
-                            values_list.append({
-                                'id': k,
-                                'parent': v.get('parent', None),
-                                'ordinal': v.get('ordinal', None),
-                                'value0': v.get('value0', None),
-                                'value1': v.get('value1', None),
-                            })
-                else:
-                    cursor_code = cursor[0] if cursor else ""
-
-                    for k, v in values.items():
-                        if k > cursor_code:
-                            values_list.append({
-                                'id': k,
-                                'parent': v.get('parent', None),
-                                'ordinal': v.get('ordinal', None),
-                                'value0': v.get('value0', None),
-                                'value1': v.get('value1', None),
-                            })
-
-                values_list = sorted(values_list, key=lambda v: v['id'], reverse=reverse)[:limit]
-            elif sort_by == 'ordinal':
-                # sort by a ordinal field as integer comparison.
-                # its not a trivial case because of null values and duplications.
-                # blank value are not allowed.
-                # null values are supported.
-                # duplicated values are supported by string concatenation of ordinal+code during sorting.
-                cursor_ordinal, cursor_code = cursor if cursor else (None, None)
-
-                if cursor_code is None:
-                    cursor_code = ""
-
-                extra_list = []
-
-                if reverse:
-                    if cursor_ordinal:
-                        cursor_ordinal = int(cursor_ordinal)
-                    else:
-                        cursor_ordinal = 999999999
-
-                    if cursor:
-                        for k, v in values.items():
-                            ordinal = v.get('ordinal')
-
-                            if ordinal is None and k > cursor_code:
-                                extra_list.append({
-                                    'id': k,
-                                    'parent': v.get('parent', None),
-                                    'ordinal': v.get('ordinal', None),
-                                    'value0': v.get('value0', None),
-                                    'value1': v.get('value1', None),
-                                })
-                            elif cursor_ordinal and ordinal and ordinal < cursor_ordinal:
-                                values_list.append({
-                                    'id': k,
-                                    'parent': v.get('parent', None),
-                                    'ordinal': v.get('ordinal', None),
-                                    'value0': v.get('value0', None),
-                                    'value1': v.get('value1', None),
-                                })
-                    else:
-                        for k, v in values.items():
-                            ordinal = v.get('ordinal')
-
-                            if ordinal is None:
-                                extra_list.append({
-                                    'id': k,
-                                    'parent': v.get('parent', None),
-                                    'ordinal': v.get('ordinal', None),
-                                    'value0': v.get('value0', None),
-                                    'value1': v.get('value1', None),
-                                })
-                            else:
-                                values_list.append({
-                                    'id': k,
-                                    'parent': v.get('parent', None),
-                                    'ordinal': v.get('ordinal', None),
-                                    'value0': v.get('value0', None),
-                                    'value1': v.get('value1', None),
-                                })
-                else:
-                    if cursor_ordinal:
-                        cursor_ordinal = int(cursor_ordinal)
-                    else:
-                        cursor_ordinal = -1
-
-                    if cursor:
-                        for k, v in values.items():
-                            ordinal = v.get('ordinal')
-
-                            if ordinal is None and k > cursor_code:
-                                extra_list.append({
-                                    'id': k,
-                                    'parent': v.get('parent', None),
-                                    'ordinal': v.get('ordinal', None),
-                                    'value0': v.get('value0', None),
-                                    'value1': v.get('value1', None),
-                                })
-                            elif cursor_ordinal and ordinal and ordinal > cursor_ordinal:
-                                values_list.append({
-                                    'id': k,
-                                    'parent': v.get('parent', None),
-                                    'ordinal': v.get('ordinal', None),
-                                    'value0': v.get('value0', None),
-                                    'value1': v.get('value1', None),
-                                })
-                    else:
-                        for k, v in values.items():
-                            ordinal = v.get('ordinal')
-
-                            if ordinal is None:
-                                extra_list.append({
-                                    'id': k,
-                                    'parent': v.get('parent', None),
-                                    'ordinal': v.get('ordinal', None),
-                                    'value0': v.get('value0', None),
-                                    'value1': v.get('value1', None),
-                                })
-                            else:
-                                values_list.append({
-                                    'id': k,
-                                    'parent': v.get('parent', None),
-                                    'ordinal': v.get('ordinal', None),
-                                    'value0': v.get('value0', None),
-                                    'value1': v.get('value1', None),
-                                })
-
-                def sort_method(v):
-                    ordinal = v['ordinal']
-
-                    if ordinal:
-                        return (int(ordinal) + 1) * int(v['id'].split(':')[1])
-                    else:
-                        return int(v['id'].split(':')[1])
-
-                values_list = sorted(values_list, key=sort_method, reverse=reverse)[:limit]
-                extra_size = limit - len(values_list)
-
-                if extra_size > 0:
-                    extra_list = sorted(extra_list, key=lambda v: int(v['id'].split(':')[1]))[:extra_size]
-                    values_list += extra_list
-            else:
-                # sort by a field contained in the values as string compare.
-                # its not a trivial case because of null values and duplications.
-                # blank value are not allowed.
-                # null values are supported.
-                # duplicated values are supported by string concatenation of value+code during sorting.
-                cursor_value, cursor_code = cursor if cursor else (None, None)
-
-                if cursor_code is None:
-                    cursor_code = ""
+            from descriptor.valuesindex import get_values_index
 
-                extra_list = []
+            values = self.values.get(lang, {}) if trans else self.values
+            index = get_values_index(self, lang if trans else None, sort_by)
 
-                if reverse:
-                    if cursor:
-                        for k, v in values.items():
-                            value = v.get(sort_by)
-
-                            # if value is None:
-                            #     raise SuspiciousOperation("Invalid value for field")
-
-                            # if value is "" and k > cursor_code:
-                            if value is None and k > cursor_code:
-                                extra_list.append({
-                                    'id': k,
-                                    'parent': v.get('parent', None),
-                                    'ordinal': v.get('ordinal', None),
-                                    'value0': v.get('value0', None),
-                                    'value1': v.get('value1', None),
-                                })
-                            elif cursor_value and value and value < cursor_value:
-                                values_list.append({
-                                    'id': k,
-                                    'parent': v.get('parent', None),
-                                    'ordinal': v.get('ordinal', None),
-                                    'value0': v.get('value0', None),
-                                    'value1': v.get('value1', None),
-                                })
-                    else:
-                        for k, v in values.items():
-                            value = v.get(sort_by)
-
-                            # if value is None:
-                            #     raise SuspiciousOperation("Invalid value for field")
-
-                            # if value is "":
-                            if value is None:
-                                extra_list.append({
-                                    'id': k,
-                                    'parent': v.get('parent', None),
-                                    'ordinal': v.get('ordinal', None),
-                                    'value0': v.get('value0', None),
-                                    'value1': v.get('value1', None),
-                                })
-                            else:
-                                values_list.append({
-                                    'id': k,
-                                    'parent': v.get('parent', None),
-                                    'ordinal': v.get('ordinal', None),
-                                    'value0': v.get('value0', None),
-                                    'value1': v.get('value1', None),
-                                })
-                else:
-                    if cursor:
-                        for k, v in values.items():
-                            value = v.get(sort_by)
-
-                            # if value is None:
-                            #     raise SuspiciousOperation("Invalid value for field")
-
-                            # if value is "" and k > cursor_code:
-                            if value is None and k > cursor_code:
-                                extra_list.append({
-                                    'id': k,
-                                    'parent': v.get('parent', None),
-                                    'ordinal': v.get('ordinal', None),
-                                    'value0': v.get('value0', None),
-                                    'value1': v.get('value1', None),
-                                })
-                            elif cursor_value and value and value > cursor_value:
-                                values_list.append({
-                                    'id': k,
-                                    'parent': v.get('parent', None),
-                                    'ordinal': v.get('ordinal', None),
-                                    'value0': v.get('value0', None),
-                                    'value1': v.get('value1', None),
-                                })
-                    else:
-                        for k, v in values.items():
-                            value = v.get(sort_by)
-
-                            # if value is None:
-                            #     raise SuspiciousOperation("Invalid value for field")
-
-                            # if value is "":
-                            if value is None:
-                                extra_list.append({
-                                    'id': k,
-                                    'parent': v.get('parent', None),
-                                    'ordinal': v.get('ordinal', None),
-                                    'value0': v.get('value0', None),
-                                    'value1': v.get('value1', None),
-                                })
-                            else:
-                                values_list.append({
-                                    'id': k,
-                                    'parent': v.get('parent', None),
-                                    'ordinal': v.get('ordinal', None),
-                                    'value0': v.get('value0', None),
-                                    'value1': v.get('value1', None),
-                                })
-
-                def sort_method(v):
-                    if v[sort_by]:
-                        return v[sort_by] + v['id']
-                    else:
-                        return v['id']
-
-                values_list = sorted(values_list, key=sort_method, reverse=reverse)[:limit]
-                extra_size = limit - len(values_list)
-
-                if extra_size > 0:
-                    extra_list = sorted(extra_list, key=lambda v: v['id'])[:extra_size]
-                    values_list += extra_list
+            for code in index.page(cursor, reverse, limit):
+                v = values[code]
+                values_list.append({
+                    'id': code,
+                    'parent': v.get('parent', None),
+                    'ordinal': v.get('ordinal', None),
+                    'value0': v.get('value0', None),
+                    'value1': v.get('value1', None),
+                })
         else:  # per row value
             if trans:
                 qs = self.values_set.filter(language=lang)
@@ -723,13 +445,13 @@ class Descriptor(Entity):
         # cursors
         if len(values_list) > 0:
             val = values_list[0]
-            if val[sort_by]:
+            if val[sort_by] is not None:
                 prev_cursor = (val[sort_by], val['id'])
             else:
                 prev_cursor = (None, val['id'])
 
             val = values_list[-1]
-            if val[sort_by]:
+            if val[sort_by] is not None:
                 next_cursor = (val[sort_by], val['id'])
             else:
                 next_cursor = (None, val['id'])
@@ -785,87 +507,22 @@ class Descriptor(Entity):
         values_list = []
 
         if self.values is not None:
-            if trans:
-                pre_values = self.values
-                if lang in pre_values:
-                    values = pre_values[lang]
-                else:
-                    values = {}
-            else:
-                values = self.values
-
             # ordinal means unique result, so no cursor/limit
-            if field_name == "ordinal":
-                for k, v in values.items():
-                    ordinal = v.get('ordinal')
-
-                    if ordinal == field_value:
-                        values_list.append({
-                            'id': k,
-                            'parent': v.get('parent', None),
-                            'ordinal': v.get('ordinal', None),
-                            'value0': v.get('value0', None),
-                            'value1': v.get('value1', None),
-                        })
-                        break
-            elif field_name == "value0" or field_name == "value1":
-                if cursor_code is None:
-                    cursor_code = ""
-
-                extra_list = []
-
-                if cursor:
-                    for k, v in values.items():
-                        value = v.get(field_name)
-
-                        # if value is None:
-                        #     raise SuspiciousOperation("Invalid value for field")
-
-                        # if value is "" and k > cursor_code:
-                        if value.startswith(field_value):
-                            if value is None and k > cursor_code:
-                                extra_list.append({
-                                    'id': k,
-                                    'parent': v.get('parent', None),
-                                    'ordinal': v.get('ordinal', None),
-                                    'value0': v.get('value0', None),
-                                    'value1': v.get('value1', None),
-                                })
-                            elif cursor_value and value and value > cursor_value:
-                                values_list.append({
-                                    'id': k,
-                                    'parent': v.get('parent', None),
-                                    'ordinal': v.get('ordinal', None),
-                                    'value0': v.get('value0', None),
-                                    'value1': v.get('value1', None),
-                                })
-                else:
-                    for k, v in values.items():
-                        value = v.get(field_name)
-
-                        if value.startswith(field_value):
-                            values_list.append({
-                                'id': k,
-                                'parent': v.get('parent', None),
-                                'ordinal': v.get('ordinal', None),
-                                'value0': v.get('value0', None),
-                                'value1': v.get('value1', None),
-                            })
-
-                # values_list = sorted(values_list, key=lambda v: v[field_name])
-
-                def sort_method(v):
-                    if v[field_name]:
-                        return v[field_name] + v['id']
-                    else:
-                        return v['id']
-
-                values_list = sorted(values_list, key=sort_method)[:limit]
-                extra_size = limit - len(values_list)
-
-                if extra_size > 0:
-                    extra_list = sorted(extra_list, key=lambda v: v['id'])[:extra_size]
-                    values_list += extra_list
+            if field_name in ("ordinal", "value0", "value1"):
+                from descriptor.valuesindex import get_values_index
+
+                values = self.values.get(lang, {}) if trans else self.values
+                index = get_values_index(self, lang if trans else None, field_name)
+
+                for code in index.search(field_value, cursor, limit):
+                    v = values[code]
+                    values_list.append({
+                        'id': code,
+                        'parent': v.get('parent', None),
+                        'ordinal': v.get('ordinal', None),
+                        'value0': v.get('value0', None),
+                        'value1': v.get('value1', None),
+                    })
         else:
             if trans:
                 qs = self.values_set.filter(language=lang)
@@ -903,13 +560,13 @@ class Descriptor(Entity):
         # cursors
         if len(values_list) > 0:
             val = values_list[0]
-            if val[field_name]:
+            if val[field_name] is not None:
                 prev_cursor = (val[field_name], val['id'])
             else:
                 prev_cursor = (None, val['id'])
 
             val = values_list[-1]
-            if val[field_name]:
+            if val[field_name] is not None:
                 next_cursor = (val[field_name], val['id'])
             else:
                 next_cursor = (None, val['id'])
@@ -1043,98 +700,161 @@ class DescriptorIndex(models.Model):
             },
         }
 
-    def create_or_drop_index(self, db='default'):
+    # index method and operator class by family of operators, for each type of index
+    INDEX_METHODS = {
+        JSONBFieldIndexType.UNIQUE_BTREE.value: {'eq': ('BTREE', None), 'range': ('BTREE', None)},
+        JSONBFieldIndexType.BTREE.value: {'eq': ('BTREE', None), 'range': ('BTREE', None)},
+        JSONBFieldIndexType.GIN.value: {'like': ('GIN', 'gin_trgm_ops')},
+        JSONBFieldIndexType.GIST.value: {'like': ('GIST', 'gist_trgm_ops')},
+    }
+
+    def create_or_drop_index(self, db='default', progress=None):
         """
         Create or drop the index on the describable table, according to the current value of index.
+        The indexes are created concurrently (without locking the table against writes) when not into a
+        transaction.
         :param db: DB name ('default')
+        :param progress: None or callable(index_name, index_number, indexes_count) called before each index build
         """
         # drop previous if exists
-        if self.type != JSONBFieldIndexType.NONE.value:
-            self.drop_index(db=db)
+        self.drop_index(db=db)
 
         if self.type == JSONBFieldIndexType.NONE.value:
-            return self.drop_index(db=db)
-        elif self.type == JSONBFieldIndexType.UNIQUE_BTREE.value:
-            return self.create_btree_index(unique=True, db=db)
-        elif self.type == JSONBFieldIndexType.BTREE.value:
-            return self.create_btree_index(unique=False, db=db)
-        elif self.type == JSONBFieldIndexType.GIN.value:
-            return self.create_gin_index(db=db)
-        elif self.type == JSONBFieldIndexType.GIST.value:
-            return self.create_gist_index(db=db)
-
-    def _make_index_name(self, table_name):
+            return
+
+        return self.create_indexes(db=db, progress=progress)
+
+    def _make_index_name(self, table_name, family=None):
         to_hash = "%s_%s" % (table_name, self.descriptor.name)
         index_name = codecs.encode(
             hashlib.sha1(to_hash.encode()).digest(), 'base64')[0:-2].decode('utf-8').replace('+', '$').replace('/', '_')
 
-        return "descriptor_%s_key" % index_name
+        # the previous unquoted names were folded to lower case
+        index_name = index_name.lower()
+
+        if family:
+            return "descriptor_%s_%s_key" % (index_name, family)
+        else:
+            return "descriptor_%s_key" % index_name
 
-    def create_btree_index(self, unique=False, db='default'):
+    def index_methods(self, expressions):
         """
-        Create a new btree index on a field of JSONB descriptors of the given describable model.
-        :param unique: True for unique
-        :param db: DB name ('default')
+        Index method and operator class by family of operators indexed, according to the type of index and
+        to the canonical index expressions of the format type of the descriptor.
+        :param expressions: Dict of the index expressions by family of operators.
+        :return: Dict of pair (method, operator class or None) by family of operators
+        """
+        methods = self.INDEX_METHODS.get(self.type, {})
+
+        if methods and not any(family in expressions for family in methods):
+            methods = self.INDEX_METHODS[JSONBFieldIndexType.BTREE.value]
+
+        return {family: method for family, method in methods.items() if family in expressions}
+
+    def make_index_statements(self, concurrently=False):
+        """
+        Make the statements creating the indexes of the descriptor, using the canonical index expressions of
+        its format type, for the families of operators supported by the type of index. When the format type
+        does not declare an expression for them (eg. a GIN index of an integer) the btree indexes are made.
+
+        :param concurrently: True to create them concurrently.
+        :return: List of pair (index name, SQL statement).
         """
+        from descriptor.descriptorformattype import DescriptorFormatTypeManager
+
         table = self.target.model_class()._meta.db_table
-        index_name = self._make_index_name(table)
+        expressions = DescriptorFormatTypeManager.index_expressions(self.descriptor)
+        methods = self.index_methods(expressions)
 
-        if unique:
-            sql = """CREATE UNIQUE INDEX %s ON %s ((descriptors->'%s'));""" % (index_name, table, self.descriptor.name)
-        else:
-            sql = """CREATE INDEX %s ON %s ((descriptors->'%s'));""" % (index_name, table, self.descriptor.name)
+        statements = []
+        made = set()
 
-        connection = connections[db]
-        with connection.cursor() as cursor:
-            cursor.execute(sql)
+        for family, (method, opclass) in sorted(methods.items()):
+            unique = family == 'eq' and self.type == JSONBFieldIndexType.UNIQUE_BTREE.value
+
+            for i, columns in enumerate(expressions.get(family, [])):
+                # same columns for many families (only the unique one is kept)
+                if (method, columns) in made:
+                    continue
+
+                made.add((method, columns))
+
+                index_name = self._make_index_name(table, family if i == 0 else "%s%i" % (family, i))
+
+                sql = 'CREATE %sINDEX %s"%s" ON "%s" USING %s (%s)' % (
+                    "UNIQUE " if unique else "",
+                    "CONCURRENTLY " if concurrently else "",
+                    index_name,
+                    table,
+                    method,
+                    ", ".join("(%s)%s" % (column, " " + opclass if opclass else "") for column in columns))
 
-        return True
+                statements.append((index_name, sql))
 
-    def create_gin_index(self, db='default'):
+        return statements
+
+    def create_indexes(self, db='default', progress=None):
         """
-        Create a new GIN (not unique) index on a field of JSONB descriptors of the given describable model.
+        Create the indexes of a field of JSONB descriptors of the given describable model.
         :param db: DB name ('default')
+        :param progress: None or callable(index_name, index_number, indexes_count) called before each index build
+        :return: List of the created index names
         """
-        table = self.target.model_class()._meta.db_table
-        index_name = self._make_index_name(table)
+        connection = connections[db]
 
-        sql = """CREATE INDEX %s ON %s USING GIN ((descriptors->'%s'));""" % (index_name, table, self.descriptor.name)
+        # CREATE INDEX CONCURRENTLY cannot run into a transaction
+        concurrently = not connection.in_atomic_block
+        statements = self.make_index_statements(concurrently=concurrently)
 
-        connection = connections[db]
-        with connection.cursor() as cursor:
-            cursor.execute(sql)
+        for i, (index_name, sql) in enumerate(statements):
+            if progress:
+                progress(index_name, i + 1, len(statements))
+
+            logger.info("Create descriptor index %s (%i/%i)" % (index_name, i + 1, len(statements)))
+
+            try:
+                with connection.cursor() as cursor:
+                    cursor.execute(sql)
+            except Exception:
+                # a failed concurrent build lets an invalid index
+                if concurrently:
+                    with connection.cursor() as cursor:
+                        cursor.execute('DROP INDEX IF EXISTS "%s"' % index_name)
+
+                raise
 
-        return True
+        return [index_name for index_name, sql in statements]
 
-    def create_gist_index(self, db='default'):
+    def index_names(self, db='default'):
         """
-        Create a new GIST (not unique) index on a field of JSONB descriptors of the given describable model.
+        Names of the existing indexes of the descriptor on the describable table, including the previous
+        single index.
         :param db: DB name ('default')
+        :return: List of index names
         """
         table = self.target.model_class()._meta.db_table
-        index_name = self._make_index_name(table)
 
-        sql = """CREATE INDEX %s ON %s USING GIST ((descriptors->'%s'));""" % (index_name, table, self.descriptor.name)
+        # descriptor_<hash>_ prefix
+        prefix = self._make_index_name(table)[0:-len("key")]
 
         connection = connections[db]
         with connection.cursor() as cursor:
-            cursor.execute(sql)
+            cursor.execute("""SELECT "indexname" FROM "pg_indexes" WHERE "tablename" = %s
+                AND substr("indexname", 1, %s) = %s""", [table, len(prefix), prefix])
 
-        return True
+            return [row[0] for row in cursor.fetchall()]
 
     def drop_index(self, db='default'):
         """
-        Drop an existing index of a field of JSONB descriptors of the given describable model.
-        :param db:
+        Drop the existing indexes of a field of JSONB descriptors of the given describable model.
+        :param db: DB name ('default')
         """
-        table = self.target.model_class()._meta.db_table
-        index_name = self._make_index_name(table)
-
-        sql = """DROP INDEX IF EXISTS %s""" % index_name
-
         connection = connections[db]
-        with connection.cursor() as cursor:
-            cursor.execute(sql)
+        concurrently = not connection.in_atomic_block
+
+        for index_name in self.index_names(db=db):
+            with connection.cursor() as cursor:
+                cursor.execute('DROP INDEX %sIF EXISTS "%s"' % ("CONCURRENTLY " if concurrently else "", index_name))
 
     def count_index_usage(self):
         """
@@ -1145,16 +865,7 @@ class DescriptorIndex(models.Model):
         if self.type == JSONBFieldIndexType.NONE.value:
             return 0
 
-        layouts = Layout.objects.filter(target=self.target)
-        count = 0
-
-        for layout in layouts:
-            for panel in layout.layout_content.get('panels'):
-                for descriptor in panel.get('descriptors'):
-                    if descriptor.get('name') == self.descriptor.name:
-                        count += 1
-
-        return count
+        return LayoutDescriptor.objects.filter(descriptor_id=self.descriptor_id, layout__target=self.target).count()
 
     def natural_name(self):
         table = self.target.model_class()._meta.db_table
@@ -1399,14 +1110,65 @@ class Layout(Entity):
 
         from django.apps import apps
         for entity in apps.get_app_config('descriptor').describable_entities:
-            content_type = get_object_or_404(ContentType, app_label=entity._meta.app_label,
-                                             model=entity._meta.model_name)
-
-            for describable in content_type.get_all_objects_for_this_type():
-                if describable.layout_id == self.id:
-                    return True
+            if entity.objects.filter(layout=self).exists():
+                return True
         return False
 
+    def update_descriptors_index(self):
+        """
+        Synchronize the reverse index of the descriptors used by this layout with its content.
+        """
+        names = set()
+
+        for panel in self.layout_content.get('panels', []):
+            for descriptor in panel.get('descriptors'):
+                names.add(descriptor.get('name'))
+
+        descriptors_ids = set(Descriptor.objects.filter(name__in=names).values_list('id', flat=True))
+        current_ids = set(self.layout_descriptors.values_list('descriptor_id', flat=True))
+
+        removed_ids = current_ids - descriptors_ids
+        if removed_ids:
+            self.layout_descriptors.filter(descriptor_id__in=removed_ids).delete()
+
+        added_ids = descriptors_ids - current_ids
+        if added_ids:
+            LayoutDescriptor.objects.bulk_create(
+                [LayoutDescriptor(layout=self, descriptor_id=descriptor_id) for descriptor_id in added_ids])
+
+
+class LayoutDescriptor(models.Model):
+    """
+    Reverse index of the descriptors used by the layouts. It is maintained at each save of a layout or of a
+    descriptor (a layout can refer to a descriptor by name before its creation or after its renaming), in way to check the usage of a descriptor with an indexed lookup in place of reading the content of any layouts.
+    """
+
+    # Layout using the descriptor.
+    layout = models.ForeignKey(Layout, related_name='layout_descriptors', on_delete=models.CASCADE)
+
+    # Descriptor used by the layout.
+    descriptor = models.ForeignKey(Descriptor, related_name='layout_descriptors', on_delete=models.CASCADE)
+
+    class Meta:
+        verbose_name = _("layout descriptor")
+        unique_together = ('layout', 'descriptor')
+
+
+@receiver(models.signals.post_save, sender=Layout)
+def layout_post_save(sender, instance, created, **kwargs):
+    instance.update_descriptors_index()
+
+
+@receiver(models.signals.post_save, sender=Descriptor)
+def descriptor_post_save(sender, instance, created, **kwargs):
+    # layouts referring to its name, and layouts indexed with its previous name
+    layouts = Layout.objects.filter(
+        Q(layout_content__contains={'panels': [{'descriptors': [{'name': instance.name}]}]}) |
+        Q(layout_descriptors__descriptor=instance)).distinct()
+
+    for layout in layouts:
+        layout.update_descriptors_index()
+
 
 def audit_create(self, user):
     return {
@@ -0,0 +1,162 @@
+# -*- coding: utf-8; -*-
+#
+# @file valuesindex.py
+# @brief coll-gate descriptor module, sorted index of the inline values of a descriptor
+# @author Frédéric SCHERMA (INRA UMR1095)
+# @date 2018-10-18
+# @copyright Copyright (c) 2018 INRA/CIRAD
+# @license MIT (see LICENSE file)
+# @details
+
+from bisect import bisect_left, bisect_right
+from itertools import islice
+
+from main.cache import cache_manager
+
+
+class DescriptorValuesIndex(object):
+    """
+    Index of the inline values of a descriptor (for a language) sorted on a field (id, ordinal, value0 or value1).
+    The values having the field defined are sorted by (field value, code), and the others values are sorted by
+    code and always come after, for both ascending and descending orders.
+    """
+
+    def __init__(self, values, field):
+        """
+        :param values: Dict of the values by code.
+        :param field: Sorting field name, 'id' means the code.
+        """
+        self.field = field
+
+        keys = []
+        nulls = []
+
+        for code, value in values.items():
+            key = code if field == 'id' else value.get(field)
+
+            if key is None:
+                nulls.append(code)
+            else:
+                keys.append((key, code))
+
+        keys.sort()
+        nulls.sort()
+
+        # immutable, the index is shared by the requests from the local cache
+        self.keys = tuple(keys)
+        self.nulls = tuple(nulls)
+
+    def _key(self, value):
+        if value is not None and self.field == 'ordinal':
+            return int(value)
+
+        return value
+
+    def page(self, cursor=None, reverse=False, limit=30):
+        """
+        Codes of the values next to a cursor.
+
+        :param cursor: Pair (field value, code) of the last previous result, or None.
+        :param reverse: Descending order of the field value.
+        :param limit: Number max of results.
+        :return: List of codes.
+        """
+        cursor_value, cursor_code = cursor if cursor else (None, None)
+        cursor_value = self._key(cursor_value)
+
+        null_start = 0
+
+        if reverse:
+            if not cursor:
+                end = len(self.keys)
+            elif cursor_value is not None:
+                end = bisect_left(self.keys, (cursor_value, cursor_code))
+            else:
+                end = 0
+                null_start = bisect_right(self.nulls, cursor_code or "")
+
+            codes = [code for key, code in reversed(self.keys[max(0, end - limit):end])]
+        else:
+            if not cursor:
+                start = 0
+            elif cursor_value is not None:
+                start = bisect_right(self.keys, (cursor_value, cursor_code or ""))
+            else:
+                start = len(self.keys)
+                null_start = bisect_right(self.nulls, cursor_code or "")
+
+            codes = [code for key, code in self.keys[start:start + limit]]
+
+        extra_size = limit - len(codes)
+
+        if extra_size > 0:
+            codes += self.nulls[null_start:null_start + extra_size]
+
+        return codes
+
+    def search(self, field_value, cursor=None, limit=30):
+        """
+        Codes of the values whose field starts with field_value (or equals for ordinal), in ascending order.
+
+        :param field_value: Prefix of the field value.
+        :param cursor: Pair (field value, code) of the last previous result, or None.
+        :param limit: Number max of results.
+        :return: List of codes.
+        """
+        if self.field == 'ordinal':
+            try:
+                ordinal = int(field_value)
+            except (TypeError, ValueError):
+                return []
+
+            # unique result
+            i = bisect_left(self.keys, (ordinal,))
+            if i < len(self.keys) and self.keys[i][0] == ordinal:
+                return [self.keys[i][1]]
+
+            return []
+
+        start = bisect_left(self.keys, (field_value,))
+
+        cursor_value, cursor_code = cursor if cursor else (None, None)
+        if cursor_value is not None:
+            start = max(start, bisect_right(self.keys, (cursor_value, cursor_code or "")))
+
+        codes = []
+
+        for key, code in islice(self.keys, start, None):
+            if not key.startswith(field_value) or len(codes) >= limit:
+                break
+
+            codes.append(code)
+
+        return codes
+
+
+def get_values_index(descriptor, lang, field):
+    """
+    Get the sorted index of the inline values of a descriptor for a language and a field, built once per
+    version of the descriptor and kept into the local cache of the 'descriptor' category, that is invalidated
+    at each save of a descriptor.
+
+    :param descriptor: Descriptor model instance with inline values.
+    :param lang: Language code, or None for non translated values.
+    :param field: Sorting field name ('id', 'ordinal', 'value0', 'value1').
+    :return: DescriptorValuesIndex
+    """
+    version = int(descriptor.modified_date.timestamp() * 1000000) if descriptor.modified_date else 0
+    cache_name = cache_manager.make_cache_name(
+        'values_index', str(descriptor.id), str(version), lang or "", field)
+
+    index = cache_manager.get_local('descriptor', cache_name)
+
+    if index is None:
+        if lang is not None:
+            values = descriptor.values.get(lang, {})
+        else:
+            values = descriptor.values
+
+        index = DescriptorValuesIndex(values, field)
+        cache_manager.set_local('descriptor', cache_name, index)
+
+    return index
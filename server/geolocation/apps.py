@@ -34,6 +34,12 @@ class CollGateGeolocation(ApplicationMain):
 
         instance.geolocation_app = self
 
+        # register geolocation cache category (local only, for the alternate names of the countries)
+        from django.conf import settings
+        from main.cache import cache_manager
+        cache_manager.register('geolocation', local_timeout=getattr(
+            settings, 'GEOLOCATION_COUNTRY_NAMES_CACHE_TIMEOUT', 3600))
+
         package_name, module_name, class_name = self.get_setting('geolocation_manager').split('.')
 
         try:
@@ -11,6 +11,8 @@
 from igdectk.rest.handler import *
 from igdectk.rest.response import HttpResponseRest
 
+from django.core.exceptions import SuspiciousOperation
+
 from geolocation import instance
 from .base import RestGeolocation
 from django.utils.translation import ugettext_lazy as _, get_language
@@ -79,6 +81,39 @@ class RestGeolocationCitySearchOnline(RestGeolocationCity):
     suffix = 'live-search'
 
 
+class RestGeolocationCityNearest(RestGeolocationCity):
+    regex = r'^nearest/$'
+    suffix = 'nearest'
+
+
+def make_nearest_city_item(city_r):
+    """
+    Format a city returned by the nearest cities lookups.
+    """
+    country_r = city_r['country']
+
+    return {
+        'id': city_r['cit_id'],
+        'name': city_r['name'],
+        'lat': float(city_r['lat']) if city_r['lat'] is not None else None,
+        'long': float(city_r['long']) if city_r['long'] is not None else None,
+        'display_names': city_r['alt_names'],
+        'country': {
+            'id': country_r['id'],
+            'name': country_r['name'],
+            'code3': country_r['code3'],
+            'lat': country_r['lat'],
+            'long': country_r['long'],
+            'display_names': country_r['alt_names'],
+            'preferred_names': country_r['preferred_names'],
+            'short_names': country_r['short_names']
+        },
+        'preferred_names': city_r['preferred_names'],
+        'short_names': city_r['short_names'],
+        'distance': city_r['distance']
+    }
+
+
 @RestGeolocationCountrySearch.def_request(Method.GET, Format.JSON)
 def search_country(request):
     """
@@ -413,3 +448,76 @@ def add_city(request):
 
     return HttpResponseRest(request, response)
 
+
+
+@RestGeolocationCityNearest.def_request(Method.GET, Format.JSON, parameters=('lat', 'long'))
+def nearest_cities(request):
+    """
+    Nearest cities of a position (reverse geocoding), using the offline spatial index of the cities.
+    """
+    try:
+        latitude = float(request.GET['lat'])
+        longitude = float(request.GET['long'])
+        max_distance = float(request.GET['max_distance']) if request.GET.get('max_distance') else None
+    except ValueError:
+        raise SuspiciousOperation(_("Invalid position"))
+
+    if not -90.0 <= latitude <= 90.0 or not -180.0 <= longitude <= 180.0:
+        raise SuspiciousOperation(_("Invalid position"))
+
+    lang = get_language()
+    limit = min(int_arg(request.GET.get('more', 5)), 100)
+
+    manager = instance.geolocation_app.geolocation_manager
+
+    cities = manager.get_nearest_cities(latitude, longitude, limit, lang, max_distance)
+
+    results = {
+        'perms': [],
+        'items': [make_nearest_city_item(city_r) for city_r in cities]
+    }
+
+    return HttpResponseRest(request, results)
+
+
+@RestGeolocationCityNearest.def_auth_request(Method.POST, Format.JSON, content={
+    "type": "object",
+    "properties": {
+        "points": {
+            "type": "array",
+            "minItems": 1,
+            "maxItems": 10000,
+            "items": {
+                "type": "object",
+                "properties": {
+                    "id": {"type": ["string", "number"]},
+                    "lat": {"type": "number", "minimum": -90, "maximum": 90},
+                    "long": {"type": "number", "minimum": -180, "maximum": 180}
+                }
+            }
+        },
+        "max_distance": {"type": "number", "minimum": 0, "required": False}
+    }
+})
+def nearest_city_bulk(request):
+    """
+    Nearest city of many positions at once (eg. the collecting sites of a batch of accessions), each
+    position comes with an id returned with its city, or None when there is no city in the max distance.
+    """
+    lang = get_language()
+    max_distance = request.data.get('max_distance')
+
+    points = {point['id']: (point['lat'], point['long']) for point in request.data['points']}
+
+    manager = instance.geolocation_app.geolocation_manager
+
+    cities = manager.get_nearest_city_bulk(points, lang, max_distance)
+
+    results = {
+        'items': [{
+            'id': key,
+            'city': make_nearest_city_item(city_r) if city_r else None
+        } for key, city_r in cities.items()]
+    }
+
+    return HttpResponseRest(request, results)
@@ -44,5 +44,11 @@ class GeolocationInterface(object):
     def get_city_list(self, list_id, limit, lang):
         return None
 
+    def get_nearest_cities(self, latitude, longitude, limit, lang, max_distance=None):
+        return None
+
+    def get_nearest_city_bulk(self, points, lang, max_distance=None):
+        return None
+
     def __str__(self):
         return 'Geolocation Interface'
@@ -8,10 +8,15 @@
 # @license MIT (see LICENSE file)
 # @details 
 
+from types import MappingProxyType
+
+from django.conf import settings
+from django.contrib.contenttypes.models import ContentType
 from django.db.models import Q
 from geolocation.geolocationinterface import GeolocationInterface
 from geonames.models import Country, City, AlternateName
 from geonames.appsettings import TRANSLATION_LANGUAGES
+from geonames.cityindex import city_index
 from geonames import instance
 from urllib.request import urlopen
 from urllib.parse import urlencode
@@ -21,8 +26,14 @@ from django.utils.translation import ugettext_lazy as _
 from igdectk.rest.handler import *
 from django.db import transaction, Error
 
+from main.cache import cache_manager
+
 
 class GeolocationManager(GeolocationInterface):
+
+    # local cache name of the alternate names of any countries, per language
+    COUNTRY_ALT_NAMES_CACHE_NAME = "country_alt_names"
+
     def __init__(self):
         self.geonames_username = instance.geonames_username
         self.geonames_allowed_city_types = instance.geonames_include_city_types
@@ -42,6 +53,69 @@ class GeolocationManager(GeolocationInterface):
         except City.DoesNotExist:
             return _('the descriptor value must be a referenced city')
 
+    @staticmethod
+    def _make_alt_names(names):
+        """
+        Split the alternate names into alternate, preferred and short names.
+        :param names: List of triple (alternate name, is preferred name, is short name).
+        :return: Triple of lists (alternate names, preferred names, short names)
+        """
+        alt_name = []
+        preferred = []
+        short = []
+
+        for alternate_name, is_preferred_name, is_short_name in names:
+            if is_preferred_name:
+                preferred.append(alternate_name)
+            if is_short_name:
+                short.append(alternate_name)
+            else:
+                alt_name.append(alternate_name)
+
+        return alt_name, preferred, short
+
+    def _alt_names(self, model, object_ids, lang):
+        """
+        Alternate names of some cities or countries for a language, using a single query.
+        :param model: City or Country model.
+        :param object_ids: List of ids, or None for any.
+        :param lang: Language code.
+        :return: Dict of triple of lists (alternate names, preferred names, short names) by object id.
+        """
+        qs = AlternateName.objects.filter(content_type=ContentType.objects.get_for_model(model), language=lang)
+
+        if object_ids is not None:
+            qs = qs.filter(object_id__in=object_ids)
+
+        names = {}
+
+        for object_id, alternate_name, is_preferred_name, is_short_name in qs.order_by('id').values_list(
+                'object_id', 'alternate_name', 'is_preferred_name', 'is_short_name'):
+            names.setdefault(object_id, []).append((alternate_name, is_preferred_name, is_short_name))
+
+        return {object_id: self._make_alt_names(object_names) for object_id, object_names in names.items()}
+
+    def _country_alt_names(self, lang):
+        """
+        Alternate names of any countries for a language, kept into the local cache of the 'geolocation' category
+        (GEOLOCATION_COUNTRY_NAMES_CACHE_TIMEOUT setting), because they almost never change.
+        :param lang: Language code.
+        :return: Read-only dict of triple of tuples (alternate names, preferred names, short names) by country id.
+        """
+        cache_name = cache_manager.make_cache_name(self.COUNTRY_ALT_NAMES_CACHE_NAME, lang)
+        country_alt_names = cache_manager.get_local('geolocation', cache_name)
+
+        if country_alt_names is None:
+            # immutable, shared by the requests
+            country_alt_names = MappingProxyType({
+                country_id: tuple(tuple(names) for names in alt_names)
+                for country_id, alt_names in self._alt_names(Country, None, lang).items()})
+
+            cache_manager.set_local('geolocation', cache_name, country_alt_names,
+                                    getattr(settings, 'GEOLOCATION_COUNTRY_NAMES_CACHE_TIMEOUT', 3600))
+
+        return country_alt_names
+
     def search_cities_online(self, limit, lang, term=None):
 
         web_service_url = self.geonames_url + 'searchJSON'
@@ -120,18 +194,11 @@ class GeolocationManager(GeolocationInterface):
 
         tqs = qs.distinct().order_by('name', 'id')[:limit]
 
+        country_alt_names = self._country_alt_names(lang)
+
         results = []
         for country in tqs:
-            alt_name = []
-            preferred = []
-            short = []
-            for name in country.alt_names.filter(language=lang):
-                if name.is_preferred_name:
-                    preferred.append(name.alternate_name)
-                if name.is_short_name:
-                    short.append(name.alternate_name)
-                else:
-                    alt_name.append(name.alternate_name)
+            alt_name, preferred, short = country_alt_names.get(country.pk, ([], [], []))
 
             result = {
                 'cou_id': country.pk,
@@ -154,18 +221,11 @@ class GeolocationManager(GeolocationInterface):
         qs = Country.objects.filter(id__in=list_id)
         tqs = qs.distinct().order_by('name', 'id')[:limit]
 
+        country_alt_names = self._country_alt_names(lang)
+
         results = []
         for country in tqs:
-            alt_name = []
-            preferred = []
-            short = []
-            for name in country.alt_names.filter(language=lang):
-                if name.is_preferred_name:
-                    preferred.append(name.alternate_name)
-                if name.is_short_name:
-                    short.append(name.alternate_name)
-                else:
-                    alt_name.append(name.alternate_name)
+            alt_name, preferred, short = country_alt_names.get(country.pk, ([], [], []))
 
             result = {
                 'cou_id': country.pk,
@@ -186,16 +246,7 @@ class GeolocationManager(GeolocationInterface):
     def get_country(self, country_id, lang):
 
         c = Country.objects.get(id=country_id)
-        alt_name = []
-        preferred = []
-        short = []
-        for name in c.alt_names.filter(language=lang):
-            if name.is_preferred_name:
-                preferred.append(name.alternate_name)
-            if name.is_short_name:
-                short.append(name.alternate_name)
-            else:
-                alt_name.append(name.alternate_name)
+        alt_name, preferred, short = self._country_alt_names(lang).get(c.pk, ([], [], []))
 
         result = {
             'cou_id': c.pk,
@@ -227,18 +278,12 @@ class GeolocationManager(GeolocationInterface):
 
         tqs = qs.distinct().order_by('name', 'id')[:limit]
 
+        cities = list(tqs)
+        city_alt_names = self._alt_names(City, [city.pk for city in cities], lang)
+
         results = []
-        for city in tqs:
-            alt_name = []
-            preferred = []
-            short = []
-            for name in city.alt_names.filter(language=lang):
-                if name.is_preferred_name:
-                    preferred.append(name.alternate_name)
-                if name.is_short_name:
-                    short.append(name.alternate_name)
-                else:
-                    alt_name.append(name.alternate_name)
+        for city in cities:
+            alt_name, preferred, short = city_alt_names.get(city.pk, ([], [], []))
 
             result = {
                 'cit_id': city.pk,
@@ -257,32 +302,18 @@ class GeolocationManager(GeolocationInterface):
 
     def get_city_list(self, list_id, limit, lang):
 
-        qs = City.objects.filter(id__in=list_id).prefetch_related('country')
+        qs = City.objects.filter(id__in=list_id).select_related('country')
         tqs = qs.distinct().order_by('name', 'id')[:limit]
 
+        cities = list(tqs)
+        city_alt_names = self._alt_names(City, [city.pk for city in cities], lang)
+        country_alt_names = self._country_alt_names(lang)
+
         results = []
-        for city in tqs:
-            alt_name = []
-            preferred = []
-            short = []
-            for name in city.alt_names.filter(language=lang):
-                if name.is_preferred_name:
-                    preferred.append(name.alternate_name)
-                if name.is_short_name:
-                    short.append(name.alternate_name)
-                else:
-                    alt_name.append(name.alternate_name)
-
-            country_alt_name = []
-            country_preferred = []
-            country_short = []
-            for name in city.country.alt_names.filter(language=lang):
-                if name.is_preferred_name:
-                    country_preferred.append(name.alternate_name)
-                if name.is_short_name:
-                    country_short.append(name.alternate_name)
-                else:
-                    country_alt_name.append(name.alternate_name)
+        for city in cities:
+            alt_name, preferred, short = city_alt_names.get(city.pk, ([], [], []))
+            country_alt_name, country_preferred, country_short = country_alt_names.get(
+                city.country_id, ([], [], []))
 
             result = {
                 'cit_id': city.pk,
@@ -308,6 +339,63 @@ class GeolocationManager(GeolocationInterface):
 
         return results
 
+    def get_nearest_cities(self, latitude, longitude, limit, lang, max_distance=None):
+        """
+        Nearest cities of a position, using the offline spatial index of the cities.
+        :param latitude: Latitude in degrees.
+        :param longitude: Longitude in degrees.
+        :param limit: Max number of cities.
+        :param lang: Language code.
+        :param max_distance: None or max distance in km.
+        :return: List of cities (@see get_city_list) with their distance in km, ordered by distance.
+        """
+        neighbours = city_index.get().nearest(latitude, longitude, limit, max_distance)
+        if not neighbours:
+            return []
+
+        cities = {city['cit_id']: city for city in self.get_city_list(
+            [city_id for city_id, distance in neighbours], len(neighbours), lang)}
+
+        results = []
+
+        for city_id, distance in neighbours:
+            city = cities.get(city_id)
+            if city is not None:
+                city['distance'] = distance
+                results.append(city)
+
+        return results
+
+    def get_nearest_city_bulk(self, points, lang, max_distance=None):
+        """
+        Nearest city of many positions, using the offline spatial index of the cities, and a single query
+        for the details of the cities.
+        :param points: Dict of pair (latitude, longitude) by key (eg. accession id).
+        :param lang: Language code.
+        :param max_distance: None or max distance in km.
+        :return: Dict of city (@see get_city_list) with its distance in km, or None, by key.
+        """
+        index = city_index.get()
+
+        nearest = {}
+        for key, (latitude, longitude) in points.items():
+            neighbours = index.nearest(latitude, longitude, 1, max_distance)
+            nearest[key] = neighbours[0] if neighbours else None
+
+        city_ids = list(set(neighbour[0] for neighbour in nearest.values() if neighbour))
+        if city_ids:
+            cities = {city['cit_id']: city for city in self.get_city_list(city_ids, len(city_ids), lang)}
+        else:
+            cities = {}
+
+        results = {}
+
+        for key, neighbour in nearest.items():
+            city = cities.get(neighbour[0]) if neighbour else None
+            results[key] = dict(city, distance=neighbour[1]) if city else None
+
+        return results
+
     def get_city(self, city_id, lang):
 
         c = City.objects.get(id=city_id)
@@ -41,6 +41,12 @@ for lang in getattr(settings, 'LANGUAGES', (('en', 'English'),)):
 DATA_DIR = getattr(settings, 'GEONAMES_DATA_DIR',
                    os.path.normpath(os.path.join(os.path.dirname(os.path.realpath(__file__)), 'data')))
 
+# number of rows copied into the staging table and merged at once
+IMPORT_CHUNK_SIZE = getattr(settings, 'GEONAMES_IMPORT_CHUNK_SIZE', 100000)
+
+# spatial index file of the cities (rebuilt after each import of cities)
+CITY_INDEX_FILE = getattr(settings, 'GEONAMES_CITY_INDEX_FILE', os.path.join(DATA_DIR, 'city_index.bin'))
+
 
 class ICountry:
     """
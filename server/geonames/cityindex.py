@@ -0,0 +1,289 @@
+# -*- coding: utf-8; -*-
+#
+# @file cityindex.py
+# @brief Spatial index of the cities for the offline reverse geocoding
+# @author Frédéric SCHERMA (INRA UMR1095)
+# @date 2018-10-18
+# @copyright Copyright (c) 2018 INRA/CIRAD
+# @license MIT (see LICENSE file)
+# @details Static KD-tree of the cities stored into a memory-mappable file.
+
+import logging
+import math
+import mmap
+import os
+import struct
+import threading
+import time
+
+from array import array
+from heapq import heappush, heapreplace
+from operator import itemgetter
+
+from geonames.appsettings import CITY_INDEX_FILE
+from geonames.models import City
+
+logger = logging.getLogger('geonames')
+
+# mean radius of the earth in km
+EARTH_RADIUS = 6371.0088
+
+
+class CityIndex(object):
+    """
+    Implicit KD-tree of the cities. The positions are converted to unit vectors (x, y, z), in way the euclidean
+    (chord) distance orders the points like the great-circle distance, without any issue at the antimeridian
+    nor at the poles. The points are sorted such as the median of each range is the node splitting it, so the
+    tree needs no pointer : it is only two flat arrays, the coordinates (float32) and the ids of the cities
+    (int32), persisted as is.
+
+    File format (native byte order) : 16 bytes header (magic, version, count, byte order check), then the
+    3 * count coordinates and the count ids.
+    """
+
+    MAGIC = b'CGCI'
+    VERSION = 1
+    BYTE_ORDER_CHECK = 0x01020304
+
+    HEADER = struct.Struct('=4sIII')
+
+    def __init__(self, coords, ids, mtime=None):
+        """
+        :param coords: Indexable of the 3 * n coordinates, in tree order.
+        :param ids: Indexable of the n ids of cities, in tree order.
+        :param mtime: Modification time of the file, None if built in memory.
+        """
+        self.coords = coords
+        self.ids = ids
+        self.mtime = mtime
+
+    def __len__(self):
+        return len(self.ids)
+
+    @staticmethod
+    def to_xyz(latitude, longitude):
+        lat = math.radians(float(latitude))
+        lon = math.radians(float(longitude))
+        cos_lat = math.cos(lat)
+
+        return cos_lat * math.cos(lon), cos_lat * math.sin(lon), math.sin(lat)
+
+    @staticmethod
+    def chord_to_km(chord2):
+        return 2.0 * math.asin(min(1.0, math.sqrt(chord2) / 2.0)) * EARTH_RADIUS
+
+    @staticmethod
+    def km_to_chord2(distance):
+        angle = min(math.pi, distance / EARTH_RADIUS)
+        return (2.0 * math.sin(angle / 2.0)) ** 2
+
+    @classmethod
+    def build(cls):
+        """
+        Build the index from the cities having a position.
+        :return: CityIndex
+        """
+        points = []
+
+        for city_id, latitude, longitude in City.objects.filter(
+                latitude__isnull=False, longitude__isnull=False).values_list(
+                'id', 'latitude', 'longitude').iterator():
+            points.append(cls.to_xyz(latitude, longitude) + (city_id,))
+
+        # median split of each range, on the axis of its depth
+        stack = [(0, len(points), 0)]
+
+        while stack:
+            lo, hi, axis = stack.pop()
+            if hi - lo <= 1:
+                continue
+
+            points[lo:hi] = sorted(points[lo:hi], key=itemgetter(axis))
+            mid = (lo + hi) >> 1
+            next_axis = (axis + 1) % 3
+
+            stack.append((lo, mid, next_axis))
+            stack.append((mid + 1, hi, next_axis))
+
+        coords = array('f')
+        ids = array('i')
+
+        for x, y, z, city_id in points:
+            coords.extend((x, y, z))
+            ids.append(city_id)
+
+        return cls(coords, ids)
+
+    def save(self, file_name=None):
+        """
+        Write the index file, replaced atomically (the processes having mapped the previous one keep it until
+        they reload).
+        :param file_name: Path of the file, default to the GEONAMES_CITY_INDEX_FILE setting.
+        """
+        file_name = file_name or CITY_INDEX_FILE
+        tmp_file_name = file_name + '.tmp'
+
+        dir_name = os.path.dirname(file_name)
+        if dir_name and not os.path.exists(dir_name):
+            os.makedirs(dir_name)
+
+        with open(tmp_file_name, 'wb') as f:
+            f.write(self.HEADER.pack(self.MAGIC, self.VERSION, len(self.ids), self.BYTE_ORDER_CHECK))
+            array('f', self.coords).tofile(f)
+            array('i', self.ids).tofile(f)
+
+        os.replace(tmp_file_name, file_name)
+
+    @classmethod
+    def load(cls, file_name=None):
+        """
+        Map an index file.
+        :param file_name: Path of the file, default to the GEONAMES_CITY_INDEX_FILE setting.
+        :return: CityIndex or None if the file is missing or invalid.
+        """
+        file_name = file_name or CITY_INDEX_FILE
+
+        try:
+            with open(file_name, 'rb') as f:
+                mtime = os.fstat(f.fileno()).st_mtime
+                data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except (OSError, ValueError):
+            return None
+
+        if len(data) < cls.HEADER.size:
+            return None
+
+        magic, version, count, byte_order = cls.HEADER.unpack_from(data)
+
+        size = cls.HEADER.size + count * 16
+        if magic != cls.MAGIC or version != cls.VERSION or byte_order != cls.BYTE_ORDER_CHECK or len(data) != size:
+            logger.warning("Invalid city index file %s" % file_name)
+            return None
+
+        view = memoryview(data)
+        offset = cls.HEADER.size
+
+        coords = view[offset:offset + count * 12].cast('f')
+        ids = view[offset + count * 12:size].cast('i')
+
+        return cls(coords, ids, mtime)
+
+    def nearest(self, latitude, longitude, k=1, max_distance=None):
+        """
+        K nearest cities of a position.
+
+        :param latitude: Latitude in degrees.
+        :param longitude: Longitude in degrees.
+        :param k: Max number of cities.
+        :param max_distance: None or max distance in km.
+        :return: List of pair (city id, distance in km), ordered by distance.
+        """
+        coords = self.coords
+        ids = self.ids
+
+        if k <= 0 or not len(ids):
+            return []
+
+        query = self.to_xyz(latitude, longitude)
+        qx, qy, qz = query
+
+        # max-heap of the k nearest (negated squared chords)
+        heap = []
+        bound = self.km_to_chord2(max_distance) if max_distance is not None else float('inf')
+
+        def search(lo, hi, axis):
+            nonlocal bound
+
+            if lo >= hi:
+                return
+
+            mid = (lo + hi) >> 1
+            i = mid * 3
+
+            dx = coords[i] - qx
+            dy = coords[i + 1] - qy
+            dz = coords[i + 2] - qz
+            d2 = dx * dx + dy * dy + dz * dz
+
+            if d2 <= bound:
+                if len(heap) < k:
+                    heappush(heap, (-d2, ids[mid]))
+                else:
+                    heapreplace(heap, (-d2, ids[mid]))
+
+                if len(heap) == k:
+                    bound = min(bound, -heap[0][0])
+
+            diff = query[axis] - coords[i + axis]
+            next_axis = (axis + 1) % 3
+
+            # nearest side first, the other one only if the splitting plane is in the bound
+            if diff < 0:
+                search(lo, mid, next_axis)
+                if diff * diff <= bound:
+                    search(mid + 1, hi, next_axis)
+            else:
+                search(mid + 1, hi, next_axis)
+                if diff * diff <= bound:
+                    search(lo, mid, next_axis)
+
+        search(0, len(ids), 0)
+
+        return [(city_id, self.chord_to_km(-d2)) for d2, city_id in sorted(heap, reverse=True)]
+
+
+class CityIndexLoader(object):
+    """
+    Lazy loading of the index file, reloaded when the file is replaced (checked at most every
+    CHECK_INTERVAL seconds). When there is no file the index is built from the database and saved.
+    """
+
+    CHECK_INTERVAL = 10
+
+    def __init__(self):
+        self._index = None
+        self._checked = 0
+        self._lock = threading.Lock()
+
+    def _file_mtime(self):
+        try:
+            return os.stat(CITY_INDEX_FILE).st_mtime
+        except OSError:
+            return None
+
+    def get(self):
+        now = time.monotonic()
+
+        if self._index is not None and now - self._checked < self.CHECK_INTERVAL:
+            return self._index
+
+        with self._lock:
+            if self._index is not None and now - self._checked < self.CHECK_INTERVAL:
+                return self._index
+
+            mtime = self._file_mtime()
+
+            if self._index is None or (mtime is not None and mtime != self._index.mtime):
+                index = CityIndex.load() if mtime is not None else None
+
+                if index is None:
+                    index = CityIndex.build()
+
+                    try:
+                        index.save()
+                    except OSError as e:
+                        logger.warning("Unable to save the city index file: %s" % str(e))
+
+                self._index = index
+
+            self._checked = now
+
+        return self._index
+
+    def reset(self):
+        with self._lock:
+            self._index = None
+
+
+# Singleton of city index loader
+city_index = CityIndexLoader()
@@ -18,6 +18,8 @@ from geonames.appsettings import CITY_SOURCES, IGeoname, DATA_DIR
 from geonames import instance
 from geonames.models import City, Country
 from geonames.geonames import Geonames
+from geonames.staging import StagingTable
+from geonames.cityindex import CityIndex
 
 import progressbar
 import resource
@@ -39,6 +41,17 @@ class Command(BaseCommand):
     --force option was used.
     And Import city data if they were downloaded."""
 
+    # columns of the staging table, in the order of the rows
+    STAGING_COLUMNS = (
+        ('geoname_id', 'INTEGER'),
+        ('name', 'VARCHAR(200)'),
+        ('country_code', 'VARCHAR(2)'),
+        ('latitude', 'NUMERIC'),
+        ('longitude', 'NUMERIC'),
+        ('population', 'BIGINT'),
+        ('feature_code', 'VARCHAR(10)')
+    )
+
     def __init__(self):
         super(Command, self).__init__()
         self.progress_enabled = False
@@ -50,7 +63,6 @@ class Command(BaseCommand):
         self.delete = False
         self.verbosity = None
         self.no_color = None
-        self.cities_bulk = []
 
     def add_arguments(self, parser):
         # Named (optional) arguments
@@ -165,81 +177,45 @@ class Command(BaseCommand):
             if not geonames.need_run:
                 continue
 
-            i = 0
             nb_lines = geonames.num_lines()
-            refresh_tx = int(nb_lines / 100) if (nb_lines / 100) >= 1 else 1
             self.progress_start(nb_lines)
 
             if not self.progress_enabled:
                 print('Importing...')
 
-            cities_to_check = []
-
-            for items in geonames.parse():
-                current_city = self.city_check(items)
-
-                if current_city:
-                    cities_to_check.append(current_city)
+            with StagingTable('city', self.STAGING_COLUMNS) as staging:
+                inserted, updated = staging.upsert(
+                    self.city_rows(geonames, nb_lines),
+                    self.city_merge_sql(staging),
+                    on_chunk=self.display_bulk_message)
 
-                if len(cities_to_check) >= 500:
-                    self.city_bulk(cities_to_check)
-                    cities_to_check = []
-
-                i += 1
-                if i % refresh_tx == 0:
-                    self.progress_update(i)
-
-            if cities_to_check:
-                self.city_bulk(cities_to_check)
             self.progress_finish()
 
             if self.export:
                 self.export_file.close()
 
+            print('Cities: %i inserted, %i updated' % (inserted, updated))
+
             geonames.finish(delete=self.delete)
 
-    def city_check(self, items):
-        if not items[IGeoname.featureCode] in instance.geonames_include_city_types:
-            return False
+        # the spatial index of the cities, for the nearest cities lookups
+        CityIndex.build().save()
 
-        return {
-            'geoname_id': int(items[IGeoname.geonameid]),
-            'name': items[IGeoname.name],
-            'country_code': items[IGeoname.countryCode],
-            'country_id': self._get_country_id(items[IGeoname.countryCode]),
-            'latitude': items[IGeoname.latitude],
-            'longitude': items[IGeoname.longitude],
-            'population': items[IGeoname.population],
-            'feature_code': items[IGeoname.featureCode]
-        }
+    def city_rows(self, geonames, nb_lines):
+        """
+        Generator of the rows of the cities to import, updating the progress at each parsed line.
+        """
+        i = 0
+        refresh_tx = int(nb_lines / 100) if (nb_lines / 100) >= 1 else 1
 
-    def city_bulk(self, cities_to_check):
-        bulk = []
-        for city in cities_to_check:
-            result = City.objects.filter(geoname_id=city.get('geoname_id'))
-            if result:
-                result[0].name = city.get('name')
-                result[0].country_id = city.get('country_id')
-                result[0].latitude = city.get('latitude')
-                result[0].longitude = city.get('longitude')
-                result[0].population = city.get('population')
-                result[0].feature_code = city.get('feature_code')
-                result[0].save()
-
-                town = result[0]
+        for items in geonames.parse():
+            i += 1
+            if i % refresh_tx == 0:
+                self.progress_update(i)
 
-            else:
-                town = City(
-                    geoname_id=city.get('geoname_id'),
-                    name=city.get('name'),
-                    country_id=city.get('country_id'),
-                    latitude=city.get('latitude'),
-                    longitude=city.get('longitude'),
-                    population=city.get('population'),
-                    feature_code=city.get('feature_code')
-                )
-
-                bulk.append(town)
+            city = self.city_check(items)
+            if not city:
+                continue
 
             if self.export:
                 r = [""] * 18
@@ -253,31 +229,54 @@ class Command(BaseCommand):
 
                 self.export_file.write('\t'.join(r) + '\n')
 
-            self.display_entry_message(town, True if result else False)
+            yield (
+                city.get('geoname_id'),
+                city.get('name'),
+                city.get('country_code'),
+                city.get('latitude') or None,
+                city.get('longitude') or None,
+                city.get('population') or None,
+                city.get('feature_code')
+            )
+
+    def city_check(self, items):
+        if not items[IGeoname.featureCode] in instance.geonames_include_city_types:
+            return False
 
-        if bulk:
-            City.objects.bulk_create(bulk)
-            self.display_bulk_message(len(bulk))
+        return {
+            'geoname_id': int(items[IGeoname.geonameid]),
+            'name': items[IGeoname.name],
+            'country_code': items[IGeoname.countryCode],
+            'latitude': items[IGeoname.latitude],
+            'longitude': items[IGeoname.longitude],
+            'population': items[IGeoname.population],
+            'feature_code': items[IGeoname.featureCode]
+        }
 
-    def _get_country_id(self, code2):
+    @staticmethod
+    def city_merge_sql(staging):
         """
-        Simple lazy identity map for code2->country
+        Upsert of the staged cities, the country is found by its code (the cities of unknown countries are ignored).
         """
-        if not hasattr(self, '_country_codes'):
-            self._country_codes = {}
-
-        if code2 not in self._country_codes.keys():
-            self._country_codes[code2] = Country.objects.get(code2=code2).pk
-        return self._country_codes[code2]
-
-    def display_bulk_message(self, bulk_size):
-        if not self.progress_enabled and self.verbosity:
-            print('BULK INSERT!\tNb_entries:%s' % bulk_size)
+        return """INSERT INTO "%(city)s" ("geoname_id", "name", "country_id", "latitude", "longitude", "population",
+                "feature_code")
+            SELECT DISTINCT ON (s."geoname_id") s."geoname_id", s."name", c."id", s."latitude", s."longitude",
+                s."population", s."feature_code"
+            FROM "%(staging)s" AS s INNER JOIN "%(country)s" AS c ON c."code2" = s."country_code"
+            ORDER BY s."geoname_id"
+            ON CONFLICT ("geoname_id") DO UPDATE SET "name" = EXCLUDED."name", "country_id" = EXCLUDED."country_id",
+                "latitude" = EXCLUDED."latitude", "longitude" = EXCLUDED."longitude",
+                "population" = EXCLUDED."population", "feature_code" = EXCLUDED."feature_code"
+            """ % {
+            'city': City._meta.db_table,
+            'country': Country._meta.db_table,
+            'staging': staging.name
+        }
 
-    def display_entry_message(self, city, state):
+    def display_bulk_message(self, copied, inserted, updated):
         if not self.progress_enabled and self.verbosity:
-            display_state = "UPDATED" if state else "ADD"
             if not self.no_color:
-                display_state = (Fore.BLUE if state else Fore.GREEN) + display_state + Style.RESET_ALL
-            print('[%s] %s' % (display_state, city))
-
+                print('UPSERT!\tNb_entries:%s\t%s%s%s inserted\t%s%s%s updated' % (
+                    copied, Fore.GREEN, inserted, Style.RESET_ALL, Fore.BLUE, updated, Style.RESET_ALL))
+            else:
+                print('UPSERT!\tNb_entries:%s\t%s inserted\t%s updated' % (copied, inserted, updated))
@@ -0,0 +1,28 @@
+# -*- coding: utf-8; -*-
+#
+# @file city_index.py
+# @brief Build the spatial index file of the cities.
+# @author Frédéric SCHERMA (INRA UMR1095)
+# @date 2018-10-18
+# @copyright Copyright (c) 2018 INRA/CIRAD
+# @license MIT (see LICENSE file)
+# @details
+
+import sys
+
+from django.core.management.base import BaseCommand
+
+from geonames.appsettings import CITY_INDEX_FILE
+from geonames.cityindex import CityIndex
+
+
+class Command(BaseCommand):
+    help = """Build the spatial index file of the cities (GEONAMES_CITY_INDEX_FILE), used for the offline
+    nearest cities lookups. It is done after each import of cities, and should be done after the cities are
+    added or moved otherwise."""
+
+    def handle(self, *args, **options):
+        index = CityIndex.build()
+        index.save()
+
+        sys.stdout.write('City index of {} cities saved into {}\n'.format(len(index), CITY_INDEX_FILE))
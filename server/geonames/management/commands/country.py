@@ -12,6 +12,7 @@ from django.core.management import BaseCommand
 from geonames.appsettings import COUNTRY_SOURCES, ICountry, DATA_DIR
 from geonames.models import Country
 from geonames.geonames import Geonames
+from geonames.staging import StagingTable
 from django.db import transaction
 
 import progressbar
@@ -34,6 +35,16 @@ class Command(BaseCommand):
     --force option was used.
     And Import country data if they were downloaded."""
 
+    # columns of the staging table, in the order of the rows
+    STAGING_COLUMNS = (
+        ('geoname_id', 'INTEGER'),
+        ('code2', 'VARCHAR(2)'),
+        ('code3', 'VARCHAR(3)'),
+        ('name', 'VARCHAR(200)'),
+        ('phone', 'VARCHAR(20)'),
+        ('continent', 'VARCHAR(2)')
+    )
+
     def __init__(self):
         super(Command, self).__init__()
         self.progress_enabled = False
@@ -154,56 +165,63 @@ class Command(BaseCommand):
             if not geonames.need_run:
                 continue
 
-            i = 0
             nb_lines = geonames.num_lines()
-            refresh_tx = int(nb_lines / 100) if (nb_lines / 100) >= 1 else 1
             self.progress_start(nb_lines)
 
             if not self.progress_enabled:
                 print('Importing...')
 
-            for items in geonames.parse():
-                imported = self.country_import(items)
-
-                if self.export and imported:
-                    export_file.write('\t'.join(items) + '\n')
-
-                i += 1
-                if i % refresh_tx == 0:
-                    self.progress_update(i)
+            with StagingTable('country', self.STAGING_COLUMNS) as staging:
+                inserted, updated = staging.upsert(
+                    self.country_rows(geonames, nb_lines, export_file if self.export else None),
+                    self.country_merge_sql(staging))
 
             self.progress_finish()
 
             if self.export:
                 export_file.close()
 
-            geonames.finish(delete=self.delete)
-
-    def country_import(self, items):
-        x, v = Country.objects.update_or_create(
-            geoname_id=items[ICountry.geonameid],
-            defaults={
-                'code2': items[ICountry.code],
-                'name': items[ICountry.name],
-                'phone': items[ICountry.phone].replace('+', ''),
-                'code3': items[ICountry.code3],
-                'continent': items[ICountry.continent]
-            }
-        )
+            print('Countries: %i inserted, %i updated' % (inserted, updated))
 
-        if not self.progress_enabled:
-            print(self.display_added_country(v, x))
+            geonames.finish(delete=self.delete)
 
-        return True
+    def country_rows(self, geonames, nb_lines, export_file=None):
+        """
+        Generator of the rows of the countries to import, updating the progress at each parsed line.
+        """
+        i = 0
+        refresh_tx = int(nb_lines / 100) if (nb_lines / 100) >= 1 else 1
+
+        for items in geonames.parse():
+            i += 1
+            if i % refresh_tx == 0:
+                self.progress_update(i)
+
+            if export_file:
+                export_file.write('\t'.join(items) + '\n')
+
+            yield (
+                int(items[ICountry.geonameid]),
+                items[ICountry.code],
+                items[ICountry.code3],
+                items[ICountry.name],
+                items[ICountry.phone].replace('+', ''),
+                items[ICountry.continent]
+            )
 
     @staticmethod
-    def display_added_country(added, country):
-
-        if not added:
-            display_status = Fore.RED
-        else:
-            display_status = Fore.GREEN
-
-        display_status = display_status + str(added) + Style.RESET_ALL
-
-        return "Added: %s | Country: %s" % (display_status, country)
+    def country_merge_sql(staging):
+        """
+        Upsert of the staged countries.
+        """
+        return """INSERT INTO "%(country)s" ("geoname_id", "code2", "code3", "name", "phone", "continent")
+            SELECT DISTINCT ON (s."geoname_id") s."geoname_id", s."code2", s."code3", s."name", s."phone",
+                s."continent"
+            FROM "%(staging)s" AS s
+            ORDER BY s."geoname_id"
+            ON CONFLICT ("geoname_id") DO UPDATE SET "code2" = EXCLUDED."code2", "code3" = EXCLUDED."code3",
+                "name" = EXCLUDED."name", "phone" = EXCLUDED."phone", "continent" = EXCLUDED."continent"
+            """ % {
+            'country': Country._meta.db_table,
+            'staging': staging.name
+        }
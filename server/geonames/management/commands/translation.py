@@ -16,7 +16,8 @@ from django.core.management import BaseCommand
 from geonames.appsettings import TRANSLATION_SOURCES, TRANSLATION_LANGUAGES, IAlternate, DATA_DIR
 from geonames.models import AlternateName, Country, City, ContentType
 from geonames.geonames import Geonames
-from django.db import transaction
+from geonames.staging import StagingTable
+from django.db import connection, transaction
 
 import progressbar
 import resource
@@ -38,6 +39,16 @@ class Command(BaseCommand):
     --force option was used.
     And Import translation data if they were downloaded."""
 
+    # columns of the staging table, in the order of the rows
+    STAGING_COLUMNS = (
+        ('alt_name_id', 'INTEGER'),
+        ('geoname_id', 'INTEGER'),
+        ('language', 'VARCHAR(2)'),
+        ('alternate_name', 'VARCHAR(255)'),
+        ('is_preferred_name', 'BOOLEAN'),
+        ('is_short_name', 'BOOLEAN')
+    )
+
     def __init__(self):
         super(Command, self).__init__()
         self.no_color = None
@@ -166,39 +177,61 @@ class Command(BaseCommand):
             if not geonames.need_run:
                 continue
 
-            i = 0
             nb_lines = geonames.num_lines()
-            refresh_tx = int(nb_lines / 100) if (nb_lines / 100) >= 1 else 1
             self.progress_start(nb_lines)
 
             if not self.progress_enabled:
                 print('Importing...')
 
-            alt_names_to_check = []
-
-            for items in geonames.parse():
-                current_alt_name = self.translation_check(items)
+            with StagingTable('translation', self.STAGING_COLUMNS) as staging:
+                # only the alternate names of the known cities and countries are exported, once staged
+                def on_chunk(copied, inserted, updated):
+                    if self.export:
+                        self.export_chunk(staging)
 
-                i += 1
-                if i % refresh_tx == 0:
-                    self.progress_update(i)
+                    self.display_bulk_message(copied, inserted, updated)
 
-                if current_alt_name:
-                    alt_names_to_check.append(current_alt_name)
+                inserted, updated = staging.upsert(
+                    self.translation_rows(geonames, nb_lines),
+                    self.translation_merge_sql(staging),
+                    {'city_content_type_id': self.city_content_type_id,
+                     'country_content_type_id': self.country_content_type_id},
+                    on_chunk=on_chunk)
 
-                if len(alt_names_to_check) >= 500:
-                    self.translation_bulk(alt_names_to_check)
-                    alt_names_to_check = []
-
-            if alt_names_to_check:
-                self.translation_bulk(alt_names_to_check)
             self.progress_finish()
 
             if self.export:
                 self.export_file.close()
 
+            print('Alternate names: %i inserted, %i updated' % (inserted, updated))
+
             geonames.finish(delete=self.delete)
 
+    def translation_rows(self, geonames, nb_lines):
+        """
+        Generator of the rows of the alternate names to import, updating the progress at each parsed line.
+        """
+        i = 0
+        refresh_tx = int(nb_lines / 100) if (nb_lines / 100) >= 1 else 1
+
+        for items in geonames.parse():
+            i += 1
+            if i % refresh_tx == 0:
+                self.progress_update(i)
+
+            alt_name = self.translation_check(items)
+            if not alt_name:
+                continue
+
+            yield (
+                alt_name.get('name_id'),
+                alt_name.get('geoname_id'),
+                alt_name.get('language'),
+                alt_name.get('alternate_name'),
+                alt_name.get('is_preferred_name'),
+                alt_name.get('is_short_name')
+            )
+
     @staticmethod
     def translation_check(items):
 
@@ -232,73 +265,65 @@ class Command(BaseCommand):
             'is_short_name': is_short
         }
 
-    def translation_bulk(self, alt_names_to_check):
-
-        bulk = []
-        geonameid_list = set(x.get('geoname_id') for x in alt_names_to_check)
-        suspect_cities = {x[1]: x[0] for x in City.objects.filter(geoname_id__in=geonameid_list).values_list('id', 'geoname_id')}
-        suspect_countries = {x[1]: x[0] for x in Country.objects.filter(geoname_id__in=geonameid_list).values_list('id', 'geoname_id')}
-
-        for alt_name in alt_names_to_check:
-            if alt_name.get('geoname_id') in suspect_cities:
-                is_city_or_country = True
-            elif alt_name.get('geoname_id') in suspect_countries:
-                is_city_or_country = False
-            else:
-                continue
-
-            result = AlternateName.objects.filter(alt_name_id=alt_name.get('name_id'))
-            if result:
-                result[0].content_type_id = self.city_content_type_id if is_city_or_country else self.country_content_type_id
-                result[0].object_id = suspect_cities[alt_name.get('geoname_id')] if is_city_or_country else suspect_countries[alt_name.get('geoname_id')]
-                result[0].language = alt_name.get('language')
-                result[0].alternate_name = alt_name.get('alternate_name')
-                result[0].is_preferred_name = alt_name.get('is_preferred_name')
-                result[0].is_short_name = alt_name.get('is_short_name')
-                result[0].save()
-
-                translation = result[0]
-
-            else:
-                translation = AlternateName(
-                    alt_name_id=alt_name.get('name_id'),
-                    content_type_id=self.city_content_type_id if is_city_or_country else self.country_content_type_id,
-                    object_id=suspect_cities[alt_name.get('geoname_id')] if is_city_or_country else suspect_countries[alt_name.get('geoname_id')],
-                    language=alt_name.get('language'),
-                    alternate_name=alt_name.get('alternate_name'),
-                    is_preferred_name=alt_name.get('is_preferred_name'),
-                    is_short_name=alt_name.get('is_short_name')
-                )
-
-                bulk.append(translation)
-
-            if self.export:
+    @staticmethod
+    def translation_merge_sql(staging):
+        """
+        Upsert of the staged alternate names, related to the city else to the country of the same geoname id
+        (the alternate names of the others geonames are ignored).
+        """
+        return """INSERT INTO "%(alternate_name)s" ("alt_name_id", "language", "alternate_name", "is_preferred_name",
+                "is_short_name", "content_type_id", "object_id")
+            SELECT DISTINCT ON (s."alt_name_id") s."alt_name_id", s."language", s."alternate_name",
+                s."is_preferred_name", s."is_short_name",
+                CASE WHEN ci."id" IS NOT NULL THEN %%(city_content_type_id)s ELSE %%(country_content_type_id)s END,
+                COALESCE(ci."id", co."id")
+            FROM "%(staging)s" AS s
+            LEFT JOIN "%(city)s" AS ci ON ci."geoname_id" = s."geoname_id"
+            LEFT JOIN "%(country)s" AS co ON co."geoname_id" = s."geoname_id"
+            WHERE ci."id" IS NOT NULL OR co."id" IS NOT NULL
+            ORDER BY s."alt_name_id"
+            ON CONFLICT ("alt_name_id") DO UPDATE SET "language" = EXCLUDED."language",
+                "alternate_name" = EXCLUDED."alternate_name", "is_preferred_name" = EXCLUDED."is_preferred_name",
+                "is_short_name" = EXCLUDED."is_short_name", "content_type_id" = EXCLUDED."content_type_id",
+                "object_id" = EXCLUDED."object_id"
+            """ % {
+            'alternate_name': AlternateName._meta.db_table,
+            'city': City._meta.db_table,
+            'country': Country._meta.db_table,
+            'staging': staging.name
+        }
 
+    def export_chunk(self, staging):
+        """
+        Export the staged alternate names of the known cities and countries.
+        """
+        with connection.cursor() as cursor:
+            cursor.execute("""SELECT s."alt_name_id", s."geoname_id", s."language", s."alternate_name",
+                    s."is_preferred_name", s."is_short_name"
+                FROM "%(staging)s" AS s
+                WHERE EXISTS (SELECT 1 FROM "%(city)s" AS ci WHERE ci."geoname_id" = s."geoname_id")
+                OR EXISTS (SELECT 1 FROM "%(country)s" AS co WHERE co."geoname_id" = s."geoname_id")
+                """ % {
+                    'city': City._meta.db_table,
+                    'country': Country._meta.db_table,
+                    'staging': staging.name
+                })
+
+            for row in cursor:
                 r = list(range(6))
-                r[IAlternate.nameid] = alt_name.get('name_id')
-                r[IAlternate.geonameid] = str(alt_name.get('geoname_id'))
-                r[IAlternate.language] = alt_name.get('language')
-                r[IAlternate.name] = alt_name.get('alternate_name')
-                r[IAlternate.isPreferred] = '1' if alt_name.get('is_preferred_name') else '0'
-                r[IAlternate.isShort] = '1' if alt_name.get('is_short_name') else '0'
+                r[IAlternate.nameid] = str(row[0])
+                r[IAlternate.geonameid] = str(row[1])
+                r[IAlternate.language] = row[2]
+                r[IAlternate.name] = row[3]
+                r[IAlternate.isPreferred] = '1' if row[4] else '0'
+                r[IAlternate.isShort] = '1' if row[5] else '0'
 
                 self.export_file.write('\t'.join(r) + '\n')
 
-            self.display_entry_message(translation, True if result else False)
-
-        if bulk:
-            AlternateName.objects.bulk_create(bulk)
-            self.display_bulk_message(len(bulk))
-
-    def display_bulk_message(self, bulk_size):
-        if not self.progress_enabled and self.verbosity:
-            print('BULK INSERT!\tNb_entries:%s' % bulk_size)
-
-    def display_entry_message(self, alt_name, state):
+    def display_bulk_message(self, copied, inserted, updated):
         if not self.progress_enabled and self.verbosity:
-            display_state = "UPDATED" if state else "ADD"
             if not self.no_color:
-                display_state = (Fore.BLUE if state else Fore.GREEN) + display_state + Style.RESET_ALL
-            print('[%s] %s' % (display_state, alt_name))
-
-
+                print('UPSERT!\tNb_entries:%s\t%s%s%s inserted\t%s%s%s updated' % (
+                    copied, Fore.GREEN, inserted, Style.RESET_ALL, Fore.BLUE, updated, Style.RESET_ALL))
+            else:
+                print('UPSERT!\tNb_entries:%s\t%s inserted\t%s updated' % (copied, inserted, updated))
@@ -0,0 +1,18 @@
+# Generated by Django 2.0.4 on 2018-10-18 10:00
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('contenttypes', '0002_remove_content_type_name'),
+        ('geonames', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AlterIndexTogether(
+            name='alternatename',
+            index_together={('content_type', 'object_id', 'language')},
+        ),
+    ]
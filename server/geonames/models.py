@@ -36,6 +36,9 @@ class AlternateName(models.Model):
     class Meta:
         unique_together = ['alt_name_id', 'language', 'alternate_name']
 
+        # the names of a city or a country for a language
+        index_together = [['content_type', 'object_id', 'language']]
+
 
 class Base(models.Model):
     """
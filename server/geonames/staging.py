@@ -0,0 +1,143 @@
+# -*- coding: utf-8; -*-
+#
+# @file staging.py
+# @brief Staging table for the geonames imports
+# @author Frédéric SCHERMA (INRA UMR1095)
+# @date 2018-10-18
+# @copyright Copyright (c) 2018 INRA/CIRAD
+# @license MIT (see LICENSE file)
+# @details Stream the parsed rows using COPY FROM STDIN, and merge them with a single upsert per chunk.
+
+from itertools import islice
+
+from django.db import connections
+
+from geonames.appsettings import IMPORT_CHUNK_SIZE
+
+
+class CopyStream(object):
+    """
+    File-like object giving the rows in the COPY text format, consuming the rows only on demand.
+    """
+
+    def __init__(self, rows):
+        self.rows = iter(rows)
+        self.buffer = ""
+        self.count = 0
+
+    @staticmethod
+    def format_value(value):
+        if value is None:
+            return "\\N"
+        elif isinstance(value, bool):
+            return "t" if value else "f"
+
+        return str(value).replace("\\", "\\\\").replace("\t", "\\t").replace("\n", "\\n").replace("\r", "\\r")
+
+    def read(self, size=-1):
+        while size < 0 or len(self.buffer) < size:
+            row = next(self.rows, None)
+            if row is None:
+                break
+
+            self.buffer += "\t".join(self.format_value(value) for value in row) + "\n"
+            self.count += 1
+
+        if size < 0:
+            data, self.buffer = self.buffer, ""
+        else:
+            data, self.buffer = self.buffer[0:size], self.buffer[size:]
+
+        return data
+
+
+class StagingTable(object):
+    """
+    Temporary table receiving the rows of a geonames source. The rows are copied and merged into the final
+    table by chunks (GEONAMES_IMPORT_CHUNK_SIZE setting), in way to keep a fixed memory budget whatever the
+    size of the source.
+    """
+
+    def __init__(self, name, columns, chunk_size=None, db='default'):
+        """
+        :param name: Name of the source, the table is named geonames_staging_<name>.
+        :param columns: List of pair (column name, SQL type) in the order of the values of the rows.
+        :param chunk_size: Number of rows per chunk, default to the setting.
+        :param db: DB name ('default')
+        """
+        self.name = "geonames_staging_%s" % name
+        self.columns = columns
+        self.chunk_size = chunk_size or IMPORT_CHUNK_SIZE
+        self.connection = connections[db]
+
+    def __enter__(self):
+        with self.connection.cursor() as cursor:
+            cursor.execute('DROP TABLE IF EXISTS "%s"' % self.name)
+            cursor.execute('CREATE TEMPORARY TABLE "%s" (%s)' % (
+                self.name, ", ".join('"%s" %s' % (column, sql_type) for column, sql_type in self.columns)))
+
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        with self.connection.cursor() as cursor:
+            cursor.execute('DROP TABLE IF EXISTS "%s"' % self.name)
+
+    def copy(self, rows):
+        """
+        Replace the content of the staging table by some rows.
+        :param rows: Iterable of tuples of values.
+        :return: Number of copied rows.
+        """
+        stream = CopyStream(rows)
+
+        with self.connection.cursor() as cursor:
+            cursor.execute('TRUNCATE "%s"' % self.name)
+            cursor.copy_expert('COPY "%s" (%s) FROM STDIN' % (
+                self.name, ", ".join('"%s"' % column for column, sql_type in self.columns)), stream)
+
+        return stream.count
+
+    def merge(self, sql, params=None):
+        """
+        Merge the staging table into the final table.
+        :param sql: INSERT ... SELECT ... FROM the staging table ... ON CONFLICT DO UPDATE statement.
+        :param params: Parameters of the statement.
+        :return: Pair (number of inserted rows, number of updated rows).
+        """
+        # a row inserted by the statement has no previous version
+        with self.connection.cursor() as cursor:
+            cursor.execute("""WITH "merged" AS (%s RETURNING ("xmax" = 0) AS "inserted")
+                SELECT COUNT(*) FILTER (WHERE "inserted"), COUNT(*) FILTER (WHERE NOT "inserted") FROM "merged"
+                """ % sql, params)
+
+            return cursor.fetchone()
+
+    def upsert(self, rows, sql, params=None, on_chunk=None):
+        """
+        Copy and merge the rows by chunks.
+        :param rows: Iterable of tuples of values, consumed chunk per chunk.
+        :param sql: Merge statement (@see merge).
+        :param params: Parameters of the merge statement.
+        :param on_chunk: None or callable(copied, inserted, updated) called after the merge of each chunk.
+        :return: Pair (number of inserted rows, number of updated rows).
+        """
+        rows = iter(rows)
+        inserted = updated = 0
+
+        while True:
+            copied = self.copy(islice(rows, self.chunk_size))
+            if not copied:
+                break
+
+            chunk_inserted, chunk_updated = self.merge(sql, params)
+
+            inserted += chunk_inserted
+            updated += chunk_updated
+
+            if on_chunk:
+                on_chunk(copied, chunk_inserted, chunk_updated)
+
+            if copied < self.chunk_size:
+                break
+
+        return inserted, updated
@@ -34,6 +34,9 @@ class CollGateMain(ApplicationMain):
         from main.models import main_register_models
         main_register_models(CollGateMain.name)
 
+        # register the ILIKE lookups used by the search backends
+        from main import search
+
         main_module = Module('main', base_url='coll-gate')
         main_module.include_urls((
             'base',
@@ -8,13 +8,127 @@
 # @license MIT (see LICENSE file)
 # @details
 
+import fnmatch
+import pickle
+import threading
+import time
+
+from collections import OrderedDict
+
 from django.core.cache import cache
 from django.conf import settings
 
 
+class _Pickled(bytes):
+    """
+    Pickled content of a local cache entry, distinct from a bytes content stored as is.
+    """
+
+
+class LocalCache(object):
+    """
+    In-process LRU cache, bounded in number of entries and with a maximal validity, used as first tier in front
+    of the shared cache backend. Contents are stored pickled, so each get returns a new copy that the caller can
+    modify without altering the entry. Immutable contents can be stored as is, to avoid the pickling cost.
+    """
+
+    def __init__(self, max_entries, timeout):
+        self.max_entries = max_entries
+        self.timeout = timeout
+
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key):
+        """
+        Get a local cache entry.
+
+        :param key: Key of the entry.
+        :return: The content or None if not found or expired.
+        """
+        now = time.monotonic()
+
+        with self._lock:
+            entry = self._entries.get(key)
+
+            if entry is None:
+                self.misses += 1
+                return None
+
+            expires, content = entry
+
+            if expires < now:
+                del self._entries[key]
+                self.misses += 1
+                return None
+
+            self._entries.move_to_end(key)
+            self.hits += 1
+
+        return pickle.loads(content) if type(content) is _Pickled else content
+
+    def set(self, key, content, validity=None, immutable=False):
+        """
+        Set a local cache entry.
+
+        :param key: Key of the entry.
+        :param content: Content, None is not stored.
+        :param validity: Validity in seconds, bounded by the timeout of the local cache.
+        :param immutable: If True the content is stored as is and the same object is returned by each get. It must
+            never be modified.
+        """
+        if content is None or self.max_entries <= 0:
+            return
+
+        # local validity is bounded by the local timeout
+        timeout = self.timeout if validity is None else min(validity, self.timeout)
+
+        if not immutable:
+            content = _Pickled(pickle.dumps(content, pickle.HIGHEST_PROTOCOL))
+
+        with self._lock:
+            self._entries[key] = (time.monotonic() + timeout, content)
+            self._entries.move_to_end(key)
+
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def delete(self, key):
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def delete_pattern(self, pattern):
+        with self._lock:
+            for key in [key for key in self._entries.keys() if fnmatch.fnmatchcase(key, pattern)]:
+                del self._entries[key]
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        with self._lock:
+            return {
+                'entries': len(self._entries),
+                'max_entries': self.max_entries,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions
+            }
+
+
 class CacheManager(object):
     """
     Helper in front of cache API. Models are watched using django signals.
+
+    Each category have an in-process local cache (L1) in front of the shared cache backend (L2).
+    Deletions are broadcast to the others processes using the messenger service, in way to drop their
+    local entries.
     """
 
     def __init__(self):
@@ -24,9 +138,24 @@ class CacheManager(object):
         if getattr(settings, 'PURGE_SERVER_CACHE', False):
             self.purge()
 
-    def register(self, category):
+    def register(self, category, local_max_entries=None, local_timeout=None):
+        """
+        Register a category of cache.
+
+        :param category: Name of the category.
+        :param local_max_entries: Max number of entries of the local cache, 0 to disable it.
+            Default to LOCAL_CACHE_MAX_ENTRIES setting.
+        :param local_timeout: Max validity in seconds of the entries of the local cache.
+            Default to LOCAL_CACHE_TIMEOUT setting.
+        """
         if category not in self.categories:
-            self.categories[category] = {}
+            if local_max_entries is None:
+                local_max_entries = getattr(settings, 'LOCAL_CACHE_MAX_ENTRIES', 1000)
+
+            if local_timeout is None:
+                local_timeout = getattr(settings, 'LOCAL_CACHE_TIMEOUT', 60)
+
+            self.categories[category] = LocalCache(local_max_entries, local_timeout)
 
     def set(self, category, name, content, validity=None):
         """
@@ -44,6 +173,7 @@ class CacheManager(object):
             raise ValueError("Unregistered cache manager category")
 
         cache.set("%s__%s" % (category, name), content, validity)
+        cache_category.set(name, content, validity)
 
     def delete(self, category, name):
         """
@@ -56,18 +186,93 @@ class CacheManager(object):
         if cache_category is None:
             raise ValueError("Unregistered cache manager category")
 
+        self.delete_local(category, name)
+
         if '*' in name:
             cache.delete_pattern("%s__%s" % (category, name))
         else:
             cache.delete("%s__%s" % (category, name))
 
+        self.broadcast_delete(category, name)
+
+    def delete_local(self, category, name):
+        """
+        Delete an entry of the local cache only.
+        :param category: Prefix
+        :param name: Name can contains wild-char
+        """
+        cache_category = self.categories.get(category)
+
+        if cache_category is None:
+            return
+
+        if name == '*':
+            cache_category.clear()
+        elif '*' in name:
+            cache_category.delete_pattern(name)
+        else:
+            cache_category.delete(name)
+
+    def broadcast_delete(self, category, name):
+        """
+        Broadcast the deletion to the local caches of the others processes.
+        """
+        from igdectk.module.manager import module_manager
+        from messenger.commands import COMMAND_SERVER_CACHE_INVALIDATION
+
+        messenger_module = module_manager.get_module('messenger')
+
+        # only in run mode
+        if messenger_module and hasattr(messenger_module, 'tcp_client'):
+            messenger_module.tcp_client.message(COMMAND_SERVER_CACHE_INVALIDATION, {
+                'category': category, 'name': name})
+
+    def on_invalidation(self, message):
+        """
+        Invalidation received from another process.
+        """
+        self.delete_local(message['category'], message['name'])
+
     def get(self, category, name):
         cache_category = self.categories.get(category)
 
         if cache_category is None:
             raise ValueError("Unregistered cache manager category")
 
-        return cache.get("%s__%s" % (category, name))
+        content = cache_category.get(name)
+        if content is not None:
+            return content
+
+        content = cache.get("%s__%s" % (category, name))
+        if content is not None:
+            # bounded by the local timeout, that is expected lesser than the shared one
+            cache_category.set(name, content)
+
+        return content
+
+    def get_local(self, category, name):
+        """
+        Get an entry of the local cache only.
+        """
+        cache_category = self.categories.get(category)
+
+        if cache_category is None:
+            raise ValueError("Unregistered cache manager category")
+
+        return cache_category.get(name)
+
+    def set_local(self, category, name, content, validity=None):
+        """
+        Set an entry into the local cache only, for contents that are not worth to be shared (large or costly
+        to pickle, or cheaper to rebuild than to transfer). It is invalidated like the others entries.
+        The content is not pickled and the same object is returned by get_local, so it must be immutable.
+        """
+        cache_category = self.categories.get(category)
+
+        if cache_category is None:
+            raise ValueError("Unregistered cache manager category")
+
+        cache_category.set(name, content, validity, immutable=True)
 
     def get_or_set(self, category, name, default, validity):
         cache_category = self.categories.get(category)
@@ -75,12 +280,28 @@ class CacheManager(object):
         if cache_category is None:
             raise ValueError("Unregistered cache manager category")
 
-        return cache.get_or_set("%s__%s" % (category, name), default, validity)
+        content = cache_category.get(name)
+        if content is not None:
+            return content
+
+        content = cache.get_or_set("%s__%s" % (category, name), default, validity)
+        cache_category.set(name, content, validity)
+
+        return content
 
     def make_cache_name(self, *kargs):
         return ":".join(kargs)
 
+    def stats(self):
+        """
+        Statistics of the local caches per category.
+        """
+        return {category: local_cache.stats() for category, local_cache in self.categories.items()}
+
     def purge(self):
+        for local_cache in self.categories.values():
+            local_cache.clear()
+
         cache.delete_pattern("*")
         # for category in self.categories:
         #     cache.delete_pattern("%s__*" % category)
@@ -10,10 +10,21 @@
 
 import re
 import datetime
+import hashlib
+import json
+import threading
 
+from collections import OrderedDict
+from functools import partial
+
+from django.conf import settings
 from django.contrib.postgres.fields import JSONField, ArrayField
-from django.db import models, ProgrammingError, connection
+from django.core.cache import cache
+from django.db import models, ProgrammingError, connection, transaction
+from django.db.backends.signals import connection_created
 from django.db.models import prefetch_related_objects
+from django.db.models.signals import post_save, post_delete, m2m_changed
+from django.dispatch import receiver
 from django.db.models.fields.related_descriptors import ForwardManyToOneDescriptor
 
 from django.utils import translation
@@ -34,6 +45,301 @@ class CursorQueryOperatorError(CursorQueryError):
         super(Exception, self).__init__("Operator error: " + message)
 
 
+class CursorQueryPlanCache(object):
+    """
+    Cache of the compiled SQL templates generated by CursorQuery, and of the related server-side
+    prepared statements per database connection.
+
+    The values of the cursor, the filters and the joins are passed as bind parameters, so the template
+    only depends on the shape of the query (model, filters tree, order by, joins...), and it is used as
+    the cache key. Each template is prepared once per database session and then executed with its
+    parameters, in way to let PostgreSQL reuse the same plan for every page of a list.
+
+    Prepared statements are bound to the database session, then the setting
+    CURSOR_QUERY_PREPARED_STATEMENTS must be set to False when a transaction level pooler is used.
+    """
+
+    PLACEHOLDER_RE = re.compile(r'%([%s])')
+
+    def __init__(self):
+        self._templates = OrderedDict()
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self):
+        return getattr(settings, 'CURSOR_QUERY_PREPARED_STATEMENTS', True)
+
+    @property
+    def max_statements(self):
+        return getattr(settings, 'CURSOR_QUERY_MAX_PREPARED_STATEMENTS', 256)
+
+    def compile(self, sql):
+        """
+        Compile a template into a prepared statement.
+
+        :param sql: SQL template using %s placeholders for its parameters.
+        :return: A tuple (statement name, PREPARE query, number of parameters).
+        """
+        with self._lock:
+            compiled = self._templates.get(sql)
+            if compiled is not None:
+                self._templates.move_to_end(sql)
+                return compiled
+
+        num_params = 0
+        parts = []
+        last = 0
+
+        for match in self.PLACEHOLDER_RE.finditer(sql):
+            parts.append(sql[last:match.start()])
+
+            if match.group(1) == '%':
+                parts.append('%')
+            else:
+                num_params += 1
+                parts.append('$%i' % num_params)
+
+            last = match.end()
+
+        parts.append(sql[last:])
+
+        name = "cq_" + hashlib.sha1(sql.encode('utf-8')).hexdigest()[:24]
+        compiled = (name, "PREPARE %s AS %s" % (name, "".join(parts)), num_params)
+
+        with self._lock:
+            self._templates[sql] = compiled
+
+            # keep some more templates than statements per connection
+            while len(self._templates) > self.max_statements * 4:
+                self._templates.popitem(last=False)
+
+        return compiled
+
+    def statement(self, sql, params, using=connection):
+        """
+        Get the statement to execute for a SQL template, and prepare it on the connection if necessary.
+
+        :param sql: SQL template using %s placeholders for its parameters.
+        :param params: List of parameters.
+        :param using: Database connection.
+        :return: A tuple (SQL, parameters) to execute.
+        """
+        if not self.enabled:
+            return sql, params
+
+        name, prepare_sql, num_params = self.compile(sql)
+
+        # the set of prepared statements is reset by the connection_created signal
+        using.ensure_connection()
+        prepared = getattr(using, 'cursor_query_statements', None)
+        if prepared is None:
+            prepared = using.cursor_query_statements = OrderedDict()
+
+        if name in prepared:
+            prepared.move_to_end(name)
+        else:
+            with using.cursor() as cursor:
+                while len(prepared) >= self.max_statements:
+                    old_name, unused = prepared.popitem(last=False)
+                    cursor.execute("DEALLOCATE %s" % old_name)
+
+                cursor.execute(prepare_sql)
+
+            prepared[name] = True
+
+        if num_params:
+            return "EXECUTE %s(%s)" % (name, ", ".join(["%s"] * num_params)), params
+        else:
+            return "EXECUTE %s" % name, params
+
+    def clear(self):
+        with self._lock:
+            self._templates.clear()
+
+
+# Singleton of cursor query plan cache
+cursor_query_plan_cache = CursorQueryPlanCache()
+
+
+@receiver(connection_created)
+def reset_prepared_statements(sender, connection, **kwargs):
+    # a new database session does not have any prepared statement
+    connection.cursor_query_statements = OrderedDict()
+
+
+class CursorQueryCountCache(object):
+    """
+    Shared cache of the exact counts of the cursor queries, keyed by the signature of the query
+    (SQL template and bind parameters).
+
+    Each table has a generation number, incremented at the commit of each write (save, delete, m2m changes) of one
+    of its rows. The generations of the tables involved into the query are part of the key of a count,
+    so any write onto one of these tables invalidates the cached counts.
+
+    Only the writes of the describable entities, of their synonyms, of their many-to-many relations and of the
+    per object permissions are tracked. The counts of a query involving another table are not cached.
+
+    Writes that does not send any signal (bulk_create, update, raw SQL) must call invalidate().
+    """
+
+    # estimations lesser than this threshold are replaced by an exact count
+    EXACT_COUNT_THRESHOLD = 10000
+
+    KEY_PREFIX = "cursor_query_count"
+
+    def __init__(self):
+        self._tables = None
+        self._lock = threading.Lock()
+
+    @property
+    def timeout(self):
+        return getattr(settings, 'CURSOR_QUERY_COUNT_CACHE_TIMEOUT', 300)
+
+    def tracked_tables(self):
+        """
+        Tables of the describable entities models, of their synonyms, of their many-to-many relations and of the
+        per object permissions. Computed once all the applications are ready.
+
+        :return: Set of the tracked tables.
+        """
+        if self._tables is not None:
+            return self._tables
+
+        from django.apps import apps
+
+        if not apps.ready:
+            # the describable entities are registered by the ready() of their applications
+            return frozenset()
+
+        with self._lock:
+            if self._tables is None:
+                from guardian.models import UserObjectPermission, GroupObjectPermission
+                from main.models import EntitySynonym
+
+                # the per object permissions filters (@see filter_object_permission)
+                tables = {UserObjectPermission._meta.db_table, GroupObjectPermission._meta.db_table}
+
+                for model in apps.get_app_config('descriptor').describable_entities:
+                    tables.add(model._meta.db_table)
+
+                    for field in model._meta.get_fields():
+                        if field.many_to_many:
+                            # forward or reverse many-to-many relation
+                            through = field.remote_field.through if field.concrete else field.through
+                            tables.add(through._meta.db_table)
+                        elif field.one_to_many and issubclass(field.related_model, EntitySynonym):
+                            tables.add(field.related_model._meta.db_table)
+
+                self._tables = frozenset(tables)
+
+        return self._tables
+
+    def is_tracked(self, tables):
+        """
+        Check if the counts of a query can be cached.
+
+        :param tables: Set of the tables involved into the query.
+        """
+        return self.tracked_tables().issuperset(tables)
+
+    def _generation_key(self, table):
+        return "%s__generation:%s" % (self.KEY_PREFIX, table)
+
+    def key(self, tables, sql, params):
+        """
+        Key of a count, according to the current generations of the tables. It must be computed before to run the
+        count query, so a write during the query makes the key outdated.
+
+        :param tables: Set of the tables involved into the query.
+        :param sql: SQL template of the count query.
+        :param params: Bind parameters of the count query.
+        :return: The key or None if the count cannot be cached.
+        """
+        if not self.is_tracked(tables):
+            return None
+
+        tables = sorted(tables)
+        keys = [self._generation_key(table) for table in tables]
+        generations = cache.get_many(keys)
+
+        signature = [sql, repr(params)]
+
+        for table, key in zip(tables, keys):
+            generation = generations.get(key)
+            if generation is None:
+                # initial generation of the table
+                generation = 0
+                cache.add(key, generation, None)
+
+            signature.append("%s:%s" % (table, generation))
+
+        return "%s__%s" % (self.KEY_PREFIX, hashlib.sha1("\n".join(signature).encode('utf-8')).hexdigest())
+
+    def get(self, key):
+        """
+        Get a cached count.
+
+        :param key: Key of the count (@see key).
+        :return: The count or None if not cached.
+        """
+        if key is None:
+            return None
+
+        return cache.get(key)
+
+    def set(self, key, count):
+        if key is not None:
+            cache.set(key, count, self.timeout)
+
+    def invalidate(self, table):
+        """
+        Invalidate any cached counts related to a table, once the current transaction is committed. Before that,
+        the others transactions still see the previous rows, and then could cache their count for the new
+        generation.
+
+        :param table: Name of the database table.
+        """
+        transaction.on_commit(partial(self._next_generation, table))
+
+    def _next_generation(self, table):
+        try:
+            cache.incr(self._generation_key(table))
+        except ValueError:
+            # no count cached for this table
+            pass
+
+
+# Singleton of cursor query count cache
+cursor_query_count_cache = CursorQueryCountCache()
+
+
+@receiver(post_save)
+@receiver(post_delete)
+def invalidate_cursor_query_counts(sender, **kwargs):
+    # only the tracked tables, not any model save of the application
+    db_table = sender._meta.db_table
+    if db_table in cursor_query_count_cache.tracked_tables():
+        cursor_query_count_cache.invalidate(db_table)
+
+
+@receiver(m2m_changed)
+def invalidate_cursor_query_counts_m2m(sender, action, **kwargs):
+    # sender is the through model
+    if action in ('post_add', 'post_remove', 'post_clear'):
+        db_table = sender._meta.db_table
+        if db_table in cursor_query_count_cache.tracked_tables():
+            cursor_query_count_cache.invalidate(db_table)
+
+
+class CursorRow(object):
+    """
+    A result row of CursorQuery.rows(), giving an attribute access to the columns, for the cursors build.
+    """
+
+    def __init__(self, row):
+        self.__dict__.update(row)
+
+
 class CursorField(object):
     """
     Internal cursor field helper.
@@ -139,9 +445,10 @@ class CursorQuery(object):
     FIELDS_SEP = "->"
 
     # need to escape % because of django raw
+    # the lists are bound as a single array parameter, so the SQL does not depend on the number of values
     OPERATORS_MAP = {
-        'in': 'IN',
-        'notin': 'NOT IN',
+        'in': '= ANY',
+        'notin': '<> ALL',
         'isnull': '=',
         'notnull': '!=',
         '=': '=',
@@ -209,6 +516,17 @@ class CursorQuery(object):
         self.query_group_by = []
         self.query_limit = None
 
+        # bind parameters of the FROM (inner joins), cursor filters and WHERE clauses, in order of placeholders
+        self.query_from_params = []
+        self.query_filters_params = []
+        self.query_where_params = []
+        self._params = self.query_where_params
+        self._processed = False
+        self._sql = None
+
+        # tables involved into the query, for the invalidation of the cached counts
+        self.query_tables = {model._meta.db_table}
+
         self._related_tables = {}
 
         self._select_related = False
@@ -217,11 +535,17 @@ class CursorQuery(object):
 
         self._filter_clauses = []
 
+        # projection of the results for rows() (@see project)
+        self._projection = None
+
         db_table = model._meta.db_table
 
-        self.sub_query_select = ['"%s".*' % db_table]
         self._sub_query_array_fields = {}
 
+        # array columns computed per row by a correlated sub-query (m2m array fields, multiple synonyms) :
+        # alias: {'table': lateral alias, 'sql': ARRAY() expression, 'filtered': bool, 'select': name or None}
+        self._array_columns = OrderedDict()
+
         self.model_fields = {}
 
         from descriptor.descriptorcolumns import get_description
@@ -302,6 +626,7 @@ class CursorQuery(object):
 
     def _process_cursor(self):
         db_table = self._model._meta.db_table
+        self._params = self.query_filters_params
 
         if self._cursor:
             _where = []
@@ -441,7 +766,17 @@ class CursorQuery(object):
             if len(_where):
                 self.query_filters.append(" OR ".join(_where))
 
+    def _bind(self, value):
+        """
+        Append a value to the bind parameters of the current clause and return its placeholder.
+        """
+        self._params.append(value)
+        return "%s"
+
     def _make_value(self, value, field_data):
+        """
+        Convert a value to its SQL form. NULL values are returned as literal, and others are bound as parameters.
+        """
         if value is None:
             if field_data[1] == 'INTEGER':
                 if field_data[2]:
@@ -466,14 +801,17 @@ class CursorQuery(object):
 
         if field_data[1] == 'INTEGER':
             if isinstance(value, int):
-                return str(value)
+                return self._bind(value)
             elif isinstance(value, list):
                 try:
+                    values = [int(v) for v in value]
+
                     if field_data[0] == 'ARRAY':
-                        return 'ARRAY[' + ','.join(str(int(v)) for v in value) + ']'
+                        return self._bind(values) + '::INTEGER[]'
                     else:
-                        return '(' + ','.join(str(int(v)) for v in value) + ')'
-                except ValueError:
+                        # operand of = ANY or <> ALL
+                        return '(' + self._bind(values) + '::INTEGER[])'
+                except (ValueError, TypeError):
                     pass
 
             if field_data[2]:
@@ -481,36 +819,39 @@ class CursorQuery(object):
             else:
                 return "NULL"
         elif field_data[1] == 'DATETIME':
-            dt = datetime.datetime.strptime(value.replace("'", "''"), '%Y-%m-%d %H:%M:%S')
-            return "'" + dt.strftime('%Y-%m-%d %H:%M:%S') + "'::timestamp"
+            dt = datetime.datetime.strptime(value, '%Y-%m-%d %H:%M:%S')
+            return self._bind(dt.strftime('%Y-%m-%d %H:%M:%S')) + "::timestamp"
         elif field_data[1] == 'BOOL':
-            return "TRUE" if value else "FALSE"
+            return self._bind(bool(value))
+        elif isinstance(value, list) and field_data[0] != 'ARRAY':
+            # operand of = ANY or <> ALL
+            return '(' + self._bind([str(v) for v in value]) + '::TEXT[])'
         else:
-            return "'" + value.replace("'", "''") + "'"
+            return self._bind(value)
 
     def _convert_value(self, value, cmp):
-        # adjust value in some cases
+        # adjust value in some cases (values are bind parameters, so % must not be escaped)
         if cmp in ('isnull', 'notnull'):
             return 'NULL'
         elif cmp in ('contains', 'icontains') and not isinstance(value, list):
-            return "%%" + value + "%%"
+            return "%" + value + "%"
         elif cmp in ('startswith', 'istartswith'):
-            return value + "%%"
+            return value + "%"
         elif cmp in ('endswith', 'iendswith'):
-            return "%%" + value
+            return "%" + value
         else:
             return value
 
     def _convert_multi_synonym_value(self, value, cmp):
-        # adjust value in some cases
+        # adjust value in some cases, None for an empty array
         if cmp in ('isnull', 'notnull'):
-            return "'{}'"
+            return None
         elif cmp in ('contains', 'icontains') and not isinstance(value, list):
-            return "%%" + value + "%%"
+            return "%" + value + "%"
         elif cmp in ('startswith', 'istartswith'):
-            return value + "%%"
+            return value + "%"
         elif cmp in ('endswith', 'iendswith'):
-            return "%%" + value
+            return "%" + value
         else:
             return value
 
@@ -819,6 +1160,8 @@ class CursorQuery(object):
         if filters is None:
             filters = self._filter_clauses
 
+        self._params = self.query_where_params
+
         if depth >= 4:
             raise CursorQueryError('Filter max depth allowed is 4')
 
@@ -905,7 +1248,10 @@ class CursorQuery(object):
                         if cf.is_multiple_synonym:
                             op = self.MULTI_SYNONYM_OPERATORS_MAP.get(cmp)
 
-                            lqs.append(self._cast_multi_synonym_type(db_table, alias, op,
+                            # the array must be computed before the WHERE clause
+                            self._array_columns[alias]['filtered'] = True
+
+                            lqs.append(self._cast_multi_synonym_type(alias, alias, op,
                                                                      self._convert_multi_synonym_value(value, cmp)))
 
                         else:
@@ -923,11 +1269,12 @@ class CursorQuery(object):
                             op = self.ARRAY_OPERATORS_MAP.get(cmp) if field_model[0] == 'ARRAY' else self.OPERATORS_MAP.get(cmp)
 
                             final_value = self._make_value(self._convert_value(value, cmp), field_model)
+                            array_table = self._array_columns[cf.name]['table']
 
                             if field_model[0] == 'ARRAY' and isinstance(op, list) and op[0] == 'NOT':
-                                lqs.append('NOT "%s"."%s" %s %s' % (db_table, cf.name, op[1], final_value))
+                                lqs.append('NOT "%s"."%s" %s %s' % (array_table, cf.name, op[1], final_value))
                             else:
-                                lqs.append('"%s"."%s" %s %s' % (db_table, cf.name, op, final_value))
+                                lqs.append('"%s"."%s" %s %s' % (array_table, cf.name, op, final_value))
 
                         else:
                             field_model = self.model_fields[cf.name]
@@ -987,10 +1334,6 @@ class CursorQuery(object):
         final_value = self._make_value(value, field_model)
         coalesce_value = self._make_value(None, field_model)
 
-        # invalid empty set
-        if final_value == '()':
-            return 'FALSE'
-
         if field_model[2]:  # is null
             if field_model[0] == 'FK':
                 return 'COALESCE("%s"."%s_id", %s) %s %s' % (
@@ -1047,7 +1390,7 @@ class CursorQuery(object):
 
     def _cast_descriptor_type(self, table_name, descriptor_name, operator, value):
         description = self._description[descriptor_name]
-        return description['handler'].operator(operator, table_name, descriptor_name, value)
+        return description['handler'].operator(operator, table_name, descriptor_name, value, self._params)
 
     def _cast_descriptor_sub_type(self, descriptor_name, field_name, operator, value):
         # descriptor_name can contains some '.', replaces them by '_'
@@ -1079,6 +1422,11 @@ class CursorQuery(object):
             value = 'NULL'
 
         final_value = self._make_value(value, ('TEXT', 'TEXT', False))
+
+        # a missing synonym never matches a pattern, and without COALESCE the trigram index of the name is usable
+        if operator in ('LIKE', 'ILIKE'):
+            return '"%s"."name" %s %s' % (table_alias, operator, final_value)
+
         coalesce_value = "'NULL'"
 
         return 'COALESCE("%s"."name", %s) %s %s' % (table_alias, coalesce_value, operator, final_value)
@@ -1086,19 +1434,21 @@ class CursorQuery(object):
     def _cast_multi_synonym_type(self, table_alias, field_alias, operator, value):
 
         if value is None:
-            value = "'{}'"
-
-        final_value = self._make_value(value, ('TEXT', 'TEXT', False))
+            # empty array
+            return '"%s"."%s" %s \'{}\'' % (table_alias, field_alias, operator)
 
         if operator == 'ILIKE' or operator == 'LIKE':
+            final_value = self._make_value(value, ('TEXT', 'TEXT', False))
             return 'array_to_string("%s"."%s", \'\\0\') %s %s' % (table_alias, field_alias, operator, final_value)
 
         if operator == '@>':
-            return '"%s"."%s" %s \'{%s}\'' % (table_alias, field_alias, operator, value)
+            return '"%s"."%s"::TEXT[] %s ARRAY[%s]::TEXT[]' % (table_alias, field_alias, operator, self._bind(value))
         elif isinstance(operator, list) and operator[0] == 'NOT':
-            return 'NOT "%s"."%s" %s \'{%s}\'' % (table_alias, field_alias, operator[1], value)
+            return 'NOT "%s"."%s"::TEXT[] %s ARRAY[%s]::TEXT[]' % (
+                table_alias, field_alias, operator[1], self._bind(value))
         else:
-            return '"%s"."%s" %s %s' % (table_alias, field_alias, operator, value)
+            return '"%s"."%s" %s %s' % (table_alias, field_alias, operator, self._make_value(
+                value, ('TEXT', 'TEXT', False)))
 
     def join_descriptor(self, description, descriptor_name, fields=None):
         model_fields = {}
@@ -1156,11 +1506,13 @@ class CursorQuery(object):
         _from = 'LEFT JOIN "%s" AS "%s" ON (%s)' % (join_db_table, renamed_table, on_clauses)
 
         self.query_from.append(_from)
+        self.query_tables.add(join_db_table)
         return self
 
     def join_sub_query_array_field(self, cf):
         """
-        Create array field from a subquery
+        Create array field from a subquery. It is only used by the filters, and it is computed by a lateral join,
+        per row of the main table, in place of a sub-select of the whole table.
         :param cf: cursorfield
         :return:
         """
@@ -1172,13 +1524,17 @@ class CursorQuery(object):
         alias = cf.name
         db_table = self._model._meta.db_table
 
-        self.sub_query_select.append(
-            'ARRAY(SELECT "%s"."%s" FROM "%s" WHERE "%s"."%s" = "%s"."%s") AS "%s"' % (
+        self._array_columns[alias] = {
+            'table': "array_" + alias,
+            'sql': 'ARRAY(SELECT "%s"."%s" FROM "%s" WHERE "%s"."%s" = "%s"."%s")' % (
                 related_db_table, selected_field, related_db_table, db_table, from_related_field, related_db_table,
-                to_related_field, alias)
-        )
+                to_related_field),
+            'filtered': True,
+            'select': None
+        }
 
         self._sub_query_array_fields[cf.name]['handle'] = True
+        self.query_tables.add(related_db_table)
 
         return self
 
@@ -1189,15 +1545,17 @@ class CursorQuery(object):
         synonym_type = synonym_cf.synonym_type()
 
         self._synonym_table_aliases[synonym_cf.name] = alias
+        self.query_tables.add(synonym_db_table)
 
         if synonym_cf.is_multiple_synonym:
-
-            self.sub_query_select.append(
-                'ARRAY(SELECT "%s"."name" FROM "%s" WHERE "%s"."synonym_type_id" = %d AND "%s"."entity_id" = "%s"."id" ) AS "%s"' % (
-                    synonym_db_table, synonym_db_table, synonym_db_table, synonym_type.id, synonym_db_table, db_table,
-                    alias))
-
-            self.query_select.append('"%s"."%s" AS "%s"' % (db_table, alias, synonym_cf.name))
+            # selected only, unless a filter references it (@see _make_from)
+            self._array_columns[alias] = {
+                'table': alias,
+                'sql': 'ARRAY(SELECT "%s"."name" FROM "%s" WHERE "%s"."synonym_type_id" = %d AND "%s"."entity_id" = "%s"."id")' % (
+                    synonym_db_table, synonym_db_table, synonym_db_table, synonym_type.id, synonym_db_table, db_table),
+                'filtered': False,
+                'select': synonym_cf.name
+            }
 
         else:
             self.query_select.append('"%s"."name" AS "%s"' % (alias, synonym_cf.name))
@@ -1271,6 +1629,7 @@ class CursorQuery(object):
             _from = 'LEFT JOIN "%s" AS "%s" ON (%s)' % (join_db_table, db_table_alias, " AND ".join(on_clause))
 
             self.query_from.append(_from)
+            self.query_tables.add(join_db_table)
 
         elif type(related_model) is models.fields.related_descriptors.ManyToManyDescriptor:
             join_db_table = related_model.through._meta.db_table
@@ -1279,6 +1638,7 @@ class CursorQuery(object):
             _from = 'LEFT JOIN "%s" AS "%s" ON (%s)' % (join_db_table, db_table_alias, " AND ".join(on_clause))
 
             self.query_from.append(_from)
+            self.query_tables.add(join_db_table)
 
         elif type(related_model) is models.fields.related_descriptors.ReverseManyToOneDescriptor:
             join_db_table = related_model.rel.related_model._meta.db_table
@@ -1290,6 +1650,7 @@ class CursorQuery(object):
             _from = 'LEFT OUTER JOIN "%s" AS "%s" ON (%s)' % (join_db_table, db_table_alias, " AND ".join(on_clause))
 
             self.query_from.append(_from)
+            self.query_tables.add(join_db_table)
 
         return self
 
@@ -1332,22 +1693,7 @@ class CursorQuery(object):
 
         try:
             for instance in self._query_set:
-                for field, (related_model, model_fields) in self._related_tables.items():
-                    if field.startswith('descr_'):
-                        continue
-
-                    new_model = related_model(id=getattr(instance, "%s_id" % field))
-
-                    # since django 2 moved to _state.fields_cache dict
-                    # setattr(instance, "_%s_cache" % field, new_model)
-                    instance._state.fields_cache[field] = new_model
-
-                    for related_field in model_fields:
-                        if model_fields[related_field][0] == 'FK':
-                            field_name = related_field + '_id'
-                            setattr(new_model, field_name, getattr(instance, "%s_%s" % (field, field_name)))
-                        else:
-                            setattr(new_model, related_field, getattr(instance, "%s_%s" % (field, related_field)))
+                self._set_related_instances(instance)
 
                 # cache them for cursor build
                 if self._first_elt is None:
@@ -1359,6 +1705,84 @@ class CursorQuery(object):
         except ProgrammingError as e:
             raise CursorQueryError('Invalid query arguments: ' + str(e))
 
+    def _set_related_instances(self, instance):
+        """
+        Set the related models instances from the joined columns.
+        """
+        for field, (related_model, model_fields) in self._related_tables.items():
+            if field.startswith('descr_'):
+                continue
+
+            new_model = related_model(id=getattr(instance, "%s_id" % field))
+
+            # since django 2 moved to _state.fields_cache dict
+            # setattr(instance, "_%s_cache" % field, new_model)
+            instance._state.fields_cache[field] = new_model
+
+            for related_field in model_fields:
+                if model_fields[related_field][0] == 'FK':
+                    field_name = related_field + '_id'
+                    setattr(new_model, field_name, getattr(instance, "%s_%s" % (field, field_name)))
+                else:
+                    setattr(new_model, related_field, getattr(instance, "%s_%s" % (field, related_field)))
+
+    def iterator(self, chunk_size=2000):
+        """
+        Iterate over the results using a named server-side cursor, fetching the rows by chunks, in way to
+        keep a flat memory usage whatever the number of results. Prefetch related are performed per chunk.
+        The query is not executed as a prepared statement because a cursor cannot be declared for an EXECUTE.
+
+        :param chunk_size: Number of rows fetched from the server-side cursor at once.
+        :return: Generator of model instances.
+        """
+        sql, params = self._make_sql()
+
+        model_init_names = None
+        model_init_pos = None
+        annotations = None
+
+        try:
+            with connection.chunked_cursor() as cursor:
+                cursor.execute(sql, params)
+
+                while True:
+                    rows = cursor.fetchmany(chunk_size)
+                    if not rows:
+                        break
+
+                    # description of a named cursor is only known after the first fetch
+                    if model_init_names is None:
+                        columns = [column[0] for column in cursor.description]
+                        model_init_names = []
+                        model_init_pos = []
+
+                        for field in self._model._meta.concrete_fields:
+                            if field.column in columns:
+                                model_init_names.append(field.attname)
+                                model_init_pos.append(columns.index(field.column))
+
+                        annotations = [(column, pos) for pos, column in enumerate(columns) if pos not in model_init_pos]
+
+                    instances = []
+
+                    for row in rows:
+                        instance = self._model.from_db(
+                            connection.alias, model_init_names, [row[pos] for pos in model_init_pos])
+
+                        for column, pos in annotations:
+                            setattr(instance, column, row[pos])
+
+                        self._set_related_instances(instance)
+                        instances.append(instance)
+
+                    if self._prefetch_related:
+                        prefetch_related_objects(instances, *self._prefetch_related)
+
+                    for instance in instances:
+                        yield instance
+        except ProgrammingError as e:
+            raise CursorQueryError('Invalid query arguments: ' + str(e))
+
     def add_select_related(self, fields):
         if isinstance(self._select_related, bool):
             field_dict = {}
@@ -1411,6 +1835,65 @@ class CursorQuery(object):
 
         return self
 
+    def filter_object_permission(self, user, perm):
+        """
+        Restrict the results to the objects on which a user has a permission, given directly or by one of its
+        groups, using the guardian object permissions tables. Nothing is filtered when the user has the
+        permission at the model level.
+
+        :param user: Instance of User.
+        :param perm: Permission string like "app_label.codename", of the model of the query.
+        :return: self
+        """
+        if self._query_set is not None or self._processed:
+            raise CursorQueryError("Can not call filter_object_permission() after iterate over results")
+
+        from django.contrib.auth.models import Permission
+        from django.contrib.contenttypes.models import ContentType
+        from guardian.models import UserObjectPermission, GroupObjectPermission
+        from permission.snapshot import PermissionSnapshot
+
+        snapshot = PermissionSnapshot.get(user)
+
+        if snapshot.has_perm(perm):
+            return self
+
+        if not snapshot.is_active:
+            self.query_filters.append("FALSE")
+            return self
+
+        db_table = self._model._meta.db_table
+        content_type = ContentType.objects.get_for_model(self._model)
+
+        try:
+            permission_id = Permission.objects.get(
+                content_type=content_type, codename=perm.split('.', 1)[-1]).pk
+        except Permission.DoesNotExist:
+            raise CursorQueryError("Unknown permission %s for the model %s" % (perm, self._model._meta.model_name))
+
+        # the object_pk column of guardian is a string
+        sub_query = 'EXISTS (SELECT 1 FROM "%s" WHERE "%s"."content_type_id" = %%s AND "%s"."permission_id" = %%s' \
+                    ' AND "%s"."%s" %s AND "%s"."object_pk" = "%s"."id"::text)'
+
+        clauses = []
+
+        user_table = UserObjectPermission._meta.db_table
+        clauses.append(sub_query % (user_table, user_table, user_table, user_table, "user_id", "= %s",
+                                    user_table, db_table))
+        self.query_filters_params.extend((content_type.pk, permission_id, user.pk))
+        self.query_tables.add(user_table)
+
+        if snapshot.group_ids:
+            group_table = GroupObjectPermission._meta.db_table
+            clauses.append(sub_query % (group_table, group_table, group_table, group_table, "group_id",
+                                        "= ANY(%s)", group_table, db_table))
+            self.query_filters_params.extend((content_type.pk, permission_id, list(snapshot.group_ids)))
+            self.query_tables.add(group_table)
+
+        self.query_filters.append("(%s)" % " OR ".join(clauses))
+
+        return self
+
     def m2m_to_array_field(self, relationship, selected_field, from_related_field, to_related_field, alias):
         """
         Add array field which contains elements of the given model field.
@@ -1425,6 +1908,59 @@ class CursorQuery(object):
 
         return self
 
+    def project(self, columns=None):
+        """
+        Project the results of rows() on the columns displayed by the client. The descriptors column only
+        contains the descriptors of the given columns (prefixed by '#'), and a synonyms column, JSON object of the
+        synonyms by type name, is added when a synonym column (prefixed by '&') is given.
+
+        :param columns: List of the displayed columns names, or None for any columns.
+        :return: self
+        """
+        if self._sql is not None:
+            raise CursorQueryError("Can not call project() after the query is built")
+
+        if columns is None:
+            descriptors = None
+            synonyms = True
+        else:
+            descriptors = [column[1:].split(self.FIELDS_SEP)[0] for column in columns if column.startswith('#')]
+            synonyms = any(column.startswith('&') for column in columns)
+
+        self._projection = {
+            'descriptors': descriptors,
+            'synonyms': synonyms
+        }
+
+        return self
+
+    def rows(self):
+        """
+        Perform the query and returns the results as dicts of the selected columns, without building model
+        instances. JSON columns are decoded.
+
+        :return: List of dict
+        """
+        sql, params = self._make_sql()
+
+        try:
+            statement, statement_params = cursor_query_plan_cache.statement(sql, params)
+
+            with connection.cursor() as cursor:
+                cursor.execute(statement, statement_params)
+
+                columns = [column[0] for column in cursor.description]
+                rows = [dict(zip(columns, row)) for row in cursor.fetchall()]
+        except ProgrammingError as e:
+            raise CursorQueryError('Invalid query arguments: ' + str(e))
+
+        # for the cursors build
+        self._query_set = [CursorRow(row) for row in rows]
+        self._first_elt = None
+        self._last_elt = None
+
+        return rows
+
     def prefetch_related(self, prefetch):
         """
         Make additional queries for many-to-many related.
@@ -1492,11 +2028,13 @@ class CursorQuery(object):
             raise CursorQueryError("Invalid to related field %s" % to_model_name_alias)
 
         # query part
-        inner_join = 'INNER JOIN "%s" ON ("%s"."%s_id" = %i AND "%s"."id" = "%s"."%s_id")' % (
-            join_db_table, join_db_table, related_field_name, id_value, db_table, join_db_table, to_model_name_alias
+        inner_join = 'INNER JOIN "%s" ON ("%s"."%s_id" = %%s AND "%s"."id" = "%s"."%s_id")' % (
+            join_db_table, join_db_table, related_field_name, db_table, join_db_table, to_model_name_alias
         )
 
         self.query_from.append(inner_join)
+        self.query_from_params.append(int(id_value))
+        self.query_tables.add(join_db_table)
 
     def set_count(self, related_field):
         self._counts.append(related_field)
@@ -1538,16 +2076,12 @@ class CursorQuery(object):
         if add_group_by:
             self.query_group_by.append('"%s"."id"' % (db_table,))
 
-    def sql(self):
+    def _process(self):
         """
-        Build the SQL query that will be performed directly if there is some prefetch related,
-        or at iterator called else.
-
-        :return: Query set
+        Process the joins, the cursor and the filters once, common to the query and to the count.
         """
-        # does not perform twice
-        if self._query_set is not None:
-            return self._query_set
+        if self._processed:
+            return
 
         # perform joins using select_related
         if type(self._select_related) is dict:
@@ -1557,19 +2091,127 @@ class CursorQuery(object):
         try:
             self._process_cursor()
             self._process_filter()
+        except KeyError as e:
+            raise CursorQueryError(e)
+
+        self._processed = True
+
+    def _make_where(self):
+        """
+        Make the WHERE clause and its related bind parameters.
+
+        :return: A tuple (WHERE string, list of parameters)
+        """
+        if self.query_filters:
+            if self.query_where:
+                _where = "WHERE (%s) AND (%s)" % (" AND ".join(self.query_filters), " OR ".join(self.query_where))
+                params = self.query_filters_params + self.query_where_params
+            else:
+                _where = "WHERE " + " AND ".join(self.query_filters)
+                params = list(self.query_filters_params)
+        else:
+            _where = "WHERE " + " OR ".join(self.query_where)
+            params = list(self.query_where_params)
+
+        return _where, params
+
+    def _make_select(self):
+        """
+        Make the list of selected columns, including the array columns. An array column that is not referenced
+        by a filter is computed into the select list, and then only for the returned rows.
+        """
+        query_select = list(self.query_select)
+
+        if self._projection is not None:
+            self._project_select(query_select)
+
+        for alias, array_column in self._array_columns.items():
+            if not array_column['select']:
+                continue
+
+            if array_column['filtered']:
+                query_select.append('"%s"."%s" AS "%s"' % (array_column['table'], alias, array_column['select']))
+            else:
+                query_select.append('%s AS "%s"' % (array_column['sql'], array_column['select']))
+
+        return query_select
+
+    def _project_select(self, query_select):
+        """
+        Replace the descriptors column by a JSON object of the projected descriptors only, and add the synonyms
+        column if necessary.
+        """
+        db_table = self._model._meta.db_table
+        descriptors = self._projection['descriptors']
+
+        if descriptors is not None and 'descriptors' in self.model_fields:
+            codes = set(descriptors)
+
+            # the descriptors of the cursor are necessary to build the next ones
+            for field in self._order_by:
+                cf = CursorField(field, -1, self)
+                if cf.is_descriptor and self.FIELDS_SEP not in cf.name:
+                    codes.add(cf.name)
+
+            # only known descriptors, they are inlined into the query
+            pairs = ["'%s', \"%s\".\"descriptors\"->'%s'" % (code, db_table, code)
+                     for code in sorted(codes) if code in self._description]
+
+            column = '"%s"."descriptors"' % db_table
+            projected = "jsonb_strip_nulls(jsonb_build_object(%s)) AS \"descriptors\"" % ", ".join(pairs) if pairs else \
+                "'{}'::JSONB AS \"descriptors\""
+
+            query_select[query_select.index(column)] = projected
+
+        if self._projection['synonyms'] and self._synonym_model is not None:
+            from main.models import EntitySynonymType
+
+            synonym_db_table = self._synonym_model._meta.db_table
+            synonym_type_db_table = EntitySynonymType._meta.db_table
+
+            # the last synonym of a type wins, like when iterating
+            query_select.append(
+                'COALESCE((SELECT json_object_agg(st."name", json_build_object('
+                '\'id\', s."id", \'name\', s."name", \'synonym_type\', s."synonym_type_id", \'language\', s."language") '
+                'ORDER BY s."synonym_type_id", s."language") '
+                'FROM "%s" AS s INNER JOIN "%s" AS st ON st."id" = s."synonym_type_id" '
+                'WHERE s."entity_id" = "%s"."id"), \'{}\'::JSON) AS "synonyms"' % (
+                    synonym_db_table, synonym_type_db_table, db_table))
+
+    def _make_from(self):
+        """
+        Make the FROM clause. The array columns referenced by a filter are computed with a lateral join, per row
+        of the main table, letting the planner apply the others conditions, the cursor and the limit first.
+        """
+        query_from = list(self.query_from)
+
+        for alias, array_column in self._array_columns.items():
+            if array_column['filtered']:
+                query_from.append('LEFT JOIN LATERAL (SELECT %s AS "%s") AS "%s" ON TRUE' % (
+                    array_column['sql'], alias, array_column['table']))
+
+        return "FROM " + " ".join(query_from)
+
+    def _make_sql(self):
+        """
+        Build the SQL query template and its bind parameters.
+
+        :return: A tuple (SQL template, list of parameters)
+        """
+        # does not build twice
+        if self._sql is not None:
+            return self._sql
+
+        self._process()
+
+        try:
             self._process_order_by()
             self._process_count()
         except KeyError as e:
             raise CursorQueryError(e)
 
-        # perform sub query
-        if len(self.sub_query_select) > 1:
-            _sub_query_from = '(SELECT DISTINCT %s FROM "%s") AS "%s"' % (
-                ",".join(self.sub_query_select), self._model._meta.db_table, self._model._meta.db_table)
-            self.query_from[0] = _sub_query_from
-
-        _select = "SELECT DISTINCT " if self.query_distinct else "SELECT " + ", ".join(self.query_select)
-        _from = "FROM " + " ".join(self.query_from)
+        _select = "SELECT DISTINCT " if self.query_distinct else "SELECT " + ", ".join(self._make_select())
+        _from = self._make_from()
 
         if self.query_group_by:
             _group_by = "GROUP BY " + ", ".join(self.query_group_by)
@@ -1586,36 +2228,50 @@ class CursorQuery(object):
         else:
             _limit = ""
 
-        if self.query_filters:
-            if self.query_where:
-                _where = "WHERE (%s) AND (%s)" % (" AND ".join(self.query_filters), " OR ".join(self.query_where))
-            else:
-                _where = "WHERE " + " AND ".join(self.query_filters)
-        else:
-            _where = "WHERE " + " OR ".join(self.query_where)
+        _where, where_params = self._make_where()
+        params = list(self.query_from_params)
 
-        if (
-                self.query_where or self.query_filters) and self.query_group_by and self.query_order_by and self.query_limit:
-            sql = " ".join([_select, _from, _where, _group_by, _order_by, _limit])
-        else:
-            sql = _select
+        sql = _select
+
+        if _from:
+            sql = sql + " " + _from
 
-            if _from:
-                sql = sql + " " + _from
+        if self.query_where or self.query_filters:
+            sql = sql + " " + _where
+            params += where_params
+
+        if self.query_group_by:
+            sql = sql + " " + _group_by
 
-            if self.query_where or self.query_filters:
-                sql = sql + " " + _where
+        if self.query_order_by:
+            sql = sql + " " + _order_by
 
-            if self.query_group_by:
-                sql = sql + " " + _group_by
+        if self.query_limit:
+            sql = sql + " " + _limit
 
-            if self.query_order_by:
-                sql = sql + " " + _order_by
+        self._sql = (sql, params)
+        return self._sql
 
-            if self.query_limit:
-                sql = sql + " " + _limit
+    def sql(self):
+        """
+        Build the SQL query that will be performed directly if there is some prefetch related,
+        or at iterator called else. The query is a template whose values are given as bind parameters,
+        and it is executed using a prepared statement (@see CursorQueryPlanCache).
 
-        self._query_set = self._model.objects.raw(sql)
+        :return: Query set
+        """
+        # does not perform twice
+        if self._query_set is not None:
+            return self._query_set
+
+        sql, params = self._make_sql()
+
+        try:
+            sql, params = cursor_query_plan_cache.statement(sql, params)
+        except ProgrammingError as e:
+            raise CursorQueryError('Invalid query arguments: ' + str(e))
+
+        self._query_set = self._model.objects.raw(sql, tuple(params))
         self._first_elt = None
         self._last_elt = None
 
@@ -1659,54 +2315,168 @@ class CursorQuery(object):
 
         return instance
 
-    def count(self):
+    def _make_count_sql(self, select="COUNT(*)"):
+        """
+        Build the SQL count query template and its bind parameters.
+
+        :param select: Selected expression.
+        :return: A tuple (SQL template, list of parameters)
+        """
+        # perform joins using select_related, like for normal SQL but does not perform the ORDER BY and LIMIT
+        self._process()
+
+        _select = "SELECT DISTINCT " + select if self.query_distinct else "SELECT " + select
+        _from = self._make_from()
+
+        _where, where_params = self._make_where()
+        params = list(self.query_from_params)
+
+        sql = _select
+
+        if _from:
+            sql = sql + " " + _from
+
+        if self.query_where or self.query_filters:
+            sql = sql + " " + _where
+            params += where_params
+
+        return sql, params
+
+    def ids_sql(self):
+        """
+        Build the SQL sub-select of the ids of the filtered rows, without ordering nor limit, to be used by a
+        set-based statement (INSERT ... SELECT, DELETE ... USING).
+
+        :return: A tuple (SQL template, list of parameters)
+        """
+        return self._make_count_sql('"%s"."id"' % self._model._meta.db_table)
+
+    def m2m_add(self, relationship, owner_id):
+        """
+        Add the filtered rows to the many-to-many relation of an owner, using a single INSERT ... SELECT.
+        The already related rows are ignored. No m2m_changed signal is sent, but a M2M_CHANGE audit of the owner.
+
+        :param relationship: Many-to-many field descriptor from the owner model to the model of the query
+            (for example AccessionPanel.accessions).
+        :param owner_id: Id of the owner.
+        :return: Number of added rows.
+        """
+        field = relationship.field
+        through_table = relationship.through._meta.db_table
+        ids_sql, ids_params = self.ids_sql()
+
+        sql = 'INSERT INTO "%s" ("%s", "%s") SELECT %%s, "ids"."id" FROM (%s) AS "ids" ON CONFLICT DO NOTHING' % (
+            through_table, field.m2m_column_name(), field.m2m_reverse_name(), ids_sql)
+
+        return self._execute_m2m(relationship, owner_id, sql, [owner_id] + ids_params, 'added')
+
+    def m2m_remove(self, relationship, owner_id):
+        """
+        Remove the filtered rows from the many-to-many relation of an owner, using a single DELETE ... USING.
+        No m2m_changed signal is sent, but a M2M_CHANGE audit of the owner.
+
+        :param relationship: Many-to-many field descriptor from the owner model to the model of the query
+            (for example AccessionPanel.accessions).
+        :param owner_id: Id of the owner.
+        :return: Number of removed rows.
+        """
+        field = relationship.field
+        through_table = relationship.through._meta.db_table
+        ids_sql, ids_params = self.ids_sql()
+
+        sql = 'DELETE FROM "%s" AS "m" USING (%s) AS "ids" WHERE "m"."%s" = %%s AND "m"."%s" = "ids"."id"' % (
+            through_table, ids_sql, field.m2m_column_name(), field.m2m_reverse_name())
+
+        return self._execute_m2m(relationship, owner_id, sql, ids_params + [owner_id], 'removed')
+
+    def _execute_m2m(self, relationship, owner_id, sql, params, action):
+        through_table = relationship.through._meta.db_table
+
+        try:
+            with connection.cursor() as cursor:
+                cursor.execute(sql, params)
+                rowcount = cursor.rowcount
+        except ProgrammingError as e:
+            raise CursorQueryError('Invalid query arguments: ' + str(e))
+
+        # raw SQL does not send any signal
+        cursor_query_count_cache.invalidate(through_table)
+
+        if rowcount:
+            from audit.models import AuditType, entities_bulk_changed
+            entities_bulk_changed(relationship.field.model, [owner_id], AuditType.M2M_CHANGE, {
+                'field': relationship.field.name, action: rowcount})
+
+        return rowcount
+
+    def count(self, approximate=False, cached=False):
         """
         Only does the count of the number of results.
 
+        :param approximate: If True returns the estimation of the planner in place of the exact count, when the
+            estimation is large enough (@see CursorQueryCountCache.EXACT_COUNT_THRESHOLD).
+        :param cached: If True the exact count is cached for the signature of the query, until a write onto one
+            of the tables of the query.
         :return: Integer count value.
         """
+        if approximate:
+            estimate = self.estimate_count()
+            if estimate is not None and estimate >= cursor_query_count_cache.EXACT_COUNT_THRESHOLD:
+                return estimate
 
-        # perform joins using select_related, like for normal SQL but does not perform the ORDER BY and LIMIT
-        if type(self._select_related) is dict:
-            for related_model, related_fields in self._select_related.items():
-                self.join(related_model, related_fields)
+        sql, params = self._make_count_sql()
+
+        if cached:
+            # keyed with the generations before the query, a concurrent write makes it outdated
+            count_key = cursor_query_count_cache.key(self.query_tables, sql, params)
+
+            count = cursor_query_count_cache.get(count_key)
+            if count is not None:
+                return count
 
         try:
-            self._process_cursor()
-            self._process_filter()
-        except KeyError as e:
-            raise CursorQueryError(e)
+            statement, statement_params = cursor_query_plan_cache.statement(sql, params)
 
-        # perform sub query
-        if len(self.sub_query_select) > 1:
-            _sub_query_from = '(SELECT DISTINCT %s FROM "%s") AS "%s"' % (
-                ",".join(self.sub_query_select), self._model._meta.db_table, self._model._meta.db_table)
-            self.query_from[0] = _sub_query_from
+            cursor = connection.cursor()
+            cursor.execute(statement, statement_params)
+            row = cursor.fetchone()
+        except ProgrammingError as e:
+            raise CursorQueryError('Invalid query arguments: ' + str(e))
 
-        _select = "SELECT DISTINCT COUNT(*)" if self.query_distinct else "SELECT COUNT(*)"
-        _from = "FROM " + " ".join(self.query_from)
+        if cached:
+            cursor_query_count_cache.set(count_key, row[0])
 
-        if self.query_filters:
-            if self.query_where:
-                _where = "WHERE (%s) AND (%s)" % (" AND ".join(self.query_filters), " OR ".join(self.query_where))
-            else:
-                _where = "WHERE " + " AND ".join(self.query_filters)
-        else:
-            _where = "WHERE " + " OR ".join(self.query_where)
+        return row[0]
 
-        if self.query_where or self.query_filters:
-            sql = " ".join([_select, _from, _where])
-        else:
-            sql = _select
+    def estimate_count(self):
+        """
+        Estimation of the number of results given by PostgreSQL. Without filter nor inner join it uses the
+        statistics of the table (pg_class.reltuples), else the estimated rows of the plan of the query.
+
+        :return: Integer estimation of the count or None if the statistics are not available.
+        """
+        sql, params = self._make_count_sql("1")
 
-            if _from:
-                sql = sql + " " + _from
+        try:
+            cursor = connection.cursor()
 
-            if self.query_where or self.query_filters:
-                sql = sql + " " + _where
+            if not self.query_where and not self.query_filters and not self.query_from_params:
+                cursor.execute("SELECT reltuples::BIGINT FROM pg_class WHERE oid = %s::regclass",
+                               ['"%s"' % self._model._meta.db_table])
+                row = cursor.fetchone()
 
-        cursor = connection.cursor()
-        cursor.execute(sql)
-        row = cursor.fetchone()
+                # negative or zero when the table has never been analyzed
+                if row is None or row[0] <= 0:
+                    return None
 
-        return row[0]
+                return int(row[0])
+
+            cursor.execute("EXPLAIN (FORMAT JSON) " + sql, params)
+            plan = cursor.fetchone()[0]
+        except ProgrammingError as e:
+            raise CursorQueryError('Invalid query arguments: ' + str(e))
+
+        if isinstance(plan, str):
+            plan = json.loads(plan)
+
+        return int(plan[0]['Plan']['Plan Rows'])
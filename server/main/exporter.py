@@ -8,9 +8,11 @@
 # @license MIT (see LICENSE file)
 # @details Controller to export a list of entities, with actives columns and specific options (sort, filters...)
 
+import csv
 import datetime
 import io
 import json
+import tempfile
 
 import validictory
 from django.contrib.contenttypes.models import ContentType
@@ -18,7 +20,6 @@ from django.core.exceptions import SuspiciousOperation
 from django.db.models import Q
 from django.http import StreamingHttpResponse
 from openpyxl import Workbook
-from openpyxl.writer.excel import save_virtual_workbook
 
 from igdectk.common.helpers import int_arg
 from igdectk.rest import Method, Format
@@ -45,14 +46,25 @@ class RestExport(RestMain):
 class DataExporter(object):
     """
     Simple CSV and XLSX data exporters used by the export API.
+    Items are consumed as an iterable, and the data are produced by chunks, in way to keep a flat memory usage
+    whatever the number of rows.
     """
 
+    # number of rows encoded per chunk of CSV
+    CSV_CHUNK_ROWS = 1000
+
+    # size of the chunks read from the XLSX file
+    FILE_CHUNK_SIZE = 64 * 1024
+
+    # maximal size of the XLSX file kept in memory before to be rolled over to disk
+    SPOOL_MAX_SIZE = 4 * 1024 * 1024
+
     def __init__(self, columns, items):
         self._columns = columns
         self._items = items
         self._columns_status = []
 
-        self._size = 0
+        self._size = None
         self._mime_type = ""
         self._file_ext = ""
 
@@ -69,32 +81,53 @@ class DataExporter(object):
         self._num_cols = len(self._columns)
 
     def export_data_as_csv(self):
-        data = self._items
+        """
+        Export the items as CSV. The size is unknown until the last chunk.
+        :return: Generator of encoded chunks of CSV.
+        """
+        self._mime_type = 'text/csv'
+        self._file_ext = ".csv"
 
-        output = io.BytesIO()
-        cols = self.filter_columns(self._columns)
-        header = ','.join(cols) + '\n'
-        output.write(header.encode('utf-8'))
+        return self._csv_chunks()
+
+    def _csv_chunks(self):
+        output = io.StringIO()
+        writer = csv.writer(output, lineterminator='\n')
+        writer.writerow(self.filter_columns(self._columns))
+
+        size = 0
+        num_rows = 0
 
-        for row in data:
+        for row in self._items:
             if len(row) != self._num_cols:
                 raise SuspiciousOperation("Row have a different number of columns than the header")
 
-            cols = self.filter_columns(row)
-            output.write((','.join(cols) + '\n').encode('utf-8'))
+            writer.writerow(self.filter_columns(row))
+            num_rows += 1
 
-        self._size = output.tell()
-        output.seek(0, io.SEEK_SET)
+            if num_rows >= self.CSV_CHUNK_ROWS:
+                chunk = output.getvalue().encode('utf-8')
+                size += len(chunk)
+                yield chunk
 
-        self._mime_type = 'text/csv'
-        self._file_ext = ".csv"
+                output.seek(0, io.SEEK_SET)
+                output.truncate()
+                num_rows = 0
 
-        return output
+        chunk = output.getvalue().encode('utf-8')
+        if chunk:
+            size += len(chunk)
+            yield chunk
 
-    def export_data_as_xslx(self):
-        data = self._items
+        self._size = size
 
-        output = io.BytesIO()
+    def export_data_as_xslx(self):
+        """
+        Export the items as XLSX. The workbook is written in write-only mode, and saved into a spooled
+        temporary file, rolled over to disk when it grows.
+        :return: Generator of chunks of the XLSX file.
+        """
+        output = tempfile.SpooledTemporaryFile(max_size=self.SPOOL_MAX_SIZE)
 
         wb = Workbook(write_only=True)
         ws = wb.create_sheet()
@@ -102,14 +135,15 @@ class DataExporter(object):
         cols = self.filter_columns(self._columns)
         ws.append(cols)
 
-        for row in data:
+        for row in self._items:
             if len(row) != self._num_cols:
+                output.close()
                 raise SuspiciousOperation("Row have a different number of columns than the header")
 
             cols = self.filter_columns(row)
             ws.append(cols)
 
-        output.write(save_virtual_workbook(wb))
+        wb.save(output)
 
         self._size = output.tell()
         output.seek(0, io.SEEK_SET)
@@ -117,7 +151,18 @@ class DataExporter(object):
         self._mime_type = 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
         self._file_ext = ".xlsx"
 
-        return output
+        return self._file_chunks(output)
+
+    def _file_chunks(self, output):
+        try:
+            while True:
+                chunk = output.read(self.FILE_CHUNK_SIZE)
+                if not chunk:
+                    break
+
+                yield chunk
+        finally:
+            output.close()
 
     def filter_columns(self, row):
         """
@@ -139,6 +184,9 @@ class DataExporter(object):
 
     @property
     def size(self):
+        """
+        Size in bytes of the exported data, or None if it is not known before the end of the streaming.
+        """
         return self._size
 
     @property
@@ -154,10 +202,14 @@ class DataExporter(object):
 def export_entity_for_model_and_options(request):
     """
     Export entity list in a list of 'format' type.
-    @note EntityModelClass.export_list() must return a list of results.
+    @note EntityModelClass.export_list() must return the columns and an iterable of rows, that should be a
+    generator in way to stream the rows. There is no limit by default.
     User of the request is used to check for permissions.
     """
-    limit = int_arg(request.GET.get('limit', 100000))
+    if request.GET.get('limit'):
+        limit = int_arg(request.GET['limit'])
+    else:
+        limit = None
 
     app_label = request.GET['app_label']
     validictory.validate(app_label, Entity.NAME_VALIDATOR)
@@ -213,6 +265,8 @@ def export_entity_for_model_and_options(request):
 
     response = StreamingHttpResponse(data, content_type=exporter.mime_type)
     response['Content-Disposition'] = 'attachment; filename="' + file_name + '"'
-    response['Content-Length'] = exporter.size
+
+    if exporter.size is not None:
+        response['Content-Length'] = exporter.size
 
     return response
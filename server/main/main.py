@@ -11,6 +11,7 @@
 from igdectk.rest.handler import *
 from igdectk.rest.response import HttpResponseRest
 
+from main.cache import cache_manager
 from main.config import configuration
 
 
@@ -39,3 +40,16 @@ def get_config_check_list(request):
         })
 
     return HttpResponseRest(request, item_list)
+
+
+class RestMainCacheStats(RestMain):
+    regex = r'^cache/stats/$'
+    name = 'cache-stats'
+
+
+@RestMainCacheStats.def_admin_request(Method.GET, Format.JSON)
+def get_cache_stats(request):
+    """
+    Get the statistics (hits, misses, evictions, entries) of the local cache of each category.
+    """
+    return HttpResponseRest(request, cache_manager.stats())
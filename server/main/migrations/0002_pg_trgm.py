@@ -0,0 +1,26 @@
+# Generated by Django 2.0.4 on 2018-10-18 10:00
+
+from django.contrib.postgres.operations import TrigramExtension
+from django.db import migrations
+
+
+def trigram_index(table, column):
+    name = "%s_%s_trgm" % (table, column)
+    return migrations.RunSQL(
+        sql='CREATE INDEX "%s" ON "%s" USING gin ("%s" gin_trgm_ops)' % (name, table, column),
+        reverse_sql='DROP INDEX IF EXISTS "%s"' % name
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('main', '0001_initial'),
+        ('auth', '0001_initial'),
+    ]
+
+    operations = [
+        # ILIKE on names and synonyms (@see main.search.TrigramSearchBackend)
+        TrigramExtension(),
+        trigram_index("auth_group", "name"),
+    ]
@@ -23,9 +23,8 @@ from django.utils import translation
 from django.utils.translation import ugettext_lazy as _
 
 from igdectk.common.models import ChoiceEnum, IntegerChoice, StringChoice
-from igdectk.module.manager import module_manager
 
-from messenger.commands import COMMAND_CACHE_INVALIDATION
+from main.search import search_backend
 
 logger = logging.getLogger('collgate')
 
@@ -455,7 +454,7 @@ class EntitySynonym(Entity):
 
     @classmethod
     def make_search_by_name(cls, term):
-        return Q(name__istartswith=term)
+        return search_backend.q('name', 'istartswith', term)
 
     def audit_create(self, user):
         return {
@@ -614,18 +613,18 @@ def _cache_update(sender, instance, created, **kwargs):
         for invalidator in instance.on_server_cache_update():
             cache_manager.delete(invalidator['category'], invalidator['name'])
 
+    # invalidate client cache(s), merged and sent by batch
     if hasattr(instance, 'on_client_cache_update'):
+        from messenger.cache import client_cache_manager
+
         for invalidator in instance.on_client_cache_update():
-            messenger_module = module_manager.get_module('messenger')
-            # if hasattr(messenger_module, 'tcp_client'):
-            messenger_module.tcp_client.message(COMMAND_CACHE_INVALIDATION, invalidator)
+            client_cache_manager.invalidate(invalidator['category'], invalidator['name'], invalidator.get('values'))
 
     elif hasattr(instance, 'client_cache_update'):
+        from messenger.cache import client_cache_manager
+
         for invalidator in sender.client_cache_update:
-            messenger_module = module_manager.get_module('messenger')
-            # if hasattr(messenger_module, 'tcp_client'):
-            messenger_module.tcp_client.message(COMMAND_CACHE_INVALIDATION, {
-                'category': invalidator, 'name': '*', 'values': None})
+            client_cache_manager.invalidate(invalidator, '*')
 
 
 @receiver(models.signals.post_save, sender=Entity)
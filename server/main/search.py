@@ -0,0 +1,147 @@
+# -*- coding: utf-8; -*-
+#
+# @file search.py
+# @brief Search backends for the names and synonyms lookups.
+# @author Frédéric SCHERMA (INRA UMR1095)
+# @date 2018-10-18
+# @copyright Copyright (c) 2018 INRA/CIRAD
+# @license MIT (see LICENSE file)
+# @details
+
+import threading
+
+from django.conf import settings
+from django.contrib.postgres.search import TrigramSimilarity
+from django.db.models import CharField, Lookup, Q, TextField
+from django.utils.module_loading import import_string
+
+
+class ILikeLookup(Lookup):
+    """
+    Case insensitive pattern matching using ILIKE directly on the column, in place of the UPPER() comparisons of
+    the Django i* lookups, in way to use the trigram (gin_trgm_ops) indexes of the column.
+    """
+
+    prepare_rhs = False
+
+    # pattern made from the escaped value
+    pattern = "%s"
+
+    def process_rhs(self, compiler, connection):
+        rhs, params = super().process_rhs(compiler, connection)
+        params = [self.pattern % connection.ops.prep_for_like_query(param) for param in params]
+        return rhs, params
+
+    def as_sql(self, compiler, connection):
+        lhs, lhs_params = self.process_lhs(compiler, connection)
+        rhs, rhs_params = self.process_rhs(compiler, connection)
+        return "%s ILIKE %s" % (lhs, rhs), lhs_params + rhs_params
+
+
+class ILikeExact(ILikeLookup):
+    lookup_name = 'ilike_exact'
+
+
+class ILikeContains(ILikeLookup):
+    lookup_name = 'ilike_contains'
+    pattern = "%%%s%%"
+
+
+class ILikeStartsWith(ILikeLookup):
+    lookup_name = 'ilike_startswith'
+    pattern = "%s%%"
+
+
+for field_class in (CharField, TextField):
+    field_class.register_lookup(ILikeExact)
+    field_class.register_lookup(ILikeContains)
+    field_class.register_lookup(ILikeStartsWith)
+
+
+class SearchBackend(object):
+    """
+    Default search backend, using the Django case insensitive lookups. They cannot use the btree indexes, so
+    any search is a sequential scan of the table.
+    """
+
+    # search method to lookup name ('ieq' is the name used by the clients for iexact)
+    LOOKUPS = {
+        'ieq': 'iexact',
+        'iexact': 'iexact',
+        'icontains': 'icontains',
+        'istartswith': 'istartswith'
+    }
+
+    def q(self, field, method, term):
+        """
+        Make a filter on a text field.
+
+        :param field: Field name, can be a related field (synonyms__name).
+        :param method: Search method 'ieq', 'iexact', 'icontains' or 'istartswith'.
+        :param term: Searched term.
+        :return: Q instance
+        """
+        return Q(**{"%s__%s" % (field, self.LOOKUPS[method]): term})
+
+    def rank(self, qs, field, term):
+        """
+        Order a query set by relevance of a text field for a term, when supported.
+
+        :param qs: Query set to order.
+        :param field: Field name.
+        :param term: Searched term.
+        :return: Query set
+        """
+        return qs
+
+
+class TrigramSearchBackend(SearchBackend):
+    """
+    Search backend using ILIKE on the columns, that are indexed using pg_trgm GIN indexes (at least 3 characters
+    are needed to the index to be selective). The results can be ordered by trigram similarity
+    (SEARCH_SIMILARITY_RANKING setting).
+    """
+
+    LOOKUPS = {
+        'ieq': 'ilike_exact',
+        'iexact': 'ilike_exact',
+        'icontains': 'ilike_contains',
+        'istartswith': 'ilike_startswith'
+    }
+
+    @property
+    def similarity_ranking(self):
+        return getattr(settings, 'SEARCH_SIMILARITY_RANKING', False)
+
+    def rank(self, qs, field, term):
+        if not self.similarity_ranking:
+            return qs
+
+        # the similarity comes first, and the previous ordering separates the equals
+        return qs.annotate(similarity=TrigramSimilarity(field, term)).order_by('-similarity', *qs.query.order_by)
+
+
+class SearchBackendProxy(object):
+    """
+    Lazy instantiation of the search backend defined by the SEARCH_BACKEND setting.
+    """
+
+    def __init__(self):
+        self._backend = None
+        self._lock = threading.Lock()
+
+    def _get_backend(self):
+        if self._backend is None:
+            with self._lock:
+                if self._backend is None:
+                    backend_class = import_string(getattr(settings, 'SEARCH_BACKEND', 'main.search.SearchBackend'))
+                    self._backend = backend_class()
+
+        return self._backend
+
+    def __getattr__(self, name):
+        return getattr(self._get_backend(), name)
+
+
+# Singleton of search backend
+search_backend = SearchBackendProxy()
@@ -0,0 +1,121 @@
+# -*- coding: utf-8; -*-
+#
+# @file test_cursor.py
+# @brief 
+# @author Frédéric SCHERMA (INRA UMR1095)
+# @date 2018-10-18
+# @copyright Copyright (c) 2018 INRA/CIRAD
+# @license MIT (see LICENSE file)
+# @details 
+
+from collections import OrderedDict
+
+from django.db import connection
+from django.test import TestCase, override_settings
+
+from accession.models import Accession
+from descriptor.descriptorformattype import DescriptorFormatTypeEntity, DescriptorFormatTypeEnumSingle
+from main.cursor import CursorQuery, CursorQueryPlanCache
+
+
+class TestCursorQuerySql(TestCase):
+    def test_in_filter(self):
+        cq = CursorQuery(Accession).filter(id__in=[1, 2, 3])
+        sql, params = cq._make_count_sql()
+
+        self.assertIn('"%s"."id" = ANY (%%s::INTEGER[])' % Accession._meta.db_table, sql)
+        self.assertEqual(params, [[1, 2, 3]])
+
+        # the same statement whatever the number of values
+        other_sql, other_params = CursorQuery(Accession).filter(id__in=[4, 5])._make_count_sql()
+
+        self.assertEqual(other_sql, sql)
+        self.assertEqual(other_params, [[4, 5]])
+
+    def test_notin_filter(self):
+        sql, params = CursorQuery(Accession).filter(id__notin=[])._make_count_sql()
+
+        self.assertIn('"%s"."id" <> ALL (%%s::INTEGER[])' % Accession._meta.db_table, sql)
+        self.assertEqual(params, [[]])
+
+    def test_descriptor_in(self):
+        params = []
+        clause = DescriptorFormatTypeEntity().operator('in', 'table', 'CODE', [1, '2', None], params)
+
+        self.assertEqual(clause, '("table"."descriptors"->>\'CODE\')::INTEGER = ANY(%s::INTEGER[])')
+        self.assertEqual(params, [[1, 2, 0]])
+
+        params = []
+        clause = DescriptorFormatTypeEnumSingle().operator('notin', 'table', 'CODE', ['a', 'b'], params)
+
+        self.assertEqual(clause, '("table"."descriptors"->>\'CODE\')::TEXT <> ALL(%s::TEXT[])')
+        self.assertEqual(params, [['a', 'b']])
+
+    def test_descriptor_in_literal(self):
+        clause = DescriptorFormatTypeEntity().operator('in', 'table', 'CODE', [1, 2])
+        self.assertEqual(clause, '("table"."descriptors"->>\'CODE\')::INTEGER IN (1,2)')
+
+
+class TestCursorQueryPlanCache(TestCase):
+    def setUp(self):
+        self.cache = CursorQueryPlanCache()
+
+        with connection.cursor() as cursor:
+            cursor.execute("DEALLOCATE ALL")
+
+        connection.cursor_query_statements = OrderedDict()
+
+    def prepared_statements(self):
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT name FROM pg_prepared_statements")
+            return {row[0] for row in cursor.fetchall()}
+
+    def test_compile(self):
+        sql = 'SELECT "id" FROM "t" WHERE "a" = %s AND "b" LIKE \'x%%\' AND "c" = ANY(%s::INTEGER[])'
+        name, prepare_sql, num_params = self.cache.compile(sql)
+
+        self.assertTrue(name.startswith("cq_"))
+        self.assertEqual(prepare_sql, 'PREPARE %s AS SELECT "id" FROM "t" WHERE "a" = $1 AND "b" LIKE \'x%%\' AND '
+                                      '"c" = ANY($2::INTEGER[])' % name)
+        self.assertEqual(num_params, 2)
+
+        self.assertIs(self.cache.compile(sql), self.cache.compile(sql))
+
+    @override_settings(CURSOR_QUERY_PREPARED_STATEMENTS=True)
+    def test_statement_reused(self):
+        statement, params = self.cache.statement("SELECT %s::INTEGER", [1])
+        name = self.cache.compile("SELECT %s::INTEGER")[0]
+
+        self.assertEqual(statement, "EXECUTE %s(%%s)" % name)
+        self.assertEqual(self.prepared_statements(), {name})
+
+        with connection.cursor() as cursor:
+            cursor.execute(statement, params)
+            self.assertEqual(cursor.fetchone()[0], 1)
+
+        # already prepared on this connection
+        statement, params = self.cache.statement("SELECT %s::INTEGER", [2])
+
+        with connection.cursor() as cursor:
+            cursor.execute(statement, params)
+            self.assertEqual(cursor.fetchone()[0], 2)
+
+        self.assertEqual(list(connection.cursor_query_statements.keys()), [name])
+
+    @override_settings(CURSOR_QUERY_PREPARED_STATEMENTS=True, CURSOR_QUERY_MAX_PREPARED_STATEMENTS=2)
+    def test_statement_evicted(self):
+        names = []
+
+        for sql in ("SELECT %s::INTEGER", "SELECT %s::TEXT", "SELECT %s::INTEGER + 1"):
+            self.cache.statement(sql, [1])
+            names.append(self.cache.compile(sql)[0])
+
+        # the least recently used statement is deallocated
+        self.assertEqual(self.prepared_statements(), set(names[1:]))
+        self.assertEqual(list(connection.cursor_query_statements.keys()), names[1:])
+
+        # using a statement makes it the most recently used
+        self.cache.statement("SELECT %s::INTEGER + 1", [1])
+        self.cache.statement("SELECT %s::INTEGER", [1])
+
+        self.assertEqual(self.prepared_statements(), {names[2], names[0]})
@@ -50,3 +50,10 @@ class CollGateMessenger(ApplicationMain):
 
         from . import cache
         cache.client_cache_manager.bind()
+
+        # receive server cache invalidations from the others processes, to drop the local cache entries
+        from main.cache import cache_manager
+        from .commands import COMMAND_SERVER_CACHE_INVALIDATION
+
+        messenger_module.tcp_client.add_handler(COMMAND_SERVER_CACHE_INVALIDATION, cache_manager.on_invalidation)
+        messenger_module.tcp_client.connect()
@@ -8,19 +8,30 @@
 # @license MIT (see LICENSE file)
 # @details 
 
-from .commands import COMMAND_CACHE_INVALIDATION
+from django.conf import settings
+
+from .commands import COMMAND_CACHE_INVALIDATION_BATCH
+from .invalidation import InvalidationBatcher
 
 
 class ClientCacheManager:
+    """
+    Client cache invalidations are debounced and merged per category, then sent as a single batch message
+    to the messenger service.
+    """
 
     def __init__(self):
         self.categories = {}
         self.messenger_module = None
+        self.batcher = InvalidationBatcher(self.send)
 
     def bind(self):
         from igdectk.module.manager import module_manager
         self.messenger_module = module_manager.get_module('messenger')
 
+        self.batcher.window = getattr(settings, 'CLIENT_CACHE_INVALIDATION_WINDOW', 0.05)
+        self.batcher.threshold = getattr(settings, 'CLIENT_CACHE_INVALIDATION_THRESHOLD', 32)
+
     def register(self, category):
         if category not in self.categories:
             self.categories[category] = {}
@@ -31,8 +42,19 @@ class ClientCacheManager:
         if cache_category is None:
             raise ValueError("Unregistered client cache manager category")
 
-        self.messenger_module.tcp_client.message(COMMAND_CACHE_INVALIDATION, {
-            'category': category, 'name': name, 'values': values})
+        self.invalidate(category, name, values)
+
+    def invalidate(self, category, name, values=None):
+        """
+        Invalidate a client cache entry, at the end of the current debounce window.
+        """
+        self.batcher.add(category, name, values)
+
+    def send(self, invalidations):
+        # only in run mode
+        if self.messenger_module and hasattr(self.messenger_module, 'tcp_client'):
+            self.messenger_module.tcp_client.message(COMMAND_CACHE_INVALIDATION_BATCH, {
+                'invalidations': invalidations})
 
 
 # Singleton of client cache manager (init by apps)
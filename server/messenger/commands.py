@@ -9,6 +9,8 @@
 # @details
 
 COMMAND_CACHE_INVALIDATION = 1
+COMMAND_SERVER_CACHE_INVALIDATION = 2
+COMMAND_CACHE_INVALIDATION_BATCH = 3
 COMMAND_AUTH_SESSION = 10
 COMMAND_LOGOFF_SESSION = 11
 COMMAND_ONLINE = 20
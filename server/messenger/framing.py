@@ -0,0 +1,161 @@
+# -*- coding: utf-8; -*-
+#
+# @file framing.py
+# @brief Framing of the messages of the messenger service
+# @author Frédéric SCHERMA (INRA UMR1095)
+# @date 2018-10-18
+# @copyright Copyright (c) 2018 INRA/CIRAD
+# @license MIT (see LICENSE file)
+# @details Must be kept identical with the messenger service one.
+
+import json
+import struct
+
+# 1 byte frame version
+# 1 byte command type
+# 4 bytes message size (little-endian)
+# ... message content (JSON UTF-8)
+FRAME_VERSION = 1
+FRAME_HEADER = struct.Struct('<BBI')
+
+# limit the size of a message to avoid unbounded allocation on a corrupted stream
+MAX_MESSAGE_SIZE = 16 * 1024 * 1024
+
+
+class FrameError(Exception):
+    """
+    Invalid frame version or size. The connection must be closed.
+    """
+    pass
+
+
+def encode_frame(command_type, message):
+    """
+    Encode a message to a frame.
+
+    :param command_type: Command type (one byte)
+    :param message: Message object, JSON serializable
+    :return: Frame bytes
+    """
+    content = json.dumps(message).encode('utf-8')
+
+    if len(content) > MAX_MESSAGE_SIZE:
+        raise FrameError("Message size exceed %i bytes" % MAX_MESSAGE_SIZE)
+
+    return FRAME_HEADER.pack(FRAME_VERSION, command_type, len(content)) + content
+
+
+class FrameBuffer(object):
+    """
+    Receive buffer of frames. The data are received directly into the buffer, and the frames are parsed
+    using memoryview. The pending data are moved to the beginning of the buffer when the end is reached,
+    and the buffer only grows for a frame bigger than its size.
+    """
+
+    def __init__(self, size=65536):
+        self.buffer = bytearray(size)
+        self.start = 0
+        self.end = 0
+
+    def size(self):
+        return self.end - self.start
+
+    def _make_room(self):
+        pending = self.end - self.start
+
+        if self.start > 0:
+            # compact
+            self.buffer[0:pending] = self.buffer[self.start:self.end]
+            self.start = 0
+            self.end = pending
+
+        if self.end == len(self.buffer):
+            # full of a pending frame
+            self.buffer.extend(bytes(len(self.buffer)))
+
+    def recv_from(self, sock):
+        """
+        Receive the available data from a socket.
+
+        :param sock: Non-blocking socket
+        :return: Number of received bytes, 0 means the peer closed the connection
+        """
+        if self.end == len(self.buffer):
+            self._make_room()
+
+        with memoryview(self.buffer) as view:
+            with view[self.end:] as free:
+                count = sock.recv_into(free)
+
+        self.end += count
+        return count
+
+    def read_messages(self):
+        """
+        Parse the complete frames.
+
+        :return: List of pairs (command type, message object)
+        """
+        messages = []
+
+        with memoryview(self.buffer) as view:
+            while self.end - self.start >= FRAME_HEADER.size:
+                version, command_type, message_size = FRAME_HEADER.unpack_from(view, self.start)
+
+                if version != FRAME_VERSION:
+                    raise FrameError("Unsupported frame version %i" % version)
+
+                if message_size > MAX_MESSAGE_SIZE:
+                    raise FrameError("Message size exceed %i bytes" % MAX_MESSAGE_SIZE)
+
+                frame_end = self.start + FRAME_HEADER.size + message_size
+
+                # message is incomplete
+                if frame_end > self.end:
+                    break
+
+                with view[self.start + FRAME_HEADER.size:frame_end] as content:
+                    messages.append((command_type, json.loads(str(content, 'utf-8'))))
+
+                self.start = frame_end
+
+        # nothing pending, restart at the beginning
+        if self.start == self.end:
+            self.start = self.end = 0
+
+        return messages
+
+
+class SendBuffer(object):
+    """
+    Send buffer of frames. Any queued frames are written in order, with as few send as possible.
+    """
+
+    def __init__(self):
+        self.buffer = bytearray()
+
+    def __len__(self):
+        return len(self.buffer)
+
+    def append(self, frame):
+        self.buffer += frame
+
+    def send_to(self, sock):
+        """
+        Send as much as possible of the pending data to a non-blocking socket.
+
+        :param sock: Non-blocking socket
+        :return: True if there is no more pending data
+        """
+        if not self.buffer:
+            return True
+
+        try:
+            with memoryview(self.buffer) as view:
+                count = sock.send(view)
+        except BlockingIOError:
+            return False
+
+        del self.buffer[0:count]
+
+        return not self.buffer
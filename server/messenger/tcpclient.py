@@ -8,64 +8,25 @@
 # @license MIT (see LICENSE file)
 # @details
 
-import io
-import json
+import logging
+import selectors
 import socket
 import threading
-import select
 
 import time
 
+from .framing import FrameBuffer, FrameError, SendBuffer, encode_frame
 from .localsettings import MESSENGER_HOST, MESSENGER_PORT
 
-
-class RWBuffer:
-    def __init__(self):
-        self.read_pos = 0
-        self.write_pos = 0
-        self.buffer = io.BytesIO()
-
-    def write(self, data):
-        self.buffer.write(data)
-        self.write_pos += len(data)
-
-        return self.write_pos - self.read_pos
-
-    def read(self, size):
-        if self.read_pos < self.write_pos:
-            right_pos = min(size + self.read_pos, self.write_pos)
-            data = self.buffer.getbuffer()[self.read_pos:right_pos]
-
-            self.read_pos += len(data)
-            self.buffer.flush()
-
-            return bytes(data)
-        else:
-            return bytes([])
-
-    def peek(self, size):
-        if self.read_pos < self.write_pos:
-            right_pos = min(size + self.read_pos, self.write_pos)
-            data = self.buffer.getbuffer()[self.read_pos:right_pos]
-
-            return bytes(data)
-        else:
-            return bytes([])
-
-    def seek(self, method, size):
-        if method == io.SEEK_CUR:
-            dist = min(size, self.write_pos - self.read_pos)
-            self.read_pos += dist
-
-            return dist
-        else:
-            return 0
-
-    def size(self):
-        return max(0, self.write_pos - self.read_pos)
+logger = logging.getLogger('collgate')
 
 
 class TCPClient(threading.Thread):
+    """
+    Connector to the messenger service. The thread waits on a selector for incoming data, for the socket
+    to be writable when there is pending outgoing data, and for a wake-up when a new message is queued,
+    so a message is sent without waiting for a polling delay. It reconnects until the termination is asked.
+    """
 
     def __init__(self):
         threading.Thread.__init__(self)
@@ -74,174 +35,200 @@ class TCPClient(threading.Thread):
         self.sock = None
         self.send_list = []
         self.recv_list = []
-        self.in_rw = RWBuffer()
+        self.handlers = {}
         self.status = 0
-        self._closed = False
-        self._sync = threading.Semaphore()
+        self._launched = False
+
+        # used by the others threads to wake up the selector
+        self._wake_r, self._wake_w = socket.socketpair()
+        self._wake_r.setblocking(False)
+        self._wake_w.setblocking(False)
 
     def __del__(self):
         self.disconnect()
 
-    def process_outgoing(self):
-        self._lock.acquire()
-        if len(self.send_list):
-            command_type, out_message = self.send_list.pop()
-            self._lock.release()
-
-            # 0 for message start
-            # 1 byte command type
-            # 2 bytes message size
-            # ... message content
-            buffer = bytes([
-                0,
-                command_type,
-                len(out_message) & 0xff,
-                (len(out_message) >> 8) & 0xff]) + out_message.encode('utf-8')
-
-            self.sock.sendall(buffer)
+    def _wake_up(self):
+        try:
+            self._wake_w.send(b'\0')
+        except (BlockingIOError, OSError):
+            # already pending wake-up
+            pass
 
-            # print("Sent:     {}".format(out_message))
-        else:
-            self._lock.release()
-
-    def read_messages(self):
-        while True:
-            head = self.in_rw.peek(4)
-
-            if len(head) < 4:
-                return
-
-            command_type = head[1]
-            message_size = head[2] | (head[3] << 8)
-
-            # message and is complete
-            if head[0] == 0 and self.in_rw.size() >= message_size:
-                self.in_rw.seek(io.SEEK_CUR, 4)
-                buffer = self.in_rw.read(message_size)
-
-                in_message = json.loads(buffer.decode('utf-8'))
-
-                self._lock.acquire()
+    def dispatch(self, messages):
+        for command_type, in_message in messages:
+            self._lock.acquire()
+            handler = self.handlers.get(command_type)
+            if handler is None:
                 self.recv_list.append((command_type, in_message))
-                self._lock.release()
+            self._lock.release()
 
-                # print("Received: {}".format(in_message))
-            else:
-                break
+            if handler is not None:
+                try:
+                    handler(in_message)
+                except Exception as e:
+                    logger.error("Messenger handler error: %s" % repr(e))
 
-    def process_incoming(self):
+    def _connect(self):
+        # try to connect every seconds, until termination asked
         while True:
-            try:
-                recv_data = self.sock.recv(1024)
-            except OSError:
-                break
-
-            if len(recv_data) > 0:
-                self.in_rw.write(recv_data)
-            else:
-                self._closed = True
-                break
-
-    def run(self):
-        # started and waiting for connection status
-        self._lock.acquire()
-        self.status = 1
-        self._lock.release()
+            sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
 
-        # release launcher thread
-        self._sync.release()
-
-        # create a socket (SOCK_STREAM means a TCP socket)
-        self.sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-
-        # try to connect
-        while True:
             try:
-                self.sock.connect((MESSENGER_HOST, MESSENGER_PORT))
-                break
+                sock.connect((MESSENGER_HOST, MESSENGER_PORT))
+                sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+                sock.setblocking(False)
+                return sock
             except OSError:
+                sock.close()
+
                 # ignore outgoing message
                 self._lock.acquire()
                 self.send_list.clear()
+                status = self.status
                 self._lock.release()
-                pass
-
-            self._lock.acquire()
-            status = self.status
-            self._lock.release()
 
             # service termination asked
             if status == 3:
-                break
+                return None
 
-            # try every seconds
             time.sleep(1)
 
-        # self.sock.setblocking(False)
-        self.sock.settimeout(0.1)
+    def _serve(self, sock):
+        in_buffer = FrameBuffer()
+        out_buffer = SendBuffer()
 
-        # set to connected status and running
-        self._lock.acquire()
-        self.status = 2
-        self._lock.release()
+        selector = selectors.DefaultSelector()
+        selector.register(self._wake_r, selectors.EVENT_READ)
+        selector.register(sock, selectors.EVENT_READ)
 
-        inout = [self.sock]
+        writing = False
 
-        self._lock.acquire()
-        while self.status == 2:
-            # peer closed connection
-            if self._closed:
-                self.status = 1
-                break
+        try:
+            while True:
+                # coalesce any queued messages, in order
+                self._lock.acquire()
+                if self.status == 3:
+                    self._lock.release()
+                    break
 
-            # service termination asked
-            if self.status == 3:
-                break
+                outgoing = self.send_list
+                self.send_list = []
+                self._lock.release()
 
-            self._lock.release()
+                for frame in outgoing:
+                    out_buffer.append(frame)
+
+                if out_buffer and not out_buffer.send_to(sock) and not writing:
+                    selector.modify(sock, selectors.EVENT_READ | selectors.EVENT_WRITE)
+                    writing = True
+                elif not out_buffer and writing:
+                    selector.modify(sock, selectors.EVENT_READ)
+                    writing = False
+
+                for key, events in selector.select():
+                    if key.fileobj is self._wake_r:
+                        try:
+                            while self._wake_r.recv(4096):
+                                pass
+                        except BlockingIOError:
+                            pass
+
+                    elif events & selectors.EVENT_READ:
+                        try:
+                            count = in_buffer.recv_from(sock)
+                        except BlockingIOError:
+                            continue
+
+                        # peer closed connection
+                        if count == 0:
+                            return
+
+                        self.dispatch(in_buffer.read_messages())
+        except (OSError, FrameError) as e:
+            logger.error("Messenger connection error: %s" % repr(e))
+        finally:
+            selector.close()
+
+    def run(self):
+        while True:
+            sock = self._connect()
+            if sock is None:
+                break
 
-            infds, outfds, errfds = select.select(inout, inout, [], self.sock.gettimeout())
+            self.sock = sock
 
-            if len(infds):
-                self.process_incoming()
+            # set to connected status and running
+            self._lock.acquire()
+            if self.status != 3:
+                self.status = 2
+            self._lock.release()
 
-            self.process_outgoing()
-            self.read_messages()
+            self._serve(sock)
 
-            # yeld
-            # time.sleep(0)
+            sock.close()
+            self.sock = None
 
+            # reconnect until service termination asked
             self._lock.acquire()
+            status = self.status
+            if status != 3:
+                self.status = 1
+            self._lock.release()
+
+            if status == 3:
+                break
 
         # non connected status
+        self._lock.acquire()
         self.status = 0
         self._lock.release()
 
     def disconnect(self):
-        if not self.sock:
+        if not self._launched:
             return
 
         self._lock.acquire()
         self.status = 3
         self._lock.release()
 
+        self._wake_up()
+
         if self.is_alive():
             self.join()
 
-    def message(self, command_type, message):
+    def add_handler(self, command_type, handler):
+        """
+        Register a callable for a type of incoming command. The handler is called from the client thread
+        with the decoded message as argument. Messages without handler are kept into the recv_list.
+        """
+        self._lock.acquire()
+        self.handlers[command_type] = handler
+        self._lock.release()
+
+    def connect(self):
+        """
+        Start the client thread if not already started.
+        """
         self._lock.acquire()
-        # was error or non started status
-        if self.status <= 0:
+        if not self._launched:
+            self._launched = True
+            self.status = 1
             self._lock.release()
             self.start()
-            self._sync.acquire()
         else:
             self._lock.release()
 
+    def message(self, command_type, message):
+        self.connect()
+
+        frame = encode_frame(command_type, message)
+
         self._lock.acquire()
-        self.send_list.append((command_type, json.dumps(message)))
+        self.send_list.append(frame)
         self._lock.release()
 
+        self._wake_up()
+
     def is_ready(self):
         self._lock.acquire()
         status = self.status
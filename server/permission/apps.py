@@ -24,6 +24,13 @@ class CollGatePermission(ApplicationMain):
     def ready(self):
         super().ready()
 
+        # register permission cache category (snapshots of the permissions of the users)
+        from main.cache import cache_manager
+        cache_manager.register('permission')
+
+        # invalidation of the snapshots
+        from . import snapshot
+
         # create a module permission
         permission_module = Module('permission', base_url='coll-gate')
         permission_module.include_urls((
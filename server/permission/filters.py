@@ -21,6 +21,8 @@ from django.core.exceptions import SuspiciousOperation
 from django.db.models import Q
 from guardian.models import UserObjectPermission, GroupObjectPermission
 
+from main.search import search_backend
+
 
 class GroupFilter:
     @classmethod
@@ -34,9 +36,10 @@ class GroupFilter:
             return Group.objects.none()
 
         if isinstance(name, str):
-            query = Group.objects.filter(name__icontains=name)
+            query = Group.objects.filter(search_backend.q('name', 'icontains', name))
         elif isinstance(name, list):
-            query = reduce(operator.or_, (Group.objects.filter(Q(name__icontains=term)) for term in name))
+            query = reduce(operator.or_, (Group.objects.filter(search_backend.q('name', 'icontains', term))
+                                          for term in name))
         else:
             raise SuspiciousOperation("Unsupported name type")
 
@@ -53,7 +56,7 @@ class GroupFilter:
             return Group.objects.none()
 
         if isinstance(name, str):
-            query = Group.objects.filter(name__iexact=name)
+            query = Group.objects.filter(search_backend.q('name', 'iexact', name))
         else:
             raise SuspiciousOperation("Unsupported name type")
 
@@ -0,0 +1,150 @@
+# -*- coding: utf-8; -*-
+#
+# @file snapshot.py
+# @brief coll-gate compiled permissions of a user
+# @author Frédéric SCHERMA (INRA UMR1095)
+# @date 2018-10-18
+# @copyright Copyright (c) 2018 INRA/CIRAD
+# @license MIT (see LICENSE file)
+# @details The model level permissions of a user are computed once, indexed per model, and shared by the
+# processes using the cache manager. Any change of the permissions or of the groups invalidates them.
+
+import uuid
+
+from django.conf import settings
+from django.contrib.auth.models import Group, Permission, User
+from django.db import models
+from django.dispatch import receiver
+
+from main.cache import cache_manager
+
+
+class PermissionSnapshot(object):
+    """
+    Model level permissions of a user, at a version of the permissions.
+    """
+
+    def __init__(self, user, version):
+        """
+        :param user: Instance of User.
+        :param version: Version of the permissions (@see current_version).
+        """
+        self.user_id = user.pk
+        self.version = version
+        self.is_superuser = user.is_active and user.is_superuser
+        self.is_active = user.is_active
+
+        # contains the groups permissions, empty for an inactive user
+        self.perms = frozenset(user.get_all_permissions())
+
+        # identifiers of the groups of the user, for the object permissions
+        self.group_ids = tuple(user.groups.values_list('id', flat=True)) if user.is_active else ()
+
+        # permissions per pair (app label, model name), the model name being the second part of the codename
+        self.models = {}
+
+        for perm in self.perms:
+            app_label, codename = perm.split('.', 1)
+            p = codename.split('_')
+
+            if len(p) > 1:
+                self.models.setdefault((app_label, p[1]), []).append(perm)
+
+    def has_perm(self, perm):
+        """
+        :param perm: Permission string like "app_label.codename".
+        """
+        return self.is_superuser or perm in self.perms
+
+    def for_model(self, app_label, model):
+        """
+        List of the permissions strings of the user related to a model.
+        """
+        return self.models.get((app_label, model), [])
+
+    @staticmethod
+    def current_version():
+        """
+        Version of the permissions, renewed at each invalidation.
+        """
+        return cache_manager.get_or_set('permission', 'version', uuid.uuid4().hex, None)
+
+    @classmethod
+    def get(cls, user):
+        """
+        Get the snapshot of a user, computed if missing or outdated. It is memorized on the user instance for the
+        rest of the request.
+
+        :param user: Instance of User.
+        :return: PermissionSnapshot
+        """
+        snapshot = getattr(user, '_permission_snapshot', None)
+        if snapshot is not None:
+            return snapshot
+
+        version = cls.current_version()
+
+        if user.pk is None:
+            # anonymous user, not cached
+            return cls(user, version)
+
+        cache_name = "snapshot:%i" % user.pk
+
+        snapshot = cache_manager.get('permission', cache_name)
+
+        # a snapshot computed during an invalidation has the previous version
+        if snapshot is None or snapshot.version != version:
+            snapshot = cls(user, version)
+            cache_manager.set('permission', cache_name, snapshot,
+                              getattr(settings, 'PERMISSION_SNAPSHOT_CACHE_TIMEOUT', 3600))
+
+        user._permission_snapshot = snapshot
+        return snapshot
+
+    @staticmethod
+    def invalidate(user_id=None):
+        """
+        Invalidate the snapshot of a user, or any snapshots with a new version.
+
+        :param user_id: Identifier of the user or None for all.
+        """
+        if user_id is not None:
+            cache_manager.delete('permission', "snapshot:%i" % user_id)
+        else:
+            cache_manager.delete('permission', '*')
+
+
+@receiver(models.signals.m2m_changed, sender=User.groups.through)
+@receiver(models.signals.m2m_changed, sender=User.user_permissions.through)
+def user_permissions_changed(sender, instance, action, reverse, pk_set, **kwargs):
+    if not action.startswith('post_'):
+        return
+
+    if not reverse:
+        PermissionSnapshot.invalidate(instance.pk)
+    elif pk_set:
+        # from the group or the permission side, pk_set contains the users
+        for user_id in pk_set:
+            PermissionSnapshot.invalidate(user_id)
+    else:
+        # cleared from the group or the permission side
+        PermissionSnapshot.invalidate()
+
+
+@receiver(models.signals.m2m_changed, sender=Group.permissions.through)
+def group_permissions_changed(sender, action, **kwargs):
+    if action.startswith('post_'):
+        PermissionSnapshot.invalidate()
+
+
+@receiver(models.signals.post_save, sender=User)
+@receiver(models.signals.post_delete, sender=User)
+def user_changed(sender, instance, **kwargs):
+    # activation or superuser status
+    PermissionSnapshot.invalidate(instance.pk)
+
+
+@receiver(models.signals.post_delete, sender=Group)
+@receiver(models.signals.post_delete, sender=Permission)
+def permissions_deleted(sender, instance, **kwargs):
+    PermissionSnapshot.invalidate()
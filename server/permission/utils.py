@@ -8,36 +8,80 @@
 # @license MIT (see LICENSE file)
 # @details 
 
-from django.contrib.auth.models import Group
+from django.contrib.auth.models import Group, Permission
+from django.contrib.contenttypes.models import ContentType
+from django.db import models
+from django.db.models import Q
 from guardian.core import ObjectPermissionChecker
+from guardian.models import UserObjectPermission, GroupObjectPermission
 
+from .snapshot import PermissionSnapshot
+
+
+def get_object_permissions_for(user_or_group, app_label, model, obj):
+    """
+    Object level permissions of a user (directly or by its groups) or of a group, using a single query.
+
+    :param user_or_group: Instance of User or Group.
+    :param app_label: Application label of the model of the object.
+    :param model: Model name of the object.
+    :param obj: Instance of the model or primary key of the object.
+    :return: List of permissions strings like "app_label.codename".
+    """
+    content_type = ContentType.objects.get_by_natural_key(app_label, model)
+    object_pk = str(obj.pk if isinstance(obj, models.Model) else obj)
 
-def get_permissions_for(user_or_group, app_label, model, obj=None):
     if isinstance(user_or_group, Group):
-        perms = user_or_group.permissions.all()
+        q = Q(id__in=GroupObjectPermission.objects.filter(
+            group_id=user_or_group.pk, content_type=content_type, object_pk=object_pk).values('permission_id'))
     else:
-        perms = user_or_group.get_all_permissions()
+        snapshot = PermissionSnapshot.get(user_or_group)
+
+        if not snapshot.is_active:
+            return []
+
+        q = Q(id__in=UserObjectPermission.objects.filter(
+            user_id=user_or_group.pk, content_type=content_type, object_pk=object_pk).values('permission_id'))
+
+        if snapshot.group_ids:
+            q |= Q(id__in=GroupObjectPermission.objects.filter(
+                group_id__in=snapshot.group_ids, content_type=content_type,
+                object_pk=object_pk).values('permission_id'))
+
+    codenames = Permission.objects.filter(q, content_type=content_type).values_list('codename', flat=True)
 
-    results = []
+    return ["%s.%s" % (app_label, codename) for codename in codenames]
+
+
+def get_permissions_for(user_or_group, app_label, model, obj=None):
+    """
+    Permissions of a user or of a group related to a model, and to one of its objects.
+
+    :param user_or_group: Instance of User or Group.
+    :param app_label: Application label of the model.
+    :param model: Model name, matched with the second part of the codenames.
+    :param obj: None, or instance or primary key of an object of the model.
+    :return: List of permissions strings like "app_label.codename".
+    """
+    if isinstance(user_or_group, Group):
+        results = []
+
+        for perm in user_or_group.permissions.all().select_related('content_type'):
+            p = perm.codename.split('_')
+            if perm.content_type.app_label == app_label and len(p) > 1 and p[1] == model:
+                results.append("%s.%s" % (app_label, perm.codename))
+    else:
+        snapshot = PermissionSnapshot.get(user_or_group)
+        results = list(snapshot.for_model(app_label, model))
 
-    for perm in perms:
-        p = perm.split('_')
-        if perm.startswith(app_label) and (len(p) > 0) and (p[1] == model):
-            results.append(perm)
+        # a superuser already have any of the permissions
+        if snapshot.is_superuser:
+            return results
 
     if obj is not None:
-        if isinstance(user_or_group, Group):
-            perms = ObjectPermissionChecker(user_or_group).get_perms(obj=obj)
-        else:
-            perms = user_or_group.get_all_permissions(obj=obj)
-
-        for perm in perms:
-            p = perm.split('_')
-            if perm.startswith(app_label) and (len(p) > 0) and (p[1] == model):
-                if (len(p) == 2) and p[2] == 'true':
-                    results.append(perm)
-                else:
-                    results.append(perm)
+        for perm in get_object_permissions_for(user_or_group, app_label, model, obj):
+            if perm not in results:
+                results.append(perm)
 
     return results
 
@@ -302,3 +302,41 @@ CACHES = {
         "KEY_PREFIX": "coll-gate"
     }
 }
+
+# CursorQuery executes its templates as server-side prepared statements, in way to reuse the plans.
+# Must be False if the database is accessed through a transaction level connections pooler (pgbouncer...).
+CURSOR_QUERY_PREPARED_STATEMENTS = True
+CURSOR_QUERY_MAX_PREPARED_STATEMENTS = 256
+
+# Validity in seconds of the exact counts of CursorQuery cached for a query signature.
+CURSOR_QUERY_COUNT_CACHE_TIMEOUT = 300
+
+# In-process local cache (first tier) of the cache manager, per category. 0 entries to disable it.
+# The validity in seconds bounds the staleness if an invalidation from another process is missed.
+LOCAL_CACHE_MAX_ENTRIES = 1000
+LOCAL_CACHE_TIMEOUT = 60
+
+# Debounce window in seconds of the client cache invalidations, and max number of names per category
+# in a window before invalidating the whole category.
+CLIENT_CACHE_INVALIDATION_WINDOW = 0.05
+CLIENT_CACHE_INVALIDATION_THRESHOLD = 32
+
+# Max depth of the ancestors and descendants of a batch listed in a single query.
+BATCH_LINEAGE_MAX_DEPTH = 32
+
+# Backend of the searches on the names and synonyms. main.search.TrigramSearchBackend uses the pg_trgm indexes,
+# and can order the results by similarity.
+SEARCH_BACKEND = 'main.search.TrigramSearchBackend'
+SEARCH_SIMILARITY_RANKING = False
+
+# Validity in seconds of the cached occupancy summaries of the storage locations (the moves of batches are
+# taken in account at expiration).
+STORAGE_LOCATION_OCCUPANCY_CACHE_TIMEOUT = 60
+
+# Validity in seconds of the alternate names of the countries, kept per language into the local cache of each
+# process (they are only changed by the geonames imports).
+GEOLOCATION_COUNTRY_NAMES_CACHE_TIMEOUT = 3600
+
+# Validity in seconds of the snapshots of the model level permissions of the users, shared by the processes and
+# invalidated on any change of the permissions, of the groups or of the users.
+PERMISSION_SNAPSHOT_CACHE_TIMEOUT = 3600